@@ -1,9 +1,12 @@
+import time
+# Start of the module imports, reported by --startup-profile
+_IMPORTS_STARTED = time.perf_counter()
+
 import os
 import logging
 from datetime import datetime
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file
 from werkzeug.utils import secure_filename
-from flask_migrate import Migrate
 import sqlite3
 import csv
 import json
@@ -14,12 +17,14 @@ import subprocess
 import sys
 import threading
 import select
-import time
 
 # Import db from models
 from models import db, init_db_session
 # Import database migration function
 from db_migrations import check_and_update_database
+from startup_profiler import StartupProfile
+
+_IMPORTS_FINISHED = time.perf_counter()
 
 # Configure logging level from environment variable
 def configure_logging():
@@ -47,6 +52,11 @@ def configure_logging():
     return actual_level
 
 def create_app():
+    # Time spent in each startup phase, printed by --startup-profile (module imports count as the first phase)
+    import_seconds = _IMPORTS_FINISHED - _IMPORTS_STARTED
+    profile = StartupProfile(started=time.perf_counter() - import_seconds)
+    profile.add('Import app modules (Flask, SQLAlchemy, models)', import_seconds)
+
     app = Flask(__name__)
     
     # Get the absolute path to the current directory
@@ -58,6 +68,33 @@ def create_app():
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['BACKUP_FOLDER'] = os.path.join(base_dir, 'backups')
     app.config['WTF_CSRF_ENABLED'] = False  # Disable CSRF for JSON API endpoints
+    # Calculation engine for multi-course pages: 'decimal' (default), 'numpy' or 'parity'
+    app.config['CALCULATION_ENGINE'] = os.environ.get('CALCULATION_ENGINE', 'decimal').lower()
+    # Worker processes for the all-courses pages: 0 or 1 computes courses serially (default)
+    app.config['CALCULATION_WORKERS'] = os.environ.get('CALCULATION_WORKERS', '0')
+    # Worker processes for scoring course outcome description pairs (cross-course outcomes): 0 or 1 = serial
+    app.config['SIMILARITY_WORKERS'] = os.environ.get('SIMILARITY_WORKERS', '0')
+    # Worker threads of the background job queue (PDF reports etc., see routes/job_queue.py)
+    app.config['JOB_WORKERS'] = os.environ.get('JOB_WORKERS', '2')
+    # Pages rendered in parallel by each pooled Chromium instance for student PDF reports
+    app.config['PDF_PAGES_PER_BROWSER'] = os.environ.get('PDF_PAGES_PER_BROWSER', '2')
+    # Maximum number of student reports in one combined PDF (bounds the memory used to combine them)
+    app.config['COMBINED_PDF_PART_SIZE'] = os.environ.get('COMBINED_PDF_PART_SIZE', '500')
+    # Backup format: 'full' SQLite copies or 'incremental' compressed backups of the changed pages
+    app.config['BACKUP_FORMAT'] = os.environ.get('BACKUP_FORMAT', 'full').lower()
+    # Pages copied per step of an online backup (smaller steps block writers for shorter periods)
+    app.config['BACKUP_PAGES_PER_STEP'] = os.environ.get('BACKUP_PAGES_PER_STEP', '1024')
+    # SQLite performance profile applied to every connection: 'balanced' (WAL, default), 'fast' or 'off'
+    app.config['DB_PERFORMANCE_PROFILE'] = os.environ.get('DB_PERFORMANCE_PROFILE', 'balanced').lower()
+    # Extra PRAGMA overrides for the profile, e.g. "mmap_size=0,cache_size=-2000"
+    app.config['DB_PRAGMAS'] = os.environ.get('DB_PRAGMAS', '')
+    # Per-request SQL profiling shown on /utility/performance (can also be switched on there at runtime)
+    app.config['SQL_PROFILING'] = os.environ.get('SQL_PROFILING', '0')
+    # Profiled requests kept by the profiler and slowest statements kept per endpoint
+    app.config['SQL_PROFILER_HISTORY'] = os.environ.get('SQL_PROFILER_HISTORY', '200')
+    app.config['SQL_PROFILER_TOP_N'] = os.environ.get('SQL_PROFILER_TOP_N', '10')
+    # Startup schema checks: 'auto' skips them while the schema fingerprint matches (default), 'always' runs them
+    app.config['STARTUP_SCHEMA_CHECK'] = os.environ.get('STARTUP_SCHEMA_CHECK', 'auto').lower()
     
     # Ensure instance and backup folders exist
     os.makedirs(app.config['BACKUP_FOLDER'], exist_ok=True)
@@ -71,44 +108,76 @@ def create_app():
         logging.info(f"Application started with log level: {logging.getLevelName(log_level)}")
     
     # Initialize extensions with app
-    db.init_app(app)
-    init_db_session(app)  # Initialize the scoped session
-    migrate = Migrate(app, db)
+    with profile.phase('Database engine and profilers'):
+        db.init_app(app)
+        init_db_session(app)  # Initialize the scoped session
+        # WAL/mmap/cache PRAGMAs on every connection and the read-only reporting engine
+        from db_performance import configure_database_performance
+        configure_database_performance(app, db)
+        # Query counts, SQL time and slowest statements per request (off unless SQL_PROFILING is set)
+        from sql_profiler import configure_sql_profiler
+        configure_sql_profiler(app)
+    # Flask-Migrate only provides the `flask db` commands, so it is only loaded for the flask CLI
+    if os.environ.get('FLASK_RUN_FROM_CLI'):
+        with profile.phase('Flask-Migrate'):
+            from flask_migrate import Migrate
+            Migrate(app, db)
     
     # Import models
     from models import Course, Exam, CourseOutcome, ProgramOutcome, Question, Student, Score, ExamWeight, AchievementLevel
     
     # Register blueprints
-    from routes.course_routes import course_bp
-    from routes.exam_routes import exam_bp
-    from routes.outcome_routes import outcome_bp
-    from routes.student_routes import student_bp
-    from routes.calculation_routes import calculation_bp
-    from routes.utility_routes import utility_bp
-    from routes.question_routes import question_bp
-    from routes.api_routes import api_bp
-    from routes.score_fixer import score_fixer_bp
+    with profile.phase('Import route modules'):
+        from routes.course_routes import course_bp
+        from routes.exam_routes import exam_bp
+        from routes.outcome_routes import outcome_bp
+        from routes.student_routes import student_bp
+        from routes.calculation_routes import calculation_bp
+        from routes.utility_routes import utility_bp
+        from routes.question_routes import question_bp
+        from routes.api_routes import api_bp
+        from routes.score_fixer import score_fixer_bp
+        from routes.job_routes import job_bp
     
-    app.register_blueprint(course_bp)
-    app.register_blueprint(exam_bp)
-    app.register_blueprint(outcome_bp)
-    app.register_blueprint(student_bp)
-    app.register_blueprint(calculation_bp)
-    app.register_blueprint(utility_bp)
-    app.register_blueprint(question_bp)
-    app.register_blueprint(api_bp)
-    app.register_blueprint(score_fixer_bp)
+    with profile.phase('Register blueprints'):
+        app.register_blueprint(course_bp)
+        app.register_blueprint(exam_bp)
+        app.register_blueprint(outcome_bp)
+        app.register_blueprint(student_bp)
+        app.register_blueprint(calculation_bp)
+        app.register_blueprint(utility_bp)
+        app.register_blueprint(question_bp)
+        app.register_blueprint(api_bp)
+        app.register_blueprint(score_fixer_bp)
+        app.register_blueprint(job_bp)
     
     # Create tables if they don't exist - moved after imports
     with app.app_context():
-        db.create_all()
-        # Run database migrations to update schema for existing installations
-        check_and_update_database(app)
-        # Initialize and check database indexes for optimal performance
         from db_index_manager import initialize_index_manager
-        initialize_index_manager(app, db)
+        from db_schema_fingerprint import check_schema_fingerprint, record_schema_fingerprint
+        # The schema checks find nothing to do until the models, migrations or database change
+        with profile.phase('Schema fingerprint check'):
+            schema_current, code_signature = check_schema_fingerprint(db)
+        if schema_current and app.config['STARTUP_SCHEMA_CHECK'] != 'always':
+            initialize_index_manager(app, db, check=False)
+        else:
+            with profile.phase('Create tables (db.create_all)'):
+                db.create_all()
+            # Run database migrations to update schema for existing installations
+            with profile.phase('Database migrations'):
+                migrated = check_and_update_database(app)
+            # Initialize and check database indexes for optimal performance
+            with profile.phase('Index checks'):
+                indexed = initialize_index_manager(app, db)
+            if migrated and indexed:
+                record_schema_fingerprint(db, code_signature)
         # Initialize default program outcomes if they don't exist
-        initialize_program_outcomes()
+        with profile.phase('Default program outcomes'):
+            initialize_program_outcomes()
+        # Jobs that were still queued/running when the app stopped will never finish
+        with profile.phase('Recover interrupted jobs'):
+            from routes.job_queue import recover_interrupted_jobs
+            recover_interrupted_jobs()
     
     # Home route
     @app.route('/')
@@ -317,6 +386,8 @@ def create_app():
                               error_message=error_message,
                               error_traceback=error_traceback), 500
     
+    profile.finish()
+    app.startup_profile = profile
     return app
 
 def initialize_program_outcomes():
@@ -470,9 +541,15 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Accredit Helper Pro')
     parser.add_argument('port', nargs='?', type=int, default=5000, help='Port to run the application on')
     parser.add_argument('--cloud', action='store_true', help='Expose the application using cloudflared')
+    parser.add_argument('--startup-profile', action='store_true',
+                        help='Print where the startup time goes and exit without starting the server')
     args = parser.parse_args()
     
     app = create_app()
+    
+    if args.startup_profile:
+        print(app.startup_profile.report())
+        sys.exit(0)
     port = args.port
     
     # Print the local URL
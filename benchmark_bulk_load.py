@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark for bulk_load_course_data.
+
+Times the bulk loader used by /calculation/all_courses against a database
+produced by generate_demo_data.py (or any other Accredit Helper Pro database)
+for a growing number of courses, so the loading time can be compared with the
+number of courses and score rows loaded.
+
+Usage:
+    python generate_demo_data.py            # fill instance/accredit_data.db
+    python benchmark_bulk_load.py
+    python benchmark_bulk_load.py --db path/to/other.db --repeat 5
+"""
+
+import os
+import sys
+import time
+import argparse
+from flask import Flask
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+
+def course_count_steps(total):
+    """1, 2, 4, 8, ... up to the total number of courses (always including the total)"""
+    steps = []
+    count = 1
+    while count < total:
+        steps.append(count)
+        count *= 2
+    steps.append(total)
+    return steps
+
+
+def run_benchmark(db_path, repeat=3, include_graduating_only=False):
+    """Time bulk_load_course_data for growing course counts, returns a list of result rows"""
+    from models import db, init_db_session, Course
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.abspath(db_path)}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    results = []
+    with app.app_context():
+        init_db_session(app)
+        from routes.calculation_routes import bulk_load_course_data
+
+        course_ids = [course.id for course in Course.query.order_by(Course.id).all()]
+        if not course_ids:
+            print(f"No courses found in {db_path}. Run generate_demo_data.py first.")
+            return results
+
+        for count in course_count_steps(len(course_ids)):
+            subset = course_ids[:count]
+            timings = []
+            bulk_data = {}
+            for _ in range(repeat):
+                db.session.expire_all()
+                start = time.perf_counter()
+                bulk_data = bulk_load_course_data(subset, include_graduating_only=include_graduating_only)
+                timings.append(time.perf_counter() - start)
+
+            score_rows = sum(len(data['scores_dict']) for data in bulk_data.values())
+            student_rows = sum(len(data['students']) for data in bulk_data.values())
+            best = min(timings)
+            results.append({
+                'courses': count,
+                'students': student_rows,
+                'scores': score_rows,
+                'best_seconds': best,
+                'us_per_score': (best / score_rows * 1e6) if score_rows else 0.0,
+            })
+
+        db.session.remove()
+    return results
+
+
+def main():
+    base_dir = os.path.abspath(os.path.dirname(__file__))
+    parser = argparse.ArgumentParser(description='Benchmark bulk_load_course_data against a demo database')
+    parser.add_argument('--db', default=os.path.join(base_dir, 'instance', 'accredit_data.db'),
+                        help='SQLite database to benchmark (default: instance/accredit_data.db)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per course count, the best time is reported')
+    parser.add_argument('--graduating-only', action='store_true', help='Load graduating students only')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"Database not found: {args.db}. Run generate_demo_data.py first.")
+        sys.exit(1)
+
+    print(f"Benchmarking bulk_load_course_data on {args.db}")
+    print(f"{'Courses':>8} {'Students':>9} {'Scores':>9} {'Best (ms)':>10} {'us/score':>9}")
+    for row in run_benchmark(args.db, repeat=max(1, args.repeat), include_graduating_only=args.graduating_only):
+        print(f"{row['courses']:>8} {row['students']:>9} {row['scores']:>9} "
+              f"{row['best_seconds'] * 1000:>10.1f} {row['us_per_score']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the SQLite performance profiles (db_performance.py).
+
+Runs reader threads (the score query of the all-courses page) and writer
+threads (auto-save style upsert + commit) against the same database for a
+fixed time, once per profile, and reports the read and write throughput, the
+write latency and the number of "database is locked" errors. Each profile
+runs on a fresh copy of the database, because the journal mode is stored in
+the database file.
+
+Usage:
+    python benchmark_db_profile.py
+    python benchmark_db_profile.py --profiles off balanced fast --seconds 10 --readers 4 --writers 2
+    python benchmark_db_profile.py --courses 20 --json results.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import threading
+from flask import Flask
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+READ_SQL = """
+    SELECT s.student_id, s.question_id, s.score
+    FROM score s JOIN question q ON q.id = s.question_id JOIN exam e ON e.id = q.exam_id
+    WHERE e.course_id IN (SELECT id FROM course)
+"""
+
+WRITE_SQL = """
+    INSERT INTO score (score, student_id, question_id, exam_id, created_at, updated_at)
+    VALUES (?, ?, ?, ?, datetime('now'), datetime('now'))
+    ON CONFLICT (student_id, question_id, exam_id) DO UPDATE SET score = excluded.score, updated_at = excluded.updated_at
+"""
+
+
+def build_database(path, course_count, students_per_course):
+    """Sample database with course_count courses (see test_helpers.build_sample_course)"""
+    from models import db, init_db_session
+    from test_helpers import build_sample_course
+
+    previous_session = db.session
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    try:
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            for index in range(course_count):
+                build_sample_course(db, seed=index, student_count=students_per_course, course_code=f'BENCH{index:03d}')
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        db.session = previous_session
+
+
+def run_profile(db_path, profile, seconds, readers, writers):
+    """Run readers and writers for the given time with the PRAGMAs of a profile"""
+    from db_performance import get_performance_pragmas, apply_sqlite_pragmas
+
+    pragmas = get_performance_pragmas(profile)
+    conn = sqlite3.connect(db_path)
+    apply_sqlite_pragmas(conn, pragmas)
+    cells = conn.execute("SELECT student_id, question_id, exam_id FROM score").fetchall()
+    conn.close()
+
+    stop = threading.Event()
+    stats = {'reads': 0, 'writes': 0, 'locked': 0, 'write_latencies': []}
+    lock = threading.Lock()
+
+    def reader():
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        apply_sqlite_pragmas(conn, pragmas, read_only=bool(pragmas))
+        while not stop.is_set():
+            try:
+                conn.execute(READ_SQL).fetchall()
+                with lock:
+                    stats['reads'] += 1
+            except sqlite3.OperationalError:
+                with lock:
+                    stats['locked'] += 1
+        conn.close()
+
+    def writer(offset):
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        apply_sqlite_pragmas(conn, pragmas)
+        index = offset
+        while not stop.is_set():
+            student_id, question_id, exam_id = cells[index % len(cells)]
+            index += writers
+            start = time.perf_counter()
+            try:
+                conn.execute(WRITE_SQL, (index % 10, student_id, question_id, exam_id))
+                conn.commit()
+                with lock:
+                    stats['writes'] += 1
+                    stats['write_latencies'].append(time.perf_counter() - start)
+            except sqlite3.OperationalError:
+                conn.rollback()
+                with lock:
+                    stats['locked'] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(offset,)) for offset in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(stats['write_latencies']) or [0.0]
+    return {
+        'profile': profile,
+        'pragmas': {name: str(value) for name, value in pragmas.items()},
+        'seconds': seconds,
+        'readers': readers,
+        'writers': writers,
+        'reads_per_second': round(stats['reads'] / seconds, 1),
+        'writes_per_second': round(stats['writes'] / seconds, 1),
+        'write_p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+        'write_p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+        'locked_errors': stats['locked'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark concurrent reads/writes for the SQLite performance profiles')
+    parser.add_argument('--profiles', nargs='+', default=['off', 'balanced'], help='Profiles to compare (default: off balanced)')
+    parser.add_argument('--seconds', type=float, default=5, help='Duration of each run')
+    parser.add_argument('--readers', type=int, default=4, help='Reader threads')
+    parser.add_argument('--writers', type=int, default=2, help='Writer threads')
+    parser.add_argument('--courses', type=int, default=10, help='Courses in the sample database')
+    parser.add_argument('--students', type=int, default=60, help='Students per course')
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        template = os.path.join(temp_dir, 'template.db')
+        print(f"Building sample database ({args.courses} courses x {args.students} students)...")
+        build_database(template, args.courses, args.students)
+
+        results = []
+        print(f"{'Profile':>10} {'Reads/s':>9} {'Writes/s':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'Locked':>7}")
+        for profile in args.profiles:
+            db_path = os.path.join(temp_dir, f'{profile}.db')
+            shutil.copy2(template, db_path)
+            result = run_profile(db_path, profile, args.seconds, args.readers, args.writers)
+            results.append(result)
+            print(f"{profile:>10} {result['reads_per_second']:>9} {result['writes_per_second']:>9} "
+                  f"{result['write_p50_ms']:>9} {result['write_p95_ms']:>9} {result['locked_errors']:>7}")
+
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Results written to {args.json}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
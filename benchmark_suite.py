@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Benchmark runner for the hot paths of Accredit Helper Pro.
+
+Builds a synthetic dataset with generate_benchmark_data.py (or uses an
+existing database) and times, on a copy of it:
+
+- bulk_load:          bulk_load_course_data for every course
+- all_courses:        /calculation/all_courses with an empty result cache
+- all_courses_cached: /calculation/all_courses served from the result cache
+- course_results:     /calculation/course/<id> with an empty result cache
+- score_import:       /student/exam/<id>/import-scores for every student of a course
+- database_import:    import_backup_data of the whole dataset into an empty database
+- merge:              merge_courses_bulk of two courses into a new course (rolled back)
+- student_reports:    build_student_report_contexts + render_student_report_html
+- student_pdfs:       Playwright PDF generation (only with --pdf, needs Chromium)
+
+Each benchmark runs --repeat times. The best and median time and the number of
+SQL statements of the last run are reported. The results, the dataset size and
+the git commit go to a JSON file. Give the JSON file of an earlier commit to
+--compare and every benchmark that got slower by more than --threshold percent
+is listed as a regression.
+
+Usage:
+    python benchmark_suite.py --json results.json
+    python benchmark_suite.py --courses 100 --students 120 --repeat 5 --json big.json
+    python benchmark_suite.py --json new.json --compare results.json --fail-on-regression
+    python benchmark_suite.py --db instance/accredit_data.db --only bulk_load all_courses
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from generate_benchmark_data import DEFAULT_SIZE, create_schema, generate_dataset
+
+BENCHMARKS = ('bulk_load', 'all_courses', 'all_courses_cached', 'course_results', 'score_import',
+              'database_import', 'merge', 'student_reports', 'student_pdfs')
+
+
+def create_benchmark_app(db_path):
+    """Flask app with the application's blueprints, templates and SQLite profile on db_path"""
+    from models import db, init_db_session
+    from db_performance import configure_database_performance
+    from routes.course_routes import course_bp
+    from routes.exam_routes import exam_bp
+    from routes.outcome_routes import outcome_bp
+    from routes.student_routes import student_bp
+    from routes.calculation_routes import calculation_bp
+    from routes.utility_routes import utility_bp
+    from routes.question_routes import question_bp
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    app = Flask(__name__, template_folder=os.path.join(root, 'templates'),
+                static_folder=os.path.join(root, 'static'))
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.abspath(db_path)}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = 'benchmark'
+    app.config['BACKUP_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(db_path)), 'backups')
+    app.config['DB_PERFORMANCE_PROFILE'] = os.environ.get('DB_PERFORMANCE_PROFILE', 'balanced').lower()
+    app.config['DB_PRAGMAS'] = os.environ.get('DB_PRAGMAS', '')
+    db.init_app(app)
+    init_db_session(app)
+    configure_database_performance(app, db)
+    for blueprint in (course_bp, exam_bp, outcome_bp, student_bp, calculation_bp, utility_bp, question_bp):
+        app.register_blueprint(blueprint)
+    app.add_url_rule('/', 'index', lambda: '')
+    return app
+
+
+def git_commit():
+    """Current commit of the working tree (None outside a git checkout)"""
+    try:
+        root = os.path.dirname(os.path.abspath(__file__))
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root, capture_output=True,
+                                text=True, timeout=10).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                               capture_output=True, text=True, timeout=30).stdout.strip()
+        return f'{commit}-dirty' if commit and dirty else (commit or None)
+    except Exception:
+        return None
+
+
+def time_runs(function, repeat, setup=None, teardown=None):
+    """
+    Run function `repeat` times and time it.
+
+    setup() runs untimed before every run, its result is passed to function.
+    function may return a dict of extra values (the last run's are kept); a
+    'queries' value replaces the number of SQLAlchemy statements counted.
+    """
+    timings = []
+    extra = {}
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        statements.clear()
+        event.listen(Engine, 'before_cursor_execute', listener)
+        try:
+            start = time.perf_counter()
+            extra = (function(argument) if setup else function()) or {}
+            timings.append(time.perf_counter() - start)
+        finally:
+            event.remove(Engine, 'before_cursor_execute', listener)
+        if teardown:
+            teardown(argument)
+    result = {
+        'best_ms': round(min(timings) * 1000, 2),
+        'median_ms': round(statistics.median(timings) * 1000, 2),
+        'runs': len(timings),
+        'queries': len(statements),
+    }
+    result.update(extra)
+    return result
+
+
+def run_benchmarks(db_path, work_dir, repeat=3, only=None, include_pdf=False, report_students=20):
+    """Run the benchmarks on a copy of db_path, returns {name: result}"""
+    from models import db, Course, Exam, Student
+    from routes.result_cache import invalidate_all_course_results, invalidate_course_results
+
+    selected = [name for name in (only or BENCHMARKS) if name != 'student_pdfs' or include_pdf]
+    work_db = os.path.join(work_dir, 'work.db')
+    shutil.copy2(db_path, work_db)
+
+    previous_session = db.session
+    app = create_benchmark_app(work_db)
+    results = {}
+    try:
+        with app.app_context():
+            client = app.test_client()
+            course_ids = [course_id for (course_id,) in db.session.query(Course.id).order_by(Course.id)]
+            if not course_ids:
+                raise ValueError(f"No courses found in {db_path}")
+            first_course = course_ids[0]
+
+            def clear_cache(course_ids=None):
+                if course_ids is None:
+                    invalidate_all_course_results()
+                else:
+                    invalidate_course_results(course_ids)
+                db.session.commit()
+                db.session.remove()
+
+            def get(url):
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{url} returned {response.status_code}")
+                return {'bytes': len(response.data)}
+
+            def run(name, function, setup=None, teardown=None):
+                if name not in selected:
+                    return
+                print(f"  {name}...", flush=True)
+                try:
+                    results[name] = time_runs(function, repeat, setup, teardown)
+                except Exception as e:
+                    db.session.rollback()
+                    results[name] = {'skipped': True, 'error': str(e).strip().splitlines()[0] if str(e).strip() else repr(e)}
+
+            def bulk_load():
+                from routes.calculation_routes import bulk_load_course_data
+                db.session.expire_all()
+                bulk_data = bulk_load_course_data(course_ids)
+                return {'scores': sum(len(data['scores_dict']) for data in bulk_data.values())}
+
+            run('bulk_load', bulk_load)
+            run('all_courses', lambda _: get('/calculation/all_courses'), setup=clear_cache)
+            if 'all_courses_cached' in selected:
+                get('/calculation/all_courses')
+            run('all_courses_cached', lambda: get('/calculation/all_courses'))
+            run('course_results', lambda _: get(f'/calculation/course/{first_course}'),
+                setup=lambda: clear_cache([first_course]))
+
+            def score_sheet():
+                exam = Exam.query.filter_by(course_id=first_course, is_makeup=False).order_by(Exam.id).first()
+                question_count = len(exam.questions)
+                students = [student.student_id for student in Student.query.filter_by(course_id=first_course)]
+                lines = [f"{student_id};" + ';'.join(str((index + number) % 9 + 1) for number in range(question_count))
+                         for index, student_id in enumerate(students)]
+                exam_id = exam.id
+                db.session.remove()
+                return exam_id, '\n'.join(lines), len(lines)
+
+            def score_import(sheet):
+                exam_id, data, line_count = sheet
+                client.post(f'/student/exam/{exam_id}/import-scores', data={
+                    'scores_data': data, 'import_format': 'simple', 'continue_on_errors': 'on'
+                })
+                return {'students': line_count}
+
+            run('score_import', score_import, setup=score_sheet)
+
+            def empty_database():
+                target = os.path.join(work_dir, 'import_target.db')
+                if os.path.exists(target):
+                    os.remove(target)
+                create_schema(target)
+                return target
+
+            def database_import(target):
+                from routes.import_engine import attach_backup, detach_backup, import_backup_data
+                options = {option: True for option in (
+                    'import_courses', 'import_students', 'import_exams', 'import_outcomes', 'import_program_outcomes',
+                    'import_achievement_levels', 'import_course_settings', 'import_exam_weights',
+                    'import_attendance', 'import_scores')}
+                summary = {'errors': []}
+                for key in ('courses_imported', 'outcomes_imported', 'program_outcomes_imported',
+                            'achievement_levels_imported', 'course_settings_imported', 'students_imported',
+                            'exams_imported', 'questions_imported', 'exam_weights_imported', 'scores_imported',
+                            'attendance_imported', 'co_po_imported', 'question_co_imported'):
+                    summary[key] = 0
+                statements = []
+                conn = sqlite3.connect(target)
+                try:
+                    conn.set_trace_callback(statements.append)
+                    attach_backup(conn, work_db)
+                    conn.execute("BEGIN TRANSACTION")
+                    import_backup_data(conn, options, summary)
+                    conn.execute("COMMIT")
+                    conn.set_trace_callback(None)
+                    detach_backup(conn)
+                finally:
+                    conn.close()
+                return {'queries': len(statements), 'scores': summary['scores_imported']}
+
+            run('database_import', database_import, setup=empty_database)
+
+            def merge_destination():
+                destination = Course(code='BENCHMERGE', name='Benchmark Merge', semester='Merge 2025', course_weight=1.0)
+                db.session.add(destination)
+                db.session.flush()
+                return destination.id
+
+            def merge(destination_id):
+                from routes.merge_engine import merge_courses_bulk
+                plan = merge_courses_bulk(destination_id, course_ids[:2], True, True, True)
+                return {'scores': plan['stats']['scores_merged']}
+
+            def merge_rollback(_):
+                db.session.rollback()
+                db.session.remove()
+
+            run('merge', merge, setup=merge_destination, teardown=merge_rollback)
+
+            report_ids = [student_id for (student_id,) in db.session.query(Student.student_id).distinct()
+                          .order_by(Student.student_id).limit(report_students)]
+            db.session.remove()
+
+            def student_reports():
+                from routes.calculation_routes import build_student_report_contexts, render_student_report_html
+                contexts = build_student_report_contexts(report_ids)
+                html_bytes = sum(len(render_student_report_html(contexts[student_id], 'http://localhost'))
+                                 for student_id in report_ids)
+                db.session.remove()
+                return {'students': len(report_ids), 'bytes': html_bytes}
+
+            run('student_reports', student_reports)
+
+            def student_pdfs():
+                from routes.pdf_multithread import generate_student_pdfs_multithreaded
+                previous_cwd = os.getcwd()
+                os.chdir(work_dir)  # student_pdfs/ is created in the working directory
+                try:
+                    result = generate_student_pdfs_multithreaded(report_ids, '', '', '', False, 'absolute',
+                                                                 base_url='http://localhost')
+                finally:
+                    os.chdir(previous_cwd)
+                    shutil.rmtree(os.path.join(work_dir, 'student_pdfs'), ignore_errors=True)
+                    db.session.remove()
+                if not result.get('success'):
+                    raise RuntimeError(result.get('error', 'PDF generation failed'))
+                return {'students': len(report_ids), 'pages_per_second': round(result.get('pages_per_second', 0), 2)}
+
+            run('student_pdfs', student_pdfs)
+
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        db.session = previous_session
+    return results
+
+
+def compare_results(current, baseline, threshold):
+    """Rows of (name, baseline ms, current ms, change %, regression) for the benchmarks in both runs"""
+    rows = []
+    for name, result in current['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or result.get('skipped') or previous.get('skipped'):
+            continue
+        before, after = previous['best_ms'], result['best_ms']
+        change = (after - before) / before * 100 if before else 0.0
+        rows.append((name, before, after, round(change, 1), change > threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the hot paths on a synthetic dataset and write JSON results')
+    parser.add_argument('--db', help='Benchmark an existing database instead of generating one')
+    parser.add_argument('--courses', type=int, default=DEFAULT_SIZE['courses'], help='Courses of the generated dataset')
+    parser.add_argument('--students', type=int, default=DEFAULT_SIZE['students'], help='Students per course')
+    parser.add_argument('--exams', type=int, default=DEFAULT_SIZE['exams'], help='Regular exams per course')
+    parser.add_argument('--questions', type=int, default=DEFAULT_SIZE['questions'], help='Questions per exam')
+    parser.add_argument('--outcomes', type=int, default=DEFAULT_SIZE['outcomes'], help='Course outcomes per course')
+    parser.add_argument('--score-density', type=float, default=DEFAULT_SIZE['score_density'],
+                        help='Share of questions with a score (0-1)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed of the generated dataset')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per benchmark')
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, help='Run only these benchmarks')
+    parser.add_argument('--pdf', action='store_true', help='Also time Playwright PDF generation (needs Chromium)')
+    parser.add_argument('--report-students', type=int, default=20, help='Students of the report/PDF benchmarks')
+    parser.add_argument('--json', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Slowdown in percent reported as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 when a regression is found')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        dataset = {}
+        if args.db:
+            if not os.path.exists(args.db):
+                print(f"Database not found: {args.db}")
+                sys.exit(1)
+            db_path = args.db
+            dataset['database'] = os.path.abspath(args.db)
+        else:
+            db_path = os.path.join(work_dir, 'dataset.db')
+            dataset = {'courses': args.courses, 'students': args.students, 'exams': args.exams,
+                       'questions': args.questions, 'outcomes': args.outcomes,
+                       'score_density': args.score_density, 'seed': args.seed}
+            print(f"Generating dataset ({args.courses} courses x {args.students} students)...")
+            start = time.perf_counter()
+            dataset['rows'] = generate_dataset(db_path, courses=args.courses, students=args.students, exams=args.exams,
+                                               questions=args.questions, outcomes=args.outcomes,
+                                               score_density=args.score_density, seed=args.seed)
+            dataset['generation_seconds'] = round(time.perf_counter() - start, 2)
+
+        print("Running benchmarks...")
+        results = run_benchmarks(db_path, work_dir, repeat=max(1, args.repeat), only=args.only,
+                                 include_pdf=args.pdf, report_students=args.report_students)
+        output = {
+            'meta': {
+                'commit': git_commit(),
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'platform': platform.platform(),
+                'repeat': max(1, args.repeat),
+                'db_performance_profile': os.environ.get('DB_PERFORMANCE_PROFILE', 'balanced'),
+            },
+            'dataset': dataset,
+            'results': results,
+        }
+
+        print(f"{'Benchmark':>20} {'Best (ms)':>11} {'Median (ms)':>12} {'Queries':>8}")
+        for name, result in results.items():
+            if result.get('skipped'):
+                print(f"{name:>20}  skipped: {result['error']}")
+            else:
+                print(f"{name:>20} {result['best_ms']:>11} {result['median_ms']:>12} {result['queries']:>8}")
+
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(output, f, indent=2)
+            print(f"Results written to {args.json}")
+
+        if args.compare:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+            rows = compare_results(output, baseline, args.threshold)
+            print(f"\nCompared with {args.compare} (commit {baseline.get('meta', {}).get('commit')}):")
+            print(f"{'Benchmark':>20} {'Before (ms)':>12} {'After (ms)':>11} {'Change':>8}")
+            for name, before, after, change, regression in rows:
+                flag = '  REGRESSION' if regression else ''
+                print(f"{name:>20} {before:>12} {after:>11} {change:>+7}%{flag}")
+            regressions = [row[0] for row in rows if row[4]]
+            if regressions:
+                print(f"{len(regressions)} regression(s) above {args.threshold}%: {', '.join(regressions)}")
+                if args.fail_on_regression:
+                    sys.exit(1)
+            else:
+                print(f"No regression above {args.threshold}%")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -307,14 +307,15 @@ class IndexManager:
             return 0
 
 
-def initialize_index_manager(app, db):
+def initialize_index_manager(app, db, check=True):
     """
     Initialize the index manager and check/create indexes
-    Called from app startup
+    Called from app startup (check=False when the schema fingerprint shows
+    the indexes were already checked, see db_schema_fingerprint.py)
     """
     try:
         index_manager = IndexManager(app, db)
-        success = index_manager.check_and_create_indexes()
+        success = index_manager.check_and_create_indexes() if check else True
         
         # Store index manager in app for later use if needed
         app.index_manager = index_manager
@@ -11,6 +11,7 @@ def check_and_update_database(app):
     This function runs at app startup to handle migrations for new columns.
     """
     logging.info("Checking database schema for required columns...")
+    migrated = True
     
     try:
         with app.app_context():
@@ -137,8 +138,18 @@ def check_and_update_database(app):
             else:
                 logging.info("graduating_student table already exists")
             # --- END: Add Check for Graduating Students Table ---
+
+            # --- START: Add Check for Unique Score Key ---
+            if 'score' in inspector.get_table_names():
+                if not score_unique_key_exists(inspector):
+                    logging.info("Adding unique (student_id, question_id, exam_id) key to score table")
+                    if not add_score_unique_key(app, engine):
+                        migrated = False
+                else:
+                    logging.info("score table already has a unique (student_id, question_id, exam_id) key")
+            # --- END: Add Check for Unique Score Key ---
         
-        return True
+        return migrated
     
     except Exception as e:
         import traceback
@@ -146,6 +157,78 @@ def check_and_update_database(app):
         logging.error(f"Error checking or updating database schema: {str(e)}\n{error_traceback}")
         return False 
         
+def add_score_unique_key(app, engine):
+    """
+    Add the unique (student_id, question_id, exam_id) key to the score table.
+
+    Older databases may hold several rows for the same key; only the most recent
+    one is kept. The database is backed up before any row is deleted, and the
+    number of removed rows is recorded in the activity log. Without a backup the
+    key is not added and the duplicates are reported instead (returns False).
+    """
+    from routes.backup_engine import create_database_backup
+
+    with engine.connect() as connection:
+        duplicate_keys, duplicate_rows = connection.execute(text("""
+            SELECT COUNT(*), COALESCE(SUM(row_count - 1), 0) FROM (
+                SELECT COUNT(*) AS row_count FROM score
+                GROUP BY student_id, question_id, exam_id HAVING COUNT(*) > 1
+            )
+        """)).one()
+
+    backup_filename = None
+    if duplicate_rows:
+        try:
+            backup_filename = create_database_backup(
+                engine.url.database, app.config.get('BACKUP_FOLDER', 'backups'), 'pre_score_key_backup')
+        except Exception as e:
+            logging.error(f"Not adding the unique score key: {duplicate_rows} duplicate score rows "
+                          f"({duplicate_keys} student/question/exam keys) need to be removed first and "
+                          f"the database could not be backed up: {str(e)}")
+            return False
+
+    with engine.connect() as connection:
+        if duplicate_rows:
+            # Keep the most recent row of any duplicated score before adding the key
+            result = connection.execute(text("""
+                DELETE FROM score WHERE id NOT IN (
+                    SELECT MAX(id) FROM score GROUP BY student_id, question_id, exam_id
+                )
+            """))
+            description = (f"Removed {result.rowcount} duplicate score rows ({duplicate_keys} student/question/exam "
+                           f"keys, most recent row kept) before adding the unique score key. "
+                           f"Backup taken before the removal: {backup_filename}")
+            logging.warning(description)
+            try:
+                connection.execute(text("""
+                    INSERT INTO log (action, description, timestamp)
+                    VALUES ('MIGRATION_REMOVE_DUPLICATE_SCORES', :description, CURRENT_TIMESTAMP)
+                """), {'description': description})
+            except Exception as log_e:
+                logging.warning(f"Could not log migration: {log_e}")
+        connection.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS _score_student_question_exam_uc "
+            "ON score (student_id, question_id, exam_id)"
+        ))
+        connection.commit()
+    logging.info("Successfully added unique key to score table")
+    return True
+
+
+def score_unique_key_exists(inspector):
+    """
+    Check whether the score table has a unique key on (student_id, question_id, exam_id),
+    either as a table constraint (new databases) or as a unique index (migrated databases).
+    """
+    key_columns = {'student_id', 'question_id', 'exam_id'}
+    for constraint in inspector.get_unique_constraints('score'):
+        if set(constraint['column_names']) == key_columns:
+            return True
+    for index in inspector.get_indexes('score'):
+        if index.get('unique') and set(index['column_names']) == key_columns:
+            return True
+    return False
+
 def graduating_students_table_exists():
     """
     Check if the graduating_student table exists in the database.
@@ -0,0 +1,191 @@
+"""
+SQLite performance profile for Accredit Helper Pro.
+
+The PRAGMAs of the selected profile (DB_PERFORMANCE_PROFILE) are applied to
+every new SQLite connection through a SQLAlchemy "connect" event:
+
+- journal_mode=WAL lets readers (report pages, PDF jobs, exports) run while
+  a writer (auto-save, imports) commits, instead of blocking each other
+- synchronous=NORMAL is safe with WAL and avoids an fsync per commit
+- mmap_size / cache_size keep the hot pages of the database in memory
+- temp_store=MEMORY keeps sorts and temporary indexes off the disk
+- busy_timeout makes a connection wait for a lock instead of failing at once
+
+A second engine on the same file is created for reporting. Its connections
+use the same PRAGMAs plus query_only, so the heavy read queries of the
+all-courses page, its export and the PDF reports run on their own connection
+pool and can never write. Routes use it with `with read_only_session(): ...`.
+
+Usage:
+    from db_performance import configure_database_performance
+    configure_database_performance(app, db)
+"""
+
+import logging
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+# Profiles selectable with DB_PERFORMANCE_PROFILE ('off' keeps the SQLite defaults)
+SQLITE_PERFORMANCE_PROFILES = {
+    'off': {},
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,          # Negative values are KiB: 64 MB page cache
+        'temp_store': 'MEMORY',
+        'busy_timeout': 10000,             # Milliseconds
+    },
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 1024 * 1024 * 1024,
+        'cache_size': -256 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 30000,
+    },
+}
+
+DEFAULT_PERFORMANCE_PROFILE = 'balanced'
+
+# PRAGMAs that change the database file rather than the connection (not run on the read-only engine)
+PERSISTENT_PRAGMAS = ('journal_mode',)
+
+
+def get_performance_pragmas(profile, overrides=''):
+    """
+    PRAGMAs of a profile with optional overrides.
+
+    Args:
+        profile: Profile name from SQLITE_PERFORMANCE_PROFILES
+        overrides: Comma separated "name=value" pairs (e.g. "mmap_size=0,cache_size=-2000")
+
+    Returns:
+        Ordered dict of PRAGMA name -> value
+    """
+    profile = (profile or DEFAULT_PERFORMANCE_PROFILE).lower()
+    if profile not in SQLITE_PERFORMANCE_PROFILES:
+        logging.warning(f"Unknown DB_PERFORMANCE_PROFILE '{profile}', using '{DEFAULT_PERFORMANCE_PROFILE}'")
+        profile = DEFAULT_PERFORMANCE_PROFILE
+
+    pragmas = dict(SQLITE_PERFORMANCE_PROFILES[profile])
+    for item in (overrides or '').split(','):
+        if '=' not in item:
+            continue
+        name, value = (part.strip() for part in item.split('=', 1))
+        if name.replace('_', '').isalnum() and str(value).replace('-', '').isalnum():
+            pragmas[name.lower()] = value
+        else:
+            logging.warning(f"Ignoring invalid PRAGMA override: {item}")
+    return pragmas
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas, read_only=False):
+    """Run the PRAGMAs on a new DBAPI connection (query_only is added for read-only connections)"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            if read_only and name in PERSISTENT_PRAGMAS:
+                continue
+            cursor.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+
+def configure_database_performance(app, db):
+    """
+    Apply the performance profile to the app's engine and create the read-only engine.
+
+    Only file-based SQLite databases are tuned; other databases are left unchanged.
+    The profile and the read-only engine are kept in app.extensions['db_performance'].
+    """
+    profile = app.config.get('DB_PERFORMANCE_PROFILE', DEFAULT_PERFORMANCE_PROFILE)
+    pragmas = get_performance_pragmas(profile, app.config.get('DB_PRAGMAS', ''))
+    state = {'profile': profile, 'pragmas': pragmas, 'read_engine': None}
+    app.extensions['db_performance'] = state
+
+    with app.app_context():
+        engine = db.engine
+        database = engine.url.database
+        if engine.dialect.name != 'sqlite' or not database or database == ':memory:':
+            logging.info("Database performance profile skipped (not a SQLite file database)")
+            return state
+
+        if pragmas:
+            @event.listens_for(engine, 'connect')
+            def set_sqlite_pragmas(dbapi_connection, connection_record):
+                apply_sqlite_pragmas(dbapi_connection, pragmas)
+
+            # Connections opened before the listener existed get the PRAGMAs on their next checkout
+            engine.dispose()
+
+        # Separate connection pool for reporting queries, enforced read-only by query_only
+        read_engine = create_engine(engine.url)
+
+        @event.listens_for(read_engine, 'connect')
+        def set_read_only_pragmas(dbapi_connection, connection_record):
+            apply_sqlite_pragmas(dbapi_connection, pragmas, read_only=True)
+
+        state['read_engine'] = read_engine
+
+    @app.teardown_appcontext
+    def close_read_only_sessions(exception=None):
+        for read_session in g.pop('_read_only_sessions', []):
+            read_session.close()
+
+    logging.info(f"Database performance profile '{profile}': {pragmas}")
+    return state
+
+
+def get_read_engine(app=None):
+    """The read-only reporting engine, or None when the profile is not configured"""
+    app = app or (current_app._get_current_object() if has_app_context() else None)
+    if app is None:
+        return None
+    return app.extensions.get('db_performance', {}).get('read_engine')
+
+
+def dispose_read_engine(app=None):
+    """Close the pooled read-only connections (after the database file was replaced)"""
+    read_engine = get_read_engine(app)
+    if read_engine is not None:
+        read_engine.dispose()
+
+
+@contextmanager
+def read_only_session():
+    """
+    Run the ORM queries of the block on the read-only engine.
+
+    db.session (and Model.query) of the current thread is bound to a session
+    of the read-only engine for the duration of the block. The session stays
+    open until the app context ends, so objects loaded in the block can still
+    lazy-load their relationships afterwards. Without a configured read engine
+    the block runs on the normal session.
+    """
+    from models import db
+
+    read_engine = get_read_engine()
+    if read_engine is None:
+        yield db.session
+        return
+
+    read_session = Session(bind=read_engine)
+    g.setdefault('_read_only_sessions', []).append(read_session)
+
+    registry = db.session.registry
+    had_session = registry.has()
+    previous_session = registry() if had_session else None
+    registry.set(read_session)
+    try:
+        yield read_session
+    finally:
+        if had_session:
+            registry.set(previous_session)
+        else:
+            registry.clear()
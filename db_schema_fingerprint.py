@@ -0,0 +1,126 @@
+"""
+Schema fingerprint for Accredit Helper Pro startup.
+
+Every start used to run db.create_all(), check_and_update_database() and the
+index check of db_index_manager.py, which together inspect every table and
+index of the database. Once a database has been checked they find nothing to
+do until either the code defining the schema or the database itself changes,
+so after a successful check two signatures are stored in the schema_fingerprint
+table:
+
+- the code signature: sha1 of the CREATE TABLE / CREATE INDEX statements of
+  the models, the required indexes of IndexManager and the source of
+  db_migrations.py (a new model, column, index or migration changes it)
+- the schema signature: sha1 of sqlite_master (a restored backup, an index
+  dropped by hand or a table created elsewhere changes it)
+
+At the next start both are computed again (one query) and the schema checks
+are skipped when they match. Anything that cannot be compared (no
+schema_fingerprint table yet, another database backend, an error) runs the
+checks as before. STARTUP_SCHEMA_CHECK=always runs them on every start.
+
+Usage:
+    from db_schema_fingerprint import check_schema_fingerprint, record_schema_fingerprint
+    current, code_signature = check_schema_fingerprint(db)
+    if not current:
+        ...  # create_all, migrations, index checks
+        record_schema_fingerprint(db, code_signature)
+"""
+
+import hashlib
+import inspect
+import logging
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+SCHEMA_SQL = text(
+    "SELECT type, name, tbl_name, COALESCE(sql, '') FROM sqlite_master "
+    "WHERE name NOT LIKE 'sqlite_%' ORDER BY type, name"
+)
+READ_FINGERPRINT_SQL = text("SELECT code_signature, schema_signature FROM schema_fingerprint WHERE id = 1")
+WRITE_FINGERPRINT_SQL = text("""
+    INSERT INTO schema_fingerprint (id, code_signature, schema_signature, updated_at)
+    VALUES (1, :code_signature, :schema_signature, :timestamp)
+    ON CONFLICT(id) DO UPDATE SET
+        code_signature = excluded.code_signature, schema_signature = excluded.schema_signature,
+        updated_at = excluded.updated_at
+""")
+
+
+def _is_sqlite(db):
+    return db.engine.dialect.name == 'sqlite'
+
+
+def compute_code_signature(db):
+    """sha1 of the schema the code expects: model DDL, required indexes and migrations"""
+    import db_migrations
+    from db_index_manager import IndexManager
+
+    dialect = db.engine.dialect
+    digest = hashlib.sha1()
+    for table in sorted(db.metadata.tables.values(), key=lambda table: table.name):
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode('utf-8'))
+        for index in sorted(table.indexes, key=lambda index: index.name or ''):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode('utf-8'))
+    digest.update(repr(sorted(IndexManager().required_indexes.items())).encode('utf-8'))
+    digest.update(inspect.getsource(db_migrations).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def compute_schema_signature(connection):
+    """sha1 of the tables, indexes, views and triggers in sqlite_master"""
+    digest = hashlib.sha1()
+    for row in connection.execute(SCHEMA_SQL):
+        digest.update(repr(tuple(row)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def check_schema_fingerprint(db):
+    """
+    (whether the schema checks can be skipped, code signature to record after
+    running them). Must be called inside an application context.
+    """
+    try:
+        code_signature = compute_code_signature(db)
+    except Exception as e:
+        logging.error(f"Error computing the schema code signature: {str(e)}")
+        return False, None
+    if not _is_sqlite(db):
+        return False, code_signature
+
+    try:
+        with db.engine.connect() as connection:
+            stored = connection.execute(READ_FINGERPRINT_SQL).first()
+            if stored is None:
+                return False, code_signature
+            current = (stored[0] == code_signature and stored[1] == compute_schema_signature(connection))
+    except Exception as e:
+        # Databases created before the schema_fingerprint table have no fingerprint yet
+        logging.info(f"No schema fingerprint available, running schema checks: {str(e)}")
+        return False, code_signature
+
+    if current:
+        logging.info("Schema fingerprint matches, skipping schema and index checks")
+    else:
+        logging.info("Schema fingerprint changed, running schema and index checks")
+    return current, code_signature
+
+
+def record_schema_fingerprint(db, code_signature):
+    """Store the signatures after successful schema checks (returns whether it was stored)"""
+    if not code_signature or not _is_sqlite(db):
+        return False
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(WRITE_FINGERPRINT_SQL, {
+                'code_signature': code_signature,
+                'schema_signature': compute_schema_signature(connection),
+                'timestamp': datetime.now()
+            })
+        return True
+    except Exception as e:
+        logging.error(f"Error recording the schema fingerprint: {str(e)}")
+        return False
+
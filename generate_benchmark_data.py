@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Parameterized synthetic dataset generator for benchmarks.
+
+generate_demo_data.py builds one realistic demo database of a fixed size with
+the ORM. This script builds databases of any size instead (courses, students
+per course, exams, questions, outcomes, score density) and writes them with
+bulk executemany statements, so millions of score rows take seconds. The
+output is deterministic for a given seed, so benchmark runs on different
+commits see the same data.
+
+Each course gets:
+- its regular exams ("Exam 1", "Exam 2", ..., the last one is the final), the
+  first one mandatory with a makeup exam
+- exam weights, questions, course outcomes, Q-CO and CO-PO links with
+  non-uniform weights and course settings
+- students drawn from a shared pool, so a student takes several courses (as
+  on the all-courses page), some of them excluded or graduating
+- scores for score_density of the questions, attendance for the mandatory
+  exam and its makeup (missed mandatory exams have no scores)
+
+Usage:
+    python generate_benchmark_data.py --db instance/benchmark_data.db
+    python generate_benchmark_data.py --db big.db --courses 200 --students 120 --exams 4 --questions 8
+    python generate_benchmark_data.py --db big.db --courses 10 --code-prefix EXTRA --append
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+from datetime import datetime
+from flask import Flask
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+DEFAULT_SIZE = {
+    'courses': 20,
+    'students': 60,
+    'exams': 3,
+    'questions': 5,
+    'outcomes': 4,
+    'program_outcomes': 11,
+    'score_density': 0.9,
+}
+
+SEMESTERS = ['Fall 2022', 'Spring 2023', 'Fall 2023', 'Spring 2024', 'Fall 2024', 'Spring 2025']
+
+
+def create_schema(db_path):
+    """Create the tables and the indexes of the application in the database"""
+    from models import db, init_db_session
+    from db_index_manager import initialize_index_manager
+
+    previous_session = db.session
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.abspath(db_path)}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    try:
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            initialize_index_manager(app, db)
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        db.session = previous_session
+
+
+def _next_id(conn, table):
+    return conn.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+
+
+def generate_dataset(db_path, courses=DEFAULT_SIZE['courses'], students=DEFAULT_SIZE['students'],
+                     exams=DEFAULT_SIZE['exams'], questions=DEFAULT_SIZE['questions'],
+                     outcomes=DEFAULT_SIZE['outcomes'], program_outcomes=DEFAULT_SIZE['program_outcomes'],
+                     score_density=DEFAULT_SIZE['score_density'], student_pool=None, graduating_share=0.2,
+                     seed=42, code_prefix='BENCH'):
+    """
+    Write a synthetic dataset into db_path (created if missing, appended to otherwise).
+
+    Args:
+        courses: Number of courses
+        students: Students per course
+        exams: Regular exams per course (a makeup for the first one is added)
+        questions: Questions per exam
+        outcomes: Course outcomes per course
+        program_outcomes: Program outcomes PO1..POn (shared, reused if they exist)
+        score_density: Share of the questions of an attended exam that have a score
+        student_pool: Distinct student IDs the course lists are drawn from (default: 4 courses per student)
+        graduating_share: Share of the student pool in the graduating students list
+        seed: Random seed (same seed, same data)
+        code_prefix: Course code prefix (use another prefix to append courses to an existing dataset)
+
+    Returns:
+        Dict of the number of rows written per table
+    """
+    rng = random.Random(seed)
+    exams = max(1, exams)
+    questions = max(1, questions)
+    outcomes = max(1, outcomes)
+    program_outcomes = max(1, program_outcomes)
+    score_density = min(max(float(score_density), 0.0), 1.0)
+    if not student_pool:
+        student_pool = max(students, students * courses // 4)
+    student_pool = max(student_pool, students)
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+
+    create_schema(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA foreign_keys=OFF")
+        conn.execute("BEGIN")
+
+        conn.executemany(
+            "INSERT OR IGNORE INTO program_outcome (code, description, created_at, updated_at) VALUES (?, ?, ?, ?)",
+            [(f'PO{index}', f'Program outcome {index}', now, now) for index in range(1, program_outcomes + 1)]
+        )
+        po_ids = [row[0] for row in conn.execute(
+            f"SELECT id FROM program_outcome WHERE code IN ({','.join('?' * program_outcomes)}) ORDER BY id",
+            [f'PO{index}' for index in range(1, program_outcomes + 1)]
+        )]
+
+        pool = [f'{code_prefix}{index:06d}' for index in range(student_pool)]
+        graduating = rng.sample(pool, int(len(pool) * min(max(graduating_share, 0.0), 1.0)))
+        conn.executemany("INSERT OR IGNORE INTO graduating_student (student_id, created_at) VALUES (?, ?)",
+                         [(student_id, now) for student_id in graduating])
+
+        rows = {name: [] for name in ('course', 'course_settings', 'exam', 'exam_weight', 'question', 'course_outcome',
+                                      'question_course_outcome', 'course_outcome_program_outcome', 'student',
+                                      'score', 'student_exam_attendance')}
+        course_id = _next_id(conn, 'course')
+        exam_id = _next_id(conn, 'exam')
+        question_id = _next_id(conn, 'question')
+        outcome_id = _next_id(conn, 'course_outcome')
+        student_row_id = _next_id(conn, 'student')
+
+        for course_index in range(courses):
+            semester = SEMESTERS[course_index % len(SEMESTERS)]
+            rows['course'].append((course_id, f'{code_prefix}{course_index:04d}', f'Benchmark Course {course_index}',
+                                   semester, 1.0, now, now))
+            rows['course_settings'].append((course_id, 'absolute', 60.0, False, now, now))
+
+            course_outcome_ids = list(range(outcome_id, outcome_id + outcomes))
+            for index, co_id in enumerate(course_outcome_ids, start=1):
+                rows['course_outcome'].append((co_id, f'CO{index}', f'Course outcome {index}', course_id, now, now))
+                for po_id in rng.sample(po_ids, min(2, len(po_ids))):
+                    rows['course_outcome_program_outcome'].append((co_id, po_id, rng.choice([1.0, 1.5, 3.0])))
+            outcome_id += outcomes
+
+            # Regular exams (the first one mandatory, the last one the final) and the makeup of the first one
+            exam_questions = {}
+            regular_weight = round(1.0 / exams, 4)
+            mandatory_id = exam_id
+            for index in range(exams):
+                is_final = index == exams - 1 and exams > 1
+                name = 'Final' if is_final else f'Exam {index + 1}'
+                rows['exam'].append((exam_id, name, 100.0, course_id, now, now, False, is_final, None, index == 0))
+                rows['exam_weight'].append((exam_id, course_id, regular_weight, now, now))
+                exam_questions[exam_id] = []
+                exam_id += 1
+            makeup_id = exam_id
+            rows['exam'].append((makeup_id, 'Exam 1 Makeup', 100.0, course_id, now, now, True, False, mandatory_id, False))
+            rows['exam_weight'].append((makeup_id, course_id, regular_weight, now, now))
+            exam_questions[makeup_id] = []
+            exam_id += 1
+
+            max_score = round(100.0 / questions, 2)
+            for current_exam_id in exam_questions:
+                for number in range(1, questions + 1):
+                    rows['question'].append((question_id, None, number, max_score, current_exam_id, now, now))
+                    exam_questions[current_exam_id].append(question_id)
+                    for co_id in rng.sample(course_outcome_ids, min(rng.choice([1, 2]), outcomes)):
+                        rows['question_course_outcome'].append((question_id, co_id, rng.choice([0.5, 1.0, 2.0])))
+                    question_id += 1
+
+            for student_index, student_id in enumerate(sorted(rng.sample(pool, students))):
+                rows['student'].append((student_row_id, student_id, f'Student {student_id}', 'Benchmark', course_id,
+                                        now, now, student_index % 25 == 0))
+                missed_mandatory = rng.random() < 0.1
+                took_makeup = missed_mandatory and rng.random() < 0.7
+                rows['student_exam_attendance'].append((student_row_id, mandatory_id, not missed_mandatory, now, now))
+                rows['student_exam_attendance'].append((student_row_id, makeup_id, took_makeup, now, now))
+                for current_exam_id, question_ids in exam_questions.items():
+                    if (current_exam_id == mandatory_id and missed_mandatory) or \
+                            (current_exam_id == makeup_id and not took_makeup):
+                        continue
+                    for current_question_id in question_ids:
+                        if rng.random() < score_density:
+                            value = round(rng.uniform(0, max_score), 2)
+                            rows['score'].append((value, student_row_id, current_question_id, current_exam_id, now, now))
+                student_row_id += 1
+            course_id += 1
+
+        statements = {
+            'course': "INSERT INTO course (id, code, name, semester, course_weight, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            'course_settings': """INSERT INTO course_settings (course_id, success_rate_method, relative_success_threshold,
+                                  excluded, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)""",
+            'exam': """INSERT INTO exam (id, name, max_score, course_id, created_at, updated_at, is_makeup, is_final,
+                       makeup_for, is_mandatory) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            'exam_weight': "INSERT INTO exam_weight (exam_id, course_id, weight, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            'question': "INSERT INTO question (id, text, number, max_score, exam_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            'course_outcome': "INSERT INTO course_outcome (id, code, description, course_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            'question_course_outcome': "INSERT INTO question_course_outcome (question_id, course_outcome_id, relative_weight) VALUES (?, ?, ?)",
+            'course_outcome_program_outcome': """INSERT INTO course_outcome_program_outcome (course_outcome_id, program_outcome_id,
+                                                 relative_weight) VALUES (?, ?, ?)""",
+            'student': """INSERT INTO student (id, student_id, first_name, last_name, course_id, created_at, updated_at, excluded)
+                          VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            'score': "INSERT INTO score (score, student_id, question_id, exam_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            'student_exam_attendance': """INSERT INTO student_exam_attendance (student_id, exam_id, attended, created_at, updated_at)
+                                          VALUES (?, ?, ?, ?, ?)""",
+        }
+        for table, sql in statements.items():
+            conn.executemany(sql, rows[table])
+        conn.execute("COMMIT")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    counts = {table: len(table_rows) for table, table_rows in rows.items()}
+    counts['program_outcome'] = len(po_ids)
+    counts['graduating_student'] = len(graduating)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic Accredit Helper Pro database of any size')
+    parser.add_argument('--db', required=True, help='SQLite database to write')
+    parser.add_argument('--courses', type=int, default=DEFAULT_SIZE['courses'], help='Number of courses')
+    parser.add_argument('--students', type=int, default=DEFAULT_SIZE['students'], help='Students per course')
+    parser.add_argument('--exams', type=int, default=DEFAULT_SIZE['exams'], help='Regular exams per course (plus one makeup)')
+    parser.add_argument('--questions', type=int, default=DEFAULT_SIZE['questions'], help='Questions per exam')
+    parser.add_argument('--outcomes', type=int, default=DEFAULT_SIZE['outcomes'], help='Course outcomes per course')
+    parser.add_argument('--program-outcomes', type=int, default=DEFAULT_SIZE['program_outcomes'], help='Program outcomes')
+    parser.add_argument('--score-density', type=float, default=DEFAULT_SIZE['score_density'],
+                        help='Share of questions with a score (0-1)')
+    parser.add_argument('--student-pool', type=int, help='Distinct student IDs shared by the courses')
+    parser.add_argument('--graduating-share', type=float, default=0.2, help='Share of students in the graduating list')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--code-prefix', default='BENCH', help='Course code and student ID prefix')
+    parser.add_argument('--append', action='store_true', help='Add to an existing database instead of replacing it')
+    args = parser.parse_args()
+
+    if os.path.exists(args.db) and not args.append:
+        os.remove(args.db)
+    os.makedirs(os.path.dirname(os.path.abspath(args.db)), exist_ok=True)
+
+    start = time.perf_counter()
+    counts = generate_dataset(args.db, courses=args.courses, students=args.students, exams=args.exams,
+                              questions=args.questions, outcomes=args.outcomes, program_outcomes=args.program_outcomes,
+                              score_density=args.score_density, student_pool=args.student_pool,
+                              graduating_share=args.graduating_share, seed=args.seed, code_prefix=args.code_prefix)
+    elapsed = time.perf_counter() - start
+    for table, count in counts.items():
+        print(f"{table:>32}: {count}")
+    print(f"Dataset written to {args.db} in {elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -228,6 +228,8 @@ class Score(db.Model):
 
     # Composite indexes for performance + Step 4 optimizations
     __table_args__ = (
+        # One score per student/question/exam (key of the bulk score upsert)
+        db.UniqueConstraint('student_id', 'question_id', 'exam_id', name='_score_student_question_exam_uc'),
         Index('idx_score_student_exam_question', 'student_id', 'exam_id', 'question_id'),
         Index('idx_score_exam_question_student', 'exam_id', 'question_id', 'student_id'),
         # Step 4: Coverage index for score lookups (includes score value for covering index)
@@ -341,4 +343,86 @@ class GraduatingStudent(db.Model):
     def __repr__(self):
         return f"<GraduatingStudent {self.student_id}>"
 
+class CourseDataVersion(db.Model):
+    """Per-course data version, bumped whenever data affecting the course's results changes"""
+    __tablename__ = 'course_data_version'
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id', ondelete='CASCADE'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self):
+        return f"<CourseDataVersion {self.version} for Course {self.course_id}>"
+
+class CourseResultCache(db.Model):
+    """Materialized per-course outcome results reused by the multi-course pages and exports"""
+    __tablename__ = 'course_result_cache'
+    id = db.Column(db.Integer, primary_key=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id', ondelete='CASCADE'), nullable=False, index=True) # Indexed FK
+    calculation_method = db.Column(db.String(20), nullable=False)
+    include_graduating_only = db.Column(db.Boolean, nullable=False, default=False)
+    result_type = db.Column(db.String(20), nullable=False, default='aggregate')
+    data_version = db.Column(db.Integer, nullable=False, default=0)
+    result_json = db.Column(db.Text, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.now)
+
+    __table_args__ = (
+        db.UniqueConstraint('course_id', 'calculation_method', 'include_graduating_only', 'result_type',
+                            name='_course_result_cache_key_uc'),
+    )
+
+    def __repr__(self):
+        return f"<CourseResultCache {self.result_type}/{self.calculation_method} for Course {self.course_id}>"
+
+class OutcomeDescription(db.Model):
+    """Course outcome description known to the similarity engine (routes/similarity_engine.py)"""
+    __tablename__ = 'outcome_description'
+    description_hash = db.Column(db.String(40), primary_key=True)  # sha1 of the lower-cased description
+    description = db.Column(db.Text, nullable=False)
+    covered_similarity = db.Column(db.Float, nullable=False)  # Every pair scoring at least this much is stored
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self):
+        return f"<OutcomeDescription {self.description_hash} (covered {self.covered_similarity})>"
+
+class OutcomeSimilarity(db.Model):
+    """Jaro-Winkler similarity of two course outcome descriptions (hash_a < hash_b)"""
+    __tablename__ = 'outcome_similarity'
+    hash_a = db.Column(db.String(40), primary_key=True)
+    hash_b = db.Column(db.String(40), primary_key=True, index=True) # Indexed for removing a description's scores
+    similarity = db.Column(db.Float, nullable=False, index=True) # Indexed for threshold lookups
+
+    def __repr__(self):
+        return f"<OutcomeSimilarity {self.hash_a}/{self.hash_b} {self.similarity:.4f}>"
+
+class BackgroundJob(db.Model):
+    """Long-running task (e.g. PDF report generation) executed by the in-process job queue"""
+    __tablename__ = 'background_job'
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex, used in /jobs/<id>
+    job_type = db.Column(db.String(50), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, running, completed, failed, cancelled, interrupted
+    current = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    result_path = db.Column(db.String(500), nullable=True)  # File offered by /jobs/<id>/download
+    result_name = db.Column(db.String(255), nullable=True)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<BackgroundJob {self.job_type} {self.id} ({self.status})>"
+
+class SchemaFingerprint(db.Model):
+    """Signatures of the schema checked at the last startup (see db_schema_fingerprint.py)"""
+    __tablename__ = 'schema_fingerprint'
+    id = db.Column(db.Integer, primary_key=True)  # Single row (id 1)
+    code_signature = db.Column(db.String(40), nullable=False)  # Models, required indexes and migrations
+    schema_signature = db.Column(db.String(40), nullable=False)  # sqlite_master after the checks
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self):
+        return f"<SchemaFingerprint {self.code_signature[:8]}/{self.schema_signature[:8]}>"
+
 # --- END OF FILE models.py ---
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""
+Compiled achievement-level classifier.
+
+get_achievement_level() used to sort the level list and convert every
+boundary with Decimal(str(...)) on every call, and the results and all-courses
+pages call it for every student x outcome cell. The levels of a course (or
+the global levels) are now compiled once into an AchievementLevelClassifier:
+
+1. Scores are rounded half up to 0.01 as before, so they are whole cents;
+   each level's [min_score, max_score] becomes the range of cents it contains
+2. The level boundaries split the cents into segments that all belong to the
+   same level (the level with the highest min_score wins where levels overlap,
+   gaps belong to no level); the segment starts are kept in a sorted list
+3. A score is classified with one bisect on that list
+
+Classifiers are cached by the content of the level list (name, color and
+boundaries), so editing the levels simply compiles a new classifier on the
+next lookup. The results are identical to the previous scan, including the
+'Invalid Score', 'Config Error' and 'Not Categorized' cases.
+"""
+
+import bisect
+import logging
+import threading
+from decimal import Decimal, InvalidOperation, ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_UP
+
+INVALID_SCORE = {'name': 'Invalid Score', 'color': 'secondary'}
+CONFIG_ERROR = {'name': 'Config Error', 'color': 'danger'}
+NOT_CATEGORIZED = {'name': 'Not Categorized', 'color': 'secondary'}
+
+CENT = Decimal('0.01')
+NEGATIVE_INFINITY = float('-inf')
+POSITIVE_INFINITY = float('inf')
+
+# Compiled classifiers kept before the cache is cleared (one per distinct level set)
+MAX_CACHED_CLASSIFIERS = 256
+
+_classifier_lock = threading.Lock()
+_classifiers = {}
+
+
+def _lower_cents(value):
+    """Smallest whole number of cents >= value (-inf for -Infinity)"""
+    if value.is_infinite():
+        return NEGATIVE_INFINITY if value < 0 else POSITIVE_INFINITY
+    return int((value * 100).to_integral_value(rounding=ROUND_CEILING))
+
+
+def _upper_cents(value):
+    """Largest whole number of cents <= value (inf for Infinity)"""
+    if value.is_infinite():
+        return POSITIVE_INFINITY if value > 0 else NEGATIVE_INFINITY
+    return int((value * 100).to_integral_value(rounding=ROUND_FLOOR))
+
+
+class AchievementLevelClassifier:
+    """Achievement levels compiled into sorted segment starts for bisect lookups"""
+
+    def __init__(self, achievement_levels):
+        self.error = None
+        self.starts = []
+        self.segments = []
+
+        # Ensure achievement_levels is a list and contains valid level objects
+        if not isinstance(achievement_levels, list):
+            self.error = CONFIG_ERROR
+            return
+
+        # Highest min_score first: where levels overlap, the first matching level wins
+        try:
+            sorted_levels = sorted(achievement_levels, key=lambda x: Decimal(str(x.min_score)), reverse=True)
+        except (InvalidOperation, TypeError, ValueError):
+            self.error = CONFIG_ERROR  # Error in level data
+            return
+
+        ranges = []
+        for level in sorted_levels:
+            try:
+                min_score_decimal = Decimal(str(level.min_score))
+                max_score_decimal = Decimal(str(level.max_score))
+                if min_score_decimal.is_nan() or max_score_decimal.is_nan():
+                    raise InvalidOperation()
+            except (InvalidOperation, TypeError, ValueError):
+                logging.warning(f"Skipping achievement level '{level.name}' due to invalid boundary values")
+                continue
+            low, high = _lower_cents(min_score_decimal), _upper_cents(max_score_decimal)
+            if low <= high:
+                ranges.append((low, high, {'name': level.name, 'color': level.color}))
+
+        # Membership only changes where a level starts or just after it ends
+        starts = sorted({low for low, _, _ in ranges} |
+                        {high + 1 for _, high, _ in ranges if high != POSITIVE_INFINITY})
+        for start in starts:
+            self.starts.append(start)
+            self.segments.append(next((result for low, high, result in ranges if low <= start <= high), None))
+
+    def classify(self, score, fallback=NOT_CATEGORIZED):
+        """{'name', 'color'} of the level the score (rounded half up to 0.01) falls into"""
+        try:
+            # Ensure score is a Decimal for precision. Handle potential non-numeric input.
+            score_decimal = score if isinstance(score, Decimal) else Decimal(str(score))
+            # Example: 59.995 -> 60.00, 59.994 -> 59.99
+            rounded_score = score_decimal.quantize(CENT, rounding=ROUND_HALF_UP)
+        except (InvalidOperation, TypeError, ValueError):
+            # Handle cases where score might be None, infinity or an unconvertible string
+            return dict(INVALID_SCORE)
+
+        if self.error is not None:
+            return dict(self.error)
+        if rounded_score.is_nan():
+            return dict(fallback)
+
+        position = bisect.bisect_right(self.starts, int(rounded_score * 100)) - 1
+        result = self.segments[position] if position >= 0 else None
+        # If no category matches (e.g., score is 0.00 and lowest level starts at 0.01)
+        return dict(result if result is not None else fallback)
+
+
+def _levels_key(achievement_levels):
+    """Content of the level list, identifying its compiled classifier"""
+    return tuple((level.name, level.color, level.min_score, level.max_score) for level in achievement_levels)
+
+
+def get_achievement_classifier(achievement_levels):
+    """The compiled classifier of a level list (compiled once per distinct set of levels)"""
+    if isinstance(achievement_levels, AchievementLevelClassifier):
+        return achievement_levels
+    if not isinstance(achievement_levels, list):
+        return AchievementLevelClassifier(achievement_levels)
+    try:
+        key = _levels_key(achievement_levels)
+        hash(key)
+    except (AttributeError, TypeError):
+        # Levels that cannot be identified are compiled without caching
+        return AchievementLevelClassifier(achievement_levels)
+
+    with _classifier_lock:
+        classifier = _classifiers.get(key)
+    if classifier is None:
+        classifier = AchievementLevelClassifier(achievement_levels)
+        with _classifier_lock:
+            if len(_classifiers) >= MAX_CACHED_CLASSIFIERS:
+                _classifiers.clear()
+            _classifiers[key] = classifier
+    return classifier
@@ -3,11 +3,12 @@ from models import Question, CourseOutcome, Log, Student, Exam, Score, Course, A
 from app import db
 import logging
 from decimal import Decimal, InvalidOperation
-from routes.calculation_routes import get_achievement_level, calculate_student_exam_score_optimized, calculate_course_outcome_score_optimized
+from routes.calculation_routes import get_achievement_level, calculate_student_exam_score_optimized, calculate_course_outcome_score_optimized, load_exam_context
 import re
 import traceback
 from datetime import datetime
 from sqlalchemy import inspect, text
+from routes.result_cache import invalidate_course_results, invalidate_course_results_for_exam
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -63,6 +64,9 @@ def update_question_co_weight():
             "coid": outcome_id
         })
 
+        question = Question.query.get(question_id)
+        if question:
+            invalidate_course_results_for_exam(question.exam_id)
         db.session.commit()
         logging.info(f"Updated weight for Q:{question_id}-CO:{outcome_id} to {weight_value}. Rows affected: {result.rowcount}")
 
@@ -205,12 +209,16 @@ def get_student_abet_scores(student_id):
         else:
             normalized_weights[exam_id] = weight
     
+    # Exam metadata and outcome weights, loaded once instead of per outcome
+    exam_context = load_exam_context(course_id)
+    
     # Calculate outcome scores using helper functions
     result = []
     for outcome in course_outcomes:
         # Use calculate_course_outcome_score_optimized to get consistent results
         outcome_score = calculate_course_outcome_score_optimized(
-            student_id, outcome.id, scores_dict, outcome_questions, normalized_weights
+            student_id, outcome.id, scores_dict, outcome_questions, normalized_weights,
+            exam_context=exam_context
         )
         
         if outcome_score is not None:
@@ -381,6 +389,7 @@ def mass_associate_outcomes():
             )
             db.session.add(log)
             
+            invalidate_course_results(exam.course_id)
             db.session.commit()
             
             return jsonify({
@@ -438,6 +447,7 @@ def update_question_outcome():
         )
         db.session.add(log)
         
+        invalidate_course_results(question.exam.course_id)
         db.session.commit()
         return jsonify({
             'success': True, 
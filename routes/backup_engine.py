@@ -0,0 +1,416 @@
+"""
+Database Backup Engine
+
+Backups are taken with SQLite's online backup API (sqlite3.Connection.backup)
+instead of copying the database file. The copy is consistent even while the
+application writes to the database, and it is made in steps of
+BACKUP_PAGES_PER_STEP pages with a short pause between steps, so writers are
+not blocked for the whole copy. A write by another connection makes SQLite
+restart the copy; after MAX_BACKUP_RESTARTS restarts the copy is finished in
+a single step.
+
+Two backup formats are written, chosen by the BACKUP_FORMAT setting:
+
+- 'full' (default): a plain SQLite database file (<name>.db)
+- 'incremental': a compressed page file (<name>.dbz) that only stores the pages
+  that changed since the previous incremental backup. Every
+  INCREMENTAL_CHAIN_LIMIT backups a self-contained base backup is written
+  again, so restoring never has to replay a long chain.
+
+A .dbz file starts with DBZ_MAGIC, a 4-byte header length and a JSON header
+(page size, page count, parent backup). Then come the zlib-compressed
+BLAKE2 digests of all pages, used to find the changed pages for the next
+backup. After that are the changed pages, each stored as page number,
+compressed length and zlib data. A .dbz backup is turned back into a
+database with materialize_backup().
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+import time
+import zlib
+from datetime import datetime
+
+from flask import current_app
+
+# Pages copied per backup step and pause between steps (lets writers in between)
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_STEP_PAUSE = 0.005
+
+# Step-by-step copies restarted more often than this by concurrent writes are finished in one step
+MAX_BACKUP_RESTARTS = 3
+
+FULL_BACKUP_EXTENSION = '.db'
+INCREMENTAL_BACKUP_EXTENSION = '.dbz'
+BACKUP_EXTENSIONS = (FULL_BACKUP_EXTENSION, INCREMENTAL_BACKUP_EXTENSION)
+
+# Number of incremental backups in a chain before a new base backup is written
+INCREMENTAL_CHAIN_LIMIT = 10
+
+DBZ_MAGIC = b'ACCREDIT-DBZ\x00\x01'
+PAGE_DIGEST_SIZE = 16
+_PAGE_RECORD = struct.Struct('>II')  # page number (1-based), compressed length
+
+
+class _BackupRestarted(Exception):
+    """Raised from the backup progress callback to abandon a copy that keeps restarting"""
+
+
+def is_backup_filename(filename):
+    """True for the file names of full (.db) and incremental (.dbz) backups"""
+    return bool(filename) and isinstance(filename, str) and filename.endswith(BACKUP_EXTENSIONS)
+
+
+def list_backup_files(backup_dir, prefixes=None):
+    """Paths of the backups in backup_dir (both formats), optionally only those starting with one of prefixes"""
+    if not os.path.isdir(backup_dir):
+        return []
+    paths = []
+    for filename in os.listdir(backup_dir):
+        if not is_backup_filename(filename):
+            continue
+        if prefixes and not filename.startswith(tuple(prefixes)):
+            continue
+        paths.append(os.path.join(backup_dir, filename))
+    return paths
+
+
+def online_backup(source_path, dest_path, pages_per_step=None, step_pause=None):
+    """
+    Copy a live SQLite database with the online backup API.
+
+    The copy is written to a temporary file next to dest_path and renamed when
+    complete, so dest_path never holds a partial backup.
+    """
+    if pages_per_step is None:
+        pages_per_step = _config_int('BACKUP_PAGES_PER_STEP', BACKUP_PAGES_PER_STEP)
+    if step_pause is None:
+        step_pause = BACKUP_STEP_PAUSE
+
+    progress = {'remaining': None, 'restarts': 0}
+
+    def throttle(status, remaining, total):
+        # A write by another connection restarts the copy from the first page
+        if progress['remaining'] is not None and remaining > progress['remaining']:
+            progress['restarts'] += 1
+            if progress['restarts'] > MAX_BACKUP_RESTARTS:
+                raise _BackupRestarted()
+        progress['remaining'] = remaining
+        # Give waiting writers the database between two steps
+        if remaining and step_pause:
+            time.sleep(step_pause)
+
+    temp_path = f"{dest_path}.partial"
+    source = sqlite3.connect(source_path, timeout=30)
+    try:
+        destination = sqlite3.connect(temp_path)
+        try:
+            try:
+                source.backup(destination, pages=max(1, int(pages_per_step)), progress=throttle)
+            except _BackupRestarted:
+                # The database is written too often to finish step by step:
+                # copy it in one step (writers wait for this copy only)
+                logging.info(f"Online backup of {source_path} restarted {progress['restarts']} times, copying in one step")
+                source.backup(destination)
+        finally:
+            destination.close()
+        os.replace(temp_path, dest_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        source.close()
+    return dest_path
+
+
+def restore_database_file(source_path, db_path):
+    """
+    Replace the contents of the live database with a backup through the SQLite backup API.
+
+    Writing the pages through SQLite instead of copying the file keeps the
+    database consistent in WAL mode: a -wal file left by the old database can
+    never be replayed onto the restored one. If SQLite cannot copy into the
+    database (e.g. a different page size in WAL mode), the file is copied once
+    no connection holds a WAL file any more.
+    """
+    if not os.path.exists(db_path):
+        shutil.copy2(source_path, db_path)
+        return db_path
+
+    source = sqlite3.connect(source_path)
+    try:
+        destination = sqlite3.connect(db_path, timeout=30)
+        try:
+            source.backup(destination)
+            return db_path
+        except sqlite3.Error as e:
+            logging.warning(f"Restoring {source_path} through SQLite failed ({e}), copying the file instead")
+            destination.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            destination.close()
+    finally:
+        source.close()
+
+    shutil.copy2(source_path, db_path)
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    return db_path
+
+
+def create_database_backup(db_path, backup_dir, prefix, timestamp=None, backup_format=None):
+    """
+    Back up the database as <prefix>_<timestamp>.db or .dbz, returns the backup's file name.
+
+    backup_format is 'full' or 'incremental' (default: the BACKUP_FORMAT setting).
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    if backup_format is None:
+        backup_format = _config_value('BACKUP_FORMAT', 'full')
+
+    incremental = str(backup_format).lower() == 'incremental'
+    extension = INCREMENTAL_BACKUP_EXTENSION if incremental else FULL_BACKUP_EXTENSION
+
+    # Never overwrite a backup taken in the same second (it may be the parent of others)
+    filename = f"{prefix}_{timestamp}{extension}"
+    counter = 1
+    while os.path.exists(os.path.join(backup_dir, filename)):
+        filename = f"{prefix}_{timestamp}_{counter}{extension}"
+        counter += 1
+
+    start = time.perf_counter()
+    if incremental:
+        write_incremental_backup(db_path, os.path.join(backup_dir, filename), backup_dir)
+    else:
+        online_backup(db_path, os.path.join(backup_dir, filename))
+
+    logging.info(f"Created database backup {filename} in {time.perf_counter() - start:.2f}s")
+    return filename
+
+
+def write_incremental_backup(db_path, dest_path, backup_dir, parent_path=None):
+    """
+    Write a .dbz backup storing only the pages changed since the latest incremental backup.
+
+    parent_path defaults to the newest .dbz in backup_dir; a self-contained base
+    is written when there is none, its page size differs or the chain is full.
+    Returns a dict with the number of stored and total pages.
+    """
+    fd, snapshot_path = tempfile.mkstemp(suffix='.snapshot', dir=backup_dir)
+    os.close(fd)
+    try:
+        # Consistent snapshot of the live database, then read it page by page
+        online_backup(db_path, snapshot_path)
+        page_size = _read_page_size(snapshot_path)
+
+        if parent_path is None:
+            parent_path = _latest_incremental_backup(backup_dir, exclude=dest_path)
+        parent_header, parent_digests, chain_length = None, [], 0
+        if parent_path:
+            try:
+                parent_header, parent_digests = read_backup_index(parent_path)
+                # Counted from the files, a deleted base may have shortened the chain
+                chain_length = len(_backup_chain(parent_path))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unusable parent backup {parent_path}: {str(e)}")
+                parent_header = None
+        if parent_header is None or parent_header['page_size'] != page_size or chain_length >= INCREMENTAL_CHAIN_LIMIT:
+            parent_header, parent_digests, chain_length = None, [], 0
+
+        digests = []
+        changed_pages = 0
+        temp_path = f"{dest_path}.partial"
+        with open(snapshot_path, 'rb') as snapshot, open(temp_path, 'wb') as output:
+            page_count = os.path.getsize(snapshot_path) // page_size
+            for _ in range(page_count):
+                digests.append(hashlib.blake2b(snapshot.read(page_size), digest_size=PAGE_DIGEST_SIZE).digest())
+
+            header = {
+                'format': 'accredit-dbz',
+                'version': 1,
+                'page_size': page_size,
+                'page_count': page_count,
+                'parent': os.path.basename(parent_path) if parent_header else None,
+                'chain_length': chain_length,
+                'created_at': datetime.now().isoformat()
+            }
+            _write_header(output, header, digests)
+
+            # Only the pages whose digest differs from the parent's are stored
+            snapshot.seek(0)
+            for index in range(page_count):
+                page = snapshot.read(page_size)
+                if index < len(parent_digests) and parent_digests[index] == digests[index]:
+                    continue
+                data = zlib.compress(page, 6)
+                output.write(_PAGE_RECORD.pack(index + 1, len(data)))
+                output.write(data)
+                changed_pages += 1
+        os.replace(temp_path, dest_path)
+
+        logging.info(f"Incremental backup {os.path.basename(dest_path)}: {changed_pages}/{page_count} pages stored"
+                     f" (parent: {header['parent'] or 'none, base backup'})")
+        return {'stored_pages': changed_pages, 'page_count': page_count, 'parent': header['parent']}
+    finally:
+        for path in (snapshot_path, f"{dest_path}.partial"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def read_backup_index(path):
+    """Return (header, page digests) of a .dbz backup"""
+    with open(path, 'rb') as f:
+        header, digests, _ = _read_header(f)
+    return header, digests
+
+
+def materialize_backup(backup_path, dest_path):
+    """
+    Write the database stored in a backup of either format to dest_path.
+    Incremental backups are rebuilt from their base backup and every backup up to them.
+    """
+    if not backup_path.endswith(INCREMENTAL_BACKUP_EXTENSION):
+        return online_backup(backup_path, dest_path)
+
+    chain = _backup_chain(backup_path)
+    target_header, _ = read_backup_index(backup_path)
+    page_size = target_header['page_size']
+
+    temp_path = f"{dest_path}.partial"
+    try:
+        with open(temp_path, 'wb') as output:
+            # Base first, then each newer backup overwrites the pages it changed
+            for path in chain:
+                with open(path, 'rb') as f:
+                    _read_header(f)
+                    while True:
+                        record = f.read(_PAGE_RECORD.size)
+                        if not record:
+                            break
+                        page_number, length = _PAGE_RECORD.unpack(record)
+                        output.seek((page_number - 1) * page_size)
+                        output.write(zlib.decompress(f.read(length)))
+            output.truncate(target_header['page_count'] * page_size)
+        os.replace(temp_path, dest_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return dest_path
+
+
+def backup_dependents(backup_dir, filename):
+    """File names of the incremental backups whose parent is filename"""
+    dependents = []
+    for path in list_backup_files(backup_dir):
+        if not path.endswith(INCREMENTAL_BACKUP_EXTENSION):
+            continue
+        try:
+            header, _ = read_backup_index(path)
+        except (OSError, ValueError):
+            continue
+        if header.get('parent') == filename:
+            dependents.append(os.path.basename(path))
+    return dependents
+
+
+def delete_backup_file(backup_dir, filename):
+    """
+    Delete a backup. Incremental backups based on it are first rewritten as
+    self-contained base backups (keeping their name and date), so they stay restorable.
+    """
+    backup_path = os.path.join(backup_dir, filename)
+    for dependent in backup_dependents(backup_dir, filename):
+        dependent_path = os.path.join(backup_dir, dependent)
+        fd, rebuilt_path = tempfile.mkstemp(suffix='.snapshot', dir=backup_dir)
+        os.close(fd)
+        try:
+            stat = os.stat(dependent_path)
+            materialize_backup(dependent_path, rebuilt_path)
+            write_incremental_backup(rebuilt_path, dependent_path, backup_dir, parent_path='')
+            os.utime(dependent_path, (stat.st_atime, stat.st_mtime))
+            logging.info(f"Rewrote incremental backup {dependent} as a base backup before deleting {filename}")
+        finally:
+            if os.path.exists(rebuilt_path):
+                os.remove(rebuilt_path)
+    os.remove(backup_path)
+
+
+def _backup_chain(backup_path):
+    """Paths from the base backup to backup_path (oldest first)"""
+    backup_dir = os.path.dirname(backup_path)
+    chain = []
+    path = backup_path
+    while path:
+        if path in chain or len(chain) > INCREMENTAL_CHAIN_LIMIT * 2:
+            raise ValueError(f"Invalid backup chain at {os.path.basename(path)}")
+        if not os.path.exists(path):
+            raise ValueError(f"Backup {os.path.basename(path)} needed to restore {os.path.basename(backup_path)} is missing")
+        chain.append(path)
+        header, _ = read_backup_index(path)
+        path = os.path.join(backup_dir, header['parent']) if header.get('parent') else None
+    chain.reverse()
+    return chain
+
+
+def _latest_incremental_backup(backup_dir, exclude=None):
+    """Newest .dbz backup in backup_dir, or None"""
+    candidates = [path for path in list_backup_files(backup_dir)
+                  if path.endswith(INCREMENTAL_BACKUP_EXTENSION) and path != exclude]
+    if not candidates:
+        return None
+    return max(candidates, key=os.path.getmtime)
+
+
+def _write_header(output, header, digests):
+    header_bytes = json.dumps(header).encode('utf-8')
+    digest_bytes = zlib.compress(b''.join(digests), 6)
+    output.write(DBZ_MAGIC)
+    output.write(struct.pack('>I', len(header_bytes)))
+    output.write(header_bytes)
+    output.write(struct.pack('>I', len(digest_bytes)))
+    output.write(digest_bytes)
+
+
+def _read_header(f):
+    """Read the header of an open .dbz file, returns (header, digests, offset of the first page record)"""
+    if f.read(len(DBZ_MAGIC)) != DBZ_MAGIC:
+        raise ValueError('Not an incremental backup file')
+    header_length = struct.unpack('>I', f.read(4))[0]
+    header = json.loads(f.read(header_length).decode('utf-8'))
+    digest_length = struct.unpack('>I', f.read(4))[0]
+    digest_bytes = zlib.decompress(f.read(digest_length))
+    digests = [digest_bytes[i:i + PAGE_DIGEST_SIZE] for i in range(0, len(digest_bytes), PAGE_DIGEST_SIZE)]
+    return header, digests, f.tell()
+
+
+def _read_page_size(db_path):
+    """Page size from the SQLite file header (bytes 16-17, 1 means 65536)"""
+    with open(db_path, 'rb') as f:
+        header = f.read(100)
+    if len(header) < 18 or not header.startswith(b'SQLite format 3\x00'):
+        raise ValueError(f"{db_path} is not a SQLite database")
+    page_size = struct.unpack('>H', header[16:18])[0]
+    return 65536 if page_size == 1 else page_size
+
+
+def _config_value(name, default):
+    try:
+        return current_app.config.get(name, default)
+    except RuntimeError:
+        # Outside an application context (command line scripts)
+        return default
+
+
+def _config_int(name, default):
+    try:
+        return int(_config_value(name, default))
+    except (TypeError, ValueError):
+        return default
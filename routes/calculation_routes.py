@@ -10,20 +10,28 @@ import logging
 import csv
 import io
 import os
-from sqlalchemy import func
+from sqlalchemy import func, text
 from routes.utility_routes import export_to_excel_csv
-from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from decimal import Decimal, ROUND_HALF_UP
 from flask import session
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import numpy as np
 import base64
 import json
 from flask import current_app
-import concurrent.futures
 import threading
-import math
+from routes.vectorized_calculation import (
+    calculate_course_results_vectorized, CALCULATION_ENGINES,
+    ENGINE_DECIMAL, ENGINE_NUMPY, ENGINE_PARITY
+)
+from routes.result_cache import (
+    get_cached_course_results, store_course_result, get_course_data_versions,
+    invalidate_course_results,
+    invalidate_graduating_course_results, RESULT_COURSE
+)
+from routes.achievement_classifier import get_achievement_classifier
+from routes.graduating_snapshot import (
+    graduating_student_id_set, graduating_students_available, invalidate_graduating_snapshot
+)
+from db_performance import read_only_session
 
 calculation_bp = Blueprint('calculation', __name__, url_prefix='/calculation')
 
@@ -32,56 +40,11 @@ def get_achievement_level(score, achievement_levels):
     """
     Get the achievement level for a given score using precise Decimal comparisons.
     Ensures boundaries are handled correctly (e.g., 60.00 falls into 60.00-69.99).
+    
+    achievement_levels is a list of levels or an AchievementLevelClassifier; lists
+    are compiled once per distinct set of levels (see routes/achievement_classifier.py).
     """
-    try:
-        # Ensure score is a Decimal for precision. Handle potential non-numeric input.
-        if not isinstance(score, Decimal):
-            score_decimal = Decimal(str(score))
-        else:
-            score_decimal = score
-
-        # Round the score to 2 decimal places using standard rounding (half up)
-        # This standardizes the value being compared against boundaries.
-        # Example: 59.995 -> 60.00, 59.994 -> 59.99
-        rounded_score = score_decimal.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-
-    except (InvalidOperation, TypeError, ValueError):
-         # Handle cases where score might be None, NaN, infinity, or unconvertible string
-        return {'name': 'Invalid Score', 'color': 'secondary'}
-
-    # Ensure achievement_levels is a list and contains valid level objects
-    if not isinstance(achievement_levels, list):
-         return {'name': 'Config Error', 'color': 'danger'} # Should not happen if called correctly
-
-    # Sort levels by min_score descending to find the highest applicable level first.
-    # Use Decimal for sorting to ensure correct order (e.g., 90.00 > 89.99)
-    try:
-        sorted_levels = sorted(achievement_levels, key=lambda x: Decimal(str(x.min_score)), reverse=True)
-    except (InvalidOperation, TypeError, ValueError):
-         return {'name': 'Config Error', 'color': 'danger'} # Error in level data
-
-    for level in sorted_levels:
-        try:
-            # Convert level boundaries to Decimal for precise comparison
-            min_score_decimal = Decimal(str(level.min_score))
-            max_score_decimal = Decimal(str(level.max_score))
-
-            # *** CRITICAL COMPARISON LOGIC ***
-            # Check if the rounded score is WITHIN the level's range (inclusive)
-            # rounded_score >= min_score AND rounded_score <= max_score
-            if rounded_score >= min_score_decimal and rounded_score <= max_score_decimal:
-                return {
-                    'name': level.name,
-                    'color': level.color
-                }
-        except (InvalidOperation, TypeError, ValueError):
-             # Skip level if its boundaries are invalid
-             print(f"Warning: Skipping achievement level '{level.name}' due to invalid boundary values.")
-             continue # Move to the next level
-
-    # If no category matches (e.g., score is 0.00 and lowest level starts at 0.01)
-    # Or if all levels had errors
-    return {'name': 'Not Categorized', 'color': 'secondary'}
+    return get_achievement_classifier(achievement_levels).classify(score)
 
 @calculation_bp.route('/course/<int:course_id>')
 def course_calculations(course_id):
@@ -192,7 +155,7 @@ def course_calculations(course_id):
                               is_excluded=True,
                               total_weight_percent=total_weight_percent,
                               exam_weights=exam_weights,
-                              get_achievement_level=get_achievement_level,
+                              achievement_classifier=get_achievement_classifier(achievement_levels),
                               active_page='courses')
     
     # Determine which calculation method to use (from session, like all_courses)
@@ -267,7 +230,7 @@ def course_calculations(course_id):
                               is_excluded=False,
                               total_weight_percent=total_weight_percent,
                               exam_weights=exam_weights,
-                              get_achievement_level=get_achievement_level,
+                              achievement_classifier=get_achievement_classifier(achievement_levels),
                               active_page='courses')
     
     # Data is available for calculation
@@ -279,10 +242,13 @@ def course_calculations(course_id):
     exam_scores_dict = {}
     exam_max_scores = {}  # Store max scores for each exam
     
+    # Question totals come with the exam context the calculation already loaded
+    exam_context = results.get('exam_context') or load_exam_context(course_id)
+    question_totals = exam_context['question_totals']
+    
     for exam in regular_exams:
-        # Calculate max possible score for this exam
-        questions = Question.query.filter_by(exam_id=exam.id).all()
-        exam_max_scores[exam.id] = sum(float(q.max_score) for q in questions) if questions else 0
+        # Max possible score for this exam
+        exam_max_scores[exam.id] = float(question_totals.get(exam.id, 0))
         
         # Get all scores for this exam
         exam_scores = Score.query.filter_by(exam_id=exam.id).all()
@@ -302,9 +268,8 @@ def course_calculations(course_id):
     # Get scores for all students for each makeup exam
     makeup_scores_dict = {}
     for exam in makeup_exams:
-        # Calculate max possible score for this makeup exam
-        questions = Question.query.filter_by(exam_id=exam.id).all()
-        exam_max_scores[exam.id] = sum(float(q.max_score) for q in questions) if questions else 0
+        # Max possible score for this makeup exam
+        exam_max_scores[exam.id] = float(question_totals.get(exam.id, 0))
         
         # Get all scores for this makeup exam
         makeup_scores = Score.query.filter_by(exam_id=exam.id).all()
@@ -479,7 +444,7 @@ def course_calculations(course_id):
                           is_excluded=False,
                           total_weight_percent=total_weight_percent,
                           exam_weights=exam_weights,
-                          get_achievement_level=get_achievement_level,
+                          achievement_classifier=get_achievement_classifier(achievement_levels),
                           active_page='courses')
 
 @calculation_bp.route('/course/<int:course_id>/export')
@@ -511,6 +476,7 @@ def export_results(course_id):
     
     # Get achievement levels
     achievement_levels = AchievementLevel.query.filter_by(course_id=course_id).order_by(AchievementLevel.min_score.desc()).all()
+    achievement_classifier = get_achievement_classifier(achievement_levels)
     
     students = Student.query.filter_by(course_id=course_id)
     
@@ -542,6 +508,9 @@ def export_results(course_id):
     for exam in all_exams:
         questions_by_exam[exam.id] = exam.questions
     
+    # Exam metadata and outcome weights for the score helpers, loaded once for the course
+    exam_context = build_exam_context(all_exams, questions_by_exam, *load_course_outcome_weights([course_id]))
+    
     # Preload all scores
     scores_dict = {}
     student_ids = [s.id for s in students]
@@ -604,7 +573,6 @@ def export_results(course_id):
     for student in students:
         # Skip excluded students
         student_data = {}
-        attendances_count = StudentExamAttendance.query.filter_by(student_id=student.id).count()
         
         # Check if student should be skipped (similar to course_calculations logic)
         should_skip = False
@@ -662,7 +630,7 @@ def export_results(course_id):
             
             # Use the proper exam score (original or makeup)
             if use_makeup:
-                exam_score = calculate_student_exam_score_optimized(student.id, actual_exam_id, scores_dict, questions_by_exam[actual_exam_id], attendance_dict)
+                exam_score = calculate_student_exam_score_optimized(student.id, actual_exam_id, scores_dict, questions_by_exam[actual_exam_id], attendance_dict, exam_context)
                 if exam_score is not None:
                     # Ensure consistent Decimal conversion
                     exam_score = Decimal(str(exam_score))
@@ -677,7 +645,7 @@ def export_results(course_id):
             # Otherwise use regular exam score
             exam_score = calculate_student_exam_score_optimized(
                 student.id, exam.id, scores_dict,
-                questions_by_exam[exam.id], attendance_dict
+                questions_by_exam[exam.id], attendance_dict, exam_context
             )
             if exam_score is not None:
                 # Ensure consistent Decimal conversion
@@ -703,7 +671,7 @@ def export_results(course_id):
             
             # Calculate course outcome achievement
             co_score = calculate_course_outcome_score_optimized(
-                student.id, co.id, scores_dict, outcome_questions, normalized_weights
+                student.id, co.id, scores_dict, outcome_questions, normalized_weights, exam_context=exam_context
             )
             
             if co_score is not None:
@@ -717,7 +685,7 @@ def export_results(course_id):
             student_row[-2] = round(float(overall_percentage), 2)
             
             # Get and add achievement level
-            level = get_achievement_level(float(overall_percentage), achievement_levels)
+            level = achievement_classifier.classify(float(overall_percentage))
             student_row[-1] = level['name']
             
             # Store for potential sorting
@@ -928,13 +896,13 @@ def bulk_load_course_data(course_ids, display_method='absolute', include_graduat
     
     # 5. Load students for these courses (with optional graduating students filter)
     if include_graduating_only:
-        # Get graduating student IDs first
+        # Graduating student numbers from the in-memory snapshot (no query unless the list changed)
         graduating_student_ids = get_graduating_student_ids()
         if graduating_student_ids:
             # Filter to only graduating students during the query for efficiency
             students_query = Student.query.filter(
                 Student.course_id.in_(course_ids),
-                Student.student_id.in_(graduating_student_ids)
+                Student.student_id.in_(sorted(graduating_student_ids))
             )
         else:
             # No graduating students defined, return empty query
@@ -972,75 +940,87 @@ def bulk_load_course_data(course_ids, display_method='absolute', include_graduat
         questions_by_exam[question.exam_id].append(question)
         question_ids.append(question.id)
     
-    # 8. Load all scores for all students and questions
-    scores_dict = {}
-    if student_ids and exam_ids:
-        scores_query = Score.query.filter(
-            Score.student_id.in_(student_ids),
-            Score.exam_id.in_(exam_ids)
-        )
-        all_scores = scores_query.all()
-        for score in all_scores:
-            scores_dict[(score.student_id, score.question_id, score.exam_id)] = score.score
+    # ==== HASH INDEXES ====
+    # Every row below is attributed to its course through these dictionaries, so
+    # organizing the data is linear in the number of rows loaded.
     
-    # 9. Load all attendance records
-    attendance_dict = {}
+    # student.id -> course_id (also acts as the student filter, e.g. graduating students only)
+    student_course_index = {student.id: student.course_id for student in all_students}
+    
+    # question.id -> Question, exam.id -> course_id
+    question_index = {question.id: question for question in all_questions}
+    exam_course_index = {exam.id: exam.course_id for exam in all_exams}
+    
+    # 8. Load all scores for these courses' exams, grouped by course
+    # Column tuples instead of ORM objects, and the exam join keeps the IN list to course ids
+    scores_by_course = {}
     if student_ids and exam_ids:
-        attendance_query = StudentExamAttendance.query.filter(
-            StudentExamAttendance.student_id.in_(student_ids),
-            StudentExamAttendance.exam_id.in_(exam_ids)
-        )
-        all_attendances = attendance_query.all()
-        for attendance in all_attendances:
-            attendance_dict[(attendance.student_id, attendance.exam_id)] = attendance.attended
+        score_rows = db.session.query(
+            Score.student_id, Score.question_id, Score.exam_id, Score.score
+        ).join(Exam, Score.exam_id == Exam.id).filter(Exam.course_id.in_(course_ids))
+        for student_id, question_id, exam_id, score in score_rows:
+            course_id = student_course_index.get(student_id)
+            if course_id is not None:
+                scores_by_course.setdefault(course_id, {})[(student_id, question_id, exam_id)] = score
+    
+    # 9. Load all attendance records, grouped by course
+    attendance_by_course = {}
+    if student_ids and exam_ids:
+        attendance_rows = db.session.query(
+            StudentExamAttendance.student_id, StudentExamAttendance.exam_id, StudentExamAttendance.attended
+        ).join(Exam, StudentExamAttendance.exam_id == Exam.id).filter(Exam.course_id.in_(course_ids))
+        for student_id, exam_id, attended in attendance_rows:
+            course_id = student_course_index.get(student_id)
+            if course_id is not None:
+                attendance_by_course.setdefault(course_id, {})[(student_id, exam_id)] = attended
     
     # 10. Load program outcomes and their relationships
-    # Get all program outcomes related to these course outcomes
+    # co_id -> {po_id: relative weight}, in association row order
+    co_po_weights_by_co = {}
+    program_outcomes_dict = {}
     if outcome_ids:
-        from sqlalchemy import text
-        # Query the association table to get program outcome relationships
-        placeholders = ','.join(str(id) for id in outcome_ids)
+        course_placeholders = ','.join(str(int(id)) for id in course_ids)
         po_relationships = db.session.execute(
-            text(f"SELECT course_outcome_id, program_outcome_id FROM course_outcome_program_outcome WHERE course_outcome_id IN ({placeholders})")
+            text(f"""
+                SELECT copo.course_outcome_id, copo.program_outcome_id, copo.relative_weight
+                FROM course_outcome_program_outcome copo
+                JOIN course_outcome co ON co.id = copo.course_outcome_id
+                WHERE co.course_id IN ({course_placeholders})
+            """)
         ).fetchall()
         
-        # Get unique program outcome IDs
-        po_ids = list(set(rel[1] for rel in po_relationships))
+        # Keep the CO-PO relative weights so calculation engines don't have to re-query them
+        for co_id, po_id, relative_weight in po_relationships:
+            weight = Decimal(str(relative_weight)) if relative_weight is not None else Decimal('1.0')
+            co_po_weights_by_co.setdefault(co_id, {})[po_id] = weight
         
         # Load program outcomes
-        program_outcomes_query = ProgramOutcome.query.filter(ProgramOutcome.id.in_(po_ids)) if po_ids else []
-        program_outcomes = program_outcomes_query.all() if po_ids else []
-        program_outcomes_dict = {po.id: po for po in program_outcomes}
-        
-        # Build program outcome relationships by course
-        po_relationships_by_course = {}
-        for course_id in course_ids:
-            course_outcomes = outcomes_by_course.get(course_id, [])
-            course_po_ids = set()
-            for co in course_outcomes:
-                for rel in po_relationships:
-                    if rel[0] == co.id:
-                        course_po_ids.add(rel[1])
-            po_relationships_by_course[course_id] = course_po_ids
-    else:
-        program_outcomes = []
-        program_outcomes_dict = {}
-        po_relationships_by_course = {}
+        po_ids = list({rel[1] for rel in po_relationships})
+        if po_ids:
+            program_outcomes_dict = {po.id: po for po in ProgramOutcome.query.filter(ProgramOutcome.id.in_(po_ids)).all()}
     
     # 11. Load question-course outcome relationships
+    # co_id -> [question_id, ...] and co_id -> {question_id: relative weight}
     question_outcome_map = {}
+    qco_weights_by_co = {}
     if question_ids and outcome_ids:
-        q_placeholders = ','.join(str(id) for id in question_ids)
-        co_placeholders = ','.join(str(id) for id in outcome_ids)
+        course_placeholders = ','.join(str(int(id)) for id in course_ids)
         qco_relationships = db.session.execute(
-            text(f"SELECT question_id, course_outcome_id FROM question_course_outcome WHERE question_id IN ({q_placeholders}) AND course_outcome_id IN ({co_placeholders})")
+            text(f"""
+                SELECT qco.question_id, qco.course_outcome_id, qco.relative_weight
+                FROM question_course_outcome qco
+                JOIN course_outcome co ON co.id = qco.course_outcome_id
+                WHERE co.course_id IN ({course_placeholders})
+            """)
         ).fetchall()
         
-        for rel in qco_relationships:
-            question_id, outcome_id = rel
-            if outcome_id not in question_outcome_map:
-                question_outcome_map[outcome_id] = []
-            question_outcome_map[outcome_id].append(question_id)
+        for question_id, outcome_id, relative_weight in qco_relationships:
+            if question_id not in question_index:
+                continue
+            question_outcome_map.setdefault(outcome_id, []).append(question_id)
+            qco_weights_by_co.setdefault(outcome_id, {})[question_id] = (
+                Decimal(str(relative_weight)) if relative_weight is not None else Decimal('1.0')
+            )
     
     # ==== ORGANIZE DATA BY COURSE ====
     
@@ -1069,19 +1049,14 @@ def bulk_load_course_data(course_ids, display_method='absolute', include_graduat
         for exam in regular_exams + makeup_exams:
             course_questions_by_exam[exam.id] = questions_by_exam.get(exam.id, [])
         
-        # Organize outcome questions for this course
+        # Organize outcome questions for this course (only questions of this course's exams)
         course_outcomes = outcomes_by_course.get(course_id, [])
         outcome_questions = {}
         for outcome in course_outcomes:
-            related_question_ids = question_outcome_map.get(outcome.id, [])
-            related_questions = []
-            for q_id in related_question_ids:
-                for exam_questions in course_questions_by_exam.values():
-                    for question in exam_questions:
-                        if question.id == q_id:
-                            related_questions.append(question)
-                            break
-            outcome_questions[outcome.id] = related_questions
+            outcome_questions[outcome.id] = [
+                question_index[q_id] for q_id in question_outcome_map.get(outcome.id, [])
+                if exam_course_index.get(question_index[q_id].exam_id) == course_id
+            ]
         
         # Calculate normalized weights
         course_weights = weights_by_course.get(course_id, {})
@@ -1097,21 +1072,15 @@ def bulk_load_course_data(course_ids, display_method='absolute', include_graduat
                 for exam in regular_exams:
                     normalized_weights[exam.id] = equal_weight
         
-        # Get program outcomes for this course
-        course_po_ids = po_relationships_by_course.get(course_id, set())
-        course_program_outcomes = [program_outcomes_dict[po_id] for po_id in course_po_ids if po_id in program_outcomes_dict]
-        
-        # Build program outcome to course outcome mapping
+        # Program outcomes for this course and the PO -> CO mapping, from the co_id -> po_ids index
+        course_po_ids = set()
         program_to_course_outcomes = {}
-        for po in course_program_outcomes:
-            related_cos = []
-            for co in course_outcomes:
-                # Check if this CO is related to this PO using the pre-loaded relationships
-                for rel in po_relationships:
-                    if rel[0] == co.id and rel[1] == po.id:
-                        related_cos.append(co)
-                        break
-            program_to_course_outcomes[po.id] = related_cos
+        for co in course_outcomes:
+            for po_id in co_po_weights_by_co.get(co.id, {}):
+                course_po_ids.add(po_id)
+                program_to_course_outcomes.setdefault(po_id, []).append(co)
+        course_program_outcomes = [program_outcomes_dict[po_id] for po_id in course_po_ids if po_id in program_outcomes_dict]
+        program_to_course_outcomes = {po.id: program_to_course_outcomes[po.id] for po in course_program_outcomes}
         
         # Create makeup mapping
         makeup_map = {}
@@ -1119,6 +1088,16 @@ def bulk_load_course_data(course_ids, display_method='absolute', include_graduat
             if makeup.makeup_for:
                 makeup_map[makeup.makeup_for] = makeup
         
+        # Relative weights for this course's Q-CO and CO-PO links, keyed like the association rows
+        question_co_weights = {}
+        co_po_weights = {}
+        for co in course_outcomes:
+            for q_id, weight in qco_weights_by_co.get(co.id, {}).items():
+                question_co_weights[(q_id, co.id)] = weight
+            for po_id, weight in co_po_weights_by_co.get(co.id, {}).items():
+                co_po_weights[(co.id, po_id)] = weight
+        
+        course_students = students_by_course.get(course_id, [])
         bulk_data[course_id] = {
             'course': course,
             'settings': settings,
@@ -1127,17 +1106,28 @@ def bulk_load_course_data(course_ids, display_method='absolute', include_graduat
             'all_exams': regular_exams + makeup_exams,
             'course_outcomes': course_outcomes,
             'program_outcomes': course_program_outcomes,
-            'students': students_by_course.get(course_id, []),
+            'students': course_students,
             'questions_by_exam': course_questions_by_exam,
             'outcome_questions': outcome_questions,
             'normalized_weights': normalized_weights,
+            # Raw weights for calculate_course_data_results(), which normalizes them like a single course
+            'exam_weights': course_weights,
             'program_to_course_outcomes': program_to_course_outcomes,
             'makeup_map': makeup_map,
             'contributing_po_ids': course_po_ids,
+            'question_co_weights': question_co_weights,
+            'co_po_weights': co_po_weights,
+            'exam_context': build_exam_context(regular_exams + makeup_exams, course_questions_by_exam,
+                                               question_co_weights, co_po_weights),
             # Pre-filtered data for this course
-            'scores_dict': {k: v for k, v in scores_dict.items() if any(s.id == k[0] for s in students_by_course.get(course_id, []))},
-            'attendance_dict': {k: v for k, v in attendance_dict.items() if any(s.id == k[0] for s in students_by_course.get(course_id, []))}
+            'scores_dict': scores_by_course.get(course_id, {}),
+            'attendance_dict': attendance_by_course.get(course_id, {})
         }
+        if include_graduating_only:
+            # Database ids of the graduating students, so the graduating filter needs no query later
+            bulk_data[course_id]['graduating_student_db_ids'] = {
+                student.id for student in course_students if student.student_id in graduating_student_ids
+            }
     
     return bulk_data
 
@@ -1189,6 +1179,7 @@ def calculate_course_results_from_bulk_data_v2_optimized(course_id, bulk_data, c
     makeup_map = course_data['makeup_map']
     scores_dict = course_data['scores_dict']
     attendance_dict = course_data['attendance_dict']
+    exam_context = course_data.get('exam_context')
     contributing_po_ids = course_data['contributing_po_ids']
     
     # Early validation with fast exits
@@ -1372,7 +1363,7 @@ def calculate_course_results_from_bulk_data_v2_optimized(course_id, bulk_data, c
             # Use optimized course outcome calculation
             co_score = calculate_course_outcome_score_optimized(
                 student_id, outcome_id, scores_dict, outcome_questions, 
-                normalized_weights, attendance_dict
+                normalized_weights, attendance_dict, exam_context
             )
             student_outcome_scores[student_id][outcome_id] = co_score
     
@@ -1387,7 +1378,7 @@ def calculate_course_results_from_bulk_data_v2_optimized(course_id, bulk_data, c
             po_score = calculate_program_outcome_score_optimized(
                 student_id, po_id, course_id, scores_dict,
                 program_to_course_outcomes, outcome_questions, 
-                normalized_weights, attendance_dict
+                normalized_weights, attendance_dict, exam_context
             )
             student_po_scores[student_id][po_id] = po_score
     
@@ -1448,7 +1439,120 @@ def calculate_course_results_from_bulk_data_v2_optimized(course_id, bulk_data, c
         'course': course
     }
 
-def calculate_course_results_with_graduating_filter(course_id, bulk_data, calculation_method='absolute', include_graduating_only=False):
+def get_calculation_engine():
+    """Return the configured calculation engine ('decimal', 'numpy' or 'parity')"""
+    engine = str(current_app.config.get('CALCULATION_ENGINE', ENGINE_DECIMAL)).lower()
+    if engine not in CALCULATION_ENGINES:
+        logging.warning(f"Unknown CALCULATION_ENGINE '{engine}', falling back to '{ENGINE_DECIMAL}'")
+        return ENGINE_DECIMAL
+    return engine
+
+def get_calculation_workers():
+    """Return the configured number of worker processes for multi-course pages (0 or 1 = serial)"""
+    try:
+        workers = int(current_app.config.get('CALCULATION_WORKERS', 0) or 0)
+    except (TypeError, ValueError):
+        logging.warning(f"Invalid CALCULATION_WORKERS '{current_app.config.get('CALCULATION_WORKERS')}', using serial calculation")
+        return 0
+    return max(workers, 0)
+
+def get_similarity_workers():
+    """Return the configured number of worker processes for outcome similarity scoring (0 or 1 = serial)"""
+    try:
+        workers = int(current_app.config.get('SIMILARITY_WORKERS', 0) or 0)
+    except (TypeError, ValueError):
+        logging.warning(f"Invalid SIMILARITY_WORKERS '{current_app.config.get('SIMILARITY_WORKERS')}', using serial scoring")
+        return 0
+    return max(workers, 0)
+
+def calculate_course_results_with_engine(course_id, bulk_data, calculation_method='absolute', engine=None):
+    """
+    Calculate course results from bulk data with the configured calculation engine.
+    
+    - 'decimal': calculate_course_results_from_bulk_data_v2_optimized (default)
+    - 'numpy':   vectorized matrix engine from routes.vectorized_calculation
+    - 'parity':  runs both, logs every difference and returns the Decimal results
+    
+    The engine can be passed explicitly (worker processes have no app config).
+    """
+    if engine is None:
+        engine = get_calculation_engine()
+    
+    if engine == ENGINE_NUMPY:
+        return calculate_course_results_vectorized(course_id, bulk_data, calculation_method)
+    
+    result = calculate_course_results_from_bulk_data_v2_optimized(course_id, bulk_data, calculation_method)
+    
+    if engine == ENGINE_PARITY:
+        mismatches = check_vectorized_engine_parity(course_id, bulk_data, calculation_method, decimal_result=result)
+        result['parity_mismatches'] = mismatches
+    
+    return result
+
+def check_vectorized_engine_parity(course_id, bulk_data, calculation_method='absolute', decimal_result=None, tolerance=0.01):
+    """
+    Diff the vectorized engine against the Decimal path for one course.
+    
+    Compares validity, student counts, the aggregated PO scores and every
+    student's CO and PO scores. Differences larger than `tolerance` are
+    logged as warnings and returned as a list of human-readable strings.
+    """
+    if decimal_result is None:
+        decimal_result = calculate_course_results_from_bulk_data_v2_optimized(course_id, bulk_data, calculation_method)
+    vector_result = calculate_course_results_vectorized(course_id, bulk_data, calculation_method, include_student_scores=True)
+    
+    mismatches = []
+    
+    if decimal_result['is_valid_for_aggregation'] != vector_result['is_valid_for_aggregation']:
+        mismatches.append(f"is_valid_for_aggregation: decimal={decimal_result['is_valid_for_aggregation']} "
+                          f"numpy={vector_result['is_valid_for_aggregation']}")
+    
+    if decimal_result['student_count_used'] != vector_result['student_count_used']:
+        mismatches.append(f"student_count_used: decimal={decimal_result['student_count_used']} "
+                          f"numpy={vector_result['student_count_used']}")
+    
+    decimal_po_scores = decimal_result['program_outcome_scores']
+    vector_po_scores = vector_result['program_outcome_scores']
+    for po_id in set(decimal_po_scores) | set(vector_po_scores):
+        decimal_score = float(decimal_po_scores.get(po_id, 0) or 0)
+        vector_score = float(vector_po_scores.get(po_id, 0) or 0)
+        if abs(decimal_score - vector_score) > tolerance:
+            mismatches.append(f"PO {po_id}: decimal={decimal_score:.4f} numpy={vector_score:.4f}")
+    
+    # Per-student comparison against the Decimal helpers
+    course_data = bulk_data.get(course_id)
+    student_co_scores = vector_result.get('student_course_outcome_scores', {})
+    student_po_scores = vector_result.get('student_program_outcome_scores', {})
+    if course_data and student_co_scores:
+        for student_id, co_scores in student_co_scores.items():
+            for outcome_id, vector_score in co_scores.items():
+                decimal_score = calculate_course_outcome_score_optimized(
+                    student_id, outcome_id, course_data['scores_dict'], course_data['outcome_questions'],
+                    course_data['normalized_weights'], course_data['attendance_dict'], course_data.get('exam_context')
+                )
+                if abs(float(decimal_score) - vector_score) > tolerance:
+                    mismatches.append(f"Student {student_id} CO {outcome_id}: "
+                                      f"decimal={float(decimal_score):.4f} numpy={vector_score:.4f}")
+            for po_id, vector_score in student_po_scores.get(student_id, {}).items():
+                decimal_score = calculate_program_outcome_score_optimized(
+                    student_id, po_id, course_id, course_data['scores_dict'],
+                    course_data['program_to_course_outcomes'], course_data['outcome_questions'],
+                    course_data['normalized_weights'], course_data['attendance_dict'], course_data.get('exam_context')
+                )
+                if abs(float(decimal_score) - vector_score) > tolerance:
+                    mismatches.append(f"Student {student_id} PO {po_id}: "
+                                      f"decimal={float(decimal_score):.4f} numpy={vector_score:.4f}")
+    
+    if mismatches:
+        logging.warning(f"Calculation engine parity check found {len(mismatches)} differences for course {course_id}: "
+                        + "; ".join(mismatches[:20]))
+    else:
+        logging.info(f"Calculation engine parity check passed for course {course_id}")
+    
+    return mismatches
+
+def calculate_course_results_with_graduating_filter(course_id, bulk_data, calculation_method='absolute', include_graduating_only=False,
+                                                    graduating_student_ids=None):
     """
     Calculate course results with graduating students filter applied.
     This function modifies the student list to only include graduating students
@@ -1459,6 +1563,7 @@ def calculate_course_results_with_graduating_filter(course_id, bulk_data, calcul
     - bulk_data: Pre-loaded bulk data
     - calculation_method: 'absolute' or 'relative'
     - include_graduating_only: If True, only include graduating students in calculations
+    - graduating_student_ids: Preloaded graduating student numbers (loaded from the database if None)
     
     Returns:
     - Same format as calculate_course_results_from_bulk_data_v2_optimized
@@ -1498,11 +1603,13 @@ def calculate_course_results_with_graduating_filter(course_id, bulk_data, calcul
     makeup_map = course_data['makeup_map']
     scores_dict = course_data['scores_dict']
     attendance_dict = course_data['attendance_dict']
+    exam_context = course_data.get('exam_context')
     contributing_po_ids = course_data['contributing_po_ids']
     
     # CRITICAL FIX: Filter students to only include graduating students
     if include_graduating_only:
-        graduating_student_ids = get_graduating_student_ids()
+        if graduating_student_ids is None:
+            graduating_student_ids = get_graduating_student_ids()
         students = [student for student in all_students 
                    if student.student_id in graduating_student_ids]
         
@@ -1597,7 +1704,7 @@ def calculate_course_results_with_graduating_filter(course_id, bulk_data, calcul
             po_score = calculate_program_outcome_score_optimized(
                 student.id, po_id, course_id, scores_dict,
                 program_to_course_outcomes, outcome_questions, 
-                normalized_weights, attendance_dict
+                normalized_weights, attendance_dict, exam_context
             )
             if po_score is not None:
                 valid_scores.append(po_score)
@@ -1626,6 +1733,53 @@ def calculate_course_results_with_graduating_filter(course_id, bulk_data, calcul
         'student_results': {}  # Not needed for aggregation
     }
 
+def calculate_course_result(course_id, bulk_data, calculation_method='absolute', engine=None, graduating_student_ids=None):
+    """
+    Calculate one course of the all-courses pages from bulk data.
+    
+    Uses the graduating students filter when graduating_student_ids is given
+    (the list of graduating student numbers), otherwise the configured engine.
+    """
+    if graduating_student_ids is not None:
+        return calculate_course_results_with_graduating_filter(
+            course_id, bulk_data, calculation_method, True, graduating_student_ids=graduating_student_ids
+        )
+    return calculate_course_results_with_engine(course_id, bulk_data, calculation_method, engine=engine)
+
+def calculate_courses_results(course_ids, bulk_data, calculation_method='absolute', include_graduating_only=False):
+    """
+    Calculate several courses from bulk data, returns {course_id: result}.
+    
+    With CALCULATION_WORKERS > 1 the courses are spread over worker processes
+    (see routes.parallel_calculation); otherwise, or if the pool fails, they are
+    calculated one after the other. Both paths run the same calculation
+    functions and return identical results.
+    """
+    engine = get_calculation_engine()
+    # Load the graduating list once instead of once per course
+    graduating_student_ids = set(get_graduating_student_ids()) if include_graduating_only else None
+    
+    results = {}
+    workers = get_calculation_workers()
+    parallel_ids = [course_id for course_id in course_ids if course_id in bulk_data]
+    if workers > 1 and len(parallel_ids) > 1:
+        from routes.parallel_calculation import calculate_courses_in_processes
+        parallel_results = calculate_courses_in_processes(
+            parallel_ids, bulk_data, calculation_method, engine, graduating_student_ids, workers
+        )
+        if parallel_results is not None:
+            # Workers do not get ORM objects, re-attach the course
+            for course_id, result in parallel_results.items():
+                result['course'] = bulk_data[course_id]['course']
+            results.update(parallel_results)
+    
+    for course_id in course_ids:
+        if course_id not in results:
+            results[course_id] = calculate_course_result(
+                course_id, bulk_data, calculation_method, engine, graduating_student_ids
+            )
+    return results
+
 def calculate_inline_exam_score(student_id, exam_id, scores_dict, questions, total_possible):
     """
     Inline exam score calculation to reduce function call overhead.
@@ -1705,6 +1859,7 @@ def calculate_course_results_from_bulk_data_optimized(course_id, bulk_data, calc
     makeup_map = course_data['makeup_map']
     scores_dict = course_data['scores_dict']
     attendance_dict = course_data['attendance_dict']
+    exam_context = course_data.get('exam_context')
     contributing_po_ids = course_data['contributing_po_ids']
     
     # Early validation checks
@@ -1840,7 +1995,7 @@ def calculate_course_results_from_bulk_data_optimized(course_id, bulk_data, calc
                 if makeup_attended:
                     # Use makeup score
                     makeup_score = calculate_student_exam_score_optimized(
-                        student_id, makeup_exam_id, scores_dict, makeup_questions, attendance_dict
+                        student_id, makeup_exam_id, scores_dict, makeup_questions, attendance_dict, exam_context
                     )
                     score_to_use = makeup_score if makeup_score is not None else Decimal('0')
                     total_weighted_score += score_to_use * weight
@@ -1848,7 +2003,7 @@ def calculate_course_results_from_bulk_data_optimized(course_id, bulk_data, calc
             
             # Use regular exam score
             exam_score = calculate_student_exam_score_optimized(
-                student_id, exam_id, scores_dict, questions, attendance_dict
+                student_id, exam_id, scores_dict, questions, attendance_dict, exam_context
             )
             
             if exam_score is not None:
@@ -1868,7 +2023,7 @@ def calculate_course_results_from_bulk_data_optimized(course_id, bulk_data, calc
             questions = outcome_info['questions']
             
             co_score = calculate_course_outcome_score_optimized(
-                student_id, outcome_id, scores_dict, outcome_questions, normalized_weights, attendance_dict
+                student_id, outcome_id, scores_dict, outcome_questions, normalized_weights, attendance_dict, exam_context
             )
             student_outcome_scores[student_id][outcome_id] = co_score
     
@@ -1881,7 +2036,7 @@ def calculate_course_results_from_bulk_data_optimized(course_id, bulk_data, calc
             
             po_score = calculate_program_outcome_score_optimized(
                 student_id, po_id, course_id, scores_dict, 
-                program_to_course_outcomes, outcome_questions, normalized_weights, attendance_dict
+                program_to_course_outcomes, outcome_questions, normalized_weights, attendance_dict, exam_context
             )
             student_po_scores[student_id][po_id] = po_score
     
@@ -1985,6 +2140,7 @@ def calculate_course_results_from_bulk_data(course_id, bulk_data, calculation_me
     makeup_map = course_data['makeup_map']
     scores_dict = course_data['scores_dict']
     attendance_dict = course_data['attendance_dict']
+    exam_context = course_data.get('exam_context')
     contributing_po_ids = course_data['contributing_po_ids']
     
     # Check for necessary data
@@ -2091,7 +2247,7 @@ def calculate_course_results_from_bulk_data(course_id, bulk_data, calculation_me
                 if makeup_attended:
                     makeup_score = calculate_student_exam_score_optimized(
                         student.id, makeup_exam.id, scores_dict, 
-                        questions_by_exam[makeup_exam.id], attendance_dict
+                        questions_by_exam[makeup_exam.id], attendance_dict, exam_context
                     )
                     # Use makeup score even if it's 0 (as long as it's not None)
                     if makeup_score is not None:
@@ -2106,7 +2262,7 @@ def calculate_course_results_from_bulk_data(course_id, bulk_data, calculation_me
             # If no makeup was attended or makeup score is None, use regular exam score
             exam_score = calculate_student_exam_score_optimized(
                 student.id, exam.id, scores_dict,
-                questions_by_exam[exam.id], attendance_dict
+                questions_by_exam[exam.id], attendance_dict, exam_context
             )
             
             # For non-mandatory exams, ensure None is treated as 0
@@ -2121,7 +2277,7 @@ def calculate_course_results_from_bulk_data(course_id, bulk_data, calculation_me
         # Calculate course outcome scores
         for outcome in course_outcomes:
             co_score = calculate_course_outcome_score_optimized(
-                student.id, outcome.id, scores_dict, outcome_questions, normalized_weights, attendance_dict
+                student.id, outcome.id, scores_dict, outcome_questions, normalized_weights, attendance_dict, exam_context
             )
             student_data['course_outcomes'][outcome.id] = co_score
         
@@ -2129,7 +2285,7 @@ def calculate_course_results_from_bulk_data(course_id, bulk_data, calculation_me
         for outcome in program_outcomes:
             po_score = calculate_program_outcome_score_optimized(
                 student.id, outcome.id, course_id, scores_dict, 
-                program_to_course_outcomes, outcome_questions, normalized_weights, attendance_dict
+                program_to_course_outcomes, outcome_questions, normalized_weights, attendance_dict, exam_context
             )
             student_data['program_outcomes'][outcome.id] = po_score
         
@@ -2276,6 +2432,151 @@ def all_courses_calculations():
     years = sorted(set(course.semester.split(' ')[1] for course in courses 
                       if ' ' in course.semester), reverse=True)
     
+    # ==== BULK LOAD ALL DATA TO ELIMINATE N+1 QUERIES ====
+    course_ids = [course.id for course in courses]
+    
+    # Serve unchanged courses from the result cache and only load the dirty ones.
+    # Individual student results need the raw data, so the student filter bypasses the cache.
+    use_result_cache = not filter_student_id
+    data_versions = get_course_data_versions(course_ids) if use_result_cache else {}
+    cached_results = get_cached_course_results(
+        course_ids, display_method, include_graduating_only,
+        courses_by_id={course.id: course for course in courses}
+    ) if use_result_cache else {}
+    dirty_course_ids = [course_id for course_id in course_ids if course_id not in cached_results]
+    
+    # Load all necessary data at once (on the read-only reporting connection, see db_performance.py)
+    with read_only_session():
+        bulk_data = bulk_load_course_data(dirty_course_ids, display_method, include_graduating_only)
+        
+        # Calculate the dirty courses up front (in worker processes if CALCULATION_WORKERS > 1)
+        computed_results = calculate_courses_results(dirty_course_ids, bulk_data, display_method, include_graduating_only)
+    
+    # Store the freshly calculated courses in the result cache
+    if use_result_cache:
+        for course in courses:
+            if course.id in computed_results and not (course.settings and course.settings.excluded) \
+                    and course.course_outcomes and course.exams:
+                store_course_result(course.id, display_method, include_graduating_only,
+                                    computed_results[course.id], data_versions[course.id])
+    
+    # If filtering by student ID, show individual student scores instead of course averages
+    individual_scores = None
+    if filter_student_id:
+        enrollments = {}
+        for student in Student.query.filter_by(student_id=filter_student_id).order_by(Student.id).all():
+            enrollments.setdefault(student.course_id, student.id)
+        individual_scores = calculate_student_course_scores(enrollments, bulk_data, display_method, include_graduating_only)
+    
+    # Build the rows of the page and the program outcome averages
+    course_results = dict(cached_results)
+    course_results.update(computed_results)
+    all_results, po_averages, excluded_courses = aggregate_all_courses_results(
+        courses, program_outcomes, course_results, individual_scores
+    )
+    
+    # Sort the results according to the sort parameter
+    sorted_results = sort_all_courses_results(all_results, sort_by)
+    
+    # Log action
+    log_description = f"Viewed program outcome scores for all courses"
+    if filter_student_id:
+        log_description += f" (filtered by student ID: {filter_student_id})"
+    if include_graduating_only:
+        log_description += f" (graduating students only)"
+    log = Log(action="ALL_COURSES_CALCULATIONS", description=log_description)
+    db.session.add(log)
+    db.session.commit()
+    
+    # Check if this is an AJAX request
+    if is_ajax:
+        # Return JSON data for AJAX requests
+        return jsonify({
+            'all_results': {k: {
+                'course': {
+                    'id': v['course'].id,
+                    'code': v['course'].code,
+                    'name': v['course'].name,
+                    'semester': v['course'].semester
+                },
+                'program_outcome_results': v['program_outcome_results'],
+                'settings': {
+                    'success_rate_method': v['settings'].success_rate_method if v['settings'] else display_method,
+                    'relative_success_threshold': float(v['settings'].relative_success_threshold) if v['settings'] else 60.0,
+                    'excluded': v['settings'].excluded if v['settings'] else False
+                },
+                'avg_outcome_score': float(v['avg_outcome_score']),
+                'excluded': v['settings'].excluded if v['settings'] else False
+            } for k, v in sorted_results.items()},
+            'program_outcomes': [{'id': po.id, 'code': po.code, 'description': po.description} for po in program_outcomes],
+            'po_averages': {k: float(v) if v is not None else None for k, v in po_averages.items()},
+            'excluded_courses': [{'id': c.id, 'code': c.code, 'name': c.name, 'semester': c.semester} for c in excluded_courses],
+            'global_achievement_levels': [{'id': l.id, 'name': l.name, 'min_score': float(l.min_score), 
+                                        'max_score': float(l.max_score), 'color': l.color} 
+                                       for l in GlobalAchievementLevel.query.order_by(GlobalAchievementLevel.min_score.desc()).all()],
+            'progress': 100,  # Always 100 when returning final results
+            'current_sort': sort_by,
+            'student_info': student_info,
+            'filter_student_id': filter_student_id,
+            'graduating_filter_info': graduating_filter_info,
+            'include_graduating_only': include_graduating_only
+        })
+    
+    # For regular requests, render the template
+    global_achievement_levels = GlobalAchievementLevel.query.order_by(GlobalAchievementLevel.min_score.desc()).all()
+    return render_template('calculation/all_courses.html', 
+                          all_results=sorted_results,
+                          program_outcomes=program_outcomes,
+                          po_averages=po_averages,
+                          excluded_courses=excluded_courses,
+                          years=years,
+                          active_page='all_courses',
+                          current_sort=sort_by,
+                          student_info=student_info,
+                          filter_student_id=filter_student_id,
+                          graduating_filter_info=graduating_filter_info,
+                          include_graduating_only=include_graduating_only,
+                          global_achievement_levels=global_achievement_levels,
+                          global_achievement_classifier=get_achievement_classifier(global_achievement_levels))
+
+def calculate_student_course_scores(enrollments, bulk_data, calculation_method='absolute', include_graduating_only=False):
+    """
+    Individual program outcome scores of one student in each of their courses.
+    
+    Parameters:
+    - enrollments: Dict mapping course_id -> the student's database ID in that course
+    - bulk_data: Pre-loaded bulk data from bulk_load_course_data()
+    
+    Returns course_id -> {po_id: score}. With the graduating filter a student
+    who is not graduating gets empty scores (shown as 0 and not aggregated),
+    like calculate_individual_student_results.
+    """
+    if include_graduating_only and enrollments:
+        # Checked once per student instead of once per course, from the flags precomputed by bulk_load_course_data
+        course_id, student_db_id = next(iter(enrollments.items()))
+        if not is_graduating_student_in_bulk_data(student_db_id, course_id, bulk_data):
+            return {course_id: {} for course_id in enrollments}
+    
+    return {
+        course_id: calculate_individual_student_results(student_db_id, course_id, bulk_data, calculation_method)
+        for course_id, student_db_id in enrollments.items()
+        if course_id in bulk_data
+    }
+
+def aggregate_all_courses_results(courses, program_outcomes, course_results, individual_scores=None):
+    """
+    Build the rows and the program outcome averages shown on the all-courses page.
+    
+    Parameters:
+    - courses: Courses to show (already filtered)
+    - program_outcomes: All program outcomes
+    - course_results: Dict mapping course_id -> course result (calculate_courses_results or the result cache)
+    - individual_scores: Dict mapping course_id -> {po_id: score} of one student (see
+      calculate_student_course_scores), or None to show course averages. Courses missing
+      from it are skipped because the student is not enrolled in them.
+    
+    Returns (all_results, po_averages, excluded_courses)
+    """
     # Initialize data structure to hold results for all courses
     all_results = {}
     
@@ -2286,13 +2587,7 @@ def all_courses_calculations():
     # Track excluded courses separately
     excluded_courses = []
     
-    # ==== BULK LOAD ALL DATA TO ELIMINATE N+1 QUERIES ====
-    course_ids = [course.id for course in courses]
-    
-    # Load all necessary data at once
-    bulk_data = bulk_load_course_data(course_ids, display_method, include_graduating_only)
-    
-    # Calculate results for each course
+    # Build a row for each course
     for course in courses:
         # Check if course is excluded
         is_excluded = course.settings and course.settings.excluded
@@ -2315,14 +2610,9 @@ def all_courses_calculations():
         if not hasattr(course, 'exams') or not course.exams:
             continue
         
-        # Calculate course results
-        # FIXED: Pass graduating students filter to the calculation function
-        if include_graduating_only:
-            # When graduating students filter is active, we need to modify the calculation
-            # to only include graduating students in the course calculations
-            result = calculate_course_results_with_graduating_filter(course.id, bulk_data, display_method, include_graduating_only)
-        else:
-            result = calculate_course_results_from_bulk_data_v2_optimized(course.id, bulk_data, display_method)
+        # Course results
+        # FIXED: the graduating students filter is applied inside calculate_courses_results
+        result = course_results[course.id]
         
         # Skip courses that don't have valid data for aggregation
         if not result['is_valid_for_aggregation']:
@@ -2332,12 +2622,9 @@ def all_courses_calculations():
         program_outcome_results = {}
         
         # If filtering by student ID, show individual student scores instead of course averages
-        if filter_student_id:
-            # Get the specific student in this course
-            student_in_course = Student.query.filter_by(student_id=filter_student_id, course_id=course.id).first()
-            if student_in_course:
-                # Calculate individual student scores
-                individual_result = calculate_individual_student_results(student_in_course.id, course.id, bulk_data, display_method, include_graduating_only)
+        if individual_scores is not None:
+            if course.id in individual_scores:
+                individual_result = individual_scores[course.id]
                 for po in program_outcomes:
                     po_score = individual_result.get(po.id)
                     contributes = po.id in result['contributing_po_ids']
@@ -2414,6 +2701,10 @@ def all_courses_calculations():
         else:
             po_averages[po.code] = None
     
+    return all_results, po_averages, excluded_courses
+
+def sort_all_courses_results(all_results, sort_by='course_code_asc'):
+    """Order the rows of the all-courses page by one of the page's sort options"""
     # Sort the results according to the sort parameter
     sorted_results = {}
     
@@ -2436,65 +2727,7 @@ def all_courses_calculations():
     for key in sorted_keys:
         sorted_results[key] = all_results[key]
     
-    # Log action
-    log_description = f"Viewed program outcome scores for all courses"
-    if filter_student_id:
-        log_description += f" (filtered by student ID: {filter_student_id})"
-    if include_graduating_only:
-        log_description += f" (graduating students only)"
-    log = Log(action="ALL_COURSES_CALCULATIONS", description=log_description)
-    db.session.add(log)
-    db.session.commit()
-    
-    # Check if this is an AJAX request
-    if is_ajax:
-        # Return JSON data for AJAX requests
-        return jsonify({
-            'all_results': {k: {
-                'course': {
-                    'id': v['course'].id,
-                    'code': v['course'].code,
-                    'name': v['course'].name,
-                    'semester': v['course'].semester
-                },
-                'program_outcome_results': v['program_outcome_results'],
-                'settings': {
-                    'success_rate_method': v['settings'].success_rate_method if v['settings'] else display_method,
-                    'relative_success_threshold': float(v['settings'].relative_success_threshold) if v['settings'] else 60.0,
-                    'excluded': v['settings'].excluded if v['settings'] else False
-                },
-                'avg_outcome_score': float(v['avg_outcome_score']),
-                'excluded': v['settings'].excluded if v['settings'] else False
-            } for k, v in sorted_results.items()},
-            'program_outcomes': [{'id': po.id, 'code': po.code, 'description': po.description} for po in program_outcomes],
-            'po_averages': {k: float(v) if v is not None else None for k, v in po_averages.items()},
-            'excluded_courses': [{'id': c.id, 'code': c.code, 'name': c.name, 'semester': c.semester} for c in excluded_courses],
-            'global_achievement_levels': [{'id': l.id, 'name': l.name, 'min_score': float(l.min_score), 
-                                        'max_score': float(l.max_score), 'color': l.color} 
-                                       for l in GlobalAchievementLevel.query.order_by(GlobalAchievementLevel.min_score.desc()).all()],
-            'progress': 100,  # Always 100 when returning final results
-            'current_sort': sort_by,
-            'student_info': student_info,
-            'filter_student_id': filter_student_id,
-            'graduating_filter_info': graduating_filter_info,
-            'include_graduating_only': include_graduating_only
-        })
-    
-    # For regular requests, render the template
-    return render_template('calculation/all_courses.html', 
-                          all_results=sorted_results,
-                          program_outcomes=program_outcomes,
-                          po_averages=po_averages,
-                          excluded_courses=excluded_courses,
-                          years=years,
-                          active_page='all_courses',
-                          current_sort=sort_by,
-                          student_info=student_info,
-                          filter_student_id=filter_student_id,
-                          graduating_filter_info=graduating_filter_info,
-                          include_graduating_only=include_graduating_only,
-                          global_achievement_levels=GlobalAchievementLevel.query.order_by(GlobalAchievementLevel.min_score.desc()).all(),
-                          get_achievement_level=get_achievement_level)
+    return sorted_results
 
 @calculation_bp.route('/all_courses_loading', endpoint='all_courses_loading')
 def all_courses_loading():
@@ -2662,8 +2895,20 @@ def export_all_courses():
     # ==== BULK LOAD ALL DATA TO ELIMINATE N+1 QUERIES ====
     course_ids = [course.id for course in courses]
     
-    # Load all necessary data at once with graduating filter
-    bulk_data = bulk_load_course_data(course_ids, display_method, include_graduating_only)
+    # Serve unchanged courses from the result cache and only load the dirty ones
+    data_versions = get_course_data_versions(course_ids)
+    cached_results = get_cached_course_results(
+        course_ids, display_method, include_graduating_only,
+        courses_by_id={course.id: course for course in courses}
+    )
+    dirty_course_ids = [course_id for course_id in course_ids if course_id not in cached_results]
+    
+    # Load all necessary data at once with graduating filter (on the read-only reporting connection)
+    with read_only_session():
+        bulk_data = bulk_load_course_data(dirty_course_ids, display_method, include_graduating_only)
+        
+        # Calculate the dirty courses up front (in worker processes if CALCULATION_WORKERS > 1)
+        computed_results = calculate_courses_results(dirty_course_ids, bulk_data, display_method, include_graduating_only)
     
     # Calculate results for each course
     for course in courses:
@@ -2690,11 +2935,14 @@ def export_all_courses():
         
         # Calculate course results using bulk data with graduating filter
         # FIXED: Use the same calculation logic as the web page
-        if include_graduating_only:
-            # When graduating students filter is active, use the graduating filter calculation
-            result = calculate_course_results_with_graduating_filter(course.id, bulk_data, display_method, include_graduating_only)
+        # (the graduating students filter is applied inside calculate_courses_results)
+        if course.id in cached_results:
+            result = cached_results[course.id]
         else:
-            result = calculate_course_results_from_bulk_data_v2_optimized(course.id, bulk_data, display_method)
+            result = computed_results[course.id]
+        
+        if course.id not in cached_results:
+            store_course_result(course.id, display_method, include_graduating_only, result, data_versions[course.id])
         
         # Skip courses that don't have valid data for aggregation
         if not result['is_valid_for_aggregation']:
@@ -2881,6 +3129,7 @@ def update_course_settings(course_id):
         except ValueError:
             flash('Course weight must be a valid number. Using previous value.', 'warning')
     
+    invalidate_course_results(course_id)
     db.session.commit()
     
     # Log action
@@ -2906,6 +3155,7 @@ def toggle_mandatory_exam(exam_id):
     
     # Toggle the status
     exam.is_mandatory = not exam.is_mandatory
+    invalidate_course_results(exam.course_id)
     db.session.commit()
     
     # Log action
@@ -2931,6 +3181,7 @@ def toggle_course_exclusion(course_id):
     
     # Toggle the status
     settings.excluded = not settings.excluded
+    invalidate_course_results(course_id)
     db.session.commit()
     
     # Log action
@@ -2979,6 +3230,7 @@ def bulk_toggle_course_exclusion():
             # Set the exclusion status
             settings.excluded = exclude
             processed_courses.append(course.code)
+            invalidate_course_results(course.id)
         
         # Commit all changes at once
         db.session.commit()
@@ -3012,20 +3264,111 @@ def update_display_method():
             return jsonify({'status': 'success', 'reload': True})
     return jsonify({'status': 'error'})
 
-def calculate_student_exam_score_optimized(student_id, exam_id, scores_dict, questions, attendance_dict=None):
-    """Calculate a student's total score for an exam using preloaded data.
+def load_course_outcome_weights(course_ids):
+    """Load the Q-CO and CO-PO relative weights of one or more courses in two queries
     
-    This improved version uses an explicit check for None so that a valid score of 0 is not skipped.
-    It also checks if the student attended the exam and returns None if they didn't.
-    If the student didn't attend a mandatory exam, it returns None to indicate they should be excluded.
-    For non-mandatory exams, missing is treated as 0.
+    Returns (question_co_weights, co_po_weights) keyed by (question_id, co_id) and
+    (co_id, po_id). Missing or NULL weights default to 1.0 in the calculation helpers.
     """
-    if not questions:
-        return None
-        
-    # Get the exam to check if it's mandatory
-    exam = Exam.query.get(exam_id)
-    is_mandatory = exam and exam.is_mandatory
+    question_co_weights = {}
+    co_po_weights = {}
+    course_ids = [int(course_id) for course_id in course_ids]
+    if not course_ids:
+        return question_co_weights, co_po_weights
+    
+    placeholders = ','.join(str(course_id) for course_id in course_ids)
+    try:
+        qco_rows = db.session.execute(text(f"""
+            SELECT qco.question_id, qco.course_outcome_id, qco.relative_weight
+            FROM question_course_outcome qco
+            JOIN course_outcome co ON co.id = qco.course_outcome_id
+            WHERE co.course_id IN ({placeholders})
+        """)).fetchall()
+        for question_id, co_id, weight in qco_rows:
+            question_co_weights[(question_id, co_id)] = Decimal(str(weight)) if weight is not None else Decimal('1.0')
+        
+        copo_rows = db.session.execute(text(f"""
+            SELECT copo.course_outcome_id, copo.program_outcome_id, copo.relative_weight
+            FROM course_outcome_program_outcome copo
+            JOIN course_outcome co ON co.id = copo.course_outcome_id
+            WHERE co.course_id IN ({placeholders})
+        """)).fetchall()
+        for co_id, po_id, weight in copo_rows:
+            co_po_weights[(co_id, po_id)] = Decimal(str(weight)) if weight is not None else Decimal('1.0')
+    except Exception as e:
+        logging.error(f"Error loading outcome weights for courses {course_ids}: {str(e)}")
+    
+    return question_co_weights, co_po_weights
+
+def build_exam_context(exams, questions_by_exam=None, question_co_weights=None, co_po_weights=None):
+    """Build the exam-metadata context consumed by the *_score_optimized helpers
+    
+    The helpers used to query the exam (mandatory flag, makeup link) and the Q-CO /
+    CO-PO weights on every call, i.e. once per student x outcome. The context holds
+    that metadata for a whole course so it is loaded once, by bulk_load_course_data()
+    or calculate_single_course_results().
+    
+    Returns a dictionary with:
+    - exams: exam_id -> {'is_mandatory', 'is_makeup', 'makeup_for'}
+    - makeup_map: base exam_id -> makeup exam_id
+    - question_totals: exam_id -> sum of question max scores
+    - question_co_weights: (question_id, co_id) -> Decimal relative weight
+    - co_po_weights: (co_id, po_id) -> Decimal relative weight
+    """
+    exam_info = {}
+    makeup_map = {}
+    for exam in exams:
+        exam_info[exam.id] = {
+            'is_mandatory': bool(exam.is_mandatory),
+            'is_makeup': bool(exam.is_makeup),
+            'makeup_for': exam.makeup_for
+        }
+        if exam.is_makeup and exam.makeup_for:
+            makeup_map[exam.makeup_for] = exam.id
+    
+    question_totals = {}
+    for exam_id, questions in (questions_by_exam or {}).items():
+        question_totals[exam_id] = sum((question.max_score for question in questions), Decimal('0'))
+    
+    return {
+        'exams': exam_info,
+        'makeup_map': makeup_map,
+        'question_totals': question_totals,
+        'question_co_weights': question_co_weights or {},
+        'co_po_weights': co_po_weights or {}
+    }
+
+def load_exam_context(course_id):
+    """Load the exam-metadata context of a single course with a fixed number of queries"""
+    exams = Exam.query.filter_by(course_id=course_id).order_by(Exam.id).all()
+    questions_by_exam = {exam.id: [] for exam in exams}
+    if exams:
+        for question in Question.query.filter(Question.exam_id.in_(list(questions_by_exam))).all():
+            questions_by_exam[question.exam_id].append(question)
+    question_co_weights, co_po_weights = load_course_outcome_weights([course_id])
+    return build_exam_context(exams, questions_by_exam, question_co_weights, co_po_weights)
+
+def calculate_student_exam_score_optimized(student_id, exam_id, scores_dict, questions, attendance_dict=None, exam_context=None):
+    """Calculate a student's total score for an exam using preloaded data.
+    
+    This improved version uses an explicit check for None so that a valid score of 0 is not skipped.
+    It also checks if the student attended the exam and returns None if they didn't.
+    If the student didn't attend a mandatory exam, it returns None to indicate they should be excluded.
+    For non-mandatory exams, missing is treated as 0.
+    
+    exam_context (see build_exam_context) provides the mandatory flag without a query;
+    without it the exam is looked up in the database.
+    """
+    if not questions:
+        return None
+        
+    # Check if the exam is mandatory
+    if exam_context is not None:
+        exam_info = exam_context['exams'].get(exam_id)
+        is_mandatory = exam_info is not None and exam_info['is_mandatory']
+    else:
+        exam = Exam.query.get(exam_id)
+        is_mandatory = exam and exam.is_mandatory
         
     # Check if the student attended the exam
     if attendance_dict is not None:
@@ -3077,7 +3420,7 @@ def calculate_student_exam_score_optimized(student_id, exam_id, scores_dict, que
 
     return (total_score / total_possible) * Decimal('100')
 
-def calculate_course_outcome_score_optimized(student_id, outcome_id, scores_dict, outcome_questions, normalized_weights=None, attendance_dict=None):
+def calculate_course_outcome_score_optimized(student_id, outcome_id, scores_dict, outcome_questions, normalized_weights=None, attendance_dict=None, exam_context=None):
     """Calculate a student's score for a course outcome using preloaded data
     
     This function calculates a student's achievement for a specific Course Outcome (CO)
@@ -3091,6 +3434,8 @@ def calculate_course_outcome_score_optimized(student_id, outcome_id, scores_dict
     - normalized_weights: Pre-calculated, normalized weights for all exams in the course
                          (if None, will calculate weights only for exams with questions for this outcome)
     - attendance_dict: Dictionary mapping (student_id, exam_id) to attendance status
+    - exam_context: Exam metadata and Q-CO weights from build_exam_context()
+                    (if None, it is loaded for the outcome's course)
     """
     questions = outcome_questions.get(outcome_id, [])
 
@@ -3105,30 +3450,32 @@ def calculate_course_outcome_score_optimized(student_id, outcome_id, scores_dict
             questions_by_exam[exam_id] = []
         questions_by_exam[exam_id].append(question)
     
-    # Get all exams
-    exam_ids = list(questions_by_exam.keys())
-    exams = Exam.query.filter(Exam.id.in_(exam_ids)).all()
+    if exam_context is None:
+        outcome = CourseOutcome.query.get(outcome_id)
+        exam_context = load_exam_context(outcome.course_id) if outcome else build_exam_context([])
+    exam_info = exam_context['exams']
     
-    # Create a map from original exam to makeup exam
+    # Create a map from original exam to makeup exam (among this outcome's exams)
+    exam_ids = list(questions_by_exam.keys())
     makeup_map = {}
-    for exam in exams:
-        if exam.is_makeup and exam.makeup_for:
-            makeup_map[exam.makeup_for] = exam.id
+    for exam_id in exam_ids:
+        info = exam_info.get(exam_id)
+        if info and info['is_makeup'] and info['makeup_for']:
+            makeup_map[info['makeup_for']] = exam_id
     
     # Filter out base exams that have makeup exams if student attended the makeup
     filtered_exam_ids = []
     for exam_id in exam_ids:
-        # Find if this is a base exam with a makeup
-        exam = next((e for e in exams if e.id == exam_id), None)
+        info = exam_info.get(exam_id)
         
         # If this is a makeup exam, always include it
-        if exam and exam.is_makeup:
+        if info and info['is_makeup']:
             filtered_exam_ids.append(exam_id)
             continue
             
         # If this is a base exam, check if it has a makeup that the student attended
-        if exam and not exam.is_makeup and exam.id in makeup_map:
-            makeup_id = makeup_map[exam.id]
+        if info and exam_id in makeup_map:
+            makeup_id = makeup_map[exam_id]
             
             # FIXED: Check attendance using attendance_dict if available, otherwise fall back to direct query
             attended_makeup = False
@@ -3150,50 +3497,12 @@ def calculate_course_outcome_score_optimized(student_id, outcome_id, scores_dict
         # Include the base exam if no makeup was attended
         filtered_exam_ids.append(exam_id)
     
-    # --- START: Fetch Q-CO Weights for this specific outcome ---
-    question_co_weights = {}
-    outcome_question_ids = [q.id for q in questions] # Get IDs of questions linked to *this* outcome
-    if outcome_question_ids:
-        from sqlalchemy import text, inspect # Ensure imports
-        try:
-            inspector = inspect(db.engine)
-            qco_columns = [c['name'] for c in inspector.get_columns('question_course_outcome')]
-            has_relative_weight = 'relative_weight' in qco_columns
-
-            if has_relative_weight:
-                # Use proper SQLAlchemy query with manual IN clause construction for SQLite compatibility
-                from sqlalchemy import text
-                if outcome_question_ids:
-                    # Create placeholders for IN clause
-                    placeholders = ','.join([':param_' + str(i) for i in range(len(outcome_question_ids))])
-                    query = f"SELECT question_id, relative_weight FROM question_course_outcome WHERE course_outcome_id = :outcome_id AND question_id IN ({placeholders})"
-                    
-                    # Create parameters dictionary
-                    params = {"outcome_id": outcome_id}
-                    for i, q_id in enumerate(outcome_question_ids):
-                        params[f'param_{i}'] = q_id
-                    
-                    weights_result = db.session.execute(text(query), params).fetchall()
-                    
-                    for q_id, weight in weights_result:
-                        question_co_weights[q_id] = Decimal(str(weight)) if weight is not None else Decimal('1.0')
-                
-                # Set default weights for questions not found in the mapping
-                for q_id in outcome_question_ids:
-                    if q_id not in question_co_weights:
-                        question_co_weights[q_id] = Decimal('1.0')
-            else:
-                # Default to 1.0 if column doesn't exist
-                for q_id in outcome_question_ids:
-                    question_co_weights[q_id] = Decimal('1.0')
-
-        except Exception as e:
-            # Only log at ERROR level for actual errors, not warnings
-            logging.error(f"Error fetching Q-CO weights for CO {outcome_id}: {e}")
-            # Default all weights to 1.0 on error
-            for q_id in outcome_question_ids:
-               question_co_weights[q_id] = Decimal('1.0')
-    # --- END: Fetch Q-CO Weights ---
+    # Q-CO weights for this specific outcome, default 1.0
+    context_qco_weights = exam_context['question_co_weights']
+    question_co_weights = {
+        question.id: context_qco_weights.get((question.id, outcome_id), Decimal('1.0'))
+        for question in questions
+    }
     
     # If normalized_weights is None, we need to calculate them only for the relevant exams
     # This is the old behavior and should only be used if no master weights are provided
@@ -3288,7 +3597,7 @@ def calculate_course_outcome_score_optimized(student_id, outcome_id, scores_dict
 # Optimized helper function to calculate a student's score for a program outcome
 def calculate_program_outcome_score_optimized(student_id, outcome_id, course_id, scores_dict, 
                                              program_to_course_outcomes, outcome_questions, 
-                                             normalized_weights=None, attendance_dict=None):
+                                             normalized_weights=None, attendance_dict=None, exam_context=None):
     """Calculate a student's score for a program outcome using preloaded data
     
     Parameters:
@@ -3300,6 +3609,8 @@ def calculate_program_outcome_score_optimized(student_id, outcome_id, course_id,
     - outcome_questions: Dictionary mapping outcome_id to list of questions
     - normalized_weights: Pre-calculated, normalized weights for all exams in the course
     - attendance_dict: Dictionary mapping (student_id, exam_id) to attendance status
+    - exam_context: Exam metadata and Q-CO / CO-PO weights from build_exam_context()
+                    (if None, it is loaded for the course)
     """
     # Get related course outcomes from the preloaded mapping
     related_course_outcomes = program_to_course_outcomes.get(outcome_id, [])
@@ -3307,43 +3618,19 @@ def calculate_program_outcome_score_optimized(student_id, outcome_id, course_id,
     if not related_course_outcomes:
         return Decimal('0')  # Return 0 instead of None when no related course outcomes
     
-    # Get course-specific settings for weighting
-    course = Course.query.get(course_id)
-    if not course:
-        return Decimal('0')  # Return 0 instead of None when course not found
+    if exam_context is None:
+        # Get course-specific settings for weighting
+        course = Course.query.get(course_id)
+        if not course:
+            return Decimal('0')  # Return 0 instead of None when course not found
+        exam_context = load_exam_context(course_id)
     
     # Initialize variables for weighted calculation
     total_weighted_score = Decimal('0')
     total_weight = Decimal('0')
     
-    # Get CO-PO relative weights from the database
-    co_po_weights = {}
-    co_ids = [co.id for co in related_course_outcomes]
-    
-    try:
-        # Properly handle SQLite IN clause
-        if co_ids:
-            from sqlalchemy import text
-            
-            # Use proper SQLAlchemy query with manual IN clause construction for SQLite compatibility
-            if co_ids:
-                # Create placeholders for IN clause
-                placeholders = ','.join([':param_' + str(i) for i in range(len(co_ids))])
-                query = f"SELECT course_outcome_id, program_outcome_id, relative_weight FROM course_outcome_program_outcome WHERE program_outcome_id = :po_id AND course_outcome_id IN ({placeholders})"
-                
-                # Create parameters dictionary
-                params = {"po_id": outcome_id}
-                for i, co_id in enumerate(co_ids):
-                    params[f'param_{i}'] = co_id
-                
-                weights_result = db.session.execute(text(query), params).fetchall()
-                
-                for co_id, po_id, weight in weights_result:
-                    co_po_weights[(co_id, po_id)] = Decimal(str(weight))
-            
-    except Exception as e:
-        logging.error(f"Error retrieving CO-PO weights: {str(e)}")
-        # Fall back to default weights of 1.0
+    # CO-PO relative weights from the preloaded context
+    co_po_weights = exam_context['co_po_weights']
     
     # Store all score and weight pairs for final calculation
     co_scores_and_weights = []
@@ -3353,7 +3640,7 @@ def calculate_program_outcome_score_optimized(student_id, outcome_id, course_id,
         # Calculate the score for this course outcome, passing through the normalized weights and attendance_dict
         co_score = calculate_course_outcome_score_optimized(
             student_id, course_outcome.id, scores_dict, outcome_questions, 
-            normalized_weights, attendance_dict
+            normalized_weights, attendance_dict, exam_context
         )
         
         if co_score is not None:
@@ -3443,9 +3730,6 @@ def calculate_single_course_results(course_id, calculation_method='absolute'):
     # Combined list of all exams
     all_exams = regular_exams + makeup_exams
     
-    # Get list of mandatory exams
-    mandatory_exams = [exam for exam in regular_exams if exam.is_mandatory]
-    
     # Check for necessary data
     course_outcomes = CourseOutcome.query.filter_by(course_id=course_id).all()
     if not course_outcomes:
@@ -3495,8 +3779,7 @@ def calculate_single_course_results(course_id, calculation_method='absolute'):
             'course': course
         }
     
-    # Check exam weights and validate
-    total_weight = Decimal('0')
+    # Raw exam weights (normalized over the regular exams by calculate_course_data_results)
     exam_weights = {}
     
     # Get all weights for this course
@@ -3504,26 +3787,16 @@ def calculate_single_course_results(course_id, calculation_method='absolute'):
     for weight in weights:
         exam_weights[weight.exam_id] = weight.weight
     
-    # Check all regular exams have weights
-    for exam in regular_exams:
-        if exam.id not in exam_weights:
-            exam_weights[exam.id] = Decimal('0')
-        total_weight += exam_weights[exam.id]
-    
-    # Normalize weights if they don't add up to 1.0
-    normalized_weights = {}
-    for exam_id, weight in exam_weights.items():
-        if total_weight > Decimal('0'):
-            normalized_weights[exam_id] = weight / total_weight
-        else:
-            normalized_weights[exam_id] = weight
-    
     # Create maps for efficient lookups
     # Create a map of exams to their questions
     questions_by_exam = {}
     for exam in all_exams:
         questions_by_exam[exam.id] = exam.questions
     
+    # Exam metadata and outcome weights for the score helpers, loaded once for the course
+    # so the per-student loops below do not issue any queries
+    exam_context = build_exam_context(all_exams, questions_by_exam, *load_course_outcome_weights([course_id]))
+    
     # Create a map of course outcomes to their related questions
     outcome_questions = {}
     for co in course_outcomes:
@@ -3535,12 +3808,6 @@ def calculate_single_course_results(course_id, calculation_method='absolute'):
         related_cos = [co for co in course_outcomes if po in co.program_outcomes]
         program_to_course_outcomes[po.id] = related_cos
     
-    # Create a map from original exam to makeup exam
-    makeup_map = {}
-    for makeup in makeup_exams:
-        if makeup.makeup_for:
-            makeup_map[makeup.makeup_for] = makeup
-    
     # Preload all scores for all exams and students
     scores_dict = {}
     student_ids = [s.id for s in students]
@@ -3568,6 +3835,91 @@ def calculate_single_course_results(course_id, calculation_method='absolute'):
         for attendance in attendances:
             attendance_dict[(attendance.student_id, attendance.exam_id)] = attendance.attended
     
+    return calculate_course_data_results({
+        'course': course,
+        'settings': settings,
+        'regular_exams': regular_exams,
+        'makeup_exams': makeup_exams,
+        'course_outcomes': course_outcomes,
+        'program_outcomes': program_outcomes,
+        'contributing_po_ids': contributing_po_ids,
+        'students': students,
+        'exam_weights': exam_weights,
+        'questions_by_exam': questions_by_exam,
+        'outcome_questions': outcome_questions,
+        'program_to_course_outcomes': program_to_course_outcomes,
+        'exam_context': exam_context,
+        'scores_dict': scores_dict,
+        'attendance_dict': attendance_dict
+    }, calculation_method)
+
+def calculate_course_data_results(course_data, calculation_method='absolute'):
+    """Calculate the CO and PO averages of one course from its preloaded data
+    
+    This is the calculation part of calculate_single_course_results(), split out so
+    that courses loaded together by bulk_load_course_data() give exactly the same
+    results as a course loaded on its own: exam weights are normalized over the
+    regular exams, a makeup exam without an attendance record counts as attended
+    and students missing a mandatory exam (and its makeup) are skipped.
+    
+    Parameters:
+    - course_data (dict): A bulk_load_course_data() entry, or the same keys loaded for one course
+      (course, settings, regular_exams, makeup_exams, course_outcomes, program_outcomes,
+      contributing_po_ids, students, exam_weights, questions_by_exam, outcome_questions,
+      program_to_course_outcomes, exam_context, scores_dict, attendance_dict)
+    - calculation_method (str): Either 'absolute' (default) or 'relative'
+    
+    Returns:
+    - The same dictionary as calculate_single_course_results()
+    """
+    course = course_data['course']
+    settings = course_data['settings']
+    regular_exams = course_data['regular_exams']
+    makeup_exams = course_data['makeup_exams']
+    course_outcomes = course_data['course_outcomes']
+    program_outcomes = course_data['program_outcomes']
+    contributing_po_ids = course_data['contributing_po_ids']
+    students = course_data['students']
+    questions_by_exam = course_data['questions_by_exam']
+    outcome_questions = course_data['outcome_questions']
+    program_to_course_outcomes = course_data['program_to_course_outcomes']
+    exam_context = course_data['exam_context']
+    scores_dict = course_data['scores_dict']
+    attendance_dict = course_data['attendance_dict']
+    course_id = course.id
+    
+    # Excluded courses, courses without outcomes, exam questions or students are not aggregated
+    has_exam_questions = any(questions_by_exam.get(exam.id) for exam in regular_exams + makeup_exams)
+    if settings.excluded or not course_outcomes or not has_exam_questions or not students:
+        return {
+            'program_outcome_scores': {},
+            'contributing_po_ids': contributing_po_ids if course_outcomes and not settings.excluded else set(),
+            'is_valid_for_aggregation': False,
+            'student_count_used': 0,
+            'course': course
+        }
+    
+    # Get list of mandatory exams
+    mandatory_exams = [exam for exam in regular_exams if exam.is_mandatory]
+    
+    # Exam weights, with regular exams without a weight counted as 0
+    total_weight = Decimal('0')
+    exam_weights = dict(course_data['exam_weights'])
+    
+    # Check all regular exams have weights
+    for exam in regular_exams:
+        if exam.id not in exam_weights:
+            exam_weights[exam.id] = Decimal('0')
+        total_weight += exam_weights[exam.id]
+    
+    # Normalize weights if they don't add up to 1.0
+    normalized_weights = {}
+    for exam_id, weight in exam_weights.items():
+        if total_weight > Decimal('0'):
+            normalized_weights[exam_id] = weight / total_weight
+        else:
+            normalized_weights[exam_id] = weight
+    
     # Calculate student results
     student_results = {}
     success_count = 0
@@ -3634,7 +3986,7 @@ def calculate_single_course_results(course_id, calculation_method='absolute'):
                 if makeup_attended:
                     makeup_score = calculate_student_exam_score_optimized(
                         student.id, makeup_exam.id, scores_dict, 
-                        questions_by_exam[makeup_exam.id], attendance_dict
+                        questions_by_exam[makeup_exam.id], attendance_dict, exam_context
                     )
                     # Use makeup score even if it's 0 (as long as it's not None)
                     if makeup_score is not None:
@@ -3650,7 +4002,7 @@ def calculate_single_course_results(course_id, calculation_method='absolute'):
             # If no makeup was attended or makeup score is None, use regular exam score
             exam_score = calculate_student_exam_score_optimized(
                 student.id, exam.id, scores_dict,
-                questions_by_exam[exam.id], attendance_dict
+                questions_by_exam[exam.id], attendance_dict, exam_context
             )
             
             # For non-mandatory exams, ensure None is treated as 0
@@ -3665,7 +4017,7 @@ def calculate_single_course_results(course_id, calculation_method='absolute'):
         # Calculate course outcome scores
         for outcome in course_outcomes:
             co_score = calculate_course_outcome_score_optimized(
-                student.id, outcome.id, scores_dict, outcome_questions, normalized_weights, attendance_dict
+                student.id, outcome.id, scores_dict, outcome_questions, normalized_weights, attendance_dict, exam_context
             )
             student_data['course_outcomes'][outcome.id] = co_score
         
@@ -3673,7 +4025,7 @@ def calculate_single_course_results(course_id, calculation_method='absolute'):
         for outcome in program_outcomes:
             po_score = calculate_program_outcome_score_optimized(
                 student.id, outcome.id, course_id, scores_dict, 
-                program_to_course_outcomes, outcome_questions, normalized_weights, attendance_dict
+                program_to_course_outcomes, outcome_questions, normalized_weights, attendance_dict, exam_context
             )
             student_data['program_outcomes'][outcome.id] = po_score
         
@@ -3735,7 +4087,8 @@ def calculate_single_course_results(course_id, calculation_method='absolute'):
         'is_valid_for_aggregation': True,
         'student_count_used': total_valid_students,
         'course': course,
-        'student_results': student_results  # Include the student results
+        'student_results': student_results,  # Include the student results
+        'exam_context': exam_context
     }
 
 @calculation_bp.route('/course/<int:course_id>/debug')
@@ -3764,6 +4117,9 @@ def debug_calculations(course_id):
     for exam in exams + makeup_exams:
         questions_by_exam[exam.id] = exam.questions
     
+    # Exam metadata and outcome weights for the score helpers, loaded once for the course
+    exam_context = build_exam_context(exams + makeup_exams, questions_by_exam, *load_course_outcome_weights([course_id]))
+    
     # Create a map of course outcomes to their related questions
     outcome_questions = {}
     for co in course_outcomes:
@@ -3832,7 +4188,7 @@ def debug_calculations(course_id):
                 regular_score = None
                 if regular_attended:
                     regular_score = calculate_student_exam_score_optimized(
-                        student.id, exam.id, scores_dict, questions_by_exam[exam.id], attendance_dict
+                        student.id, exam.id, scores_dict, questions_by_exam[exam.id], attendance_dict, exam_context
                     )
                 
                 # Check if there's a makeup exam for this mandatory exam
@@ -3845,7 +4201,7 @@ def debug_calculations(course_id):
                     makeup_attended = attendance_dict.get((student.id, makeup_exam.id), True)
                     if makeup_attended:
                         makeup_score = calculate_student_exam_score_optimized(
-                            student.id, makeup_exam.id, scores_dict, questions_by_exam[makeup_exam.id], attendance_dict
+                            student.id, makeup_exam.id, scores_dict, questions_by_exam[makeup_exam.id], attendance_dict, exam_context
                         )
                 
                 # Skip student if they missed both the mandatory exam and its makeup (if exists)
@@ -3874,7 +4230,7 @@ def debug_calculations(course_id):
                 if makeup_attended:
                     makeup_score = calculate_student_exam_score_optimized(
                         student.id, makeup_exam.id, scores_dict, 
-                        questions_by_exam[makeup_exam.id], attendance_dict
+                        questions_by_exam[makeup_exam.id], attendance_dict, exam_context
                     )
                     # Use makeup score even if it's 0 (as long as it's not None)
                     if makeup_score is not None:
@@ -3888,7 +4244,7 @@ def debug_calculations(course_id):
             # If no makeup was attended or makeup score is None, use regular exam score
             exam_score = calculate_student_exam_score_optimized(
                 student.id, exam.id, scores_dict,
-                questions_by_exam[exam.id], attendance_dict
+                questions_by_exam[exam.id], attendance_dict, exam_context
             )
             
             # For non-mandatory exams, ensure None is treated as 0
@@ -3919,14 +4275,14 @@ def debug_calculations(course_id):
         # Calculate course outcome scores
         for outcome in course_outcomes:
             score = calculate_course_outcome_score_optimized(
-                student.id, outcome.id, scores_dict, outcome_questions, normalized_weights, attendance_dict
+                student.id, outcome.id, scores_dict, outcome_questions, normalized_weights, attendance_dict, exam_context
             )
             student_results[student.id]['course_outcome_scores'][outcome.id] = score
         
         # Calculate program outcome scores
         for outcome in program_outcomes:
             score = calculate_program_outcome_score_optimized(
-                student.id, outcome.id, course_id, scores_dict, program_to_course_outcomes, outcome_questions, normalized_weights, attendance_dict
+                student.id, outcome.id, course_id, scores_dict, program_to_course_outcomes, outcome_questions, normalized_weights, attendance_dict, exam_context
             )
             student_results[student.id]['program_outcome_scores'][outcome.id] = score
     
@@ -4441,6 +4797,7 @@ def export_student_results(course_id):
     
     # Get achievement levels for this course
     achievement_levels = AchievementLevel.query.filter_by(course_id=course_id).order_by(AchievementLevel.min_score.desc()).all()
+    achievement_classifier = get_achievement_classifier(achievement_levels)
     
     # Get the calculated results which are used for the display
     results = calculate_single_course_results(course_id)
@@ -4468,10 +4825,13 @@ def export_student_results(course_id):
     exam_scores_dict = {}
     exam_max_scores = {}  # Store max scores for each exam
     
+    # Question totals come with the exam context the calculation already loaded
+    exam_context = results.get('exam_context') or load_exam_context(course_id)
+    question_totals = exam_context['question_totals']
+    
     for exam in regular_exams:
-        # Calculate max possible score for this exam
-        questions = Question.query.filter_by(exam_id=exam.id).all()
-        exam_max_scores[exam.id] = sum(float(q.max_score) for q in questions) if questions else 0
+        # Max possible score for this exam
+        exam_max_scores[exam.id] = float(question_totals.get(exam.id, 0))
         
         # Get all scores for this exam
         exam_scores = Score.query.filter_by(exam_id=exam.id).all()
@@ -4491,9 +4851,8 @@ def export_student_results(course_id):
     # Get scores for all students for each makeup exam
     makeup_scores_dict = {}
     for exam in makeup_exams:
-        # Calculate max possible score for this makeup exam
-        questions = Question.query.filter_by(exam_id=exam.id).all()
-        exam_max_scores[exam.id] = sum(float(q.max_score) for q in questions) if questions else 0
+        # Max possible score for this makeup exam
+        exam_max_scores[exam.id] = float(question_totals.get(exam.id, 0))
         
         # Get all scores for this makeup exam
         makeup_scores = Score.query.filter_by(exam_id=exam.id).all()
@@ -4625,7 +4984,7 @@ def export_student_results(course_id):
                 student_row[f'{co_code} Achievement (%)'] = round(float(co_score), 2)
                 
                 # Get achievement level
-                level = get_achievement_level(float(co_score), achievement_levels)
+                level = achievement_classifier.classify(float(co_score))
                 student_row[f'{co_code} Achievement Level'] = level['name']
             else:
                 student_row[f'{co_code} Achievement (%)'] = "N/A"
@@ -4639,7 +4998,7 @@ def export_student_results(course_id):
             student_row['Overall Weighted Score (%)'] = round(float(weighted_score), 2)
             
             # Get achievement level
-            level = get_achievement_level(round(float(weighted_score), 2), achievement_levels)
+            level = achievement_classifier.classify(round(float(weighted_score), 2))
             student_row['Overall Achievement Level'] = level['name']
             
             # Store the overall score for sorting
@@ -4691,6 +5050,7 @@ def get_student_score(course_id):
         
         # Get the achievement levels for this course
         achievement_levels = get_achievement_levels(course_id)
+        achievement_classifier = get_achievement_classifier(achievement_levels)
         
         # Perform calculations to get the student's data
         results = calculate_course_results(course, recalculate=True)
@@ -4719,7 +5079,7 @@ def get_student_score(course_id):
         else:
             # Get the percentage and achievement level
             percentage = student_data.get('overall_percentage', 0)
-            level = get_achievement_level(percentage, achievement_levels)
+            level = achievement_classifier.classify(percentage)
             
             score_html = '''
                 <div class="progress" style="height: 25px;">
@@ -4749,7 +5109,7 @@ def get_student_score(course_id):
         
         # Add course outcomes
         for co_code, percentage in student_data.get('course_outcomes', {}).items():
-            level = get_achievement_level(percentage, achievement_levels)
+            level = achievement_classifier.classify(percentage)
             details_html += '''
                 <div class="col-md-6 mb-2">
                     <small><strong>{}:</strong></small>
@@ -4775,7 +5135,7 @@ def get_student_score(course_id):
         
         # Add exam scores
         for exam_name, percentage in student_data.get('exam_scores', {}).items():
-            level = get_achievement_level(percentage, achievement_levels)
+            level = achievement_classifier.classify(percentage)
             details_html += '''
                 <div class="col-md-6 mb-2">
                     <small><strong>{}:</strong></small>
@@ -4831,7 +5191,7 @@ def calculate_individual_student_results(student_id, course_id, bulk_data, calcu
     
     # Check if student should be included when graduating filter is active
     if include_graduating_only:
-        if not is_graduating_student_by_db_id(student_id):
+        if not is_graduating_student_in_bulk_data(student_id, course_id, bulk_data):
             # Student is not graduating, return empty result when filter is active
             return {}
     
@@ -4842,6 +5202,7 @@ def calculate_individual_student_results(student_id, course_id, bulk_data, calcu
     outcome_questions = course_data['outcome_questions']
     normalized_weights = course_data['normalized_weights']
     attendance_dict = course_data['attendance_dict']
+    exam_context = course_data.get('exam_context')
     
     # Calculate program outcome scores for this specific student
     student_po_scores = {}
@@ -4849,7 +5210,7 @@ def calculate_individual_student_results(student_id, course_id, bulk_data, calcu
         po_score = calculate_program_outcome_score_optimized(
             student_id, po.id, course_id, scores_dict,
             program_to_course_outcomes, outcome_questions, 
-            normalized_weights, attendance_dict
+            normalized_weights, attendance_dict, exam_context
         )
         student_po_scores[po.id] = po_score
     
@@ -5213,117 +5574,16 @@ def cross_course_outcomes():
     
     print(f"DEBUG [cross_course_outcomes]: Request started - show_non_grouped={show_non_grouped}, force_refresh={force_refresh}")
     
-    # Check if we have cached results from a previous calculation during this app runtime
-    cached_results = getattr(cross_course_outcomes, 'cached_results', None)
-    cached_threshold = getattr(cross_course_outcomes, 'cached_threshold', None)
-    cached_non_grouped = getattr(cross_course_outcomes, 'cached_non_grouped', None)
-    
-    print(f"DEBUG [cross_course_outcomes]: Cache state - cached_results={cached_results is not None}, cached_threshold={cached_threshold}, cached_non_grouped={len(cached_non_grouped) if cached_non_grouped else 0} items")
-    
-    # Force refresh if cached_non_grouped is None but show_non_grouped is True
-    if show_non_grouped and cached_non_grouped is None:
-        force_refresh = True
-        print("DEBUG [cross_course_outcomes]: Forcing refresh because show_non_grouped is True but cached_non_grouped is None")
-    
-    if cached_results is None or cached_threshold != similarity_threshold or force_refresh:
-        # We need to compute groups - this may take time
-        try:
-            print(f"DEBUG [cross_course_outcomes]: Computing new groups with threshold={similarity_threshold}")
-            # Import Jaro-Winkler similarity
-            import jellyfish
-            
-            # Get all course outcomes
-            course_outcomes = CourseOutcome.query.all()
-            print(f"DEBUG [cross_course_outcomes]: Found {len(course_outcomes)} total course outcomes in database")
-            
-            if not course_outcomes:
-                flash('No course outcomes found in the database', 'warning')
-                return render_template('calculation/cross_course_outcomes.html',
-                                    similarity=similarity_threshold,
-                                    raw_similarity=raw_similarity,
-                                    search=search_query,
-                                    sort=sort_by,
-                                    outcome_groups=[],
-                                    non_grouped_outcomes=[],
-                                    show_non_grouped=show_non_grouped,
-                                    loading=False,
-                                    active_page='calculations')
-            
-            # Group outcomes by similarity
-            outcome_groups = []
-            processed_outcomes = set()
-            
-            for i, outcome1 in enumerate(course_outcomes):
-                if outcome1.id in processed_outcomes:
-                    continue
-                
-                # Create a new group with this outcome as the representative
-                group = {
-                    'representative': outcome1,
-                    'outcomes': [outcome1],
-                    'course_ids': set([outcome1.course_id]),
-                    'courses': [outcome1.course]
-                }
-                processed_outcomes.add(outcome1.id)
-                
-                # Track if this outcome has any similar ones
-                has_similar = False
-                
-                # Find similar outcomes
-                for j, outcome2 in enumerate(course_outcomes):
-                    if i == j or outcome2.id in processed_outcomes:
-                        continue
-                    
-                    # Calculate similarity using Jaro-Winkler
-                    description_similarity = jellyfish.jaro_winkler_similarity(
-                        outcome1.description.lower(),
-                        outcome2.description.lower()
-                    )
-                    
-                    # Check if similarity meets threshold
-                    if description_similarity >= similarity_threshold:
-                        group['outcomes'].append(outcome2)
-                        group['course_ids'].add(outcome2.course_id)
-                        group['courses'].append(outcome2.course)
-                        processed_outcomes.add(outcome2.id)
-                        has_similar = True
-                
-                # Only add groups with multiple outcomes
-                if has_similar:
-                    outcome_groups.append(group)
-                else:
-                    # Remove the outcome from processed_outcomes if it doesn't have similar ones
-                    processed_outcomes.remove(outcome1.id)
-            
-            # Get non-grouped outcomes by finding all outcomes that aren't in processed_outcomes
-            non_grouped_outcomes = [o for o in course_outcomes if o.id not in processed_outcomes]
-            
-            print(f"DEBUG [cross_course_outcomes]: Computation results - {len(outcome_groups)} groups, {len(non_grouped_outcomes)} non-grouped outcomes")
-            print(f"DEBUG [cross_course_outcomes]: First few non-grouped outcomes: {[o.code for o in non_grouped_outcomes[:5]] if non_grouped_outcomes else 'None'}")
-            
-            # Cache the results for future requests
-            cross_course_outcomes.cached_results = outcome_groups
-            cross_course_outcomes.cached_threshold = similarity_threshold
-            cross_course_outcomes.cached_non_grouped = non_grouped_outcomes
-            
-            print(f"DEBUG [cross_course_outcomes]: Cached {len(outcome_groups)} groups and {len(non_grouped_outcomes)} non-grouped outcomes")
-            print(f"DEBUG [cross_course_outcomes]: Rendering template with show_non_grouped={show_non_grouped}, passing {len(non_grouped_outcomes) if show_non_grouped else 0} non-grouped outcomes")
-            
-            # Return template with the groups but mark as loading
-            # The actual scores will be calculated via AJAX
-            return render_template('calculation/cross_course_outcomes.html',
-                                similarity=similarity_threshold,
-                                raw_similarity=raw_similarity,
-                                search=search_query,
-                                sort=sort_by,
-                                outcome_groups=outcome_groups,
-                                non_grouped_outcomes=non_grouped_outcomes if show_non_grouped else [],
-                                show_non_grouped=show_non_grouped,
-                                loading=True,
-                                active_page='calculations')
-                                
-        except ImportError:
-            flash('The jellyfish library is required for outcome similarity analysis. Please install it with "pip install jellyfish".', 'error')
+    try:
+        from sqlalchemy.orm import joinedload
+        from routes.similarity_engine import group_outcomes_by_similarity, clear_similarity_scores
+        
+        # Get all course outcomes (with their courses for the group headers)
+        course_outcomes = CourseOutcome.query.options(joinedload(CourseOutcome.course)).order_by(CourseOutcome.id).all()
+        print(f"DEBUG [cross_course_outcomes]: Found {len(course_outcomes)} total course outcomes in database")
+        
+        if not course_outcomes:
+            flash('No course outcomes found in the database', 'warning')
             return render_template('calculation/cross_course_outcomes.html',
                                 similarity=similarity_threshold,
                                 raw_similarity=raw_similarity,
@@ -5334,198 +5594,265 @@ def cross_course_outcomes():
                                 show_non_grouped=show_non_grouped,
                                 loading=False,
                                 active_page='calculations')
-    else:
-        # Use cached results
-        outcome_groups = cached_results
-        non_grouped_outcomes = cached_non_grouped if cached_non_grouped is not None and show_non_grouped else []
         
-        print(f"DEBUG [cross_course_outcomes]: Using cached results - {len(outcome_groups)} groups")
-        print(f"DEBUG [cross_course_outcomes]: show_non_grouped={show_non_grouped}")
-        print(f"DEBUG [cross_course_outcomes]: Non-grouped outcomes before filtering: {len(non_grouped_outcomes)}")
+        # Stored similarity scores survive restarts; refresh forgets them and scores every pair again
+        if force_refresh:
+            clear_similarity_scores()
         
-        # Filter by search query if provided
-        if search_query:
-            filtered_groups = []
-            for group in outcome_groups:
-                rep = group['representative']
-                if (search_query.lower() in rep.code.lower() or 
-                    search_query.lower() in rep.description.lower()):
-                    filtered_groups.append(group)
-            outcome_groups = filtered_groups
-            
-            # Also filter non-grouped outcomes
-            if show_non_grouped and non_grouped_outcomes:
-                filtered_non_grouped = []
-                for outcome in non_grouped_outcomes:
-                    if (search_query.lower() in outcome.code.lower() or 
-                        search_query.lower() in outcome.description.lower()):
-                        filtered_non_grouped.append(outcome)
-                non_grouped_outcomes = filtered_non_grouped
-                print(f"DEBUG [cross_course_outcomes]: Non-grouped outcomes after search filtering: {len(non_grouped_outcomes)}")
-        
-        # Sort the groups
-        if sort_by == 'code_asc':
-            outcome_groups.sort(key=lambda g: g['representative'].code)
-        elif sort_by == 'code_desc':
-            outcome_groups.sort(key=lambda g: g['representative'].code, reverse=True)
-        elif sort_by == 'description_asc':
-            outcome_groups.sort(key=lambda g: g['representative'].description)
-        elif sort_by == 'description_desc':
-            outcome_groups.sort(key=lambda g: g['representative'].description, reverse=True)
-        elif sort_by == 'count_asc':
-            outcome_groups.sort(key=lambda g: len(g['outcomes']))
-        elif sort_by == 'count_desc':
-            outcome_groups.sort(key=lambda g: len(g['outcomes']), reverse=True)
-            
-        # Sort non-grouped outcomes
-        if non_grouped_outcomes:
-            if sort_by == 'code_asc':
-                non_grouped_outcomes.sort(key=lambda o: o.code)
-            elif sort_by == 'code_desc':
-                non_grouped_outcomes.sort(key=lambda o: o.code, reverse=True)
-            elif sort_by == 'description_asc':
-                non_grouped_outcomes.sort(key=lambda o: o.description)
-            elif sort_by == 'description_desc':
-                non_grouped_outcomes.sort(key=lambda o: o.description, reverse=True)
-        
-        # Final check before rendering
-        final_non_grouped = non_grouped_outcomes if show_non_grouped else []
-        print(f"DEBUG [cross_course_outcomes]: Final rendering with show_non_grouped={show_non_grouped}, passing {len(final_non_grouped)} non-grouped outcomes")
-        print(f"DEBUG [cross_course_outcomes]: First few non-grouped outcomes: {[o.code for o in final_non_grouped[:5]] if final_non_grouped else 'None'}")
+        # Group outcomes by similarity: only pairs that were never scored for this threshold are computed
+        outcome_groups, non_grouped_outcomes, scored_pairs = group_outcomes_by_similarity(
+            course_outcomes, similarity_threshold, workers=get_similarity_workers())
         
+        print(f"DEBUG [cross_course_outcomes]: Computation results - {len(outcome_groups)} groups, {len(non_grouped_outcomes)} non-grouped outcomes, {scored_pairs} pairs scored")
+                                
+    except ImportError:
+        flash('The jellyfish library is required for outcome similarity analysis. Please install it with "pip install jellyfish".', 'error')
         return render_template('calculation/cross_course_outcomes.html',
                             similarity=similarity_threshold,
                             raw_similarity=raw_similarity,
                             search=search_query,
                             sort=sort_by,
-                            outcome_groups=outcome_groups,
-                            non_grouped_outcomes=final_non_grouped,
+                            outcome_groups=[],
+                            non_grouped_outcomes=[],
                             show_non_grouped=show_non_grouped,
                             loading=False,
                             active_page='calculations')
+    
+    if not show_non_grouped:
+        non_grouped_outcomes = []
+    
+    # Filter by search query if provided
+    if search_query:
+        filtered_groups = []
+        for group in outcome_groups:
+            rep = group['representative']
+            if (search_query.lower() in rep.code.lower() or 
+                search_query.lower() in rep.description.lower()):
+                filtered_groups.append(group)
+        outcome_groups = filtered_groups
+        
+        # Also filter non-grouped outcomes
+        if non_grouped_outcomes:
+            filtered_non_grouped = []
+            for outcome in non_grouped_outcomes:
+                if (search_query.lower() in outcome.code.lower() or 
+                    search_query.lower() in outcome.description.lower()):
+                    filtered_non_grouped.append(outcome)
+            non_grouped_outcomes = filtered_non_grouped
+    
+    # Sort the groups
+    if sort_by == 'code_asc':
+        outcome_groups.sort(key=lambda g: g['representative'].code)
+    elif sort_by == 'code_desc':
+        outcome_groups.sort(key=lambda g: g['representative'].code, reverse=True)
+    elif sort_by == 'description_asc':
+        outcome_groups.sort(key=lambda g: g['representative'].description)
+    elif sort_by == 'description_desc':
+        outcome_groups.sort(key=lambda g: g['representative'].description, reverse=True)
+    elif sort_by == 'count_asc':
+        outcome_groups.sort(key=lambda g: len(g['outcomes']))
+    elif sort_by == 'count_desc':
+        outcome_groups.sort(key=lambda g: len(g['outcomes']), reverse=True)
+        
+    # Sort non-grouped outcomes
+    if non_grouped_outcomes:
+        if sort_by == 'code_asc':
+            non_grouped_outcomes.sort(key=lambda o: o.code)
+        elif sort_by == 'code_desc':
+            non_grouped_outcomes.sort(key=lambda o: o.code, reverse=True)
+        elif sort_by == 'description_asc':
+            non_grouped_outcomes.sort(key=lambda o: o.description)
+        elif sort_by == 'description_desc':
+            non_grouped_outcomes.sort(key=lambda o: o.description, reverse=True)
+    
+    print(f"DEBUG [cross_course_outcomes]: Rendering with show_non_grouped={show_non_grouped}, passing {len(non_grouped_outcomes)} non-grouped outcomes")
+    
+    # Freshly scored pages show the loading indicator while the scores are fetched via AJAX
+    return render_template('calculation/cross_course_outcomes.html',
+                        similarity=similarity_threshold,
+                        raw_similarity=raw_similarity,
+                        search=search_query,
+                        sort=sort_by,
+                        outcome_groups=outcome_groups,
+                        non_grouped_outcomes=non_grouped_outcomes,
+                        show_non_grouped=show_non_grouped,
+                        loading=scored_pairs > 0,
+                        active_page='calculations')
+
+# Level shown by the cross-course outcomes page for scores outside every level
+UNKNOWN_ACHIEVEMENT_LEVEL = {'name': 'Unknown', 'color': 'secondary'}
+
+def get_cross_course_achievement_levels():
+    """Global achievement levels (highest first), creating the default levels if none exist"""
+    achievement_levels = GlobalAchievementLevel.query.order_by(GlobalAchievementLevel.min_score.desc()).all()
+    if not achievement_levels:
+        # Create default achievement levels if none exist
+        default_levels = [
+            {"name": "Excellent", "min_score": 90.00, "max_score": 100.00, "color": "success"},
+            {"name": "Better", "min_score": 70.00, "max_score": 89.99, "color": "info"},
+            {"name": "Good", "min_score": 60.00, "max_score": 69.99, "color": "primary"},
+            {"name": "Need Improvements", "min_score": 50.00, "max_score": 59.99, "color": "warning"},
+            {"name": "Failure", "min_score": 0.01, "max_score": 49.99, "color": "danger"}
+        ]
+        
+        for level_data in default_levels:
+            level = GlobalAchievementLevel(
+                name=level_data["name"],
+                min_score=level_data["min_score"],
+                max_score=level_data["max_score"],
+                color=level_data["color"]
+            )
+            db.session.add(level)
+        
+        db.session.commit()
+        achievement_levels = GlobalAchievementLevel.query.order_by(GlobalAchievementLevel.min_score.desc()).all()
+    return achievement_levels
+
+def cross_course_achievement_level(score, achievement_levels):
+    """Name and color of the achievement level a score falls into ('Unknown' if none)"""
+    return get_achievement_classifier(achievement_levels).classify(score, fallback=UNKNOWN_ACHIEVEMENT_LEVEL)
+
+def load_cross_course_results(course_ids):
+    """
+    CO averages ('absolute' method) of several courses, computed at most once per request.
+    
+    Courses with an up-to-date RESULT_COURSE cache entry are taken from the cache; all
+    the others are loaded together with bulk_load_course_data() and calculated with
+    calculate_course_data_results(), which gives the same results as
+    calculate_single_course_results() without loading every course separately.
+    Newly computed results are stored in the cache (the caller commits).
+    
+    Returns {course_id: course results}
+    """
+    course_ids = sorted(set(course_ids))
+    data_versions = get_course_data_versions(course_ids)
+    course_results = get_cached_course_results(course_ids, 'absolute', result_type=RESULT_COURSE)
+    
+    missing_course_ids = [course_id for course_id in course_ids if course_id not in course_results]
+    if missing_course_ids:
+        bulk_data = bulk_load_course_data(missing_course_ids, 'absolute')
+        for course_id in missing_course_ids:
+            course_data = bulk_data.get(course_id)
+            if course_data is None:
+                continue
+            
+            # Like calculate_single_course_results, persist the default settings of a course without them
+            if course_data['settings'].id is None:
+                db.session.add(course_data['settings'])
+            
+            result = calculate_course_data_results(course_data, 'absolute')
+            store_course_result(course_id, 'absolute', False, result,
+                                data_versions[course_id], result_type=RESULT_COURSE)
+            course_results[course_id] = result
+        logging.info(f"Cross-course outcomes: calculated {len(missing_course_ids)} courses, "
+                     f"{len(course_ids) - len(missing_course_ids)} from cache")
+    return course_results
+
+def summarize_cross_course_outcomes(outcome_ids, outcomes_by_id, courses, course_results, achievement_levels):
+    """Scores, achievement levels and course-weighted average of one set of course outcomes"""
+    results = []
+    total_weighted_score = Decimal('0')
+    total_weight = Decimal('0')
+    
+    # Outcomes in id order, like the IN query the endpoint used to run per request
+    for outcome_id in sorted(set(outcome_ids) & outcomes_by_id.keys()):
+        outcome = outcomes_by_id[outcome_id]
+        course = courses.get(outcome.course_id)
+        course_result = course_results.get(outcome.course_id)
+        if not course or not course_result or not course_result.get('is_valid_for_aggregation'):
+            continue
+        
+        # Get outcome score from course results
+        outcome_score = course_result.get('course_outcome_scores', {}).get(outcome.id)
+        if outcome_score is None:
+            continue
+        
+        results.append({
+            'outcome_id': outcome.id,
+            'outcome_code': outcome.code,
+            'outcome_description': outcome.description,
+            'course_id': course.id,
+            'course_code': course.code,
+            'course_name': course.name,
+            'course_semester': course.semester,
+            'course_weight': float(course.course_weight),
+            'score': float(outcome_score),
+            'achievement_level': cross_course_achievement_level(float(outcome_score), achievement_levels)
+        })
+        
+        # Add to weighted average calculation
+        total_weighted_score += Decimal(str(outcome_score)) * Decimal(str(course.course_weight))
+        total_weight += Decimal(str(course.course_weight))
+    
+    # Calculate overall weighted average
+    overall_average = None
+    overall_level = None
+    if total_weight > Decimal('0'):
+        overall_average = float(total_weighted_score / total_weight)
+        overall_level = cross_course_achievement_level(overall_average, achievement_levels)
+    
+    return {
+        'results': results,
+        'overall_average': overall_average,
+        'overall_level': overall_level
+    }
 
 @calculation_bp.route('/cross_course_outcomes/data', methods=['POST'])
 def cross_course_outcomes_data():
-    """API endpoint to calculate course outcome scores for cross-course analysis"""
+    """
+    API endpoint to calculate course outcome scores for cross-course analysis
+    
+    Accepts either {"outcome_ids": [...]} and returns the results of those outcomes, or
+    {"groups": {"<key>": [...], ...}} and returns {"groups": {"<key>": results}} so that
+    the page loads every outcome group with one request. Every course involved is
+    calculated once per request, whatever the number of outcomes and groups.
+    """
     try:
         data = request.json
         if not data:
             return jsonify({'success': False, 'message': 'No data provided'}), 400
         
-        outcome_ids = data.get('outcome_ids', [])
-        if not outcome_ids:
+        groups = data.get('groups')
+        if groups is None:
+            groups = {None: data.get('outcome_ids', [])}
+        if not isinstance(groups, dict):
+            return jsonify({'success': False, 'message': 'Groups must map group keys to outcome IDs'}), 400
+        try:
+            groups = {key: [int(outcome_id) for outcome_id in outcome_ids or []] for key, outcome_ids in groups.items()}
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'Outcome IDs must be integers'}), 400
+        
+        all_outcome_ids = {outcome_id for outcome_ids in groups.values() for outcome_id in outcome_ids}
+        if not all_outcome_ids:
             return jsonify({'success': False, 'message': 'No outcome IDs provided'}), 400
         
-        # Get global achievement levels for display
-        achievement_levels = GlobalAchievementLevel.query.order_by(GlobalAchievementLevel.min_score.desc()).all()
-        if not achievement_levels:
-            # Create default achievement levels if none exist
-            default_levels = [
-                {"name": "Excellent", "min_score": 90.00, "max_score": 100.00, "color": "success"},
-                {"name": "Better", "min_score": 70.00, "max_score": 89.99, "color": "info"},
-                {"name": "Good", "min_score": 60.00, "max_score": 69.99, "color": "primary"},
-                {"name": "Need Improvements", "min_score": 50.00, "max_score": 59.99, "color": "warning"},
-                {"name": "Failure", "min_score": 0.01, "max_score": 49.99, "color": "danger"}
-            ]
-            
-            for level_data in default_levels:
-                level = GlobalAchievementLevel(
-                    name=level_data["name"],
-                    min_score=level_data["min_score"],
-                    max_score=level_data["max_score"],
-                    color=level_data["color"]
-                )
-                db.session.add(level)
-            
-            db.session.commit()
-            achievement_levels = GlobalAchievementLevel.query.order_by(GlobalAchievementLevel.min_score.desc()).all()
+        # Get global achievement levels for display, compiled once for every group
+        achievement_levels = get_achievement_classifier(get_cross_course_achievement_levels())
         
-        # Get course outcomes
-        outcomes = CourseOutcome.query.filter(CourseOutcome.id.in_(outcome_ids)).all()
-        if not outcomes:
+        # Get course outcomes of every group and their distinct courses
+        outcomes_by_id = {outcome.id: outcome for outcome in
+                          CourseOutcome.query.filter(CourseOutcome.id.in_(all_outcome_ids)).all()}
+        if not outcomes_by_id:
             return jsonify({'success': False, 'message': 'No outcomes found with the provided IDs'}), 404
         
-        # Calculate results for each outcome
-        results = []
-        total_weighted_score = Decimal('0')
-        total_weight = Decimal('0')
+        course_ids = {outcome.course_id for outcome in outcomes_by_id.values()}
+        courses = {course.id: course for course in Course.query.filter(Course.id.in_(course_ids)).all()}
+        course_results = load_cross_course_results(courses.keys())
         
-        for outcome in outcomes:
-            # Get course for this outcome
-            course = Course.query.get(outcome.course_id)
-            if not course:
-                continue
-            
-            # Calculate the course results to get outcome scores
-            course_results = calculate_single_course_results(course.id, 'absolute')
-            if not course_results or not course_results.get('is_valid_for_aggregation'):
-                continue
-            
-            # Get outcome score from course results
-            outcome_score = None
-            if 'course_outcome_scores' in course_results:
-                outcome_score = course_results['course_outcome_scores'].get(outcome.id)
-            
-            if outcome_score is not None:
-                # Get achievement level for this score
-                achievement_level = {
-                    'name': 'Unknown',
-                    'color': 'secondary'
-                }
-                
-                for level in achievement_levels:
-                    if float(outcome_score) >= float(level.min_score) and float(outcome_score) <= float(level.max_score):
-                        achievement_level = {
-                            'name': level.name,
-                            'color': level.color
-                        }
-                        break
-                
-                # Add to results
-                results.append({
-                    'outcome_id': outcome.id,
-                    'outcome_code': outcome.code,
-                    'outcome_description': outcome.description,
-                    'course_id': course.id,
-                    'course_code': course.code,
-                    'course_name': course.name,
-                    'course_semester': course.semester,
-                    'course_weight': float(course.course_weight),
-                    'score': float(outcome_score),
-                    'achievement_level': achievement_level
-                })
-                
-                # Add to weighted average calculation
-                total_weighted_score += Decimal(str(outcome_score)) * Decimal(str(course.course_weight))
-                total_weight += Decimal(str(course.course_weight))
+        group_results = {
+            key: summarize_cross_course_outcomes(outcome_ids, outcomes_by_id, courses, course_results, achievement_levels)
+            for key, outcome_ids in groups.items()
+        }
         
-        # Calculate overall weighted average
-        overall_average = None
-        if total_weight > Decimal('0'):
-            overall_average = float(total_weighted_score / total_weight)
-            
-            # Get overall achievement level
-            overall_level = {
-                'name': 'Unknown',
-                'color': 'secondary'
-            }
-            
-            for level in achievement_levels:
-                if overall_average >= float(level.min_score) and overall_average <= float(level.max_score):
-                    overall_level = {
-                        'name': level.name,
-                        'color': level.color
-                    }
-                    break
+        # Persist newly cached course results
+        db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'results': results,
-            'overall_average': overall_average,
-            'overall_level': overall_level if overall_average is not None else None
-        })
+        if None in group_results:
+            return jsonify({'success': True, **group_results[None]})
+        return jsonify({'success': True, 'groups': group_results})
         
     except Exception as e:
+        db.session.rollback()
         logging.error(f"Error calculating cross-course outcome data: {str(e)}")
         return jsonify({'success': False, 'message': f'An error occurred: {str(e)}'}), 500
 
@@ -5549,6 +5876,7 @@ def manage_graduating_students():
         # Try to create the table
         success = ensure_graduating_students_table()
         if success:
+            invalidate_graduating_snapshot()
             table_available = True
             migration_message = "Graduating students table was automatically created for your database."
         else:
@@ -5580,7 +5908,9 @@ def manage_graduating_students():
                         # Add new graduating student
                         graduating_student = GraduatingStudent(student_id=student_id)
                         db.session.add(graduating_student)
+                        invalidate_graduating_course_results()
                         db.session.commit()
+                        invalidate_graduating_snapshot()
                         
                         # Log action
                         log = Log(action="ADD_GRADUATING_STUDENT", 
@@ -5614,7 +5944,9 @@ def manage_graduating_students():
                             db.session.add(graduating_student)
                             added_count += 1
                     
+                    invalidate_graduating_course_results()
                     db.session.commit()
+                    invalidate_graduating_snapshot()
                     
                     # Log action
                     log = Log(action="BULK_ADD_GRADUATING_STUDENTS", 
@@ -5633,7 +5965,9 @@ def manage_graduating_students():
             try:
                 count = GraduatingStudent.query.count()
                 GraduatingStudent.query.delete()
+                invalidate_graduating_course_results()
                 db.session.commit()
+                invalidate_graduating_snapshot()
                 
                 # Log action
                 log = Log(action="CLEAR_ALL_GRADUATING_STUDENTS", 
@@ -5680,7 +6014,9 @@ def delete_graduating_student(student_id):
         student_id_value = graduating_student.student_id
         
         db.session.delete(graduating_student)
+        invalidate_graduating_course_results()
         db.session.commit()
+        invalidate_graduating_snapshot()
         
         # Log action
         log = Log(action="DELETE_GRADUATING_STUDENT", 
@@ -5725,39 +6061,23 @@ def export_graduating_students():
 def get_graduating_student_ids():
     """
     Helper function to get all graduating student IDs.
-    Returns empty list if table doesn't exist or on error.
+    Returns a frozenset from the graduating students snapshot (routes/graduating_snapshot.py),
+    empty if the table doesn't exist or on error.
     """
-    from db_migrations import graduating_students_table_exists
-    
-    try:
-        if not graduating_students_table_exists():
-            return []
-        
-        graduating_students = GraduatingStudent.query.all()
-        return [gs.student_id for gs in graduating_students]
-    except Exception:
-        return []
+    return graduating_student_id_set()
 
 def is_graduating_student(student_id):
     """
     Check if a student ID is in the graduating students list.
     Returns False if table doesn't exist or on error.
     """
-    from db_migrations import graduating_students_table_exists
-    
-    try:
-        if not graduating_students_table_exists():
-            return False
-        
-        return GraduatingStudent.query.filter_by(student_id=student_id).first() is not None
-    except Exception:
-        return False
+    return student_id in graduating_student_id_set()
 
 def is_graduating_student_by_db_id(student_db_id):
     """
     Check if a student (by database ID) is in the graduating students list.
-    This is a helper for calculate_individual_student_results which receives DB IDs.
     Returns False if student not found, table doesn't exist, or on error.
+    Calculations use is_graduating_student_in_bulk_data instead, which needs no query.
     """
     try:
         student = Student.query.get(student_db_id)
@@ -5767,253 +6087,26 @@ def is_graduating_student_by_db_id(student_db_id):
     except Exception:
         return False
 
-@calculation_bp.route('/all_courses/pdf_progress/clear', methods=['POST'])
-def clear_pdf_progress():
-    """Clear progress tracking session and old files - for debugging"""
-    import json
-    import os
-    import tempfile
-    import glob
-    
-    #print("DEBUG: Clear progress endpoint called")
-    
-    # Clear session
-    if 'pdf_progress_file' in session:
-        old_file = session['pdf_progress_file']
-        del session['pdf_progress_file']
-        print(f"DEBUG: Cleared session progress file: {old_file}")
-    
-    # Clean up all old progress files
-    try:
-        temp_dir = tempfile.gettempdir()
-        pattern = os.path.join(temp_dir, "pdf_progress_*.txt")
-        old_files = glob.glob(pattern)
-        
-        for old_file in old_files:
-            try:
-                os.remove(old_file)
-                print(f"DEBUG: Removed old progress file: {old_file}")
-            except:
-                pass
-    except:
-        pass
-    
-    return jsonify({'status': 'cleared', 'message': 'All progress files cleared'})
-
-@calculation_bp.route('/all_courses/pdf_progress/clean_stale', methods=['POST'])
-def clean_stale_pdf_progress():
-    """Clean up only stale progress files (not actively being updated)"""
-    import json
-    import os
-    import tempfile
-    import glob
-    from datetime import datetime
-    
-    print("DEBUG: Clean stale progress endpoint called")
-    
-    cleaned_count = 0
-    
-    try:
-        temp_dir = tempfile.gettempdir()
-        pattern = os.path.join(temp_dir, "pdf_progress_*.txt")
-        progress_files = glob.glob(pattern)
-        current_time = datetime.now().timestamp()
-        
-        for progress_file in progress_files:
-            try:
-                file_mod_age = current_time - os.path.getmtime(progress_file)
-                
-                # If file hasn't been modified in the last 2 minutes, consider it stale
-                if file_mod_age > 120:
-                    os.remove(progress_file)
-                    print(f"DEBUG: Removed stale progress file: {progress_file} (not modified for {file_mod_age:.0f}s)")
-                    cleaned_count += 1
-                else:
-                    print(f"DEBUG: Keeping active progress file: {progress_file} (modified {file_mod_age:.0f}s ago)")
-            except Exception as e:
-                print(f"DEBUG: Error processing {progress_file}: {e}")
-                
-    except Exception as e:
-        print(f"DEBUG: Error cleaning stale files: {e}")
-    
-    # Clear session as well
-    if 'pdf_progress_file' in session:
-        del session['pdf_progress_file']
-    
-    return jsonify({
-        'status': 'cleaned', 
-        'message': f'Cleaned {cleaned_count} stale progress files',
-        'cleaned_count': cleaned_count
-    })
-
-@calculation_bp.route('/all_courses/pdf_progress', methods=['GET'])
-def get_pdf_progress():
-    """Get current PDF generation progress from temporary file"""
-    import json
-    import os
-    import tempfile
-    import glob
-    from datetime import datetime, timedelta
-    
-    #print("DEBUG: Progress endpoint called")  
-    
-    # IGNORE SESSION COMPLETELY - always find the most actively updated file
-    # This fixes concurrency issues where session isn't properly shared
-    #print("DEBUG: Ignoring session, finding most active progress file")
-    
-    # Search for recent progress files in temp directory
-    temp_dir = tempfile.gettempdir()
-    pattern = os.path.join(temp_dir, "pdf_progress_*.txt")
-    progress_files = glob.glob(pattern)
-    progress_file = None
-    
-    if progress_files:
-        # Filter to only files from the last 2 hours that are actively being written to
-        current_time = datetime.now().timestamp()
-        recent_files = []
-        for pf in progress_files:
-            try:
-                file_age = current_time - os.path.getctime(pf)
-                # Check if file was modified recently (within last 30 seconds) - indicates active generation
-                file_mod_age = current_time - os.path.getmtime(pf)
-                
-                if file_age < 7200:  # Within 2 hours
-                    recent_files.append((pf, file_mod_age, file_age))
-                else:
-                    # Remove old files
-                    try:
-                        os.remove(pf)
-                        print(f"DEBUG: Cleaned up old progress file: {pf}")
-                    except:
-                        pass
-            except:
-                pass
-        
-        if recent_files:
-            # Sort by modification time (most recently modified first) - this indicates active generation
-            recent_files.sort(key=lambda x: x[1])  # Sort by modification age (newest first)
-            most_recent_file, mod_age, creation_age = recent_files[0]
-            
-            print(f"DEBUG: Found {len(recent_files)} recent files")
-            print(f"DEBUG: Most recently modified: {most_recent_file} (modified {mod_age:.0f}s ago, created {creation_age:.0f}s ago)")
-            
-            # Check if the most recent file is actually stale (not being actively updated)
-            if mod_age > 60:  # If not modified in the last 60 seconds, consider it stale
-                print(f"DEBUG: Most recent file is stale (not modified in {mod_age:.0f}s), marking as completed or cleaning up")
-                
-                # Try to read the file and mark it as completed if it's still showing as processing
-                try:
-                    with open(most_recent_file, 'r', encoding='utf-8') as f:
-                        progress_data = json.loads(f.read())
-                    
-                    # If it's still showing as processing but hasn't been updated, mark as completed
-                    if progress_data.get('status') == 'processing' and not progress_data.get('completed'):
-                        print(f"DEBUG: Marking stale progress file as completed")
-                        progress_data['status'] = 'completed'
-                        progress_data['completed'] = True
-                        progress_data['message'] = f"PDF generation completed (app was restarted)"
-                        progress_data['timestamp'] = datetime.now().isoformat()
-                        
-                        with open(most_recent_file, 'w', encoding='utf-8') as f:
-                            f.write(json.dumps(progress_data))
-                except:
-                    pass  # If we can't read/update the file, just ignore it
-                
-                # Clean up old stale files
-                for old_file, old_mod_age, old_creation_age in recent_files:
-                    if old_mod_age > 300:  # Remove files not modified in 5+ minutes
-                        try:
-                            os.remove(old_file)
-                            print(f"DEBUG: Cleaned up stale progress file: {old_file}")
-                        except:
-                            pass
-                
-                # Return no active generation
-                return jsonify({
-                    'status': 'not_started',
-                    'current': 0,
-                    'total': 0,
-                    'message': 'No active PDF generation in progress',
-                    'completed': False
-                })
-            
-            # File is recent enough, use it
-            progress_file = most_recent_file
-            print(f"DEBUG: Using active progress file: {progress_file}")
-            
-            # Update session for future requests (but don't rely on it)
-            session['pdf_progress_file'] = progress_file
-            session.modified = True
-        else:
-            #print("DEBUG: No recent progress files found")
-            return jsonify({
-                'status': 'not_started',
-                'current': 0,
-                'total': 0,
-                'message': 'No PDF generation in progress',
-                'completed': False
-            })
-    else:
-        #print("DEBUG: No progress files found")
-        return jsonify({
-            'status': 'not_started',
-            'current': 0,
-            'total': 0,
-            'message': 'No PDF generation in progress',
-            'completed': False
-        })
-    
-    print(f"DEBUG: Using progress file: {progress_file}")  # Debug logging
-    
-    try:
-        if os.path.exists(progress_file):
-            with open(progress_file, 'r', encoding='utf-8') as f:
-                progress_data = json.loads(f.read())
-            print(f"DEBUG: Progress data read from {progress_file}: {progress_data}")  # Debug logging
-            
-            # Add validation to ensure we have valid progress data
-            if 'current' not in progress_data or 'total' not in progress_data:
-                print("DEBUG: Invalid progress data structure")
-                return jsonify({
-                    'status': 'error',
-                    'current': 0,
-                    'total': 0,
-                    'message': 'Invalid progress data',
-                    'completed': False,
-                    'error': 'Invalid progress data structure'
-                })
-            
-            return jsonify(progress_data)
-        else:
-            print("DEBUG: Progress file does not exist")  # Debug logging
-            return jsonify({
-                'status': 'not_started',
-                'current': 0,
-                'total': 0,
-                'message': 'No PDF generation in progress',
-                'completed': False
-            })
-    except Exception as e:
-        print(f"DEBUG: Error reading progress file: {e}")  # Debug logging
-        return jsonify({
-            'status': 'error',
-            'current': 0,
-            'total': 0,
-            'message': f'Error reading progress: {str(e)}',
-            'completed': False,
-            'error': str(e)
-        })
+def is_graduating_student_in_bulk_data(student_db_id, course_id, bulk_data):
+    """
+    Check if a student (by database ID) of a bulk-loaded course is graduating,
+    using the flags precomputed by bulk_load_course_data(include_graduating_only=True).
+    Bulk data loaded without the filter falls back to the snapshot lookup.
+    """
+    course_data = bulk_data.get(course_id)
+    if course_data is None or 'graduating_student_db_ids' not in course_data:
+        return is_graduating_student_by_db_id(student_db_id)
+    return student_db_id in course_data['graduating_student_db_ids']
 
 @calculation_bp.route('/all_courses/pdf_individual', methods=['POST'])
 def generate_individual_student_pdfs():
-    """Generate individual PDF reports for all students or filtered students using Playwright"""
-    import tempfile
-    import zipfile
-    from flask import make_response
-    import io
-    import os
-    from datetime import datetime
+    """
+    Start generating individual PDF reports for all students or filtered students using Playwright.
     
+    The reports are produced by a background job (routes.job_queue); the response
+    contains the job id and the /jobs/<id> URL to poll. The ZIP file is downloaded
+    from /jobs/<id>/download once the job is completed.
+    """
     try:
         print("DEBUG: PDF generation route called")
         logging.info("PDF generation route called")
@@ -6025,7 +6118,8 @@ def generate_individual_student_pdfs():
         include_graduating_only = request.form.get('graduating_only', '').lower() == 'true'
         orientation = request.form.get('orientation', 'landscape')  # 'landscape' or 'portrait'
         page_size = request.form.get('page_size', 'A4')  # 'A4' or 'A3'
-        thread_count = int(request.form.get('thread_count', 4))  # Default to 4 threads
+        thread_count = int(request.form.get('thread_count', 4))  # Pooled browsers, default 4
+        pages_per_browser = int(current_app.config.get('PDF_PAGES_PER_BROWSER', 2) or 2)
         
         print(f"DEBUG: Parameters - year: {filter_year}, search: {search_query}, student_id: {filter_student_id}, graduating_only: {include_graduating_only}, orientation: {orientation}, page_size: {page_size}, thread_count: {thread_count}")
         
@@ -6061,572 +6155,193 @@ def generate_individual_student_pdfs():
                     all_students.add(student.student_id)
         
         if not all_students:
-            flash('No students found matching the current filters.', 'warning')
-            return redirect(url_for('calculation.all_courses'))
-
-        # CLEAR OLD PROGRESS FILE FROM SESSION FIRST to avoid confusion
-        if 'pdf_progress_file' in session:
-            old_progress_file = session.get('pdf_progress_file')
-            print(f"DEBUG: Clearing old progress file from session: {old_progress_file}")
-            del session['pdf_progress_file']
-        
-        # Clean up old progress files to prevent confusion
-        try:
-            temp_dir = tempfile.gettempdir()
-            pattern = os.path.join(temp_dir, "pdf_progress_*.txt")
-            old_files = glob.glob(pattern)
-            current_time = datetime.now().timestamp()
-            
-            for old_file in old_files:
-                try:
-                    # Remove files older than 1 hour but not if they're actively being written to
-                    file_age = current_time - os.path.getctime(old_file)
-                    file_mod_age = current_time - os.path.getmtime(old_file)
-                    
-                    # Only remove if file is old AND hasn't been modified recently
-                    if file_age > 3600 and file_mod_age > 300:  # 1 hour old and not modified in 5 minutes
-                        os.remove(old_file)
-                        print(f"DEBUG: Cleaned up old progress file: {old_file}")
-                except:
-                    pass  # Ignore cleanup errors
-        except:
-            pass  # Ignore cleanup errors
-        
-        # Initialize progress tracking IMMEDIATELY before starting PDF generation
-        # This ensures frontend can start polling progress right away
-        progress_id = f"pdf_generation_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        progress_file = os.path.join(tempfile.gettempdir(), f"pdf_progress_{progress_id}.txt")
-        
-        # Write initial progress to file
-        progress_data = {
-            'id': progress_id,
-            'current': 0,
-            'total': len(all_students),
-            'status': 'initializing',
-            'message': f'Preparing to generate PDFs for {len(all_students)} students...',
-            'completed': False,
-            'error': None,
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        import json
-        import glob
-        with open(progress_file, 'w', encoding='utf-8') as f:
-            f.write(json.dumps(progress_data))
-        
-        # Store progress file path in session IMMEDIATELY and force commit
-        session['pdf_progress_file'] = progress_file
-        session.permanent = True  # Make session permanent so it persists across requests
+            return jsonify({'success': False, 'error': 'No students found matching the current filters.'}), 400
         
-        # Force save the session multiple ways to ensure it's available for progress polling
-        try:
-            session.modified = True
-            from flask import current_app
-            if hasattr(current_app, 'save_session'):
-                current_app.save_session(session, response=None)
-        except Exception as e:
-            print(f"DEBUG: Session save attempt failed: {e}")
-            # Continue anyway, fallback mechanism will handle it
-        
-        print(f"DEBUG: Progress tracking initialized - File: {progress_file}")
-        print(f"DEBUG: Total students to process: {len(all_students)}")
-        print(f"DEBUG: Session progress file stored: {session.get('pdf_progress_file')}")
-        
-        # Generate PDFs using multi-threaded Playwright
-        from .pdf_multithread import generate_student_pdfs_multithreaded
-        
-        pdf_results = generate_student_pdfs_multithreaded(
-            all_students, 
-            filter_year, 
-            search_query, 
-            filter_student_id, 
-            include_graduating_only,
-            display_method,
-            orientation,
-            page_size,
-            thread_count
-        )
-        
-        if not pdf_results['success']:
-            flash(f'Error generating PDF reports: {pdf_results["error"]}', 'danger')
-            return redirect(url_for('calculation.all_courses'))
-        
-        # Always return ZIP file containing both individual PDFs and combined PDF
-        response = make_response(pdf_results['zip_content'])
-        response.headers['Content-Type'] = 'application/zip'
-        
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filter_suffix = ""
         if include_graduating_only:
             filter_suffix += "_graduating"
         if filter_student_id:
             filter_suffix += f"_student_{filter_student_id}"
         
-        filename = f"student_reports{filter_suffix}_{timestamp}.zip"
-        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        # Clean up progress file
-        if 'pdf_progress_file' in session:
-            try:
-                progress_file = session['pdf_progress_file']
-                if os.path.exists(progress_file):
-                    # Wait a bit before cleanup to allow final progress read
-                    import threading
-                    def cleanup_after_delay():
-                        import time
-                        time.sleep(5)  # Wait 5 seconds
-                        try:
-                            if os.path.exists(progress_file):
-                                os.remove(progress_file)
-                        except:
-                            pass
-                    
-                    cleanup_thread = threading.Thread(target=cleanup_after_delay)
-                    cleanup_thread.daemon = True
-                    cleanup_thread.start()
-                    
-                del session['pdf_progress_file']
-            except:
-                pass
-        
-        # Log action
-        log = Log(action="GENERATE_INDIVIDUAL_STUDENT_PDFS", 
-                 description=f"Generated individual PDF reports for {len(all_students)} students{filter_suffix} using Playwright")
-        db.session.add(log)
-        db.session.commit()
+        # The job runs outside the request: pass the base URL for rendering the pages
+        from routes.job_queue import submit_job
+        job_id = submit_job(
+            'student_pdfs', generate_student_pdfs_job,
+            sorted(all_students), filter_year, search_query, filter_student_id,
+            include_graduating_only, display_method, orientation, page_size, thread_count, pages_per_browser,
+            request.url_root.rstrip('/'), filter_suffix,
+            total=len(all_students),
+            message=f'Preparing to generate PDFs for {len(all_students)} students...'
+        )
         
-        return response
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': url_for('jobs.job_status', job_id=job_id),
+            'total': len(all_students)
+        }), 202
         
     except Exception as e:
-        logging.error(f"Error generating individual student PDFs: {e}")
-        flash(f'Error generating PDF reports: {str(e)}', 'danger')
-        return redirect(url_for('calculation.all_courses'))
-
-
+        logging.error(f"Error starting individual student PDF generation: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
 
-def generate_student_pdfs_with_playwright(student_ids, filter_year, search_query, filter_student_id, include_graduating_only, display_method, orientation='landscape', page_size='A4', thread_count=4):
-    """Generate individual PDF reports for all students or filtered students using Playwright"""
-    import tempfile
-    import zipfile
-    import io
-    import os
-    from datetime import datetime
+def build_student_report_contexts(student_ids, filter_year='', search_query='', include_graduating_only=False,
+                                  display_method='absolute'):
+    """
+    Template contexts of the all-courses page filtered by each student, computed in one pass.
     
-    # Initialize combined_pdf at the very beginning to avoid reference before assignment
-    combined_pdf = None
+    Gives the same values as /calculation/all_courses?student_id=... for every
+    student, but the course data is bulk loaded and the course results are
+    calculated once for the whole batch instead of once per student page.
     
-    try:
-        logging.info(f"Starting PDF generation for {len(student_ids)} students using Playwright - Entry point reached")
-        print(f"DEBUG: Starting PDF generation for {len(student_ids)} students")
-        
-        # Get existing progress file from session (created in the route handler)
-        progress_file = session.get('pdf_progress_file')
-        if not progress_file:
-            # Fallback if no progress file exists
-            progress_id = f"pdf_generation_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            progress_file = os.path.join(tempfile.gettempdir(), f"pdf_progress_{progress_id}.txt")
-            session['pdf_progress_file'] = progress_file
-        
-        # Create timestamped directory for this run
-        timestamp = datetime.now().strftime('%d_%B_%Y_%H_%M_%p')
-        student_pdfs_dir = os.path.join(os.getcwd(), 'student_pdfs', timestamp)
-        os.makedirs(student_pdfs_dir, exist_ok=True)
-        
-        logging.info(f"Created PDF output directory: {student_pdfs_dir}")
-        print(f"DEBUG: Created PDF output directory: {student_pdfs_dir}")
-        
-        # Update progress file to processing status
-        import json
-        progress_data = {
-            'current': 0,
-            'total': len(student_ids),
-            'status': 'processing',
-            'message': 'Starting PDF generation...',
-            'completed': False,
-            'error': None,
-            'timestamp': datetime.now().isoformat()
-        }
-        with open(progress_file, 'w', encoding='utf-8') as f:
-            f.write(json.dumps(progress_data))
-        
-        # Update session to ensure it points to this progress file
-        session['pdf_progress_file'] = progress_file
-        session.modified = True
-        
-        # Generate PDFs for each student
-        pdf_files = []
-        successful_count = 0
-        
-        # Split students into chunks for multi-threading
-        student_list = sorted(list(student_ids))
-        chunk_size = math.ceil(len(student_list) / thread_count)
-        student_chunks = [student_list[i:i + chunk_size] for i in range(0, len(student_list), chunk_size)]
-        
-        # Progress lock for thread-safe progress updates
-        progress_lock = threading.Lock()
-        
-        # Use ThreadPoolExecutor for multi-threading
-        with concurrent.futures.ThreadPoolExecutor(max_workers=thread_count) as executor:
-            futures = []
-            for i, student_chunk in enumerate(student_chunks):
-                if student_chunk:  # Only submit non-empty chunks
-                    futures.append(executor.submit(
-                        generate_student_pdfs_chunk, 
-                        student_chunk, 
-                        filter_year, 
-                        search_query, 
-                        filter_student_id, 
-                        include_graduating_only, 
-                        display_method, 
-                        orientation, 
-                        page_size, 
-                        student_pdfs_dir, 
-                        progress_file, 
-                        i,
-                        len(student_ids),
-                        progress_lock
-                    ))
-            
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    chunk_result = future.result()
-                    pdf_files.extend(chunk_result['pdf_files'])
-                    successful_count += chunk_result['successful_count']
-                except Exception as e:
-                    logging.error(f"Error generating PDF chunk: {e}")
-                    print(f"DEBUG: Error generating PDF chunk: {e}")
+    Returns a dict mapping student_id -> context for render_student_report_html
+    """
+    student_ids = list(dict.fromkeys(student_ids))
+    
+    # Same course filters as the all_courses route
+    all_courses = Course.query.all()
+    courses = all_courses
+    if filter_year:
+        courses = [c for c in courses if filter_year in c.semester]
+    if search_query:
+        courses = [c for c in courses if search_query in c.code.lower() or search_query in c.name.lower()]
+    existing_course_ids = {course.id for course in all_courses}
+    
+    # Enrollments of all requested students (a few IN queries instead of one query per student):
+    # student_id -> {course_id: student database id} plus the name of the first enrollment
+    students = []
+    for start in range(0, len(student_ids), 500):
+        students.extend(Student.query.filter(Student.student_id.in_(student_ids[start:start + 500])).all())
+    students.sort(key=lambda student: student.id)
+    
+    enrollments = {student_id: {} for student_id in student_ids}
+    student_names = {}
+    for student in students:
+        if student.course_id not in existing_course_ids:
+            continue
+        enrollments[student.student_id].setdefault(student.course_id, student.id)
+        if student.student_id not in student_names:
+            student_names[student.student_id] = f"{student.first_name} {student.last_name}" if student.last_name else student.first_name
+    
+    # The graduating filter only depends on the course, so it is applied once
+    graduating_courses, base_graduating_info = filter_courses_by_graduating_students(courses, include_graduating_only)
+    graduating_course_ids = {course.id for course in graduating_courses}
+    graduating_student_ids = set(get_graduating_student_ids()) if include_graduating_only else set()
+    
+    student_courses = {}
+    for student_id in student_ids:
+        enrolled = [course for course in courses if course.id in enrollments[student_id]]
+        student_courses[student_id] = (enrolled, [course for course in enrolled if course.id in graduating_course_ids])
+    
+    # ==== ONE BULK LOAD AND ONE CALCULATION FOR THE WHOLE BATCH ====
+    course_ids = sorted({course.id for _, shown in student_courses.values() for course in shown})
+    with read_only_session():
+        bulk_data = bulk_load_course_data(course_ids, display_method, include_graduating_only)
+        course_results = calculate_courses_results(course_ids, bulk_data, display_method, include_graduating_only)
+    
+    program_outcomes = ProgramOutcome.query.all()
+    global_achievement_levels = GlobalAchievementLevel.query.order_by(GlobalAchievementLevel.min_score.desc()).all()
+    global_achievement_classifier = get_achievement_classifier(global_achievement_levels)
+    
+    contexts = {}
+    for student_id in student_ids:
+        enrolled, shown = student_courses[student_id]
         
-        if not pdf_files:
-            return {
-                'success': False,
-                'error': 'No PDFs were generated successfully'
+        if enrollments[student_id]:
+            student_info = {
+                'name': student_names.get(student_id),
+                'total_courses': len(enrollments[student_id]),
+                'filtered_courses': len(enrolled)
             }
+        else:
+            student_info = {'name': None, 'total_courses': 0, 'filtered_courses': 0}
         
-        # Combine all PDFs into a single PDF first
-        try:
-            combined_pdf = combine_pdfs(pdf_files)
-            if combined_pdf:
-                # Save combined PDF to the directory as well
-                combined_path = os.path.join(student_pdfs_dir, 'combined_all_students.pdf')
-                with open(combined_path, 'wb') as f:
-                    f.write(combined_pdf)
-                logging.info(f"Combined PDF saved: {combined_path}")
-        except Exception as e:
-            logging.error(f"Error combining PDFs: {e}")
-        
-        # Create ZIP file containing all individual PDFs plus the combined PDF
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            # Add all individual PDFs
-            for pdf_path in pdf_files:
-                zip_file.write(pdf_path, os.path.basename(pdf_path))
-            
-            # Add the combined PDF to the ZIP as well
-            if combined_pdf:
-                combined_path = os.path.join(student_pdfs_dir, 'combined_all_students.pdf')
-                if os.path.exists(combined_path):
-                    zip_file.write(combined_path, 'combined_all_students.pdf')
-        
-        zip_buffer.seek(0)
-        
-        # Mark progress as completed in file
-        progress_data['current'] = len(student_ids)
-        progress_data['status'] = 'completed'
-        progress_data['message'] = f'PDF generation completed! {successful_count}/{len(student_ids)} successful'
-        progress_data['completed'] = True
-        progress_data['timestamp'] = datetime.now().isoformat()
-        with open(progress_file, 'w', encoding='utf-8') as f:
-            f.write(json.dumps(progress_data))
+        # Graduating filter info as filter_courses_by_graduating_students reports it for this student's courses
+        graduating_filter_info = dict(base_graduating_info, filtered_courses=len(shown), original_courses=len(enrolled))
+        if base_graduating_info['courses_with_graduating_students']:
+            graduating_filter_info['courses_with_graduating_students'] = len(shown)
         
-        logging.info(f"PDF generation completed: {successful_count}/{len(student_ids)} successful")
+        # Individual scores from the shared bulk data
+        if include_graduating_only and student_id not in graduating_student_ids:
+            individual_scores = {course.id: {} for course in shown}
+        else:
+            individual_scores = calculate_student_course_scores(
+                {course.id: enrollments[student_id][course.id] for course in shown}, bulk_data, display_method
+            )
         
-        return {
-            'success': True,
-            'zip_content': zip_buffer.getvalue(),
-            'combined_pdf': combined_pdf,
-            'output_directory': student_pdfs_dir,
-            'successful_count': successful_count,
-            'total_count': len(student_ids)
-        }
+        all_results, po_averages, excluded_courses = aggregate_all_courses_results(
+            shown, program_outcomes, course_results, individual_scores
+        )
         
-    except Exception as e:
-        # Mark progress as failed in file
-        if 'pdf_progress_file' in session:
-            try:
-                progress_file = session['pdf_progress_file']
-                if os.path.exists(progress_file):
-                    with open(progress_file, 'r', encoding='utf-8') as f:
-                        progress_data = json.loads(f.read())
-                    progress_data['status'] = 'error'
-                    progress_data['error'] = str(e)
-                    progress_data['message'] = f'Error: {str(e)}'
-                    progress_data['timestamp'] = datetime.now().isoformat()
-                    with open(progress_file, 'w', encoding='utf-8') as f:
-                        f.write(json.dumps(progress_data))
-            except:
-                pass  # If file operations fail, just continue
-        
-        logging.error(f"Error generating student PDFs with Playwright: {e}")
-        return {
-            'success': False,
-            'error': str(e)
+        contexts[student_id] = {
+            'all_results': sort_all_courses_results(all_results),
+            'program_outcomes': program_outcomes,
+            'po_averages': po_averages,
+            'excluded_courses': excluded_courses,
+            'years': sorted(set(course.semester.split(' ')[1] for course in shown if ' ' in course.semester), reverse=True),
+            'active_page': 'all_courses',
+            'current_sort': 'course_code_asc',
+            'student_info': student_info,
+            'filter_student_id': student_id,
+            'graduating_filter_info': graduating_filter_info,
+            'include_graduating_only': include_graduating_only,
+            'global_achievement_levels': global_achievement_levels,
+            'global_achievement_classifier': global_achievement_classifier
         }
-
-def generate_student_pdfs_chunk(student_chunk, filter_year, search_query, filter_student_id, include_graduating_only, display_method, orientation, page_size, student_pdfs_dir, progress_file, chunk_index):
-    """Generate PDFs for a chunk of students"""
-    import asyncio
-    from playwright.async_api import async_playwright
-    from flask import url_for
     
-    async def generate_student_pdf_async(student_id):
-        try:
-            # Get student information
-            student_name = get_student_name(student_id)
-            logging.info(f"Generating PDF for student: {student_name} (ID: {student_id})")
-            print(f"DEBUG: Generating PDF for student: {student_name} (ID: {student_id})")
-            
-            async with async_playwright() as p:
-                print(f"DEBUG: Playwright launched for student {student_id}")
-                browser = await p.chromium.launch(headless=True)
-                print(f"DEBUG: Browser launched for student {student_id}")
-                page = await browser.new_page()
-                print(f"DEBUG: Page created for student {student_id}")
-                
-                # Build URL with filters to render the student's page
-                # Use the all_courses page with student filter applied
-                base_url = request.url_root.rstrip('/')
-                url_params = {
-                    'student_id': student_id
-                }
-                
-                # Add other filters if they exist
-                if filter_year:
-                    url_params['year'] = filter_year
-                if search_query:
-                    url_params['search'] = search_query
-                if include_graduating_only:
-                    url_params['graduating_only'] = 'true'
-                
-                # Build URL
-                from urllib.parse import urlencode
-                url = f"{base_url}/calculation/all_courses?{urlencode(url_params)}"
-                
-                logging.info(f"Navigating to URL: {url}")
-                
-                # Navigate to the page
-                await page.goto(url, wait_until='networkidle')
-                
-                # Wait for the page to fully load
-                await page.wait_for_selector('table', timeout=30000)
-                
-                # Remove any unnecessary elements for PDF (like navigation, buttons)
-                await page.evaluate("""
-                    () => {
-                        // Remove elements that shouldn't be in PDF
-                        const elementsToHide = [
-                            '.navbar', '.nav', '.dropdown', '.btn', 'button',
-                            '.form-control', '.form-select', 'input', '.alert-dismissible .btn-close',
-                            '.modal', '.offcanvas', '.alert', '.card-header h5'
-                        ];
-                        
-                        elementsToHide.forEach(selector => {
-                            const elements = document.querySelectorAll(selector);
-                            elements.forEach(el => el.style.display = 'none');
-                        });
-                        
-                        // Add PDF-specific styling for better table fitting
-                        const style = document.createElement('style');
-                        style.textContent = `
-                            @media print {
-                                body { 
-                                    margin: 0 !important; 
-                                    font-family: Arial, sans-serif !important;
-                                    font-size: 10px !important;
-                                }
-                                .container-fluid { 
-                                    max-width: none !important; 
-                                    padding: 0 !important;
-                                }
-                                .card { 
-                                    border: 1px solid #dee2e6 !important; 
-                                    box-shadow: none !important;
-                                    margin: 0 !important;
-                                }
-                                .card-body {
-                                    padding: 5px !important;
-                                }
-                                .table-responsive {
-                                    overflow: visible !important;
-                                }
-                                .table { 
-                                    font-size: 8px !important;
-                                    width: 100% !important;
-                                    table-layout: fixed !important;
-                                    margin: 0 !important;
-                                }
-                                .table th, .table td { 
-                                    padding: 3px 2px !important;
-                                    font-size: 8px !important;
-                                    line-height: 1.1 !important;
-                                    word-wrap: break-word !important;
-                                    overflow: hidden !important;
-                                    white-space: nowrap !important;
-                                }
-                                .table th {
-                                    font-weight: bold !important;
-                                    background-color: #f8f9fa !important;
-                                }
-                                .table td:first-child {
-                                    white-space: normal !important;
-                                    min-width: 60px !important;
-                                }
-                                .table td:nth-child(2) {
-                                    white-space: normal !important;
-                                    min-width: 80px !important;
-                                }
-                                .table td:nth-child(3) {
-                                    min-width: 40px !important;
-                                }
-                                /* Program outcome columns - make them narrower */
-                                .table td:nth-child(n+4) {
-                                    min-width: 35px !important;
-                                    text-align: center !important;
-                                }
-                                .btn, .dropdown, .form-control, .form-select { display: none !important; }
-                                .no-print { display: none !important; }
-                                
-                                /* Rotate program outcome headers for better space usage */
-                                .table thead th:nth-child(n+4) {
-                                    writing-mode: vertical-rl !important;
-                                    text-orientation: mixed !important;
-                                    height: 80px !important;
-                                    vertical-align: bottom !important;
-                                    padding: 2px !important;
-                                    font-size: 7px !important;
-                                }
-                                
-                                /* Chart styling for PDF */
-                                canvas {
-                                    max-width: 100% !important;
-                                    height: auto !important;
-                                }
-                                
-                                /* Achievement levels table */
-                                .achievement-levels-table {
-                                    font-size: 7px !important;
-                                }
-                                .achievement-levels-table th,
-                                .achievement-levels-table td {
-                                    padding: 2px !important;
-                                }
-                            }
-                        `;
-                        document.head.appendChild(style);
-                        
-                        // Add title for PDF
-                        const title = document.createElement('div');
-                        title.innerHTML = '<h2 style="text-align: center; margin: 10px 0; font-size: 14px;">Student Academic Report - ' + document.querySelector('[data-student-name]')?.getAttribute('data-student-name') || 'Student ID: """ + str(student_id) + """' + '</h2>';
-                        document.body.insertBefore(title, document.body.firstChild);
-                        
-                        // Add class to achievement levels table for styling
-                        const achievementTable = document.querySelector('.table-sm');
-                        if (achievementTable) {
-                            achievementTable.classList.add('achievement-levels-table');
-                        }
-                    }
-                """)
-                
-                # Generate PDF with user-selected orientation and page size
-                is_landscape = orientation.lower() == 'landscape'
-                
-                # Adjust margins based on page size for better fit
-                if page_size.upper() == 'A3':
-                    margins = {
-                        'top': '0.5cm',
-                        'right': '0.5cm', 
-                        'bottom': '0.5cm',
-                        'left': '0.5cm'
-                    }
-                else:  # A4
-                    margins = {
-                        'top': '0.7cm',
-                        'right': '0.7cm',
-                        'bottom': '0.7cm', 
-                        'left': '0.7cm'
-                    }
-                
-                pdf_bytes = await page.pdf(
-                    format=page_size.upper(),
-                    landscape=is_landscape,
-                    print_background=True,
-                    margin=margins
-                )
-                
-                await browser.close()
-                
-                logging.info(f"PDF generated successfully for student {student_id} ({len(pdf_bytes)} bytes)")
-                return pdf_bytes
-                
-        except Exception as e:
-            logging.error(f"Error generating PDF for student {student_id}: {e}")
-            return None
+    return contexts
+
+def render_student_report_html(context, base_url, display_method='absolute'):
+    """
+    Render the all-courses page of one student (see build_student_report_contexts) to an HTML string.
     
-    try:
-        # Run the async function
-        print(f"DEBUG: About to run async function for student chunk {chunk_index}")
-        
-        # Check if we're already in an event loop
-        try:
-            loop = asyncio.get_running_loop()
-            print(f"DEBUG: Running in existing event loop")
-            # If we're in a loop, we need to use run_until_complete or create a new thread
-            import threading
-            import concurrent.futures
-            
-            def run_in_thread():
-                return asyncio.run(generate_student_pdf_async(student_id))
-            
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                futures = [executor.submit(run_in_thread) for student_id in student_chunk]
-                results = [future.result() for future in futures]
-                print(f"DEBUG: Async function completed for student chunk {chunk_index}")
-                return results
-                
-        except RuntimeError:
-            # No event loop running, we can use asyncio.run
-            print(f"DEBUG: No event loop, using asyncio.run for student chunk {chunk_index}")
-            results = [asyncio.run(generate_student_pdf_async(student_id)) for student_id in student_chunk]
-            print(f"DEBUG: Async function completed for student chunk {chunk_index}")
-            return results
-            
-    except Exception as e:
-        logging.error(f"Error running async PDF generation for student chunk {chunk_index}: {e}")
-        print(f"DEBUG: Error running async PDF generation for student chunk {chunk_index}: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
+    Works outside a request (background jobs): a request context for base_url
+    is created for url_for and the session, and a <base> tag is added so the
+    browser loads the page's static files from the running application.
+    """
+    base_url = base_url.rstrip('/')
+    with current_app.test_request_context('/calculation/all_courses', base_url=base_url,
+                                          query_string={'student_id': context['filter_student_id']}):
+        if current_app.secret_key:
+            session['display_method'] = display_method
+        html = render_template('calculation/all_courses.html', **context)
+    return html.replace('<head>', f'<head>\n    <base href="{base_url}/">', 1)
 
-def combine_pdfs(pdf_paths):
-    """Combine multiple PDFs into a single PDF"""
-    from PyPDF2 import PdfMerger
-    import io
+def generate_student_pdfs_job(job, student_ids, filter_year, search_query, filter_student_id, include_graduating_only,
+                              display_method, orientation, page_size, thread_count, pages_per_browser, base_url, filter_suffix):
+    """Background job body for generate_individual_student_pdfs"""
+    from .pdf_multithread import generate_student_pdfs_multithreaded, COMBINED_PDF_PART_SIZE
+    
+    combined_part_size = int(current_app.config.get('COMBINED_PDF_PART_SIZE', COMBINED_PDF_PART_SIZE) or COMBINED_PDF_PART_SIZE)
+    pdf_results = generate_student_pdfs_multithreaded(
+        student_ids, 
+        filter_year, 
+        search_query, 
+        filter_student_id, 
+        include_graduating_only,
+        display_method,
+        orientation,
+        page_size,
+        thread_count,
+        base_url=base_url,
+        job=job,
+        pages_per_browser=pages_per_browser,
+        combined_part_size=combined_part_size
+    )
     
-    try:
-        merger = PdfMerger()
-        for pdf_path in pdf_paths:
-            with open(pdf_path, 'rb') as f:
-                merger.append(f)
-        
-        combined_pdf = io.BytesIO()
-        merger.write(combined_pdf)
-        merger.close()
-        
-        combined_pdf.seek(0)
-        return combined_pdf.getvalue()
-        
-    except Exception as e:
-        logging.error(f"Error combining PDFs: {e}")
-        return None
+    job.check_cancelled()
+    if not pdf_results['success']:
+        raise RuntimeError(pdf_results['error'])
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    job.set_result(pdf_results['zip_path'], f"student_reports{filter_suffix}_{timestamp}.zip")
+    
+    # Log action
+    log = Log(action="GENERATE_INDIVIDUAL_STUDENT_PDFS", 
+             description=f"Generated individual PDF reports for {len(student_ids)} students{filter_suffix} using Playwright")
+    db.session.add(log)
+    db.session.commit()
+
 
 def filter_courses_by_graduating_students(courses, include_graduating_only=False):
     """
@@ -6641,13 +6356,11 @@ def filter_courses_by_graduating_students(courses, include_graduating_only=False
     - filtered_courses: List of courses (filtered or original if feature unavailable)
     - filter_info: Dict with filtering information and statistics
     """
-    from db_migrations import graduating_students_table_exists
-    
     # If feature is disabled or table doesn't exist, return original courses
-    if not include_graduating_only or not graduating_students_table_exists():
+    if not include_graduating_only or not graduating_students_available():
         return courses, {
             'enabled': include_graduating_only,
-            'available': graduating_students_table_exists(),
+            'available': graduating_students_available(),
             'total_graduating_students': 0,
             'courses_with_graduating_students': 0,
             'filtered_courses': len(courses),
@@ -6673,14 +6386,17 @@ def filter_courses_by_graduating_students(courses, include_graduating_only=False
         filtered_courses = []
         courses_with_graduating_students = 0
         
+        # Courses with a graduating student, from one query over the enrollments of all courses
+        graduating_course_ids = set()
+        if courses:
+            enrollments = db.session.query(Student.course_id, Student.student_id).filter(
+                Student.course_id.in_([course.id for course in courses]))
+            graduating_course_ids = {course_id for course_id, student_id in enrollments
+                                     if student_id in graduating_student_ids}
+        
         for course in courses:
-            # Check if any graduating students are enrolled in this course
-            course_students = Student.query.filter_by(course_id=course.id).all()
-            course_student_ids = {student.student_id for student in course_students}
-            
             # Check if any graduating students are in this course
-            has_graduating_students = any(student_id in graduating_student_ids 
-                                        for student_id in course_student_ids)
+            has_graduating_students = course.id in graduating_course_ids
             
             if has_graduating_students:
                 filtered_courses.append(course)
@@ -0,0 +1,172 @@
+"""
+Program outcome contribution index for /utility/program_outcome_contributions.
+
+The page, its /api/<program_outcome_code> endpoint and the program outcome
+PDFs all need the same information: which courses contribute to a program
+outcome and through which course outcomes. Instead of one query per program
+outcome plus lazy loads of every course and its settings, the index is built
+from a single join over the CO-PO mapping table and grouped in one pass.
+
+The index is kept in memory and keyed on a fingerprint of the tables it reads
+(CO-PO links, course outcomes, program outcomes, courses and course settings),
+so it is rebuilt only after a mapping, an outcome, a course or a course
+exclusion changed. Score and student writes do not touch it.
+"""
+
+import logging
+import threading
+from sqlalchemy import text
+from app import db
+
+# Every CO-PO link with its course and exclusion flag; rows of a program outcome are in CO order
+CONTRIBUTION_SQL = text("""
+    SELECT po.id AS po_id, co.id AS co_id, co.code AS co_code, co.description AS co_description,
+           c.id AS course_id, c.code AS course_code, c.name AS course_name, c.semester,
+           c.course_weight, cs.excluded
+    FROM course_outcome_program_outcome copo
+    JOIN program_outcome po ON po.id = copo.program_outcome_id
+    JOIN course_outcome co ON co.id = copo.course_outcome_id
+    JOIN course c ON c.id = co.course_id
+    LEFT JOIN course_settings cs ON cs.course_id = c.id
+    ORDER BY po.id, co.id
+""")
+
+PROGRAM_OUTCOME_SQL = text("SELECT id, code, description FROM program_outcome ORDER BY code")
+
+# Cheap aggregates that change whenever a row the index depends on is added, removed or edited
+FINGERPRINT_SQL = text("""
+    SELECT
+        (SELECT COUNT(*) || ':' || COALESCE(SUM(course_outcome_id), 0) || ':' || COALESCE(SUM(program_outcome_id), 0)
+                || ':' || COALESCE(SUM(course_outcome_id * program_outcome_id), 0)
+         FROM course_outcome_program_outcome) AS links,
+        (SELECT COUNT(*) || ':' || COALESCE(MAX(id), 0) || ':' || COALESCE(MAX(updated_at), '') FROM course_outcome) AS course_outcomes,
+        (SELECT COUNT(*) || ':' || COALESCE(MAX(id), 0) || ':' || COALESCE(MAX(updated_at), '') FROM program_outcome) AS program_outcomes,
+        (SELECT COUNT(*) || ':' || COALESCE(MAX(id), 0) || ':' || COALESCE(MAX(updated_at), '') FROM course) AS courses,
+        (SELECT COUNT(*) || ':' || COALESCE(SUM(excluded), 0) || ':' || COALESCE(MAX(updated_at), '') FROM course_settings) AS settings
+""")
+
+_index_lock = threading.Lock()
+_index = {'signature': None, 'program_outcomes': [], 'by_code': {}, 'contributions': {}}
+
+
+def contribution_fingerprint():
+    """Fingerprint of the CO-PO mappings, outcomes, courses and course exclusions"""
+    return tuple(db.session.execute(FINGERPRINT_SQL).first())
+
+
+def build_contribution_index():
+    """
+    Program outcomes (by code) and, per program outcome id, its contributing
+    courses sorted by code, each with the course outcomes linking it (one query).
+    """
+    program_outcomes = [{'id': row.id, 'code': row.code, 'description': row.description}
+                        for row in db.session.execute(PROGRAM_OUTCOME_SQL)]
+
+    contributions = {}
+    for row in db.session.execute(CONTRIBUTION_SQL):
+        courses = contributions.setdefault(row.po_id, {})
+        course = courses.get(row.course_id)
+        if course is None:
+            course = courses[row.course_id] = {
+                'id': row.course_id,
+                'code': row.course_code,
+                'name': row.course_name,
+                'semester': row.semester,
+                'course_weight': float(row.course_weight or 0),
+                'excluded': bool(row.excluded),
+                'course_outcomes': []
+            }
+        course['course_outcomes'].append({'code': row.co_code, 'description': row.co_description})
+
+    # Courses are listed by code; courses with the same code keep the order of their first CO
+    return program_outcomes, {po_id: sorted(courses.values(), key=lambda course: course['code'])
+                              for po_id, courses in contributions.items()}
+
+
+def get_contribution_index():
+    """The contribution index, rebuilt only when the fingerprint changed since the last call"""
+    signature = (str(db.engine.url), contribution_fingerprint())
+    with _index_lock:
+        if _index['signature'] == signature:
+            return _index
+    program_outcomes, contributions = build_contribution_index()
+    with _index_lock:
+        _index.update({'signature': signature, 'program_outcomes': program_outcomes,
+                       'by_code': {po['code']: po for po in program_outcomes}, 'contributions': contributions})
+        logging.info(f"Program outcome contribution index built for {len(program_outcomes)} program outcomes")
+        return _index
+
+
+def invalidate_contribution_index():
+    """Force the next request to rebuild the index"""
+    with _index_lock:
+        _index.update({'signature': None, 'program_outcomes': [], 'by_code': {}, 'contributions': {}})
+
+
+def program_outcome_summary(program_outcome_id, index=None):
+    """Contributing courses of one program outcome split into included and excluded courses"""
+    index = index or get_contribution_index()
+    courses = index['contributions'].get(program_outcome_id, [])
+    included_courses = [course for course in courses if not course['excluded']]
+    excluded_courses = [course for course in courses if course['excluded']]
+    return courses, included_courses, excluded_courses
+
+
+def _page_course(course):
+    """Course entry of the contributions page: one CO is shown with its description, several by code"""
+    entry = {key: value for key, value in course.items() if key != 'course_outcomes'}
+    if len(course['course_outcomes']) == 1:
+        entry['course_outcome_code'] = course['course_outcomes'][0]['code']
+        entry['course_outcome_description'] = course['course_outcomes'][0]['description']
+    else:
+        entry['course_outcomes'] = [outcome['code'] for outcome in course['course_outcomes']]
+    return entry
+
+
+def contributions_page_data():
+    """Program outcomes and the per-code data of the contributions page (kept with the index)"""
+    index = get_contribution_index()
+    with _index_lock:
+        if index.get('page_data') is not None and index['page_data'][0] == index['signature']:
+            return index['program_outcomes'], index['page_data'][1]
+    program_outcome_data = {}
+    for po in index['program_outcomes']:
+        courses = [_page_course(course) for course in index['contributions'].get(po['id'], [])]
+        included_courses = [course for course in courses if not course['excluded']]
+        excluded_courses = [course for course in courses if course['excluded']]
+        program_outcome_data[po['code']] = {
+            'id': po['id'],
+            'description': po['description'],
+            'all_courses': courses,
+            'included_courses': included_courses,
+            'excluded_courses': excluded_courses,
+            'total_count': len(courses),
+            'included_count': len(included_courses),
+            'excluded_count': len(excluded_courses)
+        }
+    with _index_lock:
+        index['page_data'] = (index['signature'], program_outcome_data)
+    return index['program_outcomes'], program_outcome_data
+
+
+def contributions_api_data(program_outcome_code):
+    """Response of the contributions API for one program outcome code, None if the code is unknown"""
+    index = get_contribution_index()
+    po = index['by_code'].get(program_outcome_code)
+    if po is None:
+        return None
+    courses, included_courses, excluded_courses = program_outcome_summary(po['id'], index)
+    return {
+        'program_outcome': {
+            'code': po['code'],
+            'description': po['description']
+        },
+        'all_courses': courses,
+        'included_courses': included_courses,
+        'excluded_courses': excluded_courses,
+        'summary': {
+            'total_count': len(courses),
+            'included_count': len(included_courses),
+            'excluded_count': len(excluded_courses)
+        }
+    }
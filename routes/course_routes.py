@@ -4,6 +4,7 @@ from models import Course, Exam, CourseOutcome, Student, Log, ExamWeight
 from datetime import datetime
 import logging
 from routes.utility_routes import export_to_excel_csv
+from routes.result_cache import invalidate_course_results
 
 course_bp = Blueprint('course', __name__, url_prefix='/course')
 
@@ -141,6 +142,7 @@ def delete_course(course_id):
             db.session.add(log)
             
             db.session.delete(course)
+            invalidate_course_results(course_id)
             db.session.commit()
             flash(f'Course {course.code} - {course.name} deleted successfully', 'success')
             return redirect(url_for('course.list_courses'))
@@ -165,6 +167,7 @@ def delete_course(course_id):
         db.session.add(log)
         
         db.session.delete(course)
+        invalidate_course_results(course_id)
         db.session.commit()
         flash(f'Course {course.code} - {course.name} deleted successfully', 'success')
     except Exception as e:
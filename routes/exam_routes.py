@@ -10,6 +10,7 @@ from sqlalchemy import text, inspect
 from sqlalchemy.orm import joinedload, contains_eager # Added imports
 
 from routes.utility_routes import export_to_excel_csv
+from routes.result_cache import invalidate_course_results
 
 exam_bp = Blueprint('exam', __name__, url_prefix='/exam')
 
@@ -89,6 +90,7 @@ def add_exam(course_id):
             log = Log(action="ADD_EXAM", description=f"Added exam: {name} to course: {course.code}")
             db.session.add(log)
             db.session.add(exam_weight)
+            invalidate_course_results(course.id)
 
             db.session.commit()
             flash(f'Exam {name} added successfully', 'success')
@@ -219,6 +221,7 @@ def edit_exam(exam_id):
             # Log action
             log = Log(action="EDIT_EXAM", description=f"Edited exam: {name} in course: {course.code}")
             db.session.add(log)
+            invalidate_course_results(course.id)
 
             db.session.commit()
             flash(f'Exam {name} updated successfully', 'success')
@@ -280,6 +283,7 @@ def delete_exam(exam_id):
 
         # Delete the exam (will cascade delete questions and scores due to relationship configuration)
         db.session.delete(exam)
+        invalidate_course_results(course_id)
         db.session.commit()
 
         success_message = f'Exam {exam.name} deleted successfully'
@@ -428,6 +432,8 @@ def manage_weights(course_id):
                         db.session.add(new_makeup_weight)
 
             try:
+                # Weights change every outcome score of the course
+                invalidate_course_results(course_id)
                 # Commit the changes
                 db.session.commit()
                 flash('Exam weights updated successfully', 'success')
@@ -511,6 +517,7 @@ def export_exams(course_id):
     # Commit any fixes that were made
     if fixes_count > 0:
         try:
+            invalidate_course_results(course.id)
             db.session.commit()
             log = Log(action="AUTO_FIX_MAKEUP_EXAMS",
                      description=f"Automatically fixed {fixes_count} makeup exam relationships for course: {course.code}")
@@ -837,6 +844,7 @@ def fix_makeup_relations(course_id):
     # Commit changes if any fixes were made
     if fixes_count > 0:
         try:
+            invalidate_course_results(course.id)
             db.session.commit()
             log = Log(action="FIX_MAKEUP_EXAMS",
                      description=f"Fixed {fixes_count} makeup exam relationships for course: {course.code}")
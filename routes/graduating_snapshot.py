@@ -0,0 +1,69 @@
+"""
+Graduating students snapshot for the graduating students filter.
+
+The filter used to check every student separately: a Student lookup, a
+GraduatingStudent query and a table inspection per student, repeated in the
+loops of the all-courses page, its export and the PDF reports. The list only
+changes through the /calculation/graduating_students routes, so it is kept in
+memory as a frozenset of student numbers together with whether the table
+exists.
+
+The snapshot is versioned: the graduating students routes (and a database
+restore) call invalidate_graduating_snapshot() after committing, which bumps
+the version, and the next lookup reloads the list with one query. All other
+lookups, including those made while calculating, run no query at all.
+"""
+
+import logging
+import threading
+from app import db
+from models import GraduatingStudent
+
+_snapshot_lock = threading.Lock()
+_snapshot_version = 0
+_snapshot = {'signature': None, 'available': False, 'student_ids': frozenset()}
+
+
+def load_graduating_students():
+    """(table available, frozenset of graduating student numbers) read from the database"""
+    from db_migrations import graduating_students_table_exists
+
+    try:
+        if not graduating_students_table_exists():
+            return False, frozenset()
+        return True, frozenset(row[0] for row in db.session.query(GraduatingStudent.student_id))
+    except Exception as e:
+        logging.error(f"Error loading graduating students: {str(e)}")
+        return False, frozenset()
+
+
+def get_graduating_snapshot():
+    """The graduating students snapshot, reloaded only after invalidate_graduating_snapshot()"""
+    # The database URL is part of the signature so switching databases (e.g. tests) reloads it
+    signature = (str(db.engine.url), _snapshot_version)
+    with _snapshot_lock:
+        if _snapshot['signature'] == signature:
+            return _snapshot
+    available, student_ids = load_graduating_students()
+    with _snapshot_lock:
+        # A reload racing with an invalidation keeps the older version, so it is loaded again next time
+        _snapshot.update({'signature': signature, 'available': available, 'student_ids': student_ids})
+        logging.info(f"Graduating students snapshot loaded ({len(student_ids)} students)")
+        return _snapshot
+
+
+def graduating_student_id_set():
+    """Frozenset of the graduating student numbers (empty if the table does not exist)"""
+    return get_graduating_snapshot()['student_ids']
+
+
+def graduating_students_available():
+    """Whether the graduating_student table exists, as of the last snapshot"""
+    return get_graduating_snapshot()['available']
+
+
+def invalidate_graduating_snapshot():
+    """Make the next lookup reload the list (call after committing a change to it)"""
+    global _snapshot_version
+    with _snapshot_lock:
+        _snapshot_version += 1
@@ -0,0 +1,539 @@
+"""
+Set-based import of a backup database into the current database.
+
+The uploaded backup is ATTACHed to the connection of the current database
+(schema IMPORT_SCHEMA), so every import step is a handful of INSERT ... SELECT
+statements executed inside SQLite instead of a Python loop that SELECTs and
+INSERTs one row at a time:
+
+1. The rows of a source table that cannot be imported (missing required
+   fields, references to rows that were not imported) are selected once, to
+   report the same warning per row as before.
+2. The rows that have no match in the current database are inserted with one
+   INSERT ... SELECT. When the backup has several rows with the same natural
+   key, the first one is inserted (the others match it, like before).
+3. The id-mapping tables (backup id -> current id) are TEMP tables filled with
+   one INSERT ... SELECT join on the natural key (e.g. course code + semester).
+   Later steps translate foreign keys by joining these tables.
+
+Scores are written with the native upsert on the unique
+(student_id, question_id, exam_id) key, so millions of scores are one
+statement. Tables without a unique key (exam weights, attendance) are staged
+in a TEMP table and written with one UPDATE for the existing rows and one
+INSERT for the new ones.
+
+The import options and the import_summary counters are the same as in the
+row-by-row import. The caller owns the transaction: attach_backup() has to be
+called before BEGIN (SQLite cannot ATTACH inside a transaction) and
+detach_backup() after COMMIT/ROLLBACK.
+"""
+
+import logging
+from datetime import datetime
+
+IMPORT_SCHEMA = 'import_src'
+
+# TEMP id-mapping tables (backup id -> current id)
+ID_MAP_TABLES = ('course', 'course_outcome', 'program_outcome', 'student', 'exam', 'question')
+
+# Optional tables that are only imported when the backup has them
+OPTIONAL_TABLES = ('achievement_level', 'course_settings', 'exam_weight', 'student_exam_attendance')
+
+
+def attach_backup(connection, backup_path):
+    """Attach the backup database as IMPORT_SCHEMA (must be called outside a transaction)"""
+    connection.execute(f"ATTACH DATABASE ? AS {IMPORT_SCHEMA}", (backup_path,))
+
+
+def detach_backup(connection):
+    """Drop the TEMP tables of the import and detach the backup database"""
+    for table in ID_MAP_TABLES:
+        connection.execute(f"DROP TABLE IF EXISTS temp.{_map_table(table)}")
+    connection.execute("DROP TABLE IF EXISTS temp.import_stage")
+    connection.execute(f"DETACH DATABASE {IMPORT_SCHEMA}")
+
+
+def _map_table(table):
+    """Name of the TEMP id-mapping table of a source table"""
+    return f"import_{table}_map"
+
+
+def _source_columns(connection, table):
+    """Column names of a table in the backup (empty when the table does not exist)"""
+    return {row[1] for row in connection.execute(f"PRAGMA {IMPORT_SCHEMA}.table_info({table})").fetchall()}
+
+
+def _main_columns(connection, table):
+    """Column names of a table in the current database"""
+    return {row[1] for row in connection.execute(f"PRAGMA main.table_info({table})").fetchall()}
+
+
+def _value(columns, column, default):
+    """Source value with a default for NULL and for columns older backups do not have"""
+    if column in columns:
+        return f"COALESCE(s.{column}, {default})"
+    return default
+
+
+def _truthy(expression):
+    """SQL version of Python truthiness for a value (None, '' and 0 are false)"""
+    return (f"({expression} IS NOT NULL"
+            f" AND NOT (typeof({expression}) = 'text' AND {expression} = '')"
+            f" AND NOT (typeof({expression}) IN ('integer', 'real') AND {expression} = 0))")
+
+
+def _int_bool(expression):
+    """SQL version of to_int_bool(): 1/0 from integers and 'true'/'yes'/'1' style strings"""
+    return (f"(CASE WHEN typeof({expression}) = 'integer' THEN {expression} <> 0"
+            f" WHEN typeof({expression}) = 'text' THEN lower({expression}) IN ('true', 't', 'yes', 'y', '1')"
+            f" ELSE 0 END)")
+
+
+def _text(expression):
+    """Value as it appears in the warning messages (None for NULL)"""
+    return f"COALESCE(CAST({expression} AS TEXT), 'None')"
+
+
+def _collect_errors(connection, table, joins, valid, message, import_summary):
+    """Append one warning per source row that cannot be imported, in row order"""
+    rows = connection.execute(
+        f"SELECT {message} FROM {IMPORT_SCHEMA}.{table} s {joins} WHERE NOT ({valid}) ORDER BY s.rowid"
+    ).fetchall()
+    import_summary['errors'].extend(row[0] for row in rows)
+
+
+def _merge_rows(connection, table, joins, valid, key, columns, params, map_ids=False):
+    """
+    Insert the valid source rows that have no match on the natural key.
+
+    Args:
+        table: Table name (same in the backup and the current database)
+        joins: JOIN clauses translating the foreign keys of the source rows (alias s)
+        valid: Condition of the rows that can be imported
+        key: List of (current column, source expression) pairs of the natural key
+        columns: List of (current column, source expression) pairs to insert
+        params: Statement parameters (e.g. :now)
+        map_ids: Fill the TEMP id-mapping table of the table
+
+    Returns:
+        Number of inserted rows
+    """
+    key_expressions = ', '.join(expression for _, expression in key)
+    key_match = ' AND '.join(f"d.{column} = {expression}" for column, expression in key)
+
+    cursor = connection.execute(
+        f"""
+        INSERT INTO main.{table} ({', '.join(column for column, _ in columns)})
+        SELECT {', '.join(expression for _, expression in columns)}
+        FROM {IMPORT_SCHEMA}.{table} s {joins}
+        WHERE s.rowid IN (
+            SELECT MIN(s.rowid) FROM {IMPORT_SCHEMA}.{table} s {joins}
+            WHERE {valid} GROUP BY {key_expressions}
+        )
+        AND NOT EXISTS (SELECT 1 FROM main.{table} d WHERE {key_match})
+        ORDER BY s.rowid
+        """,
+        params
+    )
+    inserted = cursor.rowcount
+
+    if map_ids:
+        # The lowest id wins when the current database has several matches (like fetchone())
+        connection.execute(
+            f"""
+            INSERT OR REPLACE INTO temp.{_map_table(table)} (old_id, new_id)
+            SELECT s.id, (SELECT MIN(d.id) FROM main.{table} d WHERE {key_match})
+            FROM {IMPORT_SCHEMA}.{table} s {joins}
+            WHERE {valid}
+            """
+        )
+    return inserted
+
+
+def _write_staged_rows(connection, table, key, updated, created):
+    """
+    Write the rows of temp.import_stage into a table without a unique key.
+
+    Existing rows (matched on key) get the values of the last staged row; new
+    rows are inserted with the created columns of the first staged row and the
+    updated columns of the last one. This is what the row-by-row import did by
+    inserting the first row and updating it with every later one.
+    """
+    key_match = ' AND '.join(f"x.{column} = {table}.{column}" for column in key)
+    assignments = ', '.join(
+        f"{column} = (SELECT x.{column} FROM temp.import_stage x WHERE {key_match} ORDER BY x.src_row DESC LIMIT 1)"
+        for column in updated
+    )
+    connection.execute(
+        f"""
+        UPDATE main.{table} SET {assignments}
+        WHERE EXISTS (SELECT 1 FROM temp.import_stage x WHERE {key_match})
+        """
+    )
+
+    first_last = ' AND '.join(f"x.{column} = f.{column}" for column in key)
+    connection.execute(
+        f"""
+        INSERT INTO main.{table} ({', '.join(key + updated + created)})
+        SELECT {', '.join([f'f.{c}' for c in key] + [f'l.{c}' for c in updated] + [f'f.{c}' for c in created])}
+        FROM temp.import_stage f
+        JOIN temp.import_stage l
+          ON l.src_row = (SELECT MAX(x.src_row) FROM temp.import_stage x WHERE {first_last})
+        WHERE f.src_row = (SELECT MIN(x.src_row) FROM temp.import_stage x WHERE {first_last})
+          AND NOT EXISTS (SELECT 1 FROM main.{table} d WHERE {' AND '.join(f'd.{c} = f.{c}' for c in key)})
+        ORDER BY f.src_row
+        """
+    )
+
+
+def _stage_rows(connection, table, joins, valid, columns, params):
+    """Copy the valid source rows (translated to current ids) into temp.import_stage"""
+    connection.execute("DROP TABLE IF EXISTS temp.import_stage")
+    connection.execute(
+        f"""
+        CREATE TEMP TABLE import_stage AS
+        SELECT s.rowid AS src_row, {', '.join(f'{expression} AS {column}' for column, expression in columns)}
+        FROM {IMPORT_SCHEMA}.{table} s {joins}
+        WHERE {valid}
+        ORDER BY s.rowid
+        """,
+        params
+    )
+    return connection.execute("SELECT COUNT(*) FROM temp.import_stage").fetchone()[0]
+
+
+def import_backup_data(connection, options, import_summary):
+    """
+    Merge the attached backup into the current database.
+
+    Args:
+        connection: sqlite3 connection of the current database with the backup attached
+        options: Dict of the import options (import_courses, import_students, ...)
+        import_summary: Summary dict; its counters and error list are updated
+
+    Returns:
+        List of warning messages to show to the user
+    """
+    warnings = []
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    params = {'now': now}
+
+    for table in ID_MAP_TABLES:
+        connection.execute(f"DROP TABLE IF EXISTS temp.{_map_table(table)}")
+        connection.execute(f"CREATE TEMP TABLE {_map_table(table)} (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL)")
+
+    def map_join(table, alias, source_column):
+        return f"LEFT JOIN temp.{_map_table(table)} {alias} ON {alias}.old_id = s.{source_column}"
+
+    def timestamps(columns):
+        return [('created_at', _value(columns, 'created_at', ':now')),
+                ('updated_at', _value(columns, 'updated_at', ':now'))]
+
+    # STEP 1: IMPORT COURSES
+    if options.get('import_courses'):
+        columns = _source_columns(connection, 'course')
+        valid = ' AND '.join(_truthy(f's.{c}') for c in ('code', 'name', 'semester'))
+        _collect_errors(connection, 'course', '', valid, "'Skipped course with missing required fields'", import_summary)
+        import_summary['courses_imported'] += _merge_rows(
+            connection, 'course', '', valid,
+            key=[('code', 's.code'), ('semester', 's.semester')],
+            columns=[('code', 's.code'), ('name', 's.name'), ('semester', 's.semester'),
+                     ('course_weight', _value(columns, 'course_weight', '1.0'))] + timestamps(columns),
+            params=params, map_ids=True
+        )
+
+    # STEP 2: IMPORT COURSE OUTCOMES
+    if options.get('import_outcomes'):
+        columns = _source_columns(connection, 'course_outcome')
+        joins = map_join('course', 'cm', 'course_id')
+        present = f"{_truthy('s.code')} AND {_truthy('s.course_id')}"
+        valid = f"{present} AND cm.new_id IS NOT NULL"
+        message = (f"CASE WHEN NOT ({present}) THEN 'Skipped course outcome with missing required fields' "
+                   f"ELSE 'Skipped course outcome with invalid course_id: ' || {_text('s.course_id')} END")
+        _collect_errors(connection, 'course_outcome', joins, valid, message, import_summary)
+        import_summary['outcomes_imported'] += _merge_rows(
+            connection, 'course_outcome', joins, valid,
+            key=[('code', 's.code'), ('course_id', 'cm.new_id')],
+            columns=[('code', 's.code'), ('description', _value(columns, 'description', "''")),
+                     ('course_id', 'cm.new_id')] + timestamps(columns),
+            params=params, map_ids=True
+        )
+
+    # STEP 3: IMPORT PROGRAM OUTCOMES
+    if options.get('import_program_outcomes'):
+        columns = _source_columns(connection, 'program_outcome')
+        valid = f"{_truthy('s.code')} AND {_truthy('s.description')}"
+        _collect_errors(connection, 'program_outcome', '', valid,
+                        "'Skipped program outcome with missing required fields'", import_summary)
+        import_summary['program_outcomes_imported'] += _merge_rows(
+            connection, 'program_outcome', '', valid,
+            key=[('code', 's.code')],
+            columns=[('code', 's.code'), ('description', 's.description')] + timestamps(columns),
+            params=params, map_ids=True
+        )
+
+    # STEP 4: IMPORT ACHIEVEMENT LEVELS (Optional)
+    if options.get('import_achievement_levels'):
+        columns = _source_columns(connection, 'achievement_level')
+        if columns:
+            joins = map_join('course', 'cm', 'course_id')
+            valid = "cm.new_id IS NOT NULL"
+            _collect_errors(connection, 'achievement_level', joins, valid,
+                            f"'Skipped achievement level with invalid course_id: ' || {_text('s.course_id')}",
+                            import_summary)
+            import_summary['achievement_levels_imported'] += _merge_rows(
+                connection, 'achievement_level', joins, valid,
+                key=[('course_id', 'cm.new_id'), ('name', _value(columns, 'name', "''"))],
+                columns=[('course_id', 'cm.new_id'),
+                         ('name', _value(columns, 'name', "'Achievement Level'")),
+                         ('min_score', _value(columns, 'min_score', '0.0')),
+                         ('max_score', _value(columns, 'max_score', '100.0')),
+                         ('color', _value(columns, 'color', "'primary'"))] + timestamps(columns),
+                params=params
+            )
+
+    # STEP 5: IMPORT COURSE SETTINGS (Optional)
+    if options.get('import_course_settings'):
+        columns = _source_columns(connection, 'course_settings')
+        if columns:
+            joins = map_join('course', 'cm', 'course_id')
+            valid = "cm.new_id IS NOT NULL"
+            _collect_errors(connection, 'course_settings', joins, valid,
+                            f"'Skipped course settings with invalid course_id: ' || {_text('s.course_id')}",
+                            import_summary)
+            import_summary['course_settings_imported'] += _merge_rows(
+                connection, 'course_settings', joins, valid,
+                key=[('course_id', 'cm.new_id')],
+                columns=[('course_id', 'cm.new_id'),
+                         ('success_rate_method', _value(columns, 'success_rate_method', "'absolute'")),
+                         ('relative_success_threshold', _value(columns, 'relative_success_threshold', '60.0')),
+                         ('excluded', _int_bool(_value(columns, 'excluded', '0')))] + timestamps(columns),
+                params=params
+            )
+
+    # STEP 6: IMPORT STUDENTS
+    if options.get('import_students'):
+        columns = _source_columns(connection, 'student')
+        joins = map_join('course', 'cm', 'course_id')
+        valid = f"{_truthy('s.student_id')} AND cm.new_id IS NOT NULL"
+        _collect_errors(connection, 'student', joins, valid,
+                        f"'Skipped student with missing student_id or invalid course_id: ' || {_text('s.course_id')}",
+                        import_summary)
+        import_summary['students_imported'] += _merge_rows(
+            connection, 'student', joins, valid,
+            key=[('student_id', 's.student_id'), ('course_id', 'cm.new_id')],
+            columns=[('student_id', 's.student_id'),
+                     ('first_name', _value(columns, 'first_name', "''")),
+                     ('last_name', _value(columns, 'last_name', "''")),
+                     ('course_id', 'cm.new_id'),
+                     ('excluded', _int_bool(_value(columns, 'excluded', '0')))] + timestamps(columns),
+            params=params, map_ids=True
+        )
+
+    # STEP 7: IMPORT EXAMS
+    if options.get('import_exams'):
+        columns = _source_columns(connection, 'exam')
+        joins = map_join('course', 'cm', 'course_id')
+        valid = "cm.new_id IS NOT NULL"
+        _collect_errors(connection, 'exam', joins, valid,
+                        f"'Skipped exam with invalid course_id: ' || {_text('s.course_id')}", import_summary)
+        import_summary['exams_imported'] += _merge_rows(
+            connection, 'exam', joins, valid,
+            key=[('name', _value(columns, 'name', "''")), ('course_id', 'cm.new_id')],
+            columns=[('name', _value(columns, 'name', "''")),
+                     ('max_score', _value(columns, 'max_score', '100.0')),
+                     ('exam_date', _value(columns, 'exam_date', 'NULL')),
+                     ('course_id', 'cm.new_id'),
+                     ('is_makeup', _int_bool(_value(columns, 'is_makeup', '0'))),
+                     ('is_final', _int_bool(_value(columns, 'is_final', '0'))),
+                     ('is_mandatory', _int_bool(_value(columns, 'is_mandatory', '0')))] + timestamps(columns),
+            params=params, map_ids=True
+        )
+
+    # STEP 8: IMPORT QUESTIONS
+    if options.get('import_exams'):
+        columns = _source_columns(connection, 'question')
+        joins = map_join('exam', 'em', 'exam_id')
+        valid = "em.new_id IS NOT NULL"
+        _collect_errors(connection, 'question', joins, valid,
+                        f"'Skipped question with invalid exam_id: ' || {_text('s.exam_id')}", import_summary)
+        import_summary['questions_imported'] += _merge_rows(
+            connection, 'question', joins, valid,
+            key=[('exam_id', 'em.new_id'), ('number', _value(columns, 'number', '0'))],
+            columns=[('text', _value(columns, 'text', "''")),
+                     ('number', _value(columns, 'number', '0')),
+                     ('max_score', _value(columns, 'max_score', '0.0')),
+                     ('exam_id', 'em.new_id')] + timestamps(columns),
+            params=params, map_ids=True
+        )
+
+    # STEP 9: IMPORT EXAM WEIGHTS (Optional)
+    if options.get('import_exam_weights'):
+        columns = _source_columns(connection, 'exam_weight')
+        if columns:
+            joins = f"{map_join('exam', 'em', 'exam_id')} {map_join('course', 'cm', 'course_id')}"
+            valid = "em.new_id IS NOT NULL AND cm.new_id IS NOT NULL"
+            _collect_errors(connection, 'exam_weight', joins, valid,
+                            "'Skipped exam weight with invalid exam_id or course_id: e' || "
+                            f"{_text('s.exam_id')} || ', c' || {_text('s.course_id')}", import_summary)
+            import_summary['exam_weights_imported'] += _stage_rows(
+                connection, 'exam_weight', joins, valid,
+                [('exam_id', 'em.new_id'), ('course_id', 'cm.new_id'),
+                 ('weight', _value(columns, 'weight', '0.0'))] + timestamps(columns),
+                params
+            )
+            _write_staged_rows(connection, 'exam_weight', key=['exam_id', 'course_id'],
+                               updated=['weight', 'updated_at'], created=['created_at'])
+        else:
+            warnings.append("Exam weight table not found in backup.")
+
+    # STEP 10: IMPORT SCORES (native upsert on the unique score key, last row wins)
+    if options.get('import_scores'):
+        columns = _source_columns(connection, 'score')
+        joins = (f"{map_join('student', 'sm', 'student_id')} {map_join('question', 'qm', 'question_id')} "
+                 f"{map_join('exam', 'em', 'exam_id')}")
+        valid = "sm.new_id IS NOT NULL AND qm.new_id IS NOT NULL AND em.new_id IS NOT NULL"
+        _collect_errors(connection, 'score', joins, valid,
+                        "'Skipped score with invalid foreign keys: s' || "
+                        f"{_text('s.student_id')} || ', q' || {_text('s.question_id')} || ', e' || {_text('s.exam_id')}",
+                        import_summary)
+        cursor = connection.execute(
+            f"""
+            INSERT INTO main.score (score, student_id, question_id, exam_id, created_at, updated_at)
+            SELECT {_value(columns, 'score', '0.0')}, sm.new_id, qm.new_id, em.new_id,
+                   {_value(columns, 'created_at', ':now')}, {_value(columns, 'updated_at', ':now')}
+            FROM {IMPORT_SCHEMA}.score s
+            JOIN temp.{_map_table('student')} sm ON sm.old_id = s.student_id
+            JOIN temp.{_map_table('question')} qm ON qm.old_id = s.question_id
+            JOIN temp.{_map_table('exam')} em ON em.old_id = s.exam_id
+            WHERE true
+            ORDER BY s.rowid
+            ON CONFLICT (student_id, question_id, exam_id)
+            DO UPDATE SET score = excluded.score, updated_at = excluded.updated_at
+            """,
+            params
+        )
+        import_summary['scores_imported'] += cursor.rowcount
+
+    # STEP 11: IMPORT STUDENT EXAM ATTENDANCE (Optional)
+    if options.get('import_attendance'):
+        columns = _source_columns(connection, 'student_exam_attendance')
+        if columns:
+            joins = f"{map_join('student', 'sm', 'student_id')} {map_join('exam', 'em', 'exam_id')}"
+            valid = "sm.new_id IS NOT NULL AND em.new_id IS NOT NULL"
+            _collect_errors(connection, 'student_exam_attendance', joins, valid,
+                            "'Skipped attendance record with invalid student_id or exam_id: s' || "
+                            f"{_text('s.student_id')} || ', e' || {_text('s.exam_id')}", import_summary)
+            import_summary['attendance_imported'] += _stage_rows(
+                connection, 'student_exam_attendance', joins, valid,
+                [('student_id', 'sm.new_id'), ('exam_id', 'em.new_id'),
+                 ('attended', _int_bool(_value(columns, 'attended', '1')))] + timestamps(columns),
+                params
+            )
+            _write_staged_rows(connection, 'student_exam_attendance', key=['student_id', 'exam_id'],
+                               updated=['attended', 'updated_at'], created=['created_at'])
+
+    # STEP 12: UPDATE MAKEUP EXAM RELATIONSHIPS (older backups have no makeup_for column)
+    if 'makeup_for' in _source_columns(connection, 'exam'):
+        makeup_source = f"""
+            SELECT em.new_id AS exam_id, mm.new_id AS makeup_for, s.rowid AS src_row
+            FROM {IMPORT_SCHEMA}.exam s
+            JOIN temp.{_map_table('exam')} em ON em.old_id = s.id
+            JOIN temp.{_map_table('exam')} mm ON mm.old_id = s.makeup_for
+        """
+        connection.execute(
+            f"""
+            UPDATE main.exam SET makeup_for = (
+                SELECT m.makeup_for FROM ({makeup_source}) m WHERE m.exam_id = exam.id ORDER BY m.src_row DESC LIMIT 1
+            )
+            WHERE id IN (SELECT m.exam_id FROM ({makeup_source}) m)
+            """
+        )
+
+    # STEP 13: IMPORT CO-PO ASSOCIATIONS AND WEIGHTS
+    if options.get('import_outcomes') and options.get('import_program_outcomes'):
+        try:
+            source_columns = _source_columns(connection, 'course_outcome_program_outcome')
+            if not source_columns:
+                raise ValueError("no such table: course_outcome_program_outcome")
+            has_relative_weight = 'relative_weight' in source_columns
+            dest_has_relative_weight = 'relative_weight' in _main_columns(connection, 'course_outcome_program_outcome')
+
+            joins = (f"{map_join('course_outcome', 'om', 'course_outcome_id')} "
+                     f"{map_join('program_outcome', 'pm', 'program_outcome_id')}")
+            valid = "om.new_id IS NOT NULL AND pm.new_id IS NOT NULL"
+            _collect_errors(connection, 'course_outcome_program_outcome', joins, valid,
+                            "'Skipped CO-PO association with invalid IDs: co' || "
+                            f"{_text('s.course_outcome_id')} || ', po' || {_text('s.program_outcome_id')}",
+                            import_summary)
+            _stage_rows(connection, 'course_outcome_program_outcome', joins, valid,
+                        [('course_outcome_id', 'om.new_id'), ('program_outcome_id', 'pm.new_id'),
+                         ('relative_weight', _value(source_columns, 'relative_weight', '1.0'))],
+                        params)
+
+            pair_match = ("x.course_outcome_id = course_outcome_program_outcome.course_outcome_id "
+                          "AND x.program_outcome_id = course_outcome_program_outcome.program_outcome_id")
+            if has_relative_weight and dest_has_relative_weight:
+                # Existing associations take the weight of the last backup row
+                connection.execute(
+                    f"""
+                    UPDATE main.course_outcome_program_outcome SET relative_weight = (
+                        SELECT x.relative_weight FROM temp.import_stage x WHERE {pair_match}
+                        ORDER BY x.src_row DESC LIMIT 1
+                    )
+                    WHERE EXISTS (SELECT 1 FROM temp.import_stage x WHERE {pair_match})
+                    """
+                )
+
+            last_weight = ("(SELECT x.relative_weight FROM temp.import_stage x "
+                           "WHERE x.course_outcome_id = f.course_outcome_id AND x.program_outcome_id = f.program_outcome_id "
+                           "ORDER BY x.src_row DESC LIMIT 1)")
+            insert_columns = 'course_outcome_id, program_outcome_id'
+            select_columns = 'f.course_outcome_id, f.program_outcome_id'
+            if dest_has_relative_weight:
+                insert_columns += ', relative_weight'
+                select_columns += f", {last_weight}"
+            cursor = connection.execute(
+                f"""
+                INSERT INTO main.course_outcome_program_outcome ({insert_columns})
+                SELECT {select_columns} FROM temp.import_stage f
+                WHERE f.src_row IN (
+                    SELECT MIN(src_row) FROM temp.import_stage GROUP BY course_outcome_id, program_outcome_id
+                )
+                AND NOT EXISTS (
+                    SELECT 1 FROM main.course_outcome_program_outcome d
+                    WHERE d.course_outcome_id = f.course_outcome_id AND d.program_outcome_id = f.program_outcome_id
+                )
+                ORDER BY f.src_row
+                """
+            )
+            import_summary['co_po_imported'] += cursor.rowcount
+        except Exception as e:
+            import_summary['errors'].append(f"Error importing CO-PO associations: {str(e)}")
+
+    # STEP 14: IMPORT COURSE-OUTCOME QUESTION ASSOCIATIONS
+    if options.get('import_outcomes') and options.get('import_exams'):
+        try:
+            source_columns = _source_columns(connection, 'question_course_outcome')
+            if not source_columns:
+                raise ValueError("no such table: question_course_outcome")
+            joins = (f"{map_join('question', 'qm', 'question_id')} "
+                     f"{map_join('course_outcome', 'om', 'course_outcome_id')}")
+            valid = "qm.new_id IS NOT NULL AND om.new_id IS NOT NULL"
+            _collect_errors(connection, 'question_course_outcome', joins, valid,
+                            "'Skipped question-CO association with invalid IDs: q' || "
+                            f"{_text('s.question_id')} || ', co' || {_text('s.course_outcome_id')}",
+                            import_summary)
+            import_summary['question_co_imported'] += _merge_rows(
+                connection, 'question_course_outcome', joins, valid,
+                key=[('question_id', 'qm.new_id'), ('course_outcome_id', 'om.new_id')],
+                columns=[('question_id', 'qm.new_id'), ('course_outcome_id', 'om.new_id'),
+                         ('relative_weight', _value(source_columns, 'relative_weight', '1.0'))],
+                params=params
+            )
+        except Exception as e:
+            import_summary['errors'].append(f"Error importing question-CO associations: {str(e)}")
+
+    counts = {key: count for key, count in import_summary.items() if key != 'errors'}
+    logging.info(f"Set-based import finished: {counts}")
+    return warnings
@@ -0,0 +1,342 @@
+"""
+Background Job Queue
+
+Runs long tasks (student PDF reports, program outcome PDFs, ...) on a small
+pool of worker threads instead of inside the Flask request thread. The request
+that starts the work only registers a job and returns its id; the browser then
+polls /jobs/<id> for progress and downloads the result from
+/jobs/<id>/download when the job is completed.
+
+Every job has a row in the background_job table (status, progress, result
+file, errors). While a job runs, its progress is kept in memory and written to
+the table at most once per PROGRESS_PERSIST_INTERVAL seconds, so frequent
+progress updates from several generator threads do not contend for the SQLite
+write lock. Jobs left queued or running by a previous run of the application
+are marked 'interrupted' at startup.
+
+A job function is called as func(job, *args, **kwargs) inside an application
+context, where job is a JobHandle used to report progress, check for
+cancellation and register the result file.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from flask import current_app
+from app import db
+
+# Job states
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+JOB_INTERRUPTED = 'interrupted'  # Was queued/running when the application stopped
+ACTIVE_JOB_STATES = (JOB_QUEUED, JOB_RUNNING)
+
+# Minimum seconds between two progress writes to the job table
+PROGRESS_PERSIST_INTERVAL = 1.0
+
+# Fields of the job table mirrored in the in-memory state
+_STATE_FIELDS = ('job_type', 'status', 'current', 'total', 'message', 'error',
+                 'result_path', 'result_name', 'cancel_requested',
+                 'created_at', 'started_at', 'finished_at')
+
+_live_jobs = {}  # job_id -> state dict of jobs queued or running in this process
+_live_lock = threading.Lock()
+_job_queue = queue.Queue()
+_workers = []
+_workers_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    """Raised by JobHandle.check_cancelled() to stop a job that was cancelled"""
+
+
+class JobHandle:
+    """Progress, cancellation and result reporting for a running job (thread-safe)"""
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self._last_persist = 0.0
+        # Only the job's own thread writes progress to the table; helper threads
+        # started by the job update the in-memory state only
+        self._thread_id = threading.get_ident()
+
+    def update(self, current=None, total=None, message=None, **details):
+        """Set the progress; extra keyword arguments are exposed in /jobs/<id> under 'details'"""
+        with _live_lock:
+            state = _live_jobs.get(self.id)
+            if state is None:
+                return
+            if current is not None:
+                state['current'] = current
+            if total is not None:
+                state['total'] = total
+            if message is not None:
+                state['message'] = message
+            if details:
+                state.setdefault('details', {}).update(details)
+        self._persist_progress()
+
+    def advance(self, step=1, message=None):
+        """Increase the progress counter by step, returns the new value"""
+        with _live_lock:
+            state = _live_jobs.get(self.id)
+            if state is None:
+                return 0
+            state['current'] += step
+            if message is not None:
+                state['message'] = message
+            current = state['current']
+        self._persist_progress()
+        return current
+
+    @property
+    def cancelled(self):
+        """True once cancel_job() was called for this job"""
+        with _live_lock:
+            state = _live_jobs.get(self.id)
+            return bool(state and state['cancel_requested'])
+
+    def check_cancelled(self):
+        """Raise JobCancelled if the job was cancelled (call between units of work)"""
+        if self.cancelled:
+            raise JobCancelled()
+
+    def set_result(self, path, name=None):
+        """Register the file offered by /jobs/<id>/download"""
+        with _live_lock:
+            state = _live_jobs.get(self.id)
+            if state is not None:
+                state['result_path'] = path
+                state['result_name'] = name or os.path.basename(path)
+
+    def _persist_progress(self):
+        """Write the progress to the job table, throttled to PROGRESS_PERSIST_INTERVAL"""
+        if threading.get_ident() != self._thread_id:
+            return
+        now = time.monotonic()
+        if now - self._last_persist < PROGRESS_PERSIST_INTERVAL:
+            return
+        self._last_persist = now
+        with _live_lock:
+            state = dict(_live_jobs.get(self.id) or {})
+        if state:
+            _persist_job(self.id, current=state['current'], total=state['total'], message=state['message'])
+
+
+def ensure_job_table():
+    """Create the job table if missing (e.g. after restoring a backup from an older version)"""
+    from models import BackgroundJob
+    try:
+        BackgroundJob.__table__.create(bind=db.engine, checkfirst=True)
+        return True
+    except Exception as e:
+        logging.error(f"Error creating background job table: {str(e)}")
+        return False
+
+
+def recover_interrupted_jobs():
+    """Mark jobs that were queued or running when the application stopped as interrupted"""
+    from models import BackgroundJob
+    try:
+        interrupted = BackgroundJob.query.filter(BackgroundJob.status.in_(ACTIVE_JOB_STATES)).all()
+        for job in interrupted:
+            job.status = JOB_INTERRUPTED
+            job.message = 'Interrupted because the application was restarted'
+            job.finished_at = datetime.now()
+        db.session.commit()
+        return len(interrupted)
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error recovering interrupted background jobs: {str(e)}")
+        return 0
+
+
+def _persist_job(job_id, **fields):
+    """Update the job's row (called from worker threads and request threads)"""
+    from models import BackgroundJob
+    try:
+        job = db.session.get(BackgroundJob, job_id)
+        if job is None:
+            return
+        for name, value in fields.items():
+            setattr(job, name, value)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error saving background job {job_id}: {str(e)}")
+
+
+def _start_workers(app):
+    """Start the worker threads on first use (JOB_WORKERS of the app, default 2)"""
+    with _workers_lock:
+        alive = [worker for worker in _workers if worker.is_alive()]
+        _workers[:] = alive
+        try:
+            worker_count = max(1, int(app.config.get('JOB_WORKERS', 2)))
+        except (TypeError, ValueError):
+            worker_count = 2
+        for index in range(len(alive), worker_count):
+            worker = threading.Thread(target=_worker_loop, name=f"job-worker-{index}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+
+def _worker_loop():
+    """Take jobs from the queue and run them one at a time in their app's context"""
+    while True:
+        app, job_id, func, args, kwargs = _job_queue.get()
+        try:
+            with app.app_context():
+                _run_job(job_id, func, args, kwargs)
+        except Exception as e:
+            logging.error(f"Background job worker error for job {job_id}: {str(e)}")
+        finally:
+            _job_queue.task_done()
+
+
+def _run_job(job_id, func, args, kwargs):
+    """Run one job and record its outcome"""
+    with _live_lock:
+        state = _live_jobs.get(job_id)
+        cancelled_before_start = state is None or state['cancel_requested']
+        if not cancelled_before_start:
+            state['status'] = JOB_RUNNING
+            state['started_at'] = datetime.now()
+
+    try:
+        if cancelled_before_start:
+            _finish_job(job_id, JOB_CANCELLED, message='Cancelled before it started')
+            return
+
+        _persist_job(job_id, status=JOB_RUNNING, started_at=state['started_at'])
+        job = JobHandle(job_id)
+        try:
+            func(job, *args, **kwargs)
+        except JobCancelled:
+            _finish_job(job_id, JOB_CANCELLED, message='Cancelled')
+        except Exception as e:
+            logging.error(f"Background job {job_id} ({state['job_type']}) failed: {str(e)}")
+            _finish_job(job_id, JOB_FAILED, error=str(e), message=f'Error: {str(e)}')
+        else:
+            if job.cancelled:
+                _finish_job(job_id, JOB_CANCELLED, message='Cancelled')
+            else:
+                _finish_job(job_id, JOB_COMPLETED)
+    finally:
+        db.session.remove()
+
+
+def _finish_job(job_id, status, **fields):
+    """Store the final state of a job and drop it from the in-memory table"""
+    with _live_lock:
+        state = dict(_live_jobs.get(job_id) or {})
+    final = {name: state[name] for name in ('current', 'total', 'message', 'result_path', 'result_name')
+             if name in state}
+    final.update(fields)
+    final['status'] = status
+    final['finished_at'] = datetime.now()
+    _persist_job(job_id, **final)
+    # Dropped only after the row is written, so /jobs/<id> never sees a stale row
+    with _live_lock:
+        _live_jobs.pop(job_id, None)
+
+
+def submit_job(job_type, func, *args, total=0, message=None, **kwargs):
+    """
+    Queue func(job, *args, **kwargs) for a worker thread, returns the job id.
+
+    Must be called inside an application context; the job runs in a new
+    application context of the same app, so it can use the database but not
+    the request or session (pass everything it needs as arguments).
+    """
+    from models import BackgroundJob
+
+    app = current_app._get_current_object()
+    job_id = uuid.uuid4().hex
+    now = datetime.now()
+    message = message or 'Waiting for a free worker...'
+
+    db.session.add(BackgroundJob(id=job_id, job_type=job_type, status=JOB_QUEUED, current=0, total=total,
+                                 message=message, created_at=now))
+    db.session.commit()
+
+    with _live_lock:
+        _live_jobs[job_id] = {
+            'job_type': job_type, 'status': JOB_QUEUED, 'current': 0, 'total': total, 'message': message,
+            'error': None, 'result_path': None, 'result_name': None, 'cancel_requested': False,
+            'created_at': now, 'started_at': None, 'finished_at': None
+        }
+
+    _start_workers(app)
+    _job_queue.put((app, job_id, func, args, kwargs))
+    logging.info(f"Queued background job {job_id} ({job_type})")
+    return job_id
+
+
+def _serialize_state(job_id, state):
+    """JSON representation used by /jobs/<id>"""
+    payload = {'id': job_id}
+    for name in _STATE_FIELDS:
+        value = state.get(name)
+        payload[name] = value.isoformat() if isinstance(value, datetime) else value
+    payload['completed'] = payload['status'] == JOB_COMPLETED
+    payload['finished'] = payload['status'] not in ACTIVE_JOB_STATES
+    payload['has_result'] = bool(payload['result_path'])
+    payload['details'] = state.get('details', {})
+    del payload['result_path']  # Server-side path, not exposed
+    return payload
+
+
+def get_job(job_id):
+    """Return the job's status as a dictionary, or None if it does not exist"""
+    with _live_lock:
+        state = _live_jobs.get(job_id)
+        if state is not None:
+            return _serialize_state(job_id, dict(state))
+
+    from models import BackgroundJob
+    job = db.session.get(BackgroundJob, job_id)
+    if job is None:
+        return None
+    return _serialize_state(job_id, {name: getattr(job, name) for name in _STATE_FIELDS})
+
+
+def get_job_result_file(job_id):
+    """Return (path, download name) of a completed job's result, or None"""
+    from models import BackgroundJob
+    job = db.session.get(BackgroundJob, job_id)
+    if job is None or job.status != JOB_COMPLETED or not job.result_path:
+        return None
+    if not os.path.exists(job.result_path):
+        return None
+    return job.result_path, job.result_name or os.path.basename(job.result_path)
+
+
+def cancel_job(job_id):
+    """Request cancellation of a queued or running job, returns False if it already finished"""
+    with _live_lock:
+        state = _live_jobs.get(job_id)
+        if state is None:
+            return False
+        state['cancel_requested'] = True
+        state['message'] = 'Cancelling...'
+    _persist_job(job_id, cancel_requested=True)
+    return True
+
+
+def wait_for_jobs(timeout=None):
+    """Block until every queued job has finished (used by tests and command line scripts)"""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while _job_queue.unfinished_tasks:
+        if deadline is not None and time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
@@ -0,0 +1,43 @@
+from flask import Blueprint, jsonify, send_file, url_for
+import logging
+from routes.job_queue import get_job, get_job_result_file, cancel_job
+
+job_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+def job_status_payload(job_id, job):
+    """Job status plus the URLs the browser needs to follow it"""
+    job['status_url'] = url_for('jobs.job_status', job_id=job_id)
+    job['cancel_url'] = url_for('jobs.cancel', job_id=job_id)
+    job['download_url'] = url_for('jobs.download', job_id=job_id) if job['completed'] and job['has_result'] else None
+    return job
+
+@job_bp.route('/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Progress of a background job (polled by the browser)"""
+    try:
+        job = get_job(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job_status_payload(job_id, job))
+    except Exception as e:
+        logging.error(f"Error reading background job {job_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@job_bp.route('/<job_id>/cancel', methods=['POST'])
+def cancel(job_id):
+    """Request cancellation of a queued or running job"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if not cancel_job(job_id):
+        return jsonify({'success': False, 'message': f"Job already {job['status']}"}), 409
+    return jsonify({'success': True, 'message': 'Cancellation requested'})
+
+@job_bp.route('/<job_id>/download', methods=['GET'])
+def download(job_id):
+    """Download the file produced by a completed job"""
+    result = get_job_result_file(job_id)
+    if result is None:
+        return jsonify({'error': 'No result available for this job'}), 404
+    path, name = result
+    return send_file(path, as_attachment=True, download_name=name)
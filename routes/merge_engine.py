@@ -0,0 +1,420 @@
+"""
+Bulk course merge engine.
+
+Merging source courses into a destination course runs in three phases:
+
+1. load_merge_snapshot() reads the destination and source courses (outcomes,
+   program outcome links, exams, questions, weights, students, scores and
+   attendance) with a fixed number of column queries.
+2. plan_course_merge() walks the snapshot in memory in the same order as the
+   row-by-row merge (per source course: outcomes, exams, students) and builds
+   a plan keyed on natural keys (outcome code, exam name, question number,
+   student ID), together with the same `stats` counters and conflict messages.
+   A dry run stops here, so the merge preview and a dry-run merge share this
+   code without writing anything.
+3. apply_merge_plan() writes the plan with one executemany statement per
+   table. The ids of the new outcomes, exams, questions and students are read
+   back once per table and used to translate the natural keys of the scores,
+   attendance records, weights and outcome links.
+
+The functions only execute statements on db.session; the caller owns the
+transaction.
+"""
+
+import logging
+from datetime import datetime
+
+from sqlalchemy import text
+from app import db
+from models import (Course, CourseOutcome, Exam, ExamWeight, Question, Score, Student, StudentExamAttendance,
+                    course_outcome_program_outcome, question_course_outcome)
+
+OUTCOME_INSERT_SQL = text("""
+    INSERT INTO course_outcome (course_id, code, description, created_at, updated_at)
+    VALUES (:course_id, :code, :description, :timestamp, :timestamp)
+""")
+
+OUTCOME_PO_INSERT_SQL = text("""
+    INSERT OR IGNORE INTO course_outcome_program_outcome (course_outcome_id, program_outcome_id, relative_weight)
+    VALUES (:course_outcome_id, :program_outcome_id, 1.0)
+""")
+
+EXAM_INSERT_SQL = text("""
+    INSERT INTO exam (course_id, name, exam_date, max_score, is_makeup, is_final, is_mandatory, created_at, updated_at)
+    VALUES (:course_id, :name, :exam_date, :max_score, :is_makeup, :is_final, :is_mandatory, :timestamp, :timestamp)
+""")
+
+QUESTION_INSERT_SQL = text("""
+    INSERT INTO question (exam_id, number, text, max_score, created_at, updated_at)
+    VALUES (:exam_id, :number, :text, :max_score, :timestamp, :timestamp)
+""")
+
+QUESTION_OUTCOME_INSERT_SQL = text("""
+    INSERT OR IGNORE INTO question_course_outcome (question_id, course_outcome_id, relative_weight)
+    VALUES (:question_id, :course_outcome_id, 1.0)
+""")
+
+WEIGHT_INSERT_SQL = text("""
+    INSERT INTO exam_weight (exam_id, course_id, weight, created_at, updated_at)
+    VALUES (:exam_id, :course_id, :weight, :timestamp, :timestamp)
+""")
+
+STUDENT_INSERT_SQL = text("""
+    INSERT INTO student (course_id, student_id, first_name, last_name, excluded, created_at, updated_at)
+    VALUES (:course_id, :student_id, :first_name, :last_name, :excluded, :timestamp, :timestamp)
+""")
+
+# Existing scores are never overwritten by a merge
+SCORE_INSERT_SQL = text("""
+    INSERT INTO score (score, student_id, question_id, exam_id, created_at, updated_at)
+    VALUES (:score, :student_id, :question_id, :exam_id, :timestamp, :timestamp)
+    ON CONFLICT (student_id, question_id, exam_id) DO NOTHING
+""")
+
+ATTENDANCE_INSERT_SQL = text("""
+    INSERT INTO student_exam_attendance (student_id, exam_id, attended, created_at, updated_at)
+    VALUES (:student_id, :exam_id, :attended, :timestamp, :timestamp)
+""")
+
+MAKEUP_UPDATE_SQL = text("UPDATE exam SET makeup_for = :makeup_for WHERE id = :exam_id")
+
+
+def _number(value):
+    """Convert Decimal to float for SQLite compatibility (None stays None)"""
+    return None if value is None else float(value)
+
+
+def new_merge_stats():
+    """Counters and conflict list reported by a merge"""
+    return {
+        'students_merged': 0,
+        'exams_merged': 0,
+        'outcomes_merged': 0,
+        'scores_merged': 0,
+        'weights_merged': 0,
+        'attendances_merged': 0,
+        'conflicts': []  # To track any conflicts/warnings
+    }
+
+
+def load_merge_snapshot(destination_id, source_ids):
+    """
+    Load everything a merge needs for the destination and source courses.
+
+    Returns:
+        Dict of plain rows grouped by course (or by exam/student/outcome id)
+    """
+    course_ids = [int(destination_id)] + [int(source_id) for source_id in source_ids]
+
+    snapshot = {
+        'courses': {row.id: row for row in db.session.query(Course.id, Course.code).filter(Course.id.in_(course_ids))},
+        'outcomes': {}, 'exams': {}, 'questions': {}, 'question_rows': {}, 'students': {},
+        'outcome_pos': {}, 'question_outcome_codes': {}, 'weights': {},
+        'scores': {}, 'attendance': {}, 'dest_score_keys': set(),
+    }
+    for course_id in course_ids:
+        snapshot['outcomes'][course_id] = []
+        snapshot['exams'][course_id] = []
+        snapshot['students'][course_id] = []
+
+    for row in db.session.query(CourseOutcome.id, CourseOutcome.course_id, CourseOutcome.code, CourseOutcome.description).filter(
+            CourseOutcome.course_id.in_(course_ids)).order_by(CourseOutcome.id):
+        snapshot['outcomes'][row.course_id].append(row)
+
+    for co_id, po_id in db.session.query(course_outcome_program_outcome.c.course_outcome_id,
+                                          course_outcome_program_outcome.c.program_outcome_id).join(
+            CourseOutcome, CourseOutcome.id == course_outcome_program_outcome.c.course_outcome_id).filter(
+            CourseOutcome.course_id.in_(course_ids)):
+        snapshot['outcome_pos'].setdefault(co_id, set()).add(po_id)
+
+    for row in db.session.query(Exam.id, Exam.course_id, Exam.name, Exam.exam_date, Exam.max_score, Exam.is_makeup,
+                                Exam.is_final, Exam.is_mandatory, Exam.makeup_for).filter(
+            Exam.course_id.in_(course_ids)).order_by(Exam.id):
+        snapshot['exams'][row.course_id].append(row)
+        snapshot['questions'][row.id] = []
+
+    for row in db.session.query(Question.id, Question.exam_id, Question.number, Question.text, Question.max_score).join(
+            Exam, Exam.id == Question.exam_id).filter(Exam.course_id.in_(course_ids)).order_by(Question.id):
+        snapshot['questions'][row.exam_id].append(row)
+        snapshot['question_rows'][row.id] = row
+
+    # Outcome codes linked to each question (questions are matched to destination outcomes by code)
+    for question_id, code in db.session.query(question_course_outcome.c.question_id, CourseOutcome.code).join(
+            CourseOutcome, CourseOutcome.id == question_course_outcome.c.course_outcome_id).join(
+            Question, Question.id == question_course_outcome.c.question_id).join(
+            Exam, Exam.id == Question.exam_id).filter(Exam.course_id.in_(course_ids)).order_by(CourseOutcome.id):
+        snapshot['question_outcome_codes'].setdefault(question_id, []).append(code)
+
+    # First weight of every exam (rows are read newest first, so the oldest one is kept)
+    for exam_id, weight in db.session.query(ExamWeight.exam_id, ExamWeight.weight).join(
+            Exam, Exam.id == ExamWeight.exam_id).filter(Exam.course_id.in_(course_ids)).order_by(ExamWeight.id.desc()):
+        snapshot['weights'][exam_id] = weight
+
+    for row in db.session.query(Student.id, Student.course_id, Student.student_id, Student.first_name,
+                                Student.last_name, Student.excluded).filter(
+            Student.course_id.in_(course_ids)).order_by(Student.id):
+        snapshot['students'][row.course_id].append(row)
+
+    # Scores of the source students, through the exam of the question (like the per-student query did)
+    source_ids = course_ids[1:]
+    for row in db.session.query(Score.student_id, Score.question_id, Score.score, Question.exam_id).join(
+            Question, Question.id == Score.question_id).join(Exam, Exam.id == Question.exam_id).join(
+            Student, Student.id == Score.student_id).filter(
+            Exam.course_id.in_(source_ids), Student.course_id.in_(source_ids)).order_by(Score.id):
+        snapshot['scores'].setdefault(row.student_id, []).append(row)
+
+    # Existing destination scores as (student_id, exam name, question number)
+    for student_id, exam_name, number in db.session.query(Student.student_id, Exam.name, Question.number).join(
+            Score, Score.student_id == Student.id).join(Question, Question.id == Score.question_id).join(
+            Exam, Exam.id == Score.exam_id).filter(Student.course_id == course_ids[0]):
+        snapshot['dest_score_keys'].add((student_id, exam_name, number))
+
+    for student_id, exam_id, attended in db.session.query(StudentExamAttendance.student_id, StudentExamAttendance.exam_id,
+                                                          StudentExamAttendance.attended).join(
+            Student, Student.id == StudentExamAttendance.student_id).filter(
+            Student.course_id.in_(course_ids)).order_by(StudentExamAttendance.id):
+        snapshot['attendance'].setdefault(student_id, []).append((exam_id, attended))
+
+    return snapshot
+
+
+def plan_course_merge(snapshot, destination_id, source_ids, merge_students, merge_exams, merge_outcomes):
+    """
+    Work out what a merge would write, without writing anything.
+
+    Returns:
+        Plan dict with the `stats` of the merge and the rows to insert, keyed on
+        natural keys of the destination course
+    """
+    destination_id = int(destination_id)
+    stats = new_merge_stats()
+    plan = {
+        'destination_id': destination_id,
+        'source_ids': [int(source_id) for source_id in source_ids],
+        'stats': stats,
+        'outcomes': [], 'outcome_pos': [], 'exams': [], 'questions': [], 'question_outcomes': [],
+        'weights': [], 'students': [], 'scores': [], 'attendance': [], 'makeup_links': [],
+    }
+
+    # Destination state, updated as the plan adds items (same lookups as the row-by-row merge)
+    dest_outcomes = {row.code: {'code': row.code, 'description': row.description,
+                                'po_ids': set(snapshot['outcome_pos'].get(row.id, ()))}
+                     for row in snapshot['outcomes'][destination_id]}
+    dest_exams = {}
+    dest_questions = {}   # {(exam name, number): max_score}
+    for exam in snapshot['exams'][destination_id]:
+        dest_exams[exam.name] = exam
+        for question in snapshot['questions'][exam.id]:
+            dest_questions[(exam.name, question.number)] = question.max_score
+    dest_students = {row.student_id: row for row in snapshot['students'][destination_id]}
+    dest_attendance = {}  # {student_id: set of exam names}
+    dest_exam_names = {exam.id: exam.name for exam in snapshot['exams'][destination_id]}
+    for row in snapshot['students'][destination_id]:
+        dest_attendance[row.student_id] = {dest_exam_names.get(exam_id) for exam_id, _ in snapshot['attendance'].get(row.id, ())}
+    dest_score_keys = set(snapshot['dest_score_keys'])
+
+    exam_name_mapping = {}  # source exam id -> destination exam name (for makeup relationships and attendance)
+    source_exams = {}
+
+    for source_id in plan['source_ids']:
+        if source_id not in snapshot['courses']:
+            stats['conflicts'].append(f"Source course ID {source_id} not found, skipping")
+            continue
+
+        # Merge outcomes first (needed for exam/question associations)
+        if merge_outcomes:
+            for outcome in snapshot['outcomes'][source_id]:
+                source_po_ids = snapshot['outcome_pos'].get(outcome.id, set())
+                if outcome.code in dest_outcomes:
+                    existing = dest_outcomes[outcome.code]
+                    if existing['description'] != outcome.description:
+                        stats['conflicts'].append(
+                            f"Outcome {outcome.code} has different descriptions in source and destination: "
+                            f"'{(outcome.description or '')[:50]}...' vs '{(existing['description'] or '')[:50]}...'"
+                        )
+                    missing_pos = source_po_ids - existing['po_ids']
+                    if missing_pos:
+                        plan['outcome_pos'].extend((outcome.code, po_id) for po_id in sorted(missing_pos))
+                        existing['po_ids'].update(missing_pos)
+                        stats['conflicts'].append(
+                            f"Added {len(missing_pos)} missing program outcome links to existing outcome {outcome.code}"
+                        )
+                    continue
+
+                plan['outcomes'].append({'code': outcome.code, 'description': outcome.description})
+                plan['outcome_pos'].extend((outcome.code, po_id) for po_id in sorted(source_po_ids))
+                dest_outcomes[outcome.code] = {'code': outcome.code, 'description': outcome.description,
+                                               'po_ids': set(source_po_ids)}
+                stats['outcomes_merged'] += 1
+
+        # Merge exams next (needed for student score associations)
+        if merge_exams:
+            for exam in snapshot['exams'][source_id]:
+                source_exams[exam.id] = exam
+                if exam.name in dest_exams:
+                    exam_name_mapping[exam.id] = exam.name
+                    stats['conflicts'].append(f"Exam '{exam.name}' already exists in destination course, skipping")
+                    continue
+
+                plan['exams'].append({
+                    'name': exam.name, 'exam_date': exam.exam_date, 'max_score': exam.max_score,
+                    'is_makeup': exam.is_makeup, 'is_final': exam.is_final, 'is_mandatory': exam.is_mandatory
+                })
+                exam_name_mapping[exam.id] = exam.name
+                for question in snapshot['questions'][exam.id]:
+                    plan['questions'].append({'exam': exam.name, 'number': question.number,
+                                              'text': question.text, 'max_score': question.max_score})
+                    dest_questions[(exam.name, question.number)] = question.max_score
+                    for code in snapshot['question_outcome_codes'].get(question.id, ()):
+                        if code in dest_outcomes:
+                            plan['question_outcomes'].append((exam.name, question.number, code))
+                if exam.id in snapshot['weights']:
+                    plan['weights'].append({'exam': exam.name, 'weight': snapshot['weights'][exam.id]})
+                    stats['weights_merged'] += 1
+                dest_exams[exam.name] = exam
+                stats['exams_merged'] += 1
+
+        # Finally merge students (and their scores if applicable)
+        if merge_students:
+            for student in snapshot['students'][source_id]:
+                if student.student_id in dest_students:
+                    dest_student = dest_students[student.student_id]
+                    if (dest_student.first_name != student.first_name or
+                            dest_student.last_name != student.last_name):
+                        stats['conflicts'].append(
+                            f"Student ID {student.student_id} has different names in source and destination: "
+                            f"{student.first_name} {student.last_name} vs {dest_student.first_name} {dest_student.last_name}"
+                        )
+                else:
+                    plan['students'].append({'student_id': student.student_id, 'first_name': student.first_name,
+                                             'last_name': student.last_name, 'excluded': student.excluded})
+                    dest_students[student.student_id] = student
+                    dest_attendance[student.student_id] = set()
+                    stats['students_merged'] += 1
+
+                if not merge_exams:
+                    continue
+
+                # Scores: matched on exam name and question number, existing scores are kept
+                for score in snapshot['scores'].get(student.id, ()):
+                    source_exam = source_exams.get(score.exam_id)
+                    if source_exam is None or source_exam.course_id != source_id or source_exam.name not in dest_exams:
+                        continue
+                    source_question = snapshot['question_rows'][score.question_id]
+                    key = (source_exam.name, source_question.number)
+                    if key not in dest_questions:
+                        continue
+                    if float(dest_questions[key]) != float(source_question.max_score):
+                        stats['conflicts'].append(
+                            f"Question {source_question.number} in exam {source_exam.name} has different max_score: "
+                            f"{dest_questions[key]} vs {source_question.max_score}"
+                        )
+                    score_key = (student.student_id, source_exam.name, source_question.number)
+                    if score_key in dest_score_keys:
+                        continue
+                    plan['scores'].append({'student_id': student.student_id, 'exam': source_exam.name,
+                                           'number': source_question.number, 'score': score.score})
+                    dest_score_keys.add(score_key)
+                    stats['scores_merged'] += 1
+
+                # Attendance of exams that were merged (or matched)
+                for exam_id, attended in snapshot['attendance'].get(student.id, ()):
+                    exam_name = exam_name_mapping.get(exam_id)
+                    if exam_name is None or exam_name in dest_attendance[student.student_id]:
+                        continue
+                    plan['attendance'].append({'student_id': student.student_id, 'exam': exam_name, 'attended': attended})
+                    dest_attendance[student.student_id].add(exam_name)
+                    stats['attendances_merged'] += 1
+
+    # Makeup exam relationships, now that all exams are mapped
+    if merge_exams:
+        for exam_id in sorted(exam_name_mapping):
+            exam = source_exams[exam_id]
+            if exam.makeup_for is None:
+                continue
+            if exam.makeup_for in exam_name_mapping:
+                plan['makeup_links'].append((exam_name_mapping[exam_id], exam_name_mapping[exam.makeup_for]))
+            else:
+                stats['conflicts'].append(f"Makeup relationship broken: original exam {exam.makeup_for} was not merged")
+
+    return plan
+
+
+def apply_merge_plan(plan):
+    """Write a merge plan with one executemany statement per table"""
+    destination_id = plan['destination_id']
+    timestamp = datetime.now()
+
+    def execute(statement, rows):
+        if rows:
+            db.session.execute(statement, [dict(row, timestamp=timestamp) for row in rows])
+
+    execute(OUTCOME_INSERT_SQL, [dict(outcome, course_id=destination_id) for outcome in plan['outcomes']])
+    outcome_ids = {code: outcome_id for outcome_id, code in db.session.query(CourseOutcome.id, CourseOutcome.code).filter(
+        CourseOutcome.course_id == destination_id).order_by(CourseOutcome.id)}
+    if plan['outcome_pos']:
+        db.session.execute(OUTCOME_PO_INSERT_SQL, [
+            {'course_outcome_id': outcome_ids[code], 'program_outcome_id': po_id} for code, po_id in plan['outcome_pos']
+        ])
+
+    execute(EXAM_INSERT_SQL, [dict(exam, course_id=destination_id, max_score=_number(exam['max_score']))
+                              for exam in plan['exams']])
+    exam_ids = {name: exam_id for exam_id, name in db.session.query(Exam.id, Exam.name).filter(
+        Exam.course_id == destination_id).order_by(Exam.id)}
+    execute(QUESTION_INSERT_SQL, [
+        {'exam_id': exam_ids[question['exam']], 'number': question['number'], 'text': question['text'],
+         'max_score': _number(question['max_score'])}
+        for question in plan['questions']
+    ])
+    question_ids = {(exam_id, number): question_id for question_id, exam_id, number in db.session.query(
+        Question.id, Question.exam_id, Question.number).join(Exam, Exam.id == Question.exam_id).filter(
+        Exam.course_id == destination_id).order_by(Question.id)}
+    if plan['question_outcomes']:
+        db.session.execute(QUESTION_OUTCOME_INSERT_SQL, [
+            {'question_id': question_ids[(exam_ids[exam], number)], 'course_outcome_id': outcome_ids[code]}
+            for exam, number, code in plan['question_outcomes']
+        ])
+    execute(WEIGHT_INSERT_SQL, [
+        {'exam_id': exam_ids[weight['exam']], 'course_id': destination_id, 'weight': _number(weight['weight'])}
+        for weight in plan['weights']
+    ])
+
+    execute(STUDENT_INSERT_SQL, [dict(student, course_id=destination_id) for student in plan['students']])
+    student_ids = {student_id: row_id for row_id, student_id in db.session.query(Student.id, Student.student_id).filter(
+        Student.course_id == destination_id)}
+
+    execute(SCORE_INSERT_SQL, [
+        {'score': _number(score['score']), 'student_id': student_ids[score['student_id']],
+         'question_id': question_ids[(exam_ids[score['exam']], score['number'])], 'exam_id': exam_ids[score['exam']]}
+        for score in plan['scores']
+    ])
+    execute(ATTENDANCE_INSERT_SQL, [
+        {'student_id': student_ids[row['student_id']], 'exam_id': exam_ids[row['exam']], 'attended': row['attended']}
+        for row in plan['attendance']
+    ])
+    if plan['makeup_links']:
+        db.session.execute(MAKEUP_UPDATE_SQL, [
+            {'exam_id': exam_ids[exam], 'makeup_for': exam_ids[makeup_for]} for exam, makeup_for in plan['makeup_links']
+        ])
+
+    stats = plan['stats']
+    counts = {key: value for key, value in stats.items() if key != 'conflicts'}
+    logging.info(f"Merged into course {destination_id}: {counts}")
+    return stats
+
+
+def merge_courses_bulk(destination_id, source_ids, merge_students, merge_exams, merge_outcomes, dry_run=False):
+    """
+    Merge source courses into a destination course.
+
+    Args:
+        dry_run: Only plan the merge and return its stats, without writing
+
+    Returns:
+        The merge plan; plan['stats'] has the counters and conflicts
+    """
+    snapshot = load_merge_snapshot(destination_id, source_ids)
+    plan = plan_course_merge(snapshot, destination_id, source_ids, merge_students, merge_exams, merge_outcomes)
+    if not dry_run:
+        apply_merge_plan(plan)
+    return plan
@@ -7,9 +7,9 @@ import io
 import csv
 from routes.utility_routes import export_to_excel_csv
 import re
-import pandas as pd
 from io import BytesIO
 import json
+from routes.result_cache import invalidate_course_results
 from sqlalchemy import inspect, text
 
 outcome_bp = Blueprint('outcome', __name__, url_prefix='/outcome')
@@ -113,6 +113,7 @@ def _handle_batch_course_outcome_import(course_id, batch_data_content, course):
             log = Log(action=log_action, description=f"Batch processed CO: {co_code} for course: {course.code}")
             db.session.add(log)
 
+            invalidate_course_results(course_id)
             db.session.commit() # Commit after each CO to save partial progress
 
         except Exception as e:
@@ -235,6 +236,7 @@ def add_course_outcome(course_id):
                      description=f"Added course outcome {code} to course: {course.code}")
             db.session.add(log)
             
+            invalidate_course_results(course.id)
             db.session.commit()
             flash(f'Course outcome {code} added successfully', 'success')
             return redirect(url_for('course.course_detail', course_id=course_id))
@@ -438,6 +440,7 @@ def edit_course_outcome(outcome_id):
                      description=f"Edited course outcome {code} in course: {course.code}")
             db.session.add(log)
             
+            invalidate_course_results(course.id)
             db.session.commit()
             flash(f'Course outcome {code} updated successfully', 'success')
             return redirect(url_for('outcome.edit_course_outcome', outcome_id=outcome_id))
@@ -482,6 +485,7 @@ def delete_course_outcome(outcome_id):
         db.session.add(log)
         
         db.session.delete(course_outcome)
+        invalidate_course_results(course_id)
         db.session.commit()
         flash(f'Course outcome {course_outcome.code} deleted successfully', 'success')
     except Exception as e:
@@ -531,6 +535,8 @@ def mass_delete_outcomes():
                 flash(f'Error deleting outcome {outcome.code}: {str(e)}', 'error')
     
     try:
+        if deleted_count > 0:
+            invalidate_course_results(course_id)
         db.session.commit()
         if deleted_count > 0:
             flash(f'Successfully deleted {deleted_count} course outcomes', 'success')
@@ -599,6 +605,7 @@ def mass_edit_outcomes(course_id):
                 db.session.add(log)
                 
                 # Commit changes
+                invalidate_course_results(course_id)
                 db.session.commit()
                 flash(f'Successfully updated {len(updated_outcomes)} course outcomes', 'success')
                 return redirect(url_for('outcome.mass_edit_outcomes', course_id=course_id))
@@ -1112,6 +1119,7 @@ def import_outcomes_from_course(course_id):
                      description=f"Imported {outcomes_imported} course outcomes from {source_course.code} to {target_course.code}")
             db.session.add(log)
             
+            invalidate_course_results(target_course.id)
             db.session.commit()
             
             if outcomes_imported > 0:
@@ -1216,6 +1224,7 @@ def update_outcome_weights():
             log = Log(action="UPDATE_CO_PO_WEIGHT", description=log_message)
             db.session.add(log)
             
+            invalidate_course_results(co.course_id if co else None)
             db.session.commit()
             return jsonify({'success': True, 'message': 'Weight updated successfully', 'new_weight': weight_value})
         else:
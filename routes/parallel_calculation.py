@@ -0,0 +1,168 @@
+"""
+Multi-Process Course Calculation
+
+/calculation/all_courses and its export compute every course one after the
+other. Courses are independent of each other, so this module can spread them
+over a pool of worker processes (CALCULATION_WORKERS > 1).
+
+ORM objects cannot be sent to another process, so each course's entry from
+bulk_load_course_data is converted into a compact payload first:
+1. Exams, questions, students, outcomes and settings become SimpleNamespace
+   stand-ins carrying only the attributes the calculation functions read
+2. Score, attendance and weight dictionaries are plain dicts of ids,
+   Decimals and booleans and are shipped unchanged
+3. The course itself is not shipped; workers return results with
+   'course': None and the parent re-attaches the Course object
+
+Workers run the same calculation functions as the serial path, so results are
+identical. The per-course PO scores are merged into the all-courses aggregates
+by the caller in the parent process, exactly as before.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+# Attributes copied to the stand-in objects (everything the calculation engines read)
+EXAM_ATTRIBUTES = ('id', 'course_id', 'is_mandatory', 'is_makeup', 'makeup_for')
+QUESTION_ATTRIBUTES = ('id', 'exam_id', 'max_score')
+STUDENT_ATTRIBUTES = ('id', 'student_id', 'excluded')
+OUTCOME_ATTRIBUTES = ('id', 'code')
+SETTINGS_ATTRIBUTES = ('excluded', 'relative_success_threshold')
+
+# Plain dictionaries/sets of ids and Decimals that are shipped unchanged
+PRIMITIVE_KEYS = (
+    'normalized_weights', 'contributing_po_ids', 'question_co_weights', 'co_po_weights',
+    'exam_context', 'scores_dict', 'attendance_dict'
+)
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def _stand_in(obj, attributes, cache):
+    """Return a picklable copy of an ORM object with only the given attributes (one copy per object)"""
+    key = (type(obj).__name__, obj.id) if hasattr(obj, 'id') else id(obj)
+    stand_in = cache.get(key)
+    if stand_in is None:
+        stand_in = SimpleNamespace(**{name: getattr(obj, name, None) for name in attributes})
+        cache[key] = stand_in
+    return stand_in
+
+
+def build_course_payload(course_data):
+    """
+    Convert one course's bulk data into a picklable payload without ORM objects.
+
+    The payload has the same keys as the bulk data entry, so it can be passed to
+    any calculation function that accepts bulk_data.
+    """
+    cache = {}
+
+    def exam(obj):
+        return _stand_in(obj, EXAM_ATTRIBUTES, cache)
+
+    def question(obj):
+        return _stand_in(obj, QUESTION_ATTRIBUTES, cache)
+
+    def outcome(obj):
+        return _stand_in(obj, OUTCOME_ATTRIBUTES, cache)
+
+    regular_exams = [exam(e) for e in course_data['regular_exams']]
+    makeup_exams = [exam(e) for e in course_data['makeup_exams']]
+
+    payload = {
+        'course': None,
+        'settings': SimpleNamespace(**{name: getattr(course_data['settings'], name, None)
+                                       for name in SETTINGS_ATTRIBUTES}),
+        'regular_exams': regular_exams,
+        'makeup_exams': makeup_exams,
+        'all_exams': regular_exams + makeup_exams,
+        'course_outcomes': [outcome(co) for co in course_data['course_outcomes']],
+        'program_outcomes': [outcome(po) for po in course_data['program_outcomes']],
+        'students': [_stand_in(s, STUDENT_ATTRIBUTES, cache) for s in course_data['students']],
+        'questions_by_exam': {exam_id: [question(q) for q in questions]
+                              for exam_id, questions in course_data['questions_by_exam'].items()},
+        'outcome_questions': {co_id: [question(q) for q in questions]
+                              for co_id, questions in course_data['outcome_questions'].items()},
+        'program_to_course_outcomes': {po_id: [outcome(co) for co in outcomes]
+                                       for po_id, outcomes in course_data['program_to_course_outcomes'].items()},
+        'makeup_map': {exam_id: exam(makeup) for exam_id, makeup in course_data['makeup_map'].items()},
+    }
+    for key in PRIMITIVE_KEYS:
+        payload[key] = course_data.get(key)
+    return payload
+
+
+def _calculate_course_payload(task):
+    """Worker entry point: calculate one course payload, returns (course_id, result)"""
+    course_id, payload, calculation_method, engine, graduating_student_ids = task
+
+    # Imported here so the worker only loads the calculation code when it gets work
+    from routes.calculation_routes import calculate_course_result
+
+    result = calculate_course_result(course_id, {course_id: payload}, calculation_method,
+                                     engine=engine, graduating_student_ids=graduating_student_ids)
+    result['course'] = None
+    return course_id, result
+
+
+def _get_executor(workers):
+    """Return the shared process pool, (re)creating it when the worker count changes"""
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        # 'spawn' gives clean workers on every platform (no forked SQLAlchemy connections)
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        _executor_workers = workers
+    return _executor
+
+
+def shutdown_calculation_pool():
+    """Stop the worker processes (called at exit and after a worker failure)"""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _executor_workers = 0
+
+
+atexit.register(shutdown_calculation_pool)
+
+
+def calculate_courses_in_processes(course_ids, bulk_data, calculation_method, engine,
+                                   graduating_student_ids=None, workers=2):
+    """
+    Calculate several courses in worker processes.
+
+    Parameters:
+    - course_ids: Courses to calculate (must be present in bulk_data)
+    - bulk_data: Output of bulk_load_course_data
+    - calculation_method: 'absolute' or 'relative'
+    - engine: Calculation engine name resolved in the parent ('decimal', 'numpy' or 'parity')
+    - graduating_student_ids: Graduating student numbers when the graduating filter is active, else None
+    - workers: Number of worker processes
+
+    Returns:
+    - {course_id: result} with 'course' set to None, or None if the pool failed
+      (the caller then falls back to the serial path)
+    """
+    tasks = [(course_id, build_course_payload(bulk_data[course_id]), calculation_method, engine,
+              graduating_student_ids)
+             for course_id in course_ids]
+    chunksize = max(1, len(tasks) // (workers * 4))
+
+    try:
+        with _executor_lock:
+            executor = _get_executor(workers)
+            return dict(executor.map(_calculate_course_payload, tasks, chunksize=chunksize))
+    except Exception as e:
+        logging.error(f"Multi-process course calculation failed, falling back to serial: {str(e)}")
+        shutdown_calculation_pool()
+        return None
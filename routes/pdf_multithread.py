@@ -1,19 +1,19 @@
 """
-Simplified Multi-threaded PDF generation module for Accredit Helper Pro
-This version fixes the timeout issues and Flask context problems
+Pooled PDF generation module for Accredit Helper Pro
+Student reports are rendered on a shared Playwright browser pool (N browsers x M pages)
+driven from a single asyncio event loop instead of one browser per student.
+The report pages are rendered in-process from results calculated once for the whole
+batch (build_student_report_contexts) and loaded with page.set_content, so Chromium
+no longer requests /calculation/all_courses over HTTP for every student.
 """
 
 import asyncio
-import concurrent.futures
-import json
 import logging
 import math
 import os
 import tempfile
-import threading
 import zipfile
 from datetime import datetime
-from io import BytesIO
 
 from flask import request
 from playwright.async_api import async_playwright
@@ -32,105 +32,240 @@ def split_students_into_chunks(student_ids, thread_count):
     return chunks
 
 
+# Pages are closed and reopened after this many reports to keep Chromium's memory flat
+PAGE_RECYCLE_AFTER = 25
+
+# Rounds of retries for the students of a chunk whose report failed (e.g. a browser that keeps crashing)
+MAX_RETRY_ROUNDS = 5
+RETRY_DELAY_SECONDS = 5
+
+# Maximum number of student reports in one combined PDF (COMBINED_PDF_PART_SIZE setting)
+COMBINED_PDF_PART_SIZE = 500
+
+
+class BrowserPool:
+    """
+    Shared Playwright browser pool: browser_count Chromium instances with
+    pages_per_browser pages each, used from a single asyncio event loop.
+    
+    Starting Chromium takes far longer than rendering one report, so the
+    browsers are launched once per run and every page is reused for many
+    students. acquire() waits until a page is free, which bounds the number of
+    reports rendered at the same time to browser_count * pages_per_browser.
+    """
+    
+    def __init__(self, browser_count=2, pages_per_browser=2, recycle_after=PAGE_RECYCLE_AFTER):
+        self.browser_count = max(1, int(browser_count))
+        self.pages_per_browser = max(1, int(pages_per_browser))
+        self.recycle_after = recycle_after
+        self._playwright = None
+        self._browsers = []
+        self._browser_locks = []
+        self._pages = None
+        self.pages_rendered = 0
+        self._started_at = None
+    
+    @property
+    def size(self):
+        """Number of pages that render concurrently"""
+        return self.browser_count * self.pages_per_browser
+    
+    async def start(self):
+        self._playwright = await async_playwright().start()
+        self._pages = asyncio.Queue()
+        try:
+            for index in range(self.browser_count):
+                browser = await self._playwright.chromium.launch(headless=True)
+                self._browsers.append(browser)
+                self._browser_locks.append(asyncio.Lock())
+                for _ in range(self.pages_per_browser):
+                    page = await browser.new_page()
+                    # Each queue entry is [browser index, page, reports rendered on the page]
+                    self._pages.put_nowait([index, page, 0])
+        except Exception:
+            await self.close()
+            raise
+        self._started_at = datetime.now()
+        logging.info(f"Browser pool started with {self.browser_count} browsers x {self.pages_per_browser} pages")
+        return self
+    
+    async def close(self):
+        for browser in self._browsers:
+            try:
+                await browser.close()
+            except Exception as e:
+                logging.error(f"Error closing pooled browser: {e}")
+        self._browsers = []
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+    
+    async def __aenter__(self):
+        return await self.start()
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def _open_page(self, index):
+        """
+        New page on the browser of a slot. A browser that crashed or disconnected
+        cannot open pages any more, so it is relaunched (once for all its slots).
+        """
+        async with self._browser_locks[index]:
+            browser = self._browsers[index]
+            try:
+                if browser.is_connected():
+                    return await browser.new_page()
+                logging.error(f"Pooled browser {index} is disconnected, relaunching it")
+            except Exception as e:
+                logging.error(f"Pooled browser {index} cannot open a page, relaunching it: {e}")
+            try:
+                await browser.close()
+            except Exception:
+                pass
+            browser = await self._playwright.chromium.launch(headless=True)
+            self._browsers[index] = browser
+            return await browser.new_page()
+    
+    async def render(self, render_func, *args):
+        """Run render_func(page, *args) on a free page, recycling the page when needed"""
+        index, page, uses = await self._pages.get()
+        failed = False
+        try:
+            # A slot whose page could not be replaced last time gets one now (or fails this render)
+            if page is None:
+                page = await self._open_page(index)
+                uses = 0
+            result = await render_func(page, *args)
+            self.pages_rendered += 1
+            return result
+        except Exception:
+            failed = True
+            raise
+        finally:
+            uses += 1
+            # A page that failed may be left in a broken state; old pages are replaced to free memory
+            if page is not None and (failed or uses >= self.recycle_after):
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+                try:
+                    page = await self._open_page(index)
+                except Exception as e:
+                    # The slot goes back without a page so the pool never shrinks (or hangs in get())
+                    logging.error(f"Could not replace pooled page of browser {index}: {e}")
+                    page = None
+                uses = 0
+            self._pages.put_nowait([index, page, uses])
+    
+    def pages_per_second(self):
+        """Reports rendered per second since the pool started"""
+        if not self._started_at:
+            return 0.0
+        elapsed = (datetime.now() - self._started_at).total_seconds()
+        return self.pages_rendered / elapsed if elapsed > 0 else 0.0
+
+
 def generate_student_pdfs_multithreaded(student_ids, filter_year, search_query, filter_student_id, 
                                       include_graduating_only, display_method, orientation='landscape', 
-                                      page_size='A4', thread_count=4):
-    """Generate PDF reports using multi-threading"""
+                                      page_size='A4', thread_count=4, base_url=None, job=None,
+                                      pages_per_browser=2, combined_part_size=COMBINED_PDF_PART_SIZE):
+    """
+    Generate PDF reports for many students with a shared browser pool.
+    
+    thread_count browsers with pages_per_browser pages each are started once and
+    driven from one asyncio event loop (see BrowserPool); the students are split
+    into one chunk per page with split_students_into_chunks.
+    
+    The results of all students are calculated up front with one bulk load
+    (build_student_report_contexts); each report is then rendered to HTML in
+    this thread and printed from memory. `base_url`, captured from the request
+    by the route, is only used to load the page's static files.
+    
+    Runs inside a background job (routes.job_queue): progress and pages/second
+    throughput are reported through `job` and the generation stops early when
+    the job is cancelled.
+    
+    Every report is written to disk as soon as it is printed and the combined
+    PDF and the ZIP file are assembled from those files, so memory use does not
+    grow with the number of students (see combine_pdfs_to_files).
+    """
     try:
-        logging.info(f"Starting multi-threaded PDF generation for {len(student_ids)} students using {thread_count} threads")
-        print(f"DEBUG: Starting multi-threaded PDF generation for {len(student_ids)} students using {thread_count} threads")
+        browser_count = max(1, min(int(thread_count), len(student_ids)))
+        pages_per_browser = max(1, int(pages_per_browser))
+        logging.info(f"Starting pooled PDF generation for {len(student_ids)} students using {browser_count} browsers x {pages_per_browser} pages")
+        print(f"DEBUG: Starting pooled PDF generation for {len(student_ids)} students using {browser_count} browsers x {pages_per_browser} pages")
         
-        # Get Flask context information that threads will need
-        base_url = request.url_root.rstrip('/')
+        # Outside a request (background job) the base URL must be passed in
+        if base_url is None:
+            base_url = request.url_root
+        base_url = base_url.rstrip('/')
         
-        # Pre-fetch all student names while we have Flask context
-        from routes.calculation_routes import get_student_name
-        student_names = {}
-        for student_id in student_ids:
-            try:
-                student_names[student_id] = get_student_name(student_id)
-            except Exception as e:
-                print(f"DEBUG: Error getting name for student {student_id}: {e}")
-                student_names[student_id] = f"Student_{student_id}"
+        # Calculate every student's results in one pass (one bulk load for the whole batch)
+        from routes.calculation_routes import build_student_report_contexts, render_student_report_html
+        if job is not None:
+            job.update(current=0, total=len(student_ids), message=f'Calculating results for {len(student_ids)} students...')
+        calculation_start = datetime.now()
+        report_contexts = build_student_report_contexts(
+            student_ids, filter_year, search_query, include_graduating_only, display_method
+        )
+        logging.info(f"Calculated report data for {len(report_contexts)} students in {(datetime.now() - calculation_start).total_seconds():.2f}s")
         
-        print(f"DEBUG: Pre-fetched {len(student_names)} student names")
+        # Student names for the file names come from the same data
+        student_names = {
+            student_id: context['student_info'].get('name') or f"Student {student_id}"
+            for student_id, context in report_contexts.items()
+        }
         
-        # Get existing progress file from session
-        from flask import session
-        progress_file = session.get('pdf_progress_file')
-        if not progress_file:
-            progress_id = f"pdf_generation_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            progress_file = os.path.join(tempfile.gettempdir(), f"pdf_progress_{progress_id}.txt")
-            session['pdf_progress_file'] = progress_file
+        def report_html(student_id):
+            """HTML of one student's report, rendered when a page is free to print it"""
+            return render_student_report_html(report_contexts[student_id], base_url, display_method)
         
-        # Create timestamped directory for this run
+        # Create a timestamped directory of its own for this run (jobs started in the same minute must not share it)
         timestamp = datetime.now().strftime('%d_%B_%Y_%H_%M_%p')
-        student_pdfs_dir = os.path.join(os.getcwd(), 'student_pdfs', timestamp)
-        os.makedirs(student_pdfs_dir, exist_ok=True)
+        student_pdfs_root = os.path.join(os.getcwd(), 'student_pdfs')
+        os.makedirs(student_pdfs_root, exist_ok=True)
+        student_pdfs_dir = tempfile.mkdtemp(prefix=f'{timestamp}_', dir=student_pdfs_root)
         
         # Initialize progress tracking
-        progress_data = {
-            'current': 0,
-            'total': len(student_ids),
-            'status': 'processing',
-            'message': f'Starting multi-threaded PDF generation with {thread_count} threads...',
-            'completed': False,
-            'error': None,
-            'timestamp': datetime.now().isoformat(),
-            'threads': {}
-        }
-        
-        with open(progress_file, 'w', encoding='utf-8') as f:
-            f.write(json.dumps(progress_data))
+        if job is not None:
+            job.update(current=0, total=len(student_ids),
+                       message=f'Starting {browser_count} browsers with {pages_per_browser} pages each...')
         
-        # Split students into chunks
-        student_chunks = split_students_into_chunks(student_ids, thread_count)
+        # One chunk per pooled page
+        student_chunks = split_students_into_chunks(student_ids, browser_count * pages_per_browser)
         
-        # Progress lock for thread-safe updates
-        progress_lock = threading.Lock()
+        # Run the whole generation on one event loop owned by this thread
+        loop = asyncio.new_event_loop()
+        try:
+            chunk_results, pages_per_second = loop.run_until_complete(generate_student_pdfs_pooled(
+                student_chunks, report_html, orientation, page_size, student_pdfs_dir, job, len(student_ids),
+                student_names, browser_count, pages_per_browser
+            ))
+        finally:
+            loop.close()
         
         # Track results
         all_pdf_files = []
         total_successful = 0
         total_retry_rounds = 0
+        for chunk_result in chunk_results:
+            if isinstance(chunk_result, Exception):
+                logging.error(f"Error in PDF generation chunk: {chunk_result}")
+                print(f"DEBUG: Error in PDF generation chunk: {chunk_result}")
+                continue
+            all_pdf_files.extend(chunk_result['pdf_files'])
+            total_successful += chunk_result['successful_count']
+            total_retry_rounds += chunk_result['retry_rounds']
+            print(f"DEBUG: Chunk {chunk_result['chunk_index']} completed: {chunk_result['successful_count']} successful after {chunk_result['retry_rounds']} retry rounds")
         
-        # Use ThreadPoolExecutor for multi-threading
-        with concurrent.futures.ThreadPoolExecutor(max_workers=thread_count) as executor:
-            # Submit all chunks to threads
-            futures = []
-            for i, student_chunk in enumerate(student_chunks):
-                if student_chunk:  # Only submit non-empty chunks
-                    future = executor.submit(
-                        generate_student_pdfs_chunk_simple,
-                        student_chunk,
-                        filter_year,
-                        search_query,
-                        filter_student_id,
-                        include_graduating_only,
-                        display_method,
-                        orientation,
-                        page_size,
-                        student_pdfs_dir,
-                        progress_file,
-                        i,
-                        len(student_ids),
-                        progress_lock,
-                        base_url,
-                        student_names
-                    )
-                    futures.append(future)
-            
-            # Collect results as they complete
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    chunk_result = future.result()
-                    all_pdf_files.extend(chunk_result['pdf_files'])
-                    total_successful += chunk_result['successful_count']
-                    total_retry_rounds += chunk_result['retry_rounds']
-                    print(f"DEBUG: Chunk {chunk_result['chunk_index']} completed: {chunk_result['successful_count']} successful after {chunk_result['retry_rounds']} retry rounds")
-                except Exception as e:
-                    logging.error(f"Error in PDF generation chunk: {e}")
-                    print(f"DEBUG: Error in PDF generation chunk: {e}")
+        if job is not None and job.cancelled:
+            return {
+                'success': False,
+                'cancelled': True,
+                'error': f'PDF generation cancelled after {total_successful}/{len(student_ids)} students'
+            }
         
         if total_successful != len(student_ids):
             return {
@@ -138,95 +273,99 @@ def generate_student_pdfs_multithreaded(student_ids, filter_year, search_query,
                 'error': f'Not all PDFs were generated successfully. Expected {len(student_ids)}, got {total_successful}'
             }
         
-        # Combine all PDFs into a single PDF
-        combined_pdf = None
-        try:
-            combined_pdf = combine_pdfs(all_pdf_files)
-            if combined_pdf:
-                combined_path = os.path.join(student_pdfs_dir, 'combined_all_students.pdf')
-                with open(combined_path, 'wb') as f:
-                    f.write(combined_pdf)
-                logging.info(f"Combined PDF saved: {combined_path}")
-        except Exception as e:
-            logging.error(f"Error combining PDFs: {e}")
+        # Combine the PDFs on disk, at most combined_part_size reports per combined file
+        if job is not None:
+            job.update(message='Combining PDFs and creating the ZIP file...')
+        all_pdf_files.sort()
+        combined_paths = combine_pdfs_to_files(all_pdf_files, student_pdfs_dir, combined_part_size)
         
-        # Create ZIP file
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            # Add all individual PDFs
-            for pdf_path in all_pdf_files:
-                zip_file.write(pdf_path, os.path.basename(pdf_path))
-            
-            # Add combined PDF
-            if combined_pdf:
-                combined_path = os.path.join(student_pdfs_dir, 'combined_all_students.pdf')
-                if os.path.exists(combined_path):
-                    zip_file.write(combined_path, 'combined_all_students.pdf')
-        
-        zip_buffer.seek(0)
+        # Create ZIP file next to the PDFs (served by /jobs/<id>/download)
+        zip_path = write_zip_from_files(os.path.join(student_pdfs_dir, 'student_reports.zip'),
+                                        all_pdf_files + combined_paths)
         
         # Mark progress as completed
-        final_progress = {
-            'current': len(student_ids),
-            'total': len(student_ids),
-            'status': 'completed',
-            'message': f'Multi-threaded PDF generation completed! ALL {total_successful}/{len(student_ids)} students successful using {thread_count} threads (total retry rounds: {total_retry_rounds})',
-            'completed': True,
-            'timestamp': datetime.now().isoformat()
-        }
+        if job is not None:
+            job.update(current=len(student_ids), total=len(student_ids), pages_per_second=round(pages_per_second, 2),
+                       message=f'PDF generation completed! ALL {total_successful}/{len(student_ids)} students successful using {browser_count} browsers x {pages_per_browser} pages at {pages_per_second:.2f} pages/s (total retry rounds: {total_retry_rounds})')
         
-        with open(progress_file, 'w', encoding='utf-8') as f:
-            f.write(json.dumps(final_progress))
-        
-        logging.info(f"Multi-threaded PDF generation completed: ALL {total_successful}/{len(student_ids)} successful using {thread_count} threads after {total_retry_rounds} total retry rounds")
+        logging.info(f"Pooled PDF generation completed: ALL {total_successful}/{len(student_ids)} successful at {pages_per_second:.2f} pages/s after {total_retry_rounds} total retry rounds")
         
         return {
             'success': True,
-            'zip_content': zip_buffer.getvalue(),
-            'combined_pdf': combined_pdf,
+            'zip_path': zip_path,
+            'combined_pdf_paths': combined_paths,
             'output_directory': student_pdfs_dir,
             'successful_count': total_successful,
             'total_count': len(student_ids),
-            'thread_count': thread_count
+            'thread_count': browser_count,
+            'pages_per_second': pages_per_second
         }
         
     except Exception as e:
-        logging.error(f"Error in multi-threaded PDF generation: {e}")
+        logging.error(f"Error in pooled PDF generation: {e}")
         return {
             'success': False,
             'error': str(e)
         }
 
 
-def generate_student_pdfs_chunk_simple(student_chunk, filter_year, search_query, filter_student_id, 
-                                     include_graduating_only, display_method, orientation, page_size, 
-                                     student_pdfs_dir, progress_file, chunk_index, total_students, 
-                                     progress_lock, base_url, student_names):
-    """Generate PDFs for a chunk of students with retry logic until all succeed"""
+async def generate_student_pdfs_pooled(student_chunks, report_html, orientation, page_size,
+                                       student_pdfs_dir, job, total_students, student_names,
+                                       browser_count, pages_per_browser):
+    """Render every chunk on a shared browser pool, returns (chunk results, pages/second)"""
+    async with BrowserPool(browser_count, pages_per_browser) as pool:
+        tasks = [
+            generate_student_pdfs_chunk_pooled(
+                pool, student_chunk, report_html, orientation, page_size, student_pdfs_dir, job, i,
+                total_students, student_names
+            )
+            for i, student_chunk in enumerate(student_chunks) if student_chunk
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return results, pool.pages_per_second()
+
+
+async def generate_student_pdfs_chunk_pooled(pool, student_chunk, report_html, orientation, page_size, 
+                                             student_pdfs_dir, job, chunk_index, total_students, student_names):
+    """
+    Generate PDFs for a chunk of students, retrying failed students for up to
+    MAX_RETRY_ROUNDS rounds (or until the job is cancelled).
+    report_html(student_id) returns the HTML of a student's report (see generate_student_pdfs_multithreaded).
+    """
     pdf_files = []
     successful_count = 0
     
-    print(f"DEBUG: Thread {chunk_index} starting with {len(student_chunk)} students")
+    print(f"DEBUG: Chunk {chunk_index} starting with {len(student_chunk)} students")
     
-    # Keep retrying failed students until all succeed
+    # Retry failed students, for at most MAX_RETRY_ROUNDS rounds
     remaining_students = list(enumerate(student_chunk))
     retry_count = 0
     
-    while remaining_students:
+    while remaining_students and retry_count < MAX_RETRY_ROUNDS:
         failed_students = []
         retry_count += 1
         
         if retry_count > 1:
-            print(f"DEBUG: Thread {chunk_index} - Retry round {retry_count} for {len(remaining_students)} students")
+            print(f"DEBUG: Chunk {chunk_index} - Retry round {retry_count} for {len(remaining_students)} students")
             
         for original_index, student_id in remaining_students:
+            # Stop as soon as the job is cancelled
+            if job is not None and job.cancelled:
+                print(f"DEBUG: Chunk {chunk_index} - Job cancelled, stopping")
+                return {
+                    'pdf_files': pdf_files,
+                    'successful_count': successful_count,
+                    'chunk_index': chunk_index,
+                    'retry_rounds': retry_count
+                }
+            
             try:
-                print(f"DEBUG: Thread {chunk_index} - Processing student {student_id} (attempt {retry_count})")
+                print(f"DEBUG: Chunk {chunk_index} - Processing student {student_id} (attempt {retry_count})")
                 
-                # Generate PDF for this student
-                pdf_content = generate_student_pdf_with_playwright_simple(
-                    student_id, filter_year, search_query, filter_student_id, 
-                    include_graduating_only, display_method, orientation, page_size, base_url
+                # Render the report in-process and print it on the next free pooled page
+                html = report_html(student_id)
+                pdf_content = await pool.render(
+                    render_student_pdf_from_html, student_id, html, orientation, page_size
                 )
                 
                 if pdf_content:
@@ -242,62 +381,51 @@ def generate_student_pdfs_chunk_simple(student_chunk, filter_year, search_query,
                     
                     pdf_files.append(pdf_path)
                     successful_count += 1
-                    print(f"DEBUG: Thread {chunk_index} - Successfully generated PDF for student {student_id}: {filename}")
+                    print(f"DEBUG: Chunk {chunk_index} - Successfully generated PDF for student {student_id}: {filename}")
                     
                     # Update progress immediately on success
-                    with progress_lock:
-                        try:
-                            # Read current progress
-                            if os.path.exists(progress_file):
-                                with open(progress_file, 'r', encoding='utf-8') as f:
-                                    progress_data = json.loads(f.read())
-                            else:
-                                progress_data = {'current': 0, 'total': total_students, 'threads': {}}
-                            
-                            # Update progress
-                            progress_data['current'] = progress_data.get('current', 0) + 1
-                            progress_data['message'] = f'Thread {chunk_index} succeeded for student {student_id} ({progress_data["current"]}/{total_students}) - Retry round {retry_count}'
-                            progress_data['timestamp'] = datetime.now().isoformat()
-                            
-                            # Update thread-specific progress
-                            if 'threads' not in progress_data:
-                                progress_data['threads'] = {}
-                            
-                            progress_data['threads'][str(chunk_index)] = {
-                                'processed': successful_count,
-                                'total': len(student_chunk),
-                                'successful': successful_count,
-                                'current_student': student_id,
-                                'retry_round': retry_count,
-                                'remaining': len(remaining_students) - 1
-                            }
-                            
-                            # Write updated progress
-                            with open(progress_file, 'w', encoding='utf-8') as f:
-                                f.write(json.dumps(progress_data))
-                                
-                            print(f"DEBUG: Thread {chunk_index} - Updated progress to {progress_data['current']}/{total_students}")
-                        except Exception as progress_error:
-                            print(f"DEBUG: Thread {chunk_index} - Progress update error: {progress_error}")
+                    if job is not None:
+                        pages_per_second = pool.pages_per_second()
+                        current = job.advance(message=f'Generated PDF for student {student_id} - {pages_per_second:.2f} pages/s')
+                        job.update(pages_per_second=round(pages_per_second, 2), threads={str(chunk_index): {
+                            'processed': successful_count,
+                            'total': len(student_chunk),
+                            'successful': successful_count,
+                            'current_student': student_id,
+                            'retry_round': retry_count,
+                            'remaining': len(remaining_students) - 1
+                        }})
+                        print(f"DEBUG: Chunk {chunk_index} - Updated progress to {current}/{total_students}")
                             
                 else:
-                    print(f"DEBUG: Thread {chunk_index} - Failed to generate PDF for student {student_id} (attempt {retry_count})")
+                    print(f"DEBUG: Chunk {chunk_index} - Failed to generate PDF for student {student_id} (attempt {retry_count})")
                     failed_students.append((original_index, student_id))
                     
             except Exception as e:
-                print(f"DEBUG: Thread {chunk_index} - Error generating PDF for student {student_id} (attempt {retry_count}): {e}")
+                logging.error(f"Error generating PDF for student {student_id}: {e}")
+                print(f"DEBUG: Chunk {chunk_index} - Error generating PDF for student {student_id} (attempt {retry_count}): {e}")
                 failed_students.append((original_index, student_id))
                 
         # Update remaining students list with failed ones
         remaining_students = failed_students
         
-        if remaining_students:
-            print(f"DEBUG: Thread {chunk_index} - {len(remaining_students)} students failed in round {retry_count}, retrying...")
+        if remaining_students and retry_count < MAX_RETRY_ROUNDS:
+            print(f"DEBUG: Chunk {chunk_index} - {len(remaining_students)} students failed in round {retry_count}, retrying...")
             # Brief delay before retry
-            import time
-            time.sleep(5)  # 5 second delay between retry rounds
+            await asyncio.sleep(RETRY_DELAY_SECONDS)
+    
+    if remaining_students:
+        # The job reports the missing students instead of retrying forever
+        logging.error(f"Chunk {chunk_index}: giving up on {len(remaining_students)} students after {retry_count} retry rounds: "
+                      f"{[student_id for _, student_id in remaining_students]}")
+        return {
+            'pdf_files': pdf_files,
+            'successful_count': successful_count,
+            'chunk_index': chunk_index,
+            'retry_rounds': retry_count
+        }
     
-    print(f"DEBUG: Thread {chunk_index} completed - ALL {successful_count}/{len(student_chunk)} students successful after {retry_count} retry rounds")
+    print(f"DEBUG: Chunk {chunk_index} completed - ALL {successful_count}/{len(student_chunk)} students successful after {retry_count} retry rounds")
     
     return {
         'pdf_files': pdf_files,
@@ -307,310 +435,293 @@ def generate_student_pdfs_chunk_simple(student_chunk, filter_year, search_query,
     }
 
 
-def generate_student_pdf_with_playwright_simple(student_id, filter_year, search_query, filter_student_id, 
-                                               include_graduating_only, display_method, orientation='landscape', 
-                                               page_size='A4', base_url='http://localhost:5000'):
-    """Simplified thread-safe PDF generation using Playwright with 5-minute timeout"""
-    async def generate_student_pdf_async():
-        try:
-            print(f"DEBUG: Thread-safe generating PDF for student ID: {student_id}")
+async def render_student_pdf_from_html(page, student_id, html, orientation='landscape', page_size='A4'):
+    """Print one student's report from HTML rendered in-process (render_student_report_html), returns the PDF bytes"""
+    # The page's static files are loaded through the <base> tag of the HTML
+    await page.set_content(html, wait_until='load', timeout=120000)
+    return await print_student_report(page, student_id, orientation, page_size)
+
+
+async def print_student_report(page, student_id, orientation='landscape', page_size='A4'):
+    """Apply the PDF styling to a loaded all-courses report page and print it, returns the PDF bytes"""
+    # Apply comprehensive PDF styling for proper page fitting
+    await page.evaluate(f"""
+        () => {{
+            // Remove interactive elements
+            const elementsToHide = [
+                '.navbar', '.nav', '.dropdown', '.btn', 'button',
+                '.form-control', '.form-select', 'input', '.alert-dismissible .btn-close',
+                '.modal', '.offcanvas', '.toast', '.sidebar'
+            ];
             
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page()
-                
-                # Build URL with filters
-                url_params = {'student_id': student_id}
-                
-                if filter_year:
-                    url_params['year'] = filter_year
-                if search_query:
-                    url_params['search'] = search_query
-                if include_graduating_only:
-                    url_params['graduating_only'] = 'true'
-                
-                from urllib.parse import urlencode
-                url = f"{base_url}/calculation/all_courses?{urlencode(url_params)}"
-                
-                # Navigate with 5-minute timeout for complex pages
-                await page.goto(url, timeout=300000)  # 5 minutes timeout
-                
-                # Wait for essential content with extended timeout
-                try:
-                    await page.wait_for_selector('table', timeout=240000)  # 4 minutes for table
-                except:
-                    # If table doesn't load, try waiting for any content
-                    await page.wait_for_selector('body', timeout=60000)  # 1 minute fallback
-                
-                # Apply comprehensive PDF styling for proper page fitting
-                await page.evaluate(f"""
-                    () => {{
-                        // Remove interactive elements
-                        const elementsToHide = [
-                            '.navbar', '.nav', '.dropdown', '.btn', 'button',
-                            '.form-control', '.form-select', 'input', '.alert-dismissible .btn-close',
-                            '.modal', '.offcanvas', '.toast', '.sidebar'
-                        ];
-                        
-                        elementsToHide.forEach(selector => {{
-                            const elements = document.querySelectorAll(selector);
-                            elements.forEach(el => el.style.display = 'none');
-                        }});
-                        
-                        // Add comprehensive PDF-optimized styles
-                        const style = document.createElement('style');
-                        style.textContent = `
-                            @media print {{
-                                * {{
-                                    -webkit-print-color-adjust: exact !important;
-                                    color-adjust: exact !important;
-                                }}
-                                
-                                body {{
-                                    margin: 0 !important;
-                                    padding: 5px !important;
-                                    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif !important;
-                                    font-size: 10px !important;
-                                    line-height: 1.2 !important;
-                                    color: #333 !important;
-                                    background: white !important;
-                                }}
-                                
-                                .container, .container-fluid {{
-                                    max-width: 100% !important;
-                                    width: 100% !important;
-                                    padding: 0 !important;
-                                    margin: 0 !important;
-                                }}
-                                
-                                .row {{
-                                    margin: 0 !important;
-                                    padding: 0 !important;
-                                }}
-                                
-                                .col, .col-12, .col-md-12 {{
-                                    padding: 0 !important;
-                                    margin: 0 !important;
-                                }}
-                                
-                                /* Table styling for proper fitting */
-                                .table {{
-                                    width: 100% !important;
-                                    font-size: 7px !important;
-                                    border-collapse: collapse !important;
-                                    margin: 5px 0 !important;
-                                    table-layout: auto !important;
-                                }}
-                                
-                                .table th, .table td {{
-                                    padding: 2px 1px !important;
-                                    font-size: 7px !important;
-                                    line-height: 1.1 !important;
-                                    border: 1px solid #ddd !important;
-                                    text-align: center !important;
-                                    vertical-align: middle !important;
-                                    word-wrap: break-word !important;
-                                    overflow-wrap: break-word !important;
-                                }}
-                                
-                                .table th {{
-                                    background-color: #f8f9fa !important;
-                                    font-weight: bold !important;
-                                    font-size: 6px !important;
-                                }}
-                                
-                                /* Course code column - make it narrower */
-                                .table td:first-child, .table th:first-child {{
-                                    width: 60px !important;
-                                    max-width: 60px !important;
-                                    font-size: 6px !important;
-                                }}
-                                
-                                /* Course name column - adjust width */
-                                .table td:nth-child(2), .table th:nth-child(2) {{
-                                    width: 120px !important;
-                                    max-width: 120px !important;
-                                    text-align: left !important;
-                                    font-size: 6px !important;
-                                }}
-                                
-                                /* Program outcome columns - optimize width */
-                                .table td:nth-child(n+4), .table th:nth-child(n+4) {{
-                                    width: 35px !important;
-                                    max-width: 35px !important;
-                                    font-size: 6px !important;
-                                }}
-                                
-                                /* Student info section */
-                                .alert, .alert-info {{
-                                    padding: 8px !important;
-                                    margin: 5px 0 !important;
-                                    font-size: 10px !important;
-                                    background-color: #d1ecf1 !important;
-                                    border: 1px solid #bee5eb !important;
-                                    border-radius: 4px !important;
-                                }}
-                                
-                                /* Chart section */
-                                .chart-container {{
-                                    width: 100% !important;
-                                    height: auto !important;
-                                    margin: 10px 0 !important;
-                                }}
-                                
-                                /* Achievement levels table */
-                                .achievement-levels {{
-                                    font-size: 8px !important;
-                                    margin: 10px 0 !important;
-                                }}
-                                
-                                /* Color preservation for cells */
-                                .table-success {{ background-color: #d4edda !important; }}
-                                .table-info {{ background-color: #d1ecf1 !important; }}
-                                .table-warning {{ background-color: #fff3cd !important; }}
-                                .table-danger {{ background-color: #f8d7da !important; }}
-                                .table-primary {{ background-color: #d1ecf1 !important; }}
-                                
-                                /* Responsive table wrapper */
-                                .table-responsive {{
-                                    overflow: visible !important;
-                                    width: 100% !important;
-                                }}
-                                
-                                /* Page break handling */
-                                .page-break {{
-                                    page-break-before: always !important;
-                                }}
-                                
-                                /* Hide search and filter elements */
-                                .form-group, .input-group, .search-container {{
-                                    display: none !important;
-                                }}
-                                
-                                /* Adjust margins for better fitting */
-                                h1, h2, h3, h4, h5, h6 {{
-                                    margin: 8px 0 4px 0 !important;
-                                    font-size: 12px !important;
-                                    font-weight: bold !important;
-                                }}
-                                
-                                /* Ensure no content overflows */
-                                * {{
-                                    box-sizing: border-box !important;
-                                }}
-                            }}
-                        `;
-                        document.head.appendChild(style);
-                        
-                        // Force table to fit page width
-                        const tables = document.querySelectorAll('.table');
-                        tables.forEach(table => {{
-                            // Calculate and adjust column widths
-                            const cells = table.querySelectorAll('th, td');
-                            const totalCols = table.rows[0] ? table.rows[0].cells.length : 0;
-                            
-                            // Set specific widths for better fitting
-                            if (totalCols > 10) {{
-                                // For wide tables, make columns smaller
-                                cells.forEach((cell, index) => {{
-                                    if (index === 0) cell.style.width = '50px'; // Course code
-                                    else if (index === 1) cell.style.width = '100px'; // Course name
-                                    else if (index === 2) cell.style.width = '40px'; // Weight
-                                    else cell.style.width = '30px'; // Program outcomes
-                                }});
-                            }}
-                        }});
-                        
-                        // Add title with student info
-                        const title = document.createElement('div');
-                        title.innerHTML = `
-                            <div style="text-align: center; margin: 5px 0; padding: 5px; border-bottom: 2px solid #333;">
-                                <h1 style="margin: 0; font-size: 14px; color: #333;">Student Academic Report</h1>
-                                <p style="margin: 2px 0; font-size: 10px; color: #666;">Student ID: {student_id}</p>
-                            </div>
-                        `;
-                        document.body.insertBefore(title, document.body.firstChild);
-                        
-                        // Remove any empty or unnecessary elements
-                        const emptyElements = document.querySelectorAll('div:empty, p:empty, span:empty');
-                        emptyElements.forEach(el => {{
-                            if (!el.hasChildNodes()) el.remove();
-                        }});
-                        
-                        // Force layout recalculation
-                        document.body.offsetHeight;
+            elementsToHide.forEach(selector => {{
+                const elements = document.querySelectorAll(selector);
+                elements.forEach(el => el.style.display = 'none');
+            }});
+            
+            // Add comprehensive PDF-optimized styles
+            const style = document.createElement('style');
+            style.textContent = `
+                @media print {{
+                    * {{
+                        -webkit-print-color-adjust: exact !important;
+                        color-adjust: exact !important;
                     }}
-                """)
-                
-                # Generate PDF with optimized settings for better fitting
-                is_landscape = orientation.lower() == 'landscape'
-                
-                # Adjust margins based on page size and orientation
-                if page_size.upper() == 'A3':
-                    margins = {
-                        'top': '0.3cm',
-                        'right': '0.3cm', 
-                        'bottom': '0.3cm',
-                        'left': '0.3cm'
-                    }
-                else:  # A4
-                    margins = {
-                        'top': '0.5cm',
-                        'right': '0.4cm',
-                        'bottom': '0.5cm', 
-                        'left': '0.4cm'
-                    }
-                
-                pdf_bytes = await page.pdf(
-                    format=page_size.upper(),
-                    landscape=is_landscape,
-                    print_background=True,
-                    margin=margins,
-                    prefer_css_page_size=False,
-                    display_header_footer=False
-                )
-                
-                await browser.close()
-                return pdf_bytes
+                    
+                    body {{
+                        margin: 0 !important;
+                        padding: 5px !important;
+                        font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif !important;
+                        font-size: 10px !important;
+                        line-height: 1.2 !important;
+                        color: #333 !important;
+                        background: white !important;
+                    }}
+                    
+                    .container, .container-fluid {{
+                        max-width: 100% !important;
+                        width: 100% !important;
+                        padding: 0 !important;
+                        margin: 0 !important;
+                    }}
+                    
+                    .row {{
+                        margin: 0 !important;
+                        padding: 0 !important;
+                    }}
+                    
+                    .col, .col-12, .col-md-12 {{
+                        padding: 0 !important;
+                        margin: 0 !important;
+                    }}
+                    
+                    /* Table styling for proper fitting */
+                    .table {{
+                        width: 100% !important;
+                        font-size: 7px !important;
+                        border-collapse: collapse !important;
+                        margin: 5px 0 !important;
+                        table-layout: auto !important;
+                    }}
+                    
+                    .table th, .table td {{
+                        padding: 2px 1px !important;
+                        font-size: 7px !important;
+                        line-height: 1.1 !important;
+                        border: 1px solid #ddd !important;
+                        text-align: center !important;
+                        vertical-align: middle !important;
+                        word-wrap: break-word !important;
+                        overflow-wrap: break-word !important;
+                    }}
+                    
+                    .table th {{
+                        background-color: #f8f9fa !important;
+                        font-weight: bold !important;
+                        font-size: 6px !important;
+                    }}
+                    
+                    /* Course code column - make it narrower */
+                    .table td:first-child, .table th:first-child {{
+                        width: 60px !important;
+                        max-width: 60px !important;
+                        font-size: 6px !important;
+                    }}
+                    
+                    /* Course name column - adjust width */
+                    .table td:nth-child(2), .table th:nth-child(2) {{
+                        width: 120px !important;
+                        max-width: 120px !important;
+                        text-align: left !important;
+                        font-size: 6px !important;
+                    }}
+                    
+                    /* Program outcome columns - optimize width */
+                    .table td:nth-child(n+4), .table th:nth-child(n+4) {{
+                        width: 35px !important;
+                        max-width: 35px !important;
+                        font-size: 6px !important;
+                    }}
+                    
+                    /* Student info section */
+                    .alert, .alert-info {{
+                        padding: 8px !important;
+                        margin: 5px 0 !important;
+                        font-size: 10px !important;
+                        background-color: #d1ecf1 !important;
+                        border: 1px solid #bee5eb !important;
+                        border-radius: 4px !important;
+                    }}
+                    
+                    /* Chart section */
+                    .chart-container {{
+                        width: 100% !important;
+                        height: auto !important;
+                        margin: 10px 0 !important;
+                    }}
+                    
+                    /* Achievement levels table */
+                    .achievement-levels {{
+                        font-size: 8px !important;
+                        margin: 10px 0 !important;
+                    }}
+                    
+                    /* Color preservation for cells */
+                    .table-success {{ background-color: #d4edda !important; }}
+                    .table-info {{ background-color: #d1ecf1 !important; }}
+                    .table-warning {{ background-color: #fff3cd !important; }}
+                    .table-danger {{ background-color: #f8d7da !important; }}
+                    .table-primary {{ background-color: #d1ecf1 !important; }}
+                    
+                    /* Responsive table wrapper */
+                    .table-responsive {{
+                        overflow: visible !important;
+                        width: 100% !important;
+                    }}
+                    
+                    /* Page break handling */
+                    .page-break {{
+                        page-break-before: always !important;
+                    }}
+                    
+                    /* Hide search and filter elements */
+                    .form-group, .input-group, .search-container {{
+                        display: none !important;
+                    }}
+                    
+                    /* Adjust margins for better fitting */
+                    h1, h2, h3, h4, h5, h6 {{
+                        margin: 8px 0 4px 0 !important;
+                        font-size: 12px !important;
+                        font-weight: bold !important;
+                    }}
+                    
+                    /* Ensure no content overflows */
+                    * {{
+                        box-sizing: border-box !important;
+                    }}
+                }}
+            `;
+            document.head.appendChild(style);
+            
+            // Force table to fit page width
+            const tables = document.querySelectorAll('.table');
+            tables.forEach(table => {{
+                // Calculate and adjust column widths
+                const cells = table.querySelectorAll('th, td');
+                const totalCols = table.rows[0] ? table.rows[0].cells.length : 0;
                 
-        except Exception as e:
-            logging.error(f"Error generating PDF for student {student_id}: {e}")
-            print(f"DEBUG: PDF generation error for student {student_id}: {e}")
-            return None
-    
-    try:
-        # Create new event loop for this thread
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            result = loop.run_until_complete(generate_student_pdf_async())
-            return result
-        finally:
-            loop.close()
+                // Set specific widths for better fitting
+                if (totalCols > 10) {{
+                    // For wide tables, make columns smaller
+                    cells.forEach((cell, index) => {{
+                        if (index === 0) cell.style.width = '50px'; // Course code
+                        else if (index === 1) cell.style.width = '100px'; // Course name
+                        else if (index === 2) cell.style.width = '40px'; // Weight
+                        else cell.style.width = '30px'; // Program outcomes
+                    }});
+                }}
+            }});
             
-    except Exception as e:
-        logging.error(f"Error in thread-safe PDF generation for student {student_id}: {e}")
-        print(f"DEBUG: Thread-safe PDF generation error for student {student_id}: {e}")
-        return None
+            // Add title with student info
+            const title = document.createElement('div');
+            title.innerHTML = `
+                <div style="text-align: center; margin: 5px 0; padding: 5px; border-bottom: 2px solid #333;">
+                    <h1 style="margin: 0; font-size: 14px; color: #333;">Student Academic Report</h1>
+                    <p style="margin: 2px 0; font-size: 10px; color: #666;">Student ID: {student_id}</p>
+                </div>
+            `;
+            document.body.insertBefore(title, document.body.firstChild);
+            
+            // Remove any empty or unnecessary elements
+            const emptyElements = document.querySelectorAll('div:empty, p:empty, span:empty');
+            emptyElements.forEach(el => {{
+                if (!el.hasChildNodes()) el.remove();
+            }});
+            
+            // Force layout recalculation
+            document.body.offsetHeight;
+        }}
+    """)
+    
+    # Generate PDF with optimized settings for better fitting
+    is_landscape = orientation.lower() == 'landscape'
+    
+    # Adjust margins based on page size and orientation
+    if page_size.upper() == 'A3':
+        margins = {
+            'top': '0.3cm',
+            'right': '0.3cm', 
+            'bottom': '0.3cm',
+            'left': '0.3cm'
+        }
+    else:  # A4
+        margins = {
+            'top': '0.5cm',
+            'right': '0.4cm',
+            'bottom': '0.5cm', 
+            'left': '0.4cm'
+        }
+    
+    pdf_bytes = await page.pdf(
+        format=page_size.upper(),
+        landscape=is_landscape,
+        print_background=True,
+        margin=margins,
+        prefer_css_page_size=False,
+        display_header_footer=False
+    )
+    
+    return pdf_bytes
 
 
-def combine_pdfs(pdf_paths):
-    """Combine multiple PDF files into a single PDF"""
-    try:
-        from PyPDF2 import PdfMerger
-        merger = PdfMerger()
+def combine_pdfs_to_files(pdf_paths, output_dir, part_size=COMBINED_PDF_PART_SIZE, base_name='combined_all_students'):
+    """
+    Combine PDF files into combined PDFs on disk, returns the written paths.
+    
+    The reports are appended one file at a time and each combined file holds at
+    most part_size reports, so the memory PyPDF2 needs is bounded by one part
+    instead of growing with the number of students. A single part keeps the
+    name <base_name>.pdf; more parts are numbered <base_name>_part_01.pdf, ...
+    """
+    from PyPDF2 import PdfMerger
+    
+    pdf_paths = [pdf_path for pdf_path in pdf_paths if os.path.exists(pdf_path)]
+    part_size = max(1, int(part_size or COMBINED_PDF_PART_SIZE))
+    parts = [pdf_paths[i:i + part_size] for i in range(0, len(pdf_paths), part_size)]
+    
+    combined_paths = []
+    for index, part in enumerate(parts, start=1):
+        if len(parts) == 1:
+            output_path = os.path.join(output_dir, f'{base_name}.pdf')
+        else:
+            output_path = os.path.join(output_dir, f'{base_name}_part_{index:02d}.pdf')
         
-        for pdf_path in pdf_paths:
-            if os.path.exists(pdf_path):
+        merger = PdfMerger()
+        try:
+            for pdf_path in part:
                 merger.append(pdf_path)
-        
-        output_buffer = BytesIO()
-        merger.write(output_buffer)
-        merger.close()
-        
-        output_buffer.seek(0)
-        return output_buffer.getvalue()
-        
-    except Exception as e:
-        logging.error(f"Error combining PDFs: {e}")
-        return None 
\ No newline at end of file
+            # Written straight to the file instead of an in-memory buffer
+            with open(output_path, 'wb') as output_file:
+                merger.write(output_file)
+            combined_paths.append(output_path)
+            logging.info(f"Combined PDF saved: {output_path} ({len(part)} reports)")
+        except Exception as e:
+            logging.error(f"Error combining PDFs into {output_path}: {e}")
+            if os.path.exists(output_path):
+                os.remove(output_path)
+        finally:
+            merger.close()
+    
+    return combined_paths
+
+
+def write_zip_from_files(zip_path, file_paths):
+    """
+    Write the files into a ZIP archive on disk, returns zip_path.
+    zipfile copies each file in small blocks, so no file is held in memory as a whole.
+    """
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for file_path in file_paths:
+            zip_file.write(file_path, os.path.basename(file_path))
+    return zip_path
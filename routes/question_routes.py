@@ -8,6 +8,7 @@ import csv
 from routes.utility_routes import export_to_excel_csv
 from decimal import Decimal, InvalidOperation
 from sqlalchemy import text, inspect
+from routes.result_cache import invalidate_course_results
 
 question_bp = Blueprint('question', __name__, url_prefix='/question')
 
@@ -91,6 +92,7 @@ def add_question(exam_id):
                      description=f"Added question {next_question_number} to exam: {exam.name}")
             db.session.add(log)
             
+            invalidate_course_results(exam.course_id)
             db.session.commit()
             
             # --- START: Process Weights ---
@@ -125,6 +127,7 @@ def add_question(exam_id):
                     except Exception as e:
                         flash(f'Error setting weight for outcome ID {outcome_id}: {str(e)}', 'error')
                 
+                invalidate_course_results(exam.course_id)
                 db.session.commit()
             # --- END: Process Weights ---
                 
@@ -249,6 +252,7 @@ def edit_question(question_id):
                      description=f"Edited question {question.number} in exam: {exam.name}")
             db.session.add(log)
             
+            invalidate_course_results(exam.course_id)
             db.session.commit()
             
             # --- START: Process Weights ---
@@ -284,6 +288,7 @@ def edit_question(question_id):
                     except Exception as e:
                         flash(f'Error setting weight for outcome ID {outcome_id}: {str(e)}', 'error')
                 
+                invalidate_course_results(exam.course_id)
                 db.session.commit()
             # --- END: Process Weights ---
             
@@ -368,6 +373,7 @@ def delete_question(question_id):
     """
     question = Question.query.get_or_404(question_id)
     exam_id = question.exam_id
+    course_id = question.exam.course_id
     question_number = question.number
     
     try:
@@ -396,6 +402,7 @@ def delete_question(question_id):
         for q in remaining_questions:
             q.number -= 1
         
+        invalidate_course_results(course_id)
         db.session.commit()
             
         flash(f'Question {question_number} deleted successfully', 'success')
@@ -429,6 +436,7 @@ def auto_assign_scores(exam_id):
                  description=f"Auto-assigned equal scores ({equal_score}) to questions in exam: {exam.name}")
         db.session.add(log)
         
+        invalidate_course_results(exam.course_id)
         db.session.commit()
         flash(f'Assigned {equal_score} points to each question', 'success')
     except Exception as e:
@@ -565,6 +573,7 @@ def batch_add_questions(exam_id):
                          description=f"Added {questions_added} questions to exam: {exam.name}")
                 db.session.add(log)
                 
+                invalidate_course_results(exam.course_id)
                 db.session.commit()
                 flash(f'{questions_added} questions added successfully', 'success')
                 return redirect(url_for('exam.exam_detail', exam_id=exam_id))
@@ -699,6 +708,7 @@ def mass_associate_outcomes(course_id):
                      description=f"Updated outcome associations for {updates} questions in course: {course.code}")
             db.session.add(log)
             
+            invalidate_course_results(course.id)
             db.session.commit()
             flash(f'Updated outcome associations for {updates} questions', 'success')
             return redirect(url_for('question.mass_associate_outcomes', course_id=course_id))
@@ -0,0 +1,154 @@
+"""
+Student ranking engine for /utility/student_ranking.
+
+The ranking (number of courses + average exam percentage per student ID) is
+computed by one GROUP BY statement: SQLite sums the scores and question
+maximums per student and exam, turns them into exam percentages and sums
+those per student, so only one row per student reaches Python instead of
+every score row.
+
+The result is kept as an in-memory snapshot keyed on the data signature of the
+result cache (routes/result_cache.get_data_signature). Every score, student or
+exam write already invalidates its course there, so the next request after a
+write recomputes the snapshot and all other requests (page changes, sorting,
+searching, the CSV export) are served from memory.
+"""
+
+import logging
+import threading
+from sqlalchemy import text
+from app import db
+from routes.result_cache import get_data_signature
+
+# One row per student ID (non-excluded enrollments only); exams with a zero maximum are skipped
+RANKING_SQL = text("""
+    WITH exam_totals AS (
+        SELECT s.student_id AS row_id, SUM(s.score) AS total, SUM(q.max_score) AS max_total
+        FROM score s
+        JOIN student st ON st.id = s.student_id
+        JOIN question q ON q.id = s.question_id
+        JOIN exam e ON e.id = q.exam_id
+        WHERE st.excluded = 0
+        GROUP BY s.student_id, s.exam_id
+    ),
+    row_totals AS (
+        SELECT row_id, SUM((total * 1.0 / max_total) * 100) AS percentage_sum, COUNT(*) AS exam_count
+        FROM exam_totals
+        WHERE max_total > 0
+        GROUP BY row_id
+    ),
+    students AS (
+        SELECT st.student_id, COUNT(*) AS course_count, MIN(st.id) AS first_row,
+               COALESCE(SUM(rt.percentage_sum), 0) AS percentage_sum, COALESCE(SUM(rt.exam_count), 0) AS exam_count
+        FROM student st
+        JOIN course c ON c.id = st.course_id
+        LEFT JOIN row_totals rt ON rt.row_id = st.id
+        WHERE st.excluded = 0
+        GROUP BY st.student_id
+    )
+    SELECT s.student_id, n.first_name, n.last_name, s.course_count, s.percentage_sum, s.exam_count
+    FROM students s
+    JOIN student n ON n.id = s.first_row
+    ORDER BY s.first_row
+""")
+
+# Sort options of the ranking page: key and direction (ties keep the rank order)
+RANKING_SORTS = {
+    'rank': (lambda student: student['rank'], False),
+    'name': (lambda student: student['name'].casefold(), False),
+    'student_id': (lambda student: student['student_id'], False),
+    'course_count': (lambda student: student['course_count'], True),
+    'average_score': (lambda student: student['average_score'], True),
+    'exam_count': (lambda student: student['exam_count'], True),
+}
+
+_snapshot_lock = threading.Lock()
+_snapshot = {'signature': None, 'students': [], 'ranked': {}}
+
+
+def compute_student_rankings():
+    """Every student ID with its course count, exam count and average exam percentage (one query)"""
+    students = []
+    for row in db.session.execute(RANKING_SQL):
+        exam_count = int(row.exam_count)
+        average_score = float(row.percentage_sum) / exam_count if exam_count > 0 else 0
+        students.append({
+            'student_id': row.student_id,
+            'name': f"{row.first_name} {row.last_name}".strip(),
+            'course_count': int(row.course_count),
+            'average_score': round(average_score, 2),
+            'exam_count': exam_count,
+            'ranking_value': round(row.course_count + average_score, 2)
+        })
+    return students
+
+
+def get_ranking_snapshot():
+    """The students of the ranking, recomputed only when course data changed since the last call"""
+    versions, invalidations = get_data_signature()
+    signature = (str(db.engine.url), versions, invalidations)
+    with _snapshot_lock:
+        if versions is not None and _snapshot['signature'] == signature:
+            return _snapshot
+    students = compute_student_rankings()
+    with _snapshot_lock:
+        _snapshot.update({'signature': signature, 'students': students, 'ranked': {}})
+        logging.info(f"Student ranking snapshot computed for {len(students)} students")
+        return _snapshot
+
+
+def invalidate_ranking_snapshot():
+    """Force the next request to recompute the ranking"""
+    with _snapshot_lock:
+        _snapshot.update({'signature': None, 'students': [], 'ranked': {}})
+
+
+def get_student_rankings(min_exams=0):
+    """
+    Ranked students with at least min_exams exams, highest ranking value first.
+
+    Students with the same ranking value keep the order of their first
+    enrollment. The ranked list of each min_exams value is kept in the snapshot.
+    """
+    min_exams = max(int(min_exams or 0), 0)
+    snapshot = get_ranking_snapshot()
+    with _snapshot_lock:
+        ranked = snapshot['ranked'].get(min_exams)
+        if ranked is None:
+            ranked = [dict(student) for student in snapshot['students'] if student['exam_count'] >= min_exams]
+            ranked.sort(key=lambda student: student['ranking_value'], reverse=True)
+            for index, student in enumerate(ranked):
+                student['rank'] = index + 1
+            snapshot['ranked'][min_exams] = ranked
+    return ranked
+
+
+def ranking_statistics(students):
+    """Totals shown above the ranking table"""
+    if not students:
+        return {'total_students': 0, 'avg_courses': 0, 'avg_score': 0, 'top_score': 0}
+    return {
+        'total_students': len(students),
+        'avg_courses': round(sum(student['course_count'] for student in students) / len(students), 1),
+        'avg_score': round(sum(student['average_score'] for student in students) / len(students), 1),
+        'top_score': round(max(student['average_score'] for student in students), 1),
+    }
+
+
+def query_student_rankings(min_exams=0, search='', sort='rank', page=1, per_page=25):
+    """
+    One page of the ranking, filtered by a search term and sorted by a RANKING_SORTS key.
+
+    Returns (page students, number of matching students, statistics of the ranking).
+    """
+    ranked = get_student_rankings(min_exams)
+    students = ranked
+    search = (search or '').strip().lower()
+    if search:
+        students = [student for student in students
+                    if search in student['student_id'].lower() or search in student['name'].lower()]
+    key, descending = RANKING_SORTS.get(sort, RANKING_SORTS['rank'])
+    if sort in RANKING_SORTS and sort != 'rank':
+        students = sorted(students, key=key, reverse=descending)
+    start = (page - 1) * per_page
+    return students[start:start + per_page], len(students), ranking_statistics(ranked)
@@ -0,0 +1,272 @@
+"""
+Course Result Cache
+
+Materialized per-course outcome results for the multi-course pages
+(/calculation/all_courses, its CSV export and /cross_course_outcomes/data).
+
+Results are stored in the course_result_cache table keyed by course, calculation
+method, graduating students filter and result type. Every write that changes
+data a course's results depend on (scores, attendance, exam weights, outcome
+associations, ...) calls invalidate_course_results() inside its own transaction,
+which removes the course's entries and bumps its data version in
+course_data_version.
+
+A cached entry is only served if it was computed against the current data
+version, so a calculation that was already running while a score was saved can
+never store a stale result that outlives the write.
+
+Caches of data spanning every course (e.g. the student ranking snapshot) use
+get_data_signature(), which changes whenever any course is invalidated.
+"""
+
+import json
+import logging
+import threading
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import text
+from app import db
+
+# Result types stored in the cache
+RESULT_AGGREGATE = 'aggregate'  # PO results used by all_courses and its export
+RESULT_COURSE = 'course'        # calculate_single_course_results (CO + PO averages)
+
+# Keys of the result dictionaries that are persisted
+_SCORE_KEYS = ('program_outcome_scores', 'course_outcome_scores')
+
+# Invalidations made by this process (part of get_data_signature)
+_invalidation_count = 0
+_invalidation_lock = threading.Lock()
+
+
+def _count_invalidation():
+    global _invalidation_count
+    with _invalidation_lock:
+        _invalidation_count += 1
+
+
+def _encode_scores(scores):
+    """Encode an {id: number} dict keeping track of Decimal vs float values"""
+    return {str(key): [str(value), isinstance(value, Decimal)] for key, value in scores.items()}
+
+
+def _decode_scores(encoded):
+    """Inverse of _encode_scores"""
+    return {int(key): (Decimal(value) if is_decimal else float(value))
+            for key, (value, is_decimal) in encoded.items()}
+
+
+def serialize_course_result(result):
+    """Convert a calculation result into JSON (the ORM course object is not stored)"""
+    payload = {
+        'contributing_po_ids': sorted(result.get('contributing_po_ids', set())),
+        'is_valid_for_aggregation': bool(result.get('is_valid_for_aggregation', False)),
+        'student_count_used': int(result.get('student_count_used', 0)),
+    }
+    for key in _SCORE_KEYS:
+        if key in result:
+            payload[key] = _encode_scores(result[key])
+    return json.dumps(payload)
+
+
+def deserialize_course_result(result_json, course=None):
+    """Rebuild a calculation result from its JSON form, re-attaching the course object"""
+    payload = json.loads(result_json)
+    result = {
+        'contributing_po_ids': set(payload['contributing_po_ids']),
+        'is_valid_for_aggregation': payload['is_valid_for_aggregation'],
+        'student_count_used': payload['student_count_used'],
+        'course': course,
+    }
+    for key in _SCORE_KEYS:
+        if key in payload:
+            result[key] = _decode_scores(payload[key])
+    return result
+
+
+def get_course_data_versions(course_ids):
+    """Return {course_id: data_version}; courses never invalidated are at version 0"""
+    if not course_ids:
+        return {}
+    placeholders = ','.join(str(int(course_id)) for course_id in course_ids)
+    versions = {course_id: 0 for course_id in course_ids}
+    try:
+        rows = db.session.execute(
+            text(f"SELECT course_id, version FROM course_data_version WHERE course_id IN ({placeholders})")
+        ).fetchall()
+    except Exception as e:
+        logging.error(f"Error reading course data versions: {str(e)}")
+        return versions
+    for course_id, version in rows:
+        versions[course_id] = version
+    return versions
+
+
+def get_data_signature():
+    """
+    Signature of the data of all courses: changes whenever a course is invalidated.
+
+    Combines the data versions (bumped by every invalidation, also by other
+    processes) with the number of invalidations made by this process, which
+    also covers invalidate_all_course_results() before any version row exists.
+    """
+    try:
+        row = db.session.execute(
+            text("SELECT COUNT(*), COALESCE(SUM(version), 0), MAX(updated_at) FROM course_data_version")
+        ).fetchone()
+        versions = tuple(str(value) for value in row)
+    except Exception as e:
+        logging.error(f"Error reading course data versions: {str(e)}")
+        versions = None
+    return versions, _invalidation_count
+
+
+def get_cached_course_results(course_ids, calculation_method, include_graduating_only=False,
+                              result_type=RESULT_AGGREGATE, courses_by_id=None):
+    """
+    Look up cached results for several courses in one query.
+
+    Returns {course_id: result} for the courses that have an up-to-date entry.
+    Courses missing from the returned dict must be recomputed.
+    """
+    if not course_ids:
+        return {}
+
+    courses_by_id = courses_by_id or {}
+    placeholders = ','.join(str(int(course_id)) for course_id in course_ids)
+
+    try:
+        rows = db.session.execute(
+            text(f"""
+                SELECT c.course_id, c.result_json
+                FROM course_result_cache c
+                LEFT JOIN course_data_version v ON v.course_id = c.course_id
+                WHERE c.course_id IN ({placeholders})
+                  AND c.calculation_method = :method
+                  AND c.include_graduating_only = :graduating_only
+                  AND c.result_type = :result_type
+                  AND c.data_version = COALESCE(v.version, 0)
+            """),
+            {
+                'method': calculation_method,
+                'graduating_only': bool(include_graduating_only),
+                'result_type': result_type,
+            }
+        ).fetchall()
+    except Exception as e:
+        logging.error(f"Error reading course result cache: {str(e)}")
+        return {}
+
+    cached = {}
+    for course_id, result_json in rows:
+        try:
+            cached[course_id] = deserialize_course_result(result_json, courses_by_id.get(course_id))
+        except (ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Ignoring corrupt result cache entry for course {course_id}: {str(e)}")
+    return cached
+
+
+def store_course_result(course_id, calculation_method, include_graduating_only, result, data_version,
+                        result_type=RESULT_AGGREGATE):
+    """
+    Store a freshly computed result. data_version must be the version read with
+    get_course_data_versions() *before* the course data was loaded.
+
+    The caller commits; the row is written inside the caller's transaction.
+    """
+    try:
+        db.session.execute(
+            text("""
+                INSERT OR REPLACE INTO course_result_cache
+                    (course_id, calculation_method, include_graduating_only, result_type,
+                     data_version, result_json, computed_at)
+                VALUES (:course_id, :method, :graduating_only, :result_type,
+                        :data_version, :result_json, :computed_at)
+            """),
+            {
+                'course_id': course_id,
+                'method': calculation_method,
+                'graduating_only': bool(include_graduating_only),
+                'result_type': result_type,
+                'data_version': data_version,
+                'result_json': serialize_course_result(result),
+                'computed_at': datetime.now(),
+            }
+        )
+    except Exception as e:
+        logging.error(f"Error storing course result cache for course {course_id}: {str(e)}")
+
+
+def invalidate_course_results(course_ids):
+    """
+    Mark the results of one or more courses as dirty.
+
+    Runs inside the caller's transaction so the invalidation commits (or rolls
+    back) together with the write that caused it. Errors are re-raised so the
+    caller rolls the write back instead of committing it next to stale results.
+    """
+    if course_ids is None:
+        return
+    if not isinstance(course_ids, (list, tuple, set)):
+        course_ids = [course_ids]
+    course_ids = sorted({int(course_id) for course_id in course_ids if course_id is not None})
+    if not course_ids:
+        return
+
+    placeholders = ','.join(str(course_id) for course_id in course_ids)
+    _count_invalidation()
+    try:
+        db.session.execute(text(f"DELETE FROM course_result_cache WHERE course_id IN ({placeholders})"))
+        for course_id in course_ids:
+            db.session.execute(
+                text("""
+                    INSERT INTO course_data_version (course_id, version, updated_at)
+                    VALUES (:course_id, 1, :now)
+                    ON CONFLICT(course_id) DO UPDATE SET version = version + 1, updated_at = :now
+                """),
+                {'course_id': course_id, 'now': datetime.now()}
+            )
+    except Exception as e:
+        logging.error(f"Error invalidating course result cache for courses {course_ids}: {str(e)}")
+        raise
+
+
+def invalidate_course_results_for_exam(exam_id):
+    """Invalidate the course that owns an exam"""
+    row = db.session.execute(text("SELECT course_id FROM exam WHERE id = :exam_id"), {'exam_id': exam_id}).fetchone()
+    if row:
+        invalidate_course_results(row[0])
+
+
+def invalidate_graduating_course_results():
+    """Drop every entry computed with the graduating students filter (the graduating list changed)"""
+    _count_invalidation()
+    try:
+        db.session.execute(text("DELETE FROM course_result_cache WHERE include_graduating_only = 1"))
+    except Exception as e:
+        logging.error(f"Error invalidating graduating course results: {str(e)}")
+        raise
+
+
+def invalidate_all_course_results():
+    """Drop the whole cache (database import, merge or restore)"""
+    _count_invalidation()
+    try:
+        db.session.execute(text("DELETE FROM course_result_cache"))
+        db.session.execute(text("UPDATE course_data_version SET version = version + 1"))
+    except Exception as e:
+        logging.error(f"Error clearing course result cache: {str(e)}")
+        raise
+
+
+def ensure_result_cache_tables():
+    """Create the cache tables if missing (e.g. after restoring a backup from an older version)"""
+    from models import CourseResultCache, CourseDataVersion
+    try:
+        engine = db.engine
+        CourseDataVersion.__table__.create(bind=engine, checkfirst=True)
+        CourseResultCache.__table__.create(bind=engine, checkfirst=True)
+        return True
+    except Exception as e:
+        logging.error(f"Error creating course result cache tables: {str(e)}")
+        return False
@@ -8,8 +8,9 @@ import os
 import tempfile
 import traceback
 from decimal import Decimal, ROUND_HALF_UP
-from sqlalchemy import func
+from sqlalchemy import func, distinct, text
 from collections import defaultdict
+from routes.result_cache import invalidate_course_results
 
 score_fixer_bp = Blueprint('score_fixer', __name__, url_prefix='/score_fixer')
 
@@ -56,6 +57,43 @@ def fix_invalid_scores():
             logging.error(f"Error in fix_invalid_scores: {str(e)}\n{traceback.format_exc()}")
             return redirect(url_for('utility.index'))
 
+# Bulk updates of the fixer: one executemany statement per exam
+QUESTION_MAX_UPDATE_SQL = text("UPDATE question SET max_score = :max_score, updated_at = :timestamp WHERE id = :id")
+SCORE_UPDATE_SQL = text("UPDATE score SET score = :score, updated_at = :timestamp WHERE id = :id")
+
+
+def exam_score_diagnostics():
+    """
+    One row per exam with its course, question count, question max score sum,
+    number of scores above their question maximum and number of students with
+    such scores (one grouped query over score/question/exam).
+    """
+    question_sums = db.session.query(
+        Question.exam_id.label('exam_id'),
+        func.count(Question.id).label('question_count'),
+        func.sum(Question.max_score).label('question_sum')
+    ).group_by(Question.exam_id).subquery()
+
+    invalid_scores = db.session.query(
+        Score.exam_id.label('exam_id'),
+        func.count(Score.id).label('invalid_count'),
+        func.count(distinct(Score.student_id)).label('students_affected')
+    ).join(Question, Score.question_id == Question.id).filter(
+        Score.score > Question.max_score
+    ).group_by(Score.exam_id).subquery()
+
+    return db.session.query(
+        Exam.id, Exam.name, Exam.max_score, Exam.course_id,
+        Course.code.label('course_code'), Course.name.label('course_name'),
+        question_sums.c.question_count, question_sums.c.question_sum,
+        invalid_scores.c.invalid_count, invalid_scores.c.students_affected
+    ).join(Course, Exam.course_id == Course.id).outerjoin(
+        question_sums, question_sums.c.exam_id == Exam.id
+    ).outerjoin(
+        invalid_scores, invalid_scores.c.exam_id == Exam.id
+    ).order_by(Exam.id).all()
+
+
 def get_invalid_scores_statistics():
     """Get statistics about invalid scores in the database"""
     stats = {
@@ -69,16 +107,15 @@ def get_invalid_scores_statistics():
     }
     
     try:
-        # Get all exams with their questions and scores
-        exams = Exam.query.join(Course).all()
+        exams = exam_score_diagnostics()
         stats['total_exams'] = len(exams)
         
         for exam in exams:
             exam_stats = {
                 'exam_id': exam.id,
                 'exam_name': exam.name,
-                'course_code': exam.course.code,
-                'course_name': exam.course.name,
+                'course_code': exam.course_code,
+                'course_name': exam.course_name,
                 'students_affected': 0,
                 'invalid_scores_count': 0,
                 'question_scores_sum_issue': False,
@@ -88,35 +125,24 @@ def get_invalid_scores_statistics():
             }
             
             # Check if question scores sum exceeds or is less than exam max score
-            questions = Question.query.filter_by(exam_id=exam.id).all()
-            if questions:
-                question_scores_sum = sum(q.max_score for q in questions)
-                exam_stats['question_scores_sum'] = question_scores_sum
-                if question_scores_sum > exam.max_score:
+            if exam.question_count:
+                exam_stats['question_scores_sum'] = exam.question_sum
+                if exam.question_sum > exam.max_score:
                     exam_stats['question_scores_sum_issue'] = True
                     stats['exams_with_question_score_issues'] += 1
-                elif question_scores_sum < exam.max_score:
+                elif exam.question_sum < exam.max_score:
                     exam_stats['question_scores_undersum_issue'] = True
                     stats['exams_with_underscored_question_sums'] += 1
             
-            # Find scores that exceed question max_score
-            invalid_scores = db.session.query(Score, Question).join(
-                Question, Score.question_id == Question.id
-            ).filter(
-                Score.exam_id == exam.id,
-                Score.score > Question.max_score
-            ).all()
-            
             # If there are any issues (invalid scores or question sum issues), add to details
-            if invalid_scores or exam_stats['question_scores_sum_issue'] or exam_stats['question_scores_undersum_issue']:
-                if invalid_scores:
-                    exam_stats['invalid_scores_count'] = len(invalid_scores)
-                    affected_students = set([score.student_id for score, question in invalid_scores])
-                    exam_stats['students_affected'] = len(affected_students)
+            if exam.invalid_count or exam_stats['question_scores_sum_issue'] or exam_stats['question_scores_undersum_issue']:
+                if exam.invalid_count:
+                    exam_stats['invalid_scores_count'] = exam.invalid_count
+                    exam_stats['students_affected'] = exam.students_affected
                     
                     stats['exams_with_invalid_scores'] += 1
-                    stats['total_students_affected'] += len(affected_students)
-                    stats['total_invalid_scores'] += len(invalid_scores)
+                    stats['total_students_affected'] += exam.students_affected
+                    stats['total_invalid_scores'] += exam.invalid_count
                 
                 stats['exams_details'].append(exam_stats)
         
@@ -125,121 +151,134 @@ def get_invalid_scores_statistics():
     
     return stats
 
+def load_exam_questions(exam_ids):
+    """Questions of the given exams ordered by number, as {exam_id: [question dict]} (one query)"""
+    questions = defaultdict(list)
+    if not exam_ids:
+        return questions
+    rows = db.session.query(Question.id, Question.exam_id, Question.number, Question.max_score).filter(
+        Question.exam_id.in_(exam_ids)
+    ).order_by(Question.exam_id, Question.number, Question.id)
+    for row in rows:
+        questions[row.exam_id].append({'id': row.id, 'number': row.number, 'max_score': row.max_score})
+    return questions
+
+def load_exam_scores(exam_id):
+    """Scores of one exam grouped by student: [(student dict, [score dict])] in student order (one query)"""
+    students = {}
+    rows = db.session.query(
+        Score.id, Score.student_id, Score.question_id, Score.score,
+        Student.student_id.label('student_number'), Student.first_name, Student.last_name
+    ).join(Student, Student.id == Score.student_id).filter(
+        Score.exam_id == exam_id
+    ).order_by(Score.student_id, Score.id)
+    for row in rows:
+        if row.student_id not in students:
+            students[row.student_id] = ({'student_id': row.student_number, 'first_name': row.first_name,
+                                         'last_name': row.last_name}, [])
+        students[row.student_id][1].append({'id': row.id, 'question_id': row.question_id,
+                                            'score': row.score, 'original': row.score})
+    return list(students.values())
+
 def process_invalid_scores_fix(log_path):
-    """Process and fix all invalid scores, writing detailed log"""
+    """
+    Process and fix all invalid scores, streaming a detailed log to log_path.
+
+    Exams are handled one at a time: the questions and scores of an exam are
+    loaded with one query each, the new values are computed in memory and
+    written with one bulk UPDATE per table. Everything is committed at the end.
+    """
     results = {
         'fixed_students': 0,
         'total_questions_fixed': 0,
         'processed_exams': 0
     }
     
-    log_entries = []
-    log_entries.append(f"Invalid Scores Fix Log - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    log_entries.append("=" * 80)
-    log_entries.append("")
-    
-    try:
-        # Get all exams that have invalid scores
-        exams_with_invalid_scores = db.session.query(Exam).join(
-            Score, Exam.id == Score.exam_id
-        ).join(
-            Question, Score.question_id == Question.id
-        ).filter(
-            Score.score > Question.max_score
-        ).distinct().all()
-        
-        log_entries.append(f"Found {len(exams_with_invalid_scores)} exams with invalid scores")
-        log_entries.append("")
-        
-        # Also get exams where question scores sum exceeds exam max score
-        exams_with_question_score_issues = db.session.query(Exam).all()
-        exams_to_process = set()
+    with open(log_path, 'w', encoding='utf-8') as log_file:
+        def log(line=''):
+            log_file.write(f"{line}\n")
         
-        # Add exams with invalid scores
-        for exam in exams_with_invalid_scores:
-            exams_to_process.add(exam)
+        log(f"Invalid Scores Fix Log - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        log("=" * 80)
+        log()
         
-        # Add exams with question score sum issues
-        for exam in exams_with_question_score_issues:
-            questions = Question.query.filter_by(exam_id=exam.id).all()
-            if questions:
-                question_scores_sum = sum(q.max_score for q in questions)
-                if question_scores_sum > exam.max_score:
-                    exams_to_process.add(exam)
-        
-        log_entries.append(f"Found {len(exams_to_process)} exams that need processing")
-        log_entries.append("")
-        
-        for exam in exams_to_process:
-            results['processed_exams'] += 1
-            log_entries.append(f"Processing Exam: {exam.name} (ID: {exam.id})")
-            log_entries.append(f"Course: {exam.course.code} - {exam.course.name}")
-            log_entries.append("-" * 60)
+        try:
+            # Exams with scores above their question maximum or with question maximums above the exam maximum
+            diagnostics = exam_score_diagnostics()
+            exams_to_process = [exam for exam in diagnostics
+                                if exam.invalid_count or (exam.question_count and exam.question_sum > exam.max_score)]
             
-            # STEP 1: Fix question scores if their sum exceeds exam max score
-            question_fix_result = fix_exam_question_scores(exam, log_entries)
-            if question_fix_result['questions_adjusted'] > 0:
-                results['total_questions_fixed'] += question_fix_result['questions_adjusted']
-                log_entries.append(f"  Fixed {question_fix_result['questions_adjusted']} question max scores")
+            log(f"Found {len([exam for exam in diagnostics if exam.invalid_count])} exams with invalid scores")
+            log()
+            log(f"Found {len(exams_to_process)} exams that need processing")
+            log()
             
-            # STEP 2: Get students with invalid scores in this exam (check again after question fixes)
-            students_with_invalid_scores = db.session.query(Student).join(
-                Score, Student.id == Score.student_id
-            ).join(
-                Question, Score.question_id == Question.id
-            ).filter(
-                Score.exam_id == exam.id,
-                Score.score > Question.max_score
-            ).distinct().all()
+            questions_by_exam = load_exam_questions([exam.id for exam in exams_to_process])
             
-            # STEP 3: Fix student scores using proportional distribution
-            for student in students_with_invalid_scores:
-                fix_result = fix_student_exam_scores(student, exam, log_entries)
-                if fix_result['fixed']:
-                    results['fixed_students'] += 1
-                    results['total_questions_fixed'] += fix_result['questions_fixed']
+            for exam in exams_to_process:
+                results['processed_exams'] += 1
+                timestamp = datetime.now()
+                questions = questions_by_exam.get(exam.id, [])
+                log(f"Processing Exam: {exam.name} (ID: {exam.id})")
+                log(f"Course: {exam.course_code} - {exam.course_name}")
+                log("-" * 60)
+                
+                # STEP 1: Fix question scores if their sum exceeds exam max score
+                question_fix_result = fix_exam_question_scores(exam, questions, log)
+                if question_fix_result['questions_adjusted'] > 0:
+                    results['total_questions_fixed'] += question_fix_result['questions_adjusted']
+                    log(f"  Fixed {question_fix_result['questions_adjusted']} question max scores")
+                    db.session.execute(QUESTION_MAX_UPDATE_SQL, [
+                        {'id': question['id'], 'max_score': float(question['max_score']), 'timestamp': timestamp}
+                        for question in questions if question['changed']
+                    ])
+                    # Continue with the stored two-decimal values
+                    for question in questions:
+                        question['max_score'] = question['max_score'].quantize(Decimal('0.01'))
+                
+                students = load_exam_scores(exam.id)
+                
+                # STEP 2 and 3: Fix students with scores above the (adjusted) question maximums
+                for student, scores in students:
+                    fix_result = fix_student_exam_scores(student, questions, scores, log)
+                    if fix_result['fixed']:
+                        results['fixed_students'] += 1
+                        results['total_questions_fixed'] += fix_result['questions_fixed']
+                
+                # STEP 4: Cap student scores that exceed exam max score
+                for student, scores in students:
+                    cap_result = cap_student_exam_total(student, exam, questions, scores, log)
+                    if cap_result['capped']:
+                        results['fixed_students'] += 1
+                
+                # Write the changed scores of the exam with one statement
+                updates = [{'id': score['id'], 'score': float(score['score']), 'timestamp': timestamp}
+                           for student, scores in students for score in scores if score['score'] != score['original']]
+                if updates:
+                    db.session.execute(SCORE_UPDATE_SQL, updates)
+                
+                log()
+                log_file.flush()
             
-            # STEP 4: Cap student scores that exceed exam max score
-            all_students_in_exam = db.session.query(Student).join(
-                Score, Student.id == Score.student_id
-            ).filter(
-                Score.exam_id == exam.id
-            ).distinct().all()
+            # Commit all changes
+            invalidate_course_results({exam.course_id for exam in exams_to_process})
+            db.session.commit()
             
-            for student in all_students_in_exam:
-                cap_result = cap_student_exam_total(student, exam, log_entries)
-                if cap_result['capped']:
-                    results['fixed_students'] += 1
+            log("Summary:")
+            log(f"- Fixed students: {results['fixed_students']}")
+            log(f"- Total questions adjusted: {results['total_questions_fixed']}")
+            log(f"- Processed exams: {results['processed_exams']}")
             
-            log_entries.append("")
-        
-        # Write log file
-        with open(log_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(log_entries))
-        
-        # Commit all changes
-        db.session.commit()
-        
-        log_entries.append(f"Summary:")
-        log_entries.append(f"- Fixed students: {results['fixed_students']}")
-        log_entries.append(f"- Total questions adjusted: {results['total_questions_fixed']}")
-        log_entries.append(f"- Processed exams: {results['processed_exams']}")
-        
-    except Exception as e:
-        db.session.rollback()
-        log_entries.append(f"ERROR: {str(e)}")
-        log_entries.append(traceback.format_exc())
-        
-        # Write error log
-        with open(log_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(log_entries))
-        
-        raise e
+        except Exception as e:
+            db.session.rollback()
+            log(f"ERROR: {str(e)}")
+            log(traceback.format_exc())
+            raise e
     
     return results
 
-def cap_student_exam_total(student, exam, log_entries):
-    """Cap student's total exam score if it exceeds exam max score"""
+def cap_student_exam_total(student, exam, questions, scores, log):
+    """Cap student's total exam score if it exceeds exam max score (updates the score dicts)"""
     result = {
         'capped': False,
         'original_total': Decimal('0'),
@@ -247,31 +286,19 @@ def cap_student_exam_total(student, exam, log_entries):
     }
     
     try:
-        # Get all questions for this exam
-        questions = Question.query.filter_by(exam_id=exam.id).order_by(Question.number).all()
-        
-        if not questions:
-            return result
-        
-        # Get all scores for this student in this exam
-        scores = Score.query.filter_by(
-            student_id=student.id,
-            exam_id=exam.id
-        ).all()
-        
-        if not scores:
+        if not questions or not scores:
             return result
         
         # Calculate current total
-        current_total = sum(score.score for score in scores)
+        current_total = sum(score['score'] for score in scores)
         result['original_total'] = current_total
         
         # Check if total exceeds exam max score
         if current_total > exam.max_score:
-            log_entries.append(f"  Student {student.student_id}: Total score {current_total} exceeds exam max {exam.max_score}")
+            log(f"  Student {student['student_id']}: Total score {current_total} exceeds exam max {exam.max_score}")
             
             # Create mapping of question_id to score
-            score_map = {score.question_id: score for score in scores}
+            score_map = {score['question_id']: score for score in scores}
             
             # Use integer-based proportional reduction to cap at exam max score
             reduction_factor = float(exam.max_score) / float(current_total)
@@ -279,85 +306,55 @@ def cap_student_exam_total(student, exam, log_entries):
             exam_max_int = int(exam.max_score)
             
             # Apply integer-based proportional reduction to all scores except the last one
-            for i in range(len(questions) - 1):
-                question = questions[i]
-                if question.id in score_map:
-                    old_score = score_map[question.id].score
+            for question in questions[:-1]:
+                if question['id'] in score_map:
+                    old_score = score_map[question['id']]['score']
                     
                     # Calculate proportional integer score
                     proportional_score = float(old_score) * reduction_factor
                     new_score_int = max(0, int(round(proportional_score)))
                     
                     # Ensure score doesn't exceed question max
-                    question_max_int = int(question.max_score)
-                    if new_score_int > question_max_int:
-                        new_score_int = question_max_int
+                    new_score_int = min(new_score_int, int(question['max_score']))
                     
-                    new_score = Decimal(str(new_score_int))
-                    score_map[question.id].score = new_score
-                    score_map[question.id].updated_at = datetime.now()
+                    score_map[question['id']]['score'] = Decimal(str(new_score_int))
                     distributed_sum_so_far += new_score_int
             
-            # Handle the last question - gets the remainder
-            if len(questions) > 0:
-                last_question = questions[-1]
-                if last_question.id in score_map:
-                    old_score = score_map[last_question.id].score
-                    
-                    # Last question gets whatever is left to reach exam max
-                    remaining_score = max(0, exam_max_int - distributed_sum_so_far)
-                    
-                    # Ensure score doesn't exceed question max
-                    question_max_int = int(last_question.max_score)
-                    if remaining_score > question_max_int:
-                        remaining_score = question_max_int
-                    
-                    new_score = Decimal(str(remaining_score))
-                    score_map[last_question.id].score = new_score
-                    score_map[last_question.id].updated_at = datetime.now()
+            # Handle the last question - gets whatever is left to reach exam max
+            last_question = questions[-1]
+            if last_question['id'] in score_map:
+                remaining_score = max(0, exam_max_int - distributed_sum_so_far)
+                remaining_score = min(remaining_score, int(last_question['max_score']))
+                score_map[last_question['id']]['score'] = Decimal(str(remaining_score))
             
             # Calculate new total
-            new_total = sum(score.score for score in scores)
+            new_total = sum(score['score'] for score in scores)
             result['new_total'] = new_total
             result['capped'] = True
             
-            log_entries.append(f"    Capped total score: {current_total} → {new_total}")
+            log(f"    Capped total score: {current_total} → {new_total}")
         else:
             result['new_total'] = current_total
     
     except Exception as e:
-        log_entries.append(f"  ERROR capping student {student.student_id} total: {str(e)}")
-        logging.error(f"Error capping student {student.student_id} total for exam {exam.id}: {str(e)}")
+        log(f"  ERROR capping student {student['student_id']} total: {str(e)}")
+        logging.error(f"Error capping student {student['student_id']} total for exam {exam.id}: {str(e)}")
     
     return result
 
-def fix_student_exam_scores(student, exam, log_entries):
-    """Fix scores for a specific student in a specific exam using proportional distribution"""
+def fix_student_exam_scores(student, questions, scores, log):
+    """Fix scores for a specific student in a specific exam using proportional distribution (updates the score dicts)"""
     result = {
         'fixed': False,
         'questions_fixed': 0
     }
     
     try:
-        # Get all questions for this exam
-        questions = Question.query.filter_by(exam_id=exam.id).order_by(Question.number).all()
-        
-        if not questions:
-            log_entries.append(f"  No questions found for exam {exam.id}")
-            return result
-        
-        # Get all scores for this student in this exam
-        scores = Score.query.filter_by(
-            student_id=student.id,
-            exam_id=exam.id
-        ).all()
-        
-        if not scores:
-            log_entries.append(f"  No scores found for student {student.student_id}")
+        if not questions or not scores:
             return result
         
         # Create mapping of question_id to score
-        score_map = {score.question_id: score for score in scores}
+        score_map = {score['question_id']: score for score in scores}
         
         # Check if student has any invalid scores
         has_invalid_scores = False
@@ -365,98 +362,86 @@ def fix_student_exam_scores(student, exam, log_entries):
         invalid_questions = []
         
         for question in questions:
-            if question.id in score_map:
-                score = score_map[question.id].score
+            if question['id'] in score_map:
+                score = score_map[question['id']]['score']
                 current_total += score
-                if score > question.max_score:
+                if score > question['max_score']:
                     has_invalid_scores = True
-                    invalid_questions.append(f"Q{question.number}: {score}/{question.max_score}")
+                    invalid_questions.append(f"Q{question['number']}: {score}/{question['max_score']}")
         
         if not has_invalid_scores:
             return result
         
-        log_entries.append(f"  Student: {student.student_id} - {student.first_name} {student.last_name or ''}")
-        log_entries.append(f"    Invalid questions: {', '.join(invalid_questions)}")
-        log_entries.append(f"    Previous total score: {current_total}")
+        log(f"  Student: {student['student_id']} - {student['first_name']} {student['last_name'] or ''}")
+        log(f"    Invalid questions: {', '.join(invalid_questions)}")
+        log(f"    Previous total score: {current_total}")
         
         # Calculate maximum possible total
-        max_possible_total = sum(q.max_score for q in questions)
+        max_possible_total = sum(question['max_score'] for question in questions)
         
         # Cap the target total at the maximum possible score and convert to integer
         target_total_decimal = min(current_total, max_possible_total)
         target_total_int = int(round(float(target_total_decimal)))
         max_possible_int = int(max_possible_total)
         
-        log_entries.append(f"    Target total score: {target_total_int} (max possible: {max_possible_int})")
+        log(f"    Target total score: {target_total_int} (max possible: {max_possible_int})")
         
         # Use integer-based proportional distribution
         distributed_sum_so_far = 0
         new_scores = {}
         
         # Distribute scores for all questions proportionally, except the last one
-        for i in range(len(questions) - 1):
-            question = questions[i]
-            
+        for question in questions[:-1]:
             # Calculate proportional integer score: (question_max / total_max) * target_total
             if max_possible_int > 0:
-                proportional_score = (float(question.max_score) / float(max_possible_total)) * target_total_int
+                proportional_score = (float(question['max_score']) / float(max_possible_total)) * target_total_int
                 q_score_int = max(0, int(round(proportional_score)))
             else:
                 q_score_int = 0
             
             # Ensure score doesn't exceed question max
-            question_max_int = int(question.max_score)
-            if q_score_int > question_max_int:
-                q_score_int = question_max_int
-            
-            q_score = Decimal(str(q_score_int))
-            new_scores[question.id] = q_score
+            q_score_int = min(q_score_int, int(question['max_score']))
+            new_scores[question['id']] = Decimal(str(q_score_int))
             distributed_sum_so_far += q_score_int
         
         # Calculate the score for the last question - gets the remainder
         last_question = questions[-1]
         last_q_score_int = max(0, target_total_int - distributed_sum_so_far)
-        
-        # Ensure last question score doesn't exceed max
-        last_question_max_int = int(last_question.max_score)
-        if last_q_score_int > last_question_max_int:
-            last_q_score_int = last_question_max_int
-        
-        new_scores[last_question.id] = Decimal(str(last_q_score_int))
+        last_q_score_int = min(last_q_score_int, int(last_question['max_score']))
+        new_scores[last_question['id']] = Decimal(str(last_q_score_int))
         
         # Calculate new total
         new_total = sum(new_scores.values())
         
-        # Update scores in database and log changes
+        # Update the scores and log changes
         changes_made = []
         for question in questions:
-            if question.id in score_map and question.id in new_scores:
-                old_score = score_map[question.id].score
-                new_score = new_scores[question.id]
+            if question['id'] in score_map:
+                old_score = score_map[question['id']]['score']
+                new_score = new_scores[question['id']]
                 
                 if old_score != new_score:
-                    score_map[question.id].score = new_score
-                    score_map[question.id].updated_at = datetime.now()
-                    changes_made.append(f"Q{question.number}: {old_score} → {new_score}")
+                    score_map[question['id']]['score'] = new_score
+                    changes_made.append(f"Q{question['number']}: {old_score} → {new_score}")
                     result['questions_fixed'] += 1
         
         if changes_made:
-            log_entries.append(f"    Changes made: {', '.join(changes_made)}")
-            log_entries.append(f"    New total score: {new_total}")
+            log(f"    Changes made: {', '.join(changes_made)}")
+            log(f"    New total score: {new_total}")
             result['fixed'] = True
         else:
-            log_entries.append(f"    No changes needed")
+            log(f"    No changes needed")
         
-        log_entries.append("")
+        log()
         
     except Exception as e:
-        log_entries.append(f"  ERROR fixing student {student.student_id}: {str(e)}")
-        logging.error(f"Error fixing student {student.student_id}: {str(e)}")
+        log(f"  ERROR fixing student {student['student_id']}: {str(e)}")
+        logging.error(f"Error fixing student {student['student_id']}: {str(e)}")
     
     return result
 
-def fix_exam_question_scores(exam, log_entries):
-    """Fix question max scores if their sum exceeds exam max score"""
+def fix_exam_question_scores(exam, questions, log):
+    """Fix question max scores if their sum exceeds exam max score (updates the question dicts)"""
     result = {
         'questions_adjusted': 0,
         'original_total': Decimal('0'),
@@ -464,22 +449,22 @@ def fix_exam_question_scores(exam, log_entries):
     }
     
     try:
-        # Get all questions for this exam
-        questions = Question.query.filter_by(exam_id=exam.id).order_by(Question.number).all()
+        for question in questions:
+            question['changed'] = False
         
         if not questions:
             return result
         
         # Calculate sum of question max scores
-        question_scores_sum = sum(q.max_score for q in questions)
+        question_scores_sum = sum(question['max_score'] for question in questions)
         exam_max_score = exam.max_score
         
         result['original_total'] = question_scores_sum
         
         # Check if question scores sum exceeds exam max score
         if question_scores_sum > exam_max_score:
-            log_entries.append(f"    Question scores sum ({question_scores_sum}) exceeds exam max score ({exam_max_score})")
-            log_entries.append(f"    Adjusting question scores proportionally...")
+            log(f"    Question scores sum ({question_scores_sum}) exceeds exam max score ({exam_max_score})")
+            log(f"    Adjusting question scores proportionally...")
             
             # Calculate reduction factor and convert to float
             reduction_factor = float(exam_max_score) / float(question_scores_sum)
@@ -488,9 +473,8 @@ def fix_exam_question_scores(exam, log_entries):
             distributed_sum_so_far = 0
             exam_max_int = int(exam_max_score)
             
-            for i in range(len(questions) - 1):
-                question = questions[i]
-                old_max_score = question.max_score
+            for question in questions[:-1]:
+                old_max_score = question['max_score']
                 
                 # Calculate proportional integer score
                 proportional_score = float(old_max_score) * reduction_factor
@@ -498,38 +482,35 @@ def fix_exam_question_scores(exam, log_entries):
                 new_max_score = Decimal(str(new_max_int))
                 
                 if old_max_score != new_max_score:
-                    question.max_score = new_max_score
-                    question.updated_at = datetime.now()
-                    log_entries.append(f"      Q{question.number}: {old_max_score} → {new_max_score}")
+                    question['max_score'] = new_max_score
+                    question['changed'] = True
+                    log(f"      Q{question['number']}: {old_max_score} → {new_max_score}")
                     result['questions_adjusted'] += 1
                 
                 distributed_sum_so_far += new_max_int
             
-            # Handle the last question - gets the remainder
-            if len(questions) > 0:
-                last_question = questions[-1]
-                old_max_score = last_question.max_score
-                
-                # Last question gets whatever is left to make total equal exam max
-                remaining_score = max(1, exam_max_int - distributed_sum_so_far)
-                new_max_score = Decimal(str(remaining_score))
-                
-                if old_max_score != new_max_score:
-                    last_question.max_score = new_max_score
-                    last_question.updated_at = datetime.now()
-                    log_entries.append(f"      Q{last_question.number}: {old_max_score} → {new_max_score}")
-                    result['questions_adjusted'] += 1
+            # Handle the last question - gets whatever is left to make total equal exam max
+            last_question = questions[-1]
+            old_max_score = last_question['max_score']
+            remaining_score = max(1, exam_max_int - distributed_sum_so_far)
+            new_max_score = Decimal(str(remaining_score))
+            
+            if old_max_score != new_max_score:
+                last_question['max_score'] = new_max_score
+                last_question['changed'] = True
+                log(f"      Q{last_question['number']}: {old_max_score} → {new_max_score}")
+                result['questions_adjusted'] += 1
             
             # Calculate new total
-            new_question_scores_sum = sum(q.max_score for q in questions)
+            new_question_scores_sum = sum(question['max_score'] for question in questions)
             result['new_total'] = new_question_scores_sum
-            log_entries.append(f"    New question scores sum: {new_question_scores_sum}")
+            log(f"    New question scores sum: {new_question_scores_sum}")
         else:
             result['new_total'] = question_scores_sum
-            log_entries.append(f"    Question scores sum ({question_scores_sum}) is within exam max score ({exam_max_score})")
+            log(f"    Question scores sum ({question_scores_sum}) is within exam max score ({exam_max_score})")
     
     except Exception as e:
-        log_entries.append(f"    ERROR adjusting question scores: {str(e)}")
+        log(f"    ERROR adjusting question scores: {str(e)}")
         logging.error(f"Error adjusting question scores for exam {exam.id}: {str(e)}")
     
     return result
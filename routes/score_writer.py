@@ -0,0 +1,215 @@
+"""
+Set-based writes of scores and exam attendance.
+
+Scores are written with SQLite's native upsert (INSERT ... ON CONFLICT DO
+UPDATE) keyed on the unique (student_id, question_id, exam_id) constraint of
+the score table, so a whole import is a single executemany statement instead
+of one query (and one ORM object) per score. Attendance has no unique key, so
+it is written with one executemany UPDATE for the students that already have
+a record and one executemany INSERT for the others. Edits of the score grid
+are validated against one snapshot of the exam and applied the same way.
+
+The functions only execute statements on db.session; the caller owns the
+transaction (commit/rollback) so scores, attendance and the result cache
+invalidation are committed together.
+"""
+
+import logging
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy.sql import text
+from app import db
+from models import Exam, Question, Student, StudentExamAttendance
+
+# Native SQLite upsert (needs SQLite 3.24+ and the unique constraint on score)
+SCORE_UPSERT_SQL = text("""
+    INSERT INTO score (score, student_id, question_id, exam_id, created_at, updated_at)
+    VALUES (:score, :student_id, :question_id, :exam_id, :created_at, :updated_at)
+    ON CONFLICT (student_id, question_id, exam_id)
+    DO UPDATE SET score = excluded.score, updated_at = excluded.updated_at
+""")
+
+SCORE_DELETE_SQL = text("""
+    DELETE FROM score WHERE student_id = :student_id AND question_id = :question_id AND exam_id = :exam_id
+""")
+
+ATTENDANCE_UPDATE_SQL = text("""
+    UPDATE student_exam_attendance
+    SET attended = :attended, updated_at = :updated_at
+    WHERE student_id = :student_id AND exam_id = :exam_id
+""")
+
+ATTENDANCE_INSERT_SQL = text("""
+    INSERT INTO student_exam_attendance (student_id, exam_id, attended, created_at, updated_at)
+    VALUES (:student_id, :exam_id, :attended, :created_at, :updated_at)
+""")
+
+
+def upsert_scores(score_rows, timestamp=None):
+    """
+    Insert or update scores in one executemany statement.
+
+    Args:
+        score_rows: Iterable of dicts with student_id, question_id, exam_id and score
+        timestamp: created_at/updated_at value (defaults to now)
+
+    Returns:
+        Number of rows written
+    """
+    timestamp = timestamp or datetime.now()
+    parameters = [
+        {
+            # Convert Decimal to float for SQLite compatibility (same as the auto-save)
+            'score': float(row['score']),
+            'student_id': row['student_id'],
+            'question_id': row['question_id'],
+            'exam_id': row['exam_id'],
+            'created_at': timestamp,
+            'updated_at': timestamp
+        }
+        for row in score_rows
+    ]
+    if parameters:
+        db.session.execute(SCORE_UPSERT_SQL, parameters)
+        logging.debug(f"Upserted {len(parameters)} scores")
+    return len(parameters)
+
+
+def load_attendance(exam_id):
+    """Attendance snapshot of an exam: {student db id: attended}"""
+    rows = db.session.query(StudentExamAttendance.student_id, StudentExamAttendance.attended).filter(
+        StudentExamAttendance.exam_id == exam_id
+    ).all()
+    return {student_id: attended for student_id, attended in rows}
+
+
+def write_attendance(exam_id, student_ids, attended, attendance=None, timestamp=None):
+    """
+    Set the attendance of many students for an exam in two executemany statements.
+
+    Args:
+        exam_id: Exam ID
+        student_ids: Student database IDs to update
+        attended: New attendance flag
+        attendance: Snapshot from load_attendance (loaded when not given); updated in place
+        timestamp: created_at/updated_at value (defaults to now)
+
+    Returns:
+        Number of students written
+    """
+    if attendance is None:
+        attendance = load_attendance(exam_id)
+    timestamp = timestamp or datetime.now()
+
+    updates = []
+    inserts = []
+    for student_id in dict.fromkeys(student_ids):
+        parameters = {'student_id': student_id, 'exam_id': exam_id, 'attended': bool(attended), 'updated_at': timestamp}
+        if student_id in attendance:
+            updates.append(parameters)
+        else:
+            parameters['created_at'] = timestamp
+            inserts.append(parameters)
+        attendance[student_id] = bool(attended)
+
+    if updates:
+        db.session.execute(ATTENDANCE_UPDATE_SQL, updates)
+    if inserts:
+        db.session.execute(ATTENDANCE_INSERT_SQL, inserts)
+    return len(updates) + len(inserts)
+
+
+def apply_score_edits(exam_id, edits, allow_exceed_max=False):
+    """
+    Validate and write a batch of score grid edits.
+
+    All edits are validated against one snapshot of the exam's questions, the
+    course's students and the exam attendance, then written with one executemany
+    upsert and one executemany delete. When the same cell is edited more than
+    once, the last edit wins.
+
+    Args:
+        exam_id: Exam ID
+        edits: List of dicts with student_id, question_id and score ('' or None clears the cell)
+        allow_exceed_max: Keep scores above the question's max score instead of capping them
+
+    Returns:
+        List with one status dict per edit: student_id, question_id, success and
+        either the saved score (None when cleared) or an error message
+    """
+    exam = db.session.get(Exam, exam_id)
+    if exam is None:
+        return [dict(_edit_key(edit), success=False, error='Exam not found') for edit in edits]
+
+    # One snapshot of everything the edits are validated against
+    max_scores = dict(db.session.query(Question.id, Question.max_score).filter(Question.exam_id == exam_id).all())
+    course_students = {student_id for (student_id,) in db.session.query(Student.id).filter(Student.course_id == exam.course_id)}
+    attendance = load_attendance(exam_id)
+
+    results = []
+    cells = {}  # (student_id, question_id) -> score value or None (delete)
+    for edit in edits:
+        result = _edit_key(edit)
+        results.append(result)
+        try:
+            student_id = int(edit['student_id'])
+            question_id = int(edit['question_id'])
+        except (KeyError, TypeError, ValueError):
+            result.update(success=False, error='Missing required data')
+            continue
+
+        if question_id not in max_scores:
+            result.update(success=False, error='Question not found')
+            continue
+        if student_id not in course_students:
+            result.update(success=False, error='Student not found')
+            continue
+        # Students without an attendance record attended the exam
+        if not attendance.get(student_id, True):
+            result.update(success=False, error='Student did not attend the exam')
+            continue
+
+        score_value = edit.get('score', '')
+        if score_value is None or score_value == '':
+            cells[(student_id, question_id)] = None
+            result.update(success=True, score=None)
+            continue
+
+        try:
+            score_value = Decimal(str(score_value))
+            if not score_value.is_finite():
+                raise InvalidOperation
+        except (ValueError, InvalidOperation):
+            result.update(success=False, error='Invalid score value')
+            continue
+
+        max_score = max_scores[question_id]
+        if score_value < 0:
+            score_value = Decimal('0')
+        elif score_value > max_score and not allow_exceed_max:
+            score_value = max_score
+
+        cells[(student_id, question_id)] = score_value
+        result.update(success=True, score=float(score_value))
+
+    upserts = [
+        {'student_id': student_id, 'question_id': question_id, 'exam_id': exam_id, 'score': score}
+        for (student_id, question_id), score in cells.items() if score is not None
+    ]
+    deletes = [
+        {'student_id': student_id, 'question_id': question_id, 'exam_id': exam_id}
+        for (student_id, question_id), score in cells.items() if score is None
+    ]
+    upsert_scores(upserts)
+    if deletes:
+        db.session.execute(SCORE_DELETE_SQL, deletes)
+    logging.debug(f"Applied {len(edits)} score edits for exam {exam_id}: {len(upserts)} saved, {len(deletes)} cleared")
+    return results
+
+
+def _edit_key(edit):
+    """The cell identifiers echoed back in an edit's status"""
+    if not isinstance(edit, dict):
+        return {'student_id': None, 'question_id': None}
+    return {'student_id': edit.get('student_id'), 'question_id': edit.get('question_id')}
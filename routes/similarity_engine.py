@@ -0,0 +1,269 @@
+"""
+Course outcome similarity engine for /calculation/cross_course_outcomes.
+
+The page groups course outcomes whose lower-cased descriptions have a
+Jaro-Winkler similarity of at least the chosen threshold. Comparing every
+description with every other one is quadratic, so the scores are kept in the
+database and only computed for pairs that can plausibly reach the threshold:
+
+1. Descriptions are identified by the sha1 of their lower-cased text, so the
+   same text in several courses is scored once (identical texts score 1.0)
+2. A character trigram inverted index proposes candidate pairs: two texts are
+   only scored when they share at least BLOCKING_OVERLAP of the trigrams of
+   the larger text (prefix filtering keeps the index lookups small)
+3. Candidate pairs are scored with jellyfish, in worker processes when
+   SIMILARITY_WORKERS > 1 and there are enough pairs
+4. Scores of at least the requested threshold are stored in outcome_similarity
+   and every description remembers the lowest threshold it was scored for
+   (outcome_description.covered_similarity)
+
+A later request with the same or a higher threshold groups the outcomes from
+the stored scores without computing any similarity. A lower threshold (or a
+new description) only scores the pairs of the descriptions not yet covered.
+Descriptions that are no longer used are removed together with their scores.
+"""
+
+import hashlib
+import logging
+import math
+import multiprocessing
+from collections import defaultdict
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import text
+from app import db
+from models import OutcomeDescription, OutcomeSimilarity
+
+NGRAM_SIZE = 3
+
+# Minimum share of the larger text's trigrams two texts must have in common to be scored,
+# by threshold. Measured on course outcome style sentences: pairs scoring >= 0.9 shared at
+# least ~70% of their trigrams and pairs scoring >= 0.8 at least ~7%. Below 0.8 almost all
+# sentence pairs reach the threshold, so every pair is scored.
+BLOCKING_OVERLAP = ((0.9, 0.3), (0.8, 0.05))
+
+# Pairs scored per worker task and the minimum number of pairs worth starting worker processes for
+SCORE_CHUNK_SIZE = 20000
+PARALLEL_MIN_PAIRS = 50000
+
+UPSERT_DESCRIPTION_SQL = text("""
+    INSERT INTO outcome_description (description_hash, description, covered_similarity, updated_at)
+    VALUES (:description_hash, :description, :covered_similarity, :timestamp)
+    ON CONFLICT(description_hash) DO UPDATE SET
+        covered_similarity = excluded.covered_similarity, updated_at = excluded.updated_at
+""")
+INSERT_SIMILARITY_SQL = text(
+    "INSERT OR REPLACE INTO outcome_similarity (hash_a, hash_b, similarity) VALUES (:hash_a, :hash_b, :similarity)"
+)
+DELETE_DESCRIPTION_SQL = text("DELETE FROM outcome_description WHERE description_hash = :description_hash")
+DELETE_SIMILARITY_SQL = text("DELETE FROM outcome_similarity WHERE hash_a = :description_hash OR hash_b = :description_hash")
+
+
+def description_key(description):
+    """Lower-cased description (the text that is compared) and its sha1"""
+    lowered = (description or '').lower()
+    return lowered, hashlib.sha1(lowered.encode('utf-8')).hexdigest()
+
+
+def description_ngrams(lowered, size=NGRAM_SIZE):
+    """Character n-grams of a padded text (short texts give at least one n-gram)"""
+    padded = f" {lowered} "
+    if len(padded) <= size:
+        return {padded}
+    return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+
+def blocking_overlap(threshold):
+    """Trigram overlap required for scoring a pair at the given threshold (0 scores every pair)"""
+    for minimum_threshold, overlap in BLOCKING_OVERLAP:
+        if threshold >= minimum_threshold:
+            return overlap
+    return 0.0
+
+
+def candidate_pairs(pending, texts, overlap):
+    """
+    Pairs (hash_a, hash_b) with hash_a < hash_b to score: every pending hash
+    against every hash of texts, keeping pairs that share at least `overlap`
+    of the larger text's n-grams.
+    """
+    hashes = sorted(texts)
+    pending = set(pending)
+    pairs = set()
+    if overlap <= 0:
+        for pending_hash in pending:
+            pairs.update((min(pending_hash, other), max(pending_hash, other))
+                         for other in hashes if other != pending_hash)
+        return sorted(pairs)
+
+    grams = {description_hash: description_ngrams(texts[description_hash]) for description_hash in hashes}
+    postings = defaultdict(list)
+    for description_hash in hashes:
+        for gram in grams[description_hash]:
+            postings[gram].append(description_hash)
+    # n-gram sets as bit masks: the shared n-grams of two texts are one AND and a bit count
+    gram_bits = {gram: 1 << position for position, gram in enumerate(postings)}
+    masks = {description_hash: sum(gram_bits[gram] for gram in grams[description_hash]) for description_hash in hashes}
+
+    for pending_hash in pending:
+        pending_grams = grams[pending_hash]
+        pending_mask = masks[pending_hash]
+        # A pair sharing k n-grams shares one of any len - k + 1 of them: look up the rarest ones only
+        required = math.ceil(overlap * len(pending_grams))
+        prefix = sorted(pending_grams, key=lambda gram: (len(postings[gram]), gram))[:len(pending_grams) - required + 1]
+        seen = set()
+        for gram in prefix:
+            for other in postings[gram]:
+                # Two pending texts are checked once, from the smaller hash (its own lookup is just as complete)
+                if other == pending_hash or other in seen or (other < pending_hash and other in pending):
+                    continue
+                seen.add(other)
+                shared = bin(pending_mask & masks[other]).count('1')  # int.bit_count() needs Python 3.10
+                if shared >= overlap * max(len(pending_grams), len(grams[other])):
+                    pairs.add((min(pending_hash, other), max(pending_hash, other)))
+    return sorted(pairs)
+
+
+def _score_chunk(chunk):
+    """Worker entry point: Jaro-Winkler similarity of each (text_a, text_b) pair"""
+    import jellyfish
+    return [jellyfish.jaro_winkler_similarity(text_a, text_b) for text_a, text_b in chunk]
+
+
+def score_pairs(pairs, texts, workers=0):
+    """Similarity of each pair, computed in worker processes for large batches when workers > 1"""
+    chunks = [[(texts[hash_a], texts[hash_b]) for hash_a, hash_b in pairs[start:start + SCORE_CHUNK_SIZE]]
+              for start in range(0, len(pairs), SCORE_CHUNK_SIZE)]
+    if workers > 1 and len(pairs) >= PARALLEL_MIN_PAIRS:
+        try:
+            # 'spawn' gives clean workers on every platform (no forked SQLAlchemy connections)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                return [score for chunk_scores in executor.map(_score_chunk, chunks) for score in chunk_scores]
+        except ImportError:
+            raise
+        except Exception as e:
+            logging.error(f"Parallel similarity scoring failed, falling back to serial: {str(e)}")
+    return [score for chunk in chunks for score in _score_chunk(chunk)]
+
+
+def ensure_similarity_tables():
+    """Create the similarity tables if the database predates them (e.g. after restoring an old backup)"""
+    for model in (OutcomeDescription, OutcomeSimilarity):
+        model.__table__.create(db.engine, checkfirst=True)
+
+
+def clear_similarity_scores():
+    """Forget every stored description and score (the next request scores from scratch)"""
+    ensure_similarity_tables()
+    db.session.execute(text("DELETE FROM outcome_similarity"))
+    db.session.execute(text("DELETE FROM outcome_description"))
+    db.session.commit()
+
+
+def update_similarity_scores(texts, threshold, workers=0):
+    """
+    Make sure every pair of texts ({hash: lower-cased description}) scoring at
+    least threshold is stored. Returns the number of pairs that were scored.
+    """
+    ensure_similarity_tables()
+    level = min(max(threshold, 0.0), 1.0)
+    covered = dict(db.session.query(OutcomeDescription.description_hash, OutcomeDescription.covered_similarity))
+
+    # Descriptions no longer used by any course outcome are dropped with their scores
+    stale = [{'description_hash': description_hash} for description_hash in covered if description_hash not in texts]
+    if stale:
+        db.session.execute(DELETE_SIMILARITY_SQL, stale)
+        db.session.execute(DELETE_DESCRIPTION_SQL, stale)
+
+    pending = [description_hash for description_hash in texts
+               if description_hash not in covered or covered[description_hash] > level]
+    if not pending:
+        if stale:
+            db.session.commit()
+        return 0
+
+    pairs = candidate_pairs(pending, texts, blocking_overlap(level))
+    stored = set()
+    if pairs:
+        pending_set = set(pending)
+        stored = {(row.hash_a, row.hash_b) for row in db.session.query(OutcomeSimilarity.hash_a, OutcomeSimilarity.hash_b)
+                  if row.hash_a in pending_set or row.hash_b in pending_set}
+    pairs = [pair for pair in pairs if pair not in stored]
+    scores = score_pairs(pairs, texts, workers)
+
+    rows = [{'hash_a': hash_a, 'hash_b': hash_b, 'similarity': score}
+            for (hash_a, hash_b), score in zip(pairs, scores) if score >= level]
+    if rows:
+        db.session.execute(INSERT_SIMILARITY_SQL, rows)
+    timestamp = datetime.now()
+    db.session.execute(UPSERT_DESCRIPTION_SQL, [
+        {'description_hash': description_hash, 'description': texts[description_hash],
+         'covered_similarity': level, 'timestamp': timestamp}
+        for description_hash in pending
+    ])
+    db.session.commit()
+    logging.info(f"Outcome similarity: scored {len(pairs)} pairs for {len(pending)} descriptions "
+                 f"(threshold {level}), stored {len(rows)}")
+    return len(pairs)
+
+
+def similar_description_hashes(threshold):
+    """{hash: set of hashes} of the stored pairs scoring at least threshold"""
+    neighbours = defaultdict(set)
+    rows = db.session.query(OutcomeSimilarity.hash_a, OutcomeSimilarity.hash_b).filter(
+        OutcomeSimilarity.similarity >= threshold)
+    for hash_a, hash_b in rows:
+        neighbours[hash_a].add(hash_b)
+        neighbours[hash_b].add(hash_a)
+    return neighbours
+
+
+def group_outcomes_by_similarity(course_outcomes, threshold, workers=0):
+    """
+    Group course outcomes like the page always did: in order, each outcome not
+    yet grouped collects every other ungrouped outcome whose description scores
+    at least threshold against its own; outcomes without a match stay alone.
+
+    Returns (groups, non-grouped outcomes, number of pairs scored by this call).
+    Each group is {'representative', 'outcomes', 'course_ids', 'courses'}.
+    """
+    keys = [description_key(outcome.description) for outcome in course_outcomes]
+    texts = {description_hash: lowered for lowered, description_hash in keys}
+    scored = update_similarity_scores(texts, threshold, workers)
+    neighbours = similar_description_hashes(threshold)
+
+    positions = defaultdict(list)
+    for position, (lowered, description_hash) in enumerate(keys):
+        positions[description_hash].append(position)
+
+    groups = []
+    processed = set()
+    for i, outcome1 in enumerate(course_outcomes):
+        if i in processed:
+            continue
+        lowered, description_hash = keys[i]
+        # Identical texts score 1.0 (jellyfish scores two empty texts 0.0)
+        candidates = list(positions[description_hash]) if threshold <= (1.0 if lowered else 0.0) else []
+        for other_hash in neighbours.get(description_hash, ()):
+            candidates.extend(positions.get(other_hash, ()))
+        similar = sorted(j for j in set(candidates) if j != i and j not in processed)
+        if not similar:
+            continue
+
+        group = {
+            'representative': outcome1,
+            'outcomes': [outcome1],
+            'course_ids': {outcome1.course_id},
+            'courses': [outcome1.course]
+        }
+        processed.add(i)
+        for j in similar:
+            outcome2 = course_outcomes[j]
+            group['outcomes'].append(outcome2)
+            group['course_ids'].add(outcome2.course_id)
+            group['courses'].append(outcome2.course)
+            processed.add(j)
+        groups.append(group)
+
+    non_grouped = [outcome for position, outcome in enumerate(course_outcomes) if position not in processed]
+    return groups, non_grouped, scored
@@ -9,15 +9,14 @@ import re
 from routes.utility_routes import export_to_excel_csv
 from decimal import Decimal, DivisionByZero, InvalidOperation, ROUND_HALF_UP
 from sqlalchemy.exc import IntegrityError
-import pandas as pd
-import numpy as np
 import json
 from sqlalchemy import and_, or_
 from werkzeug.utils import secure_filename
 import os
 from chardet import detect
 import traceback
-from sqlalchemy.sql import text
+from routes.result_cache import invalidate_course_results, invalidate_course_results_for_exam
+from routes.score_writer import upsert_scores, write_attendance, apply_score_edits
 
 student_bp = Blueprint('student', __name__, url_prefix='/student')
 
@@ -323,6 +322,7 @@ def import_students(course_id):
                     log = Log(action="IMPORT_STUDENTS", 
                              description=f"Imported {students_added} students to course: {course.code}")
                     db.session.add(log)
+                    invalidate_course_results(course.id)
                     
                     db.session.commit()
                     flash(f'Successfully imported {students_added} students', 'success')
@@ -399,6 +399,7 @@ def delete_student(student_id):
         db.session.add(log)
         
         db.session.delete(student)
+        invalidate_course_results(course_id)
         db.session.commit()
         flash(f'Student {student.student_id} deleted successfully', 'success')
     except Exception as e:
@@ -486,6 +487,7 @@ def manage_scores(exam_id):
                 description=f"Updated scores for exam: {exam.name} in course: {course.code}"
             )
             db.session.add(log)
+            invalidate_course_results(course.id)
             db.session.commit()
             
             flash('Scores updated successfully.', 'success')
@@ -520,108 +522,55 @@ def auto_save_score(exam_id):
         if not data or 'student_id' not in data or 'question_id' not in data:
             return jsonify({'success': False, 'error': 'Missing required data'})
         
-        student_id = int(data['student_id'])
-        question_id = int(data['question_id'])
-        score_value = data.get('score', '')
-        
-        # Check attendance and get question in a single query 
-        # to reduce database round-trips
-        attendance_status = db.session.query(
-            StudentExamAttendance.attended, 
-            Question.max_score
-        ).outerjoin(
-            StudentExamAttendance, 
-            db.and_(
-                StudentExamAttendance.student_id == student_id,
-                StudentExamAttendance.exam_id == exam_id
-            )
-        ).filter(
-            Question.id == question_id
-        ).first()
-        
-        if not attendance_status:
-            return jsonify({'success': False, 'error': 'Question not found'})
-            
-        # Extract values from the query result
-        attended = True if attendance_status[0] is None else attendance_status[0]
-        max_score = attendance_status[1]
-        
-        # If student didn't attend, don't save
-        if not attended:
-            return jsonify({'success': False, 'error': 'Student did not attend the exam'})
-        
-        # Handle empty score (delete if exists)
-        if score_value == '':
-            # Use direct SQL for faster deletion
-            db.session.execute(
-                text("DELETE FROM score WHERE student_id = :student_id AND question_id = :question_id AND exam_id = :exam_id"),
-                {"student_id": student_id, "question_id": question_id, "exam_id": exam_id}
-            )
-            db.session.commit()
-            return jsonify({'success': True})
+        result = apply_score_edits(exam_id, [data], allow_exceed_max=bool(data.get('allow_exceed_max_score', False)))[0]
+        if not result['success']:
+            db.session.rollback()
+            return jsonify({'success': False, 'error': result['error']})
         
-        # Convert and validate score
-        try:
-            score_value = Decimal(str(score_value))
-            
-            if score_value < 0:
-                score_value = Decimal('0')
-            elif score_value > max_score:
-                # Check if exceeding max score is allowed
-                allow_exceed_max = data.get('allow_exceed_max_score', False)
-                if not allow_exceed_max:
-                    score_value = max_score
-                
-        except (ValueError, InvalidOperation):
-            return jsonify({'success': False, 'error': 'Invalid score value'})
+        # Mark the course's cached outcome results as dirty in the same transaction
+        invalidate_course_results_for_exam(exam_id)
+        db.session.commit()
+        return jsonify({'success': True})
         
-        # Convert Decimal to float for SQLite compatibility
-        score_float = float(score_value)
-        current_time = datetime.now()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error auto-saving score: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)})
+
+@student_bp.route('/exam/<int:exam_id>/scores/auto-save-batch', methods=['POST'])
+def auto_save_scores_batch(exam_id):
+    """
+    Auto-save a batch of score grid edits via AJAX.
+    
+    Expects {"edits": [{"student_id", "question_id", "score"}, ...], "allow_exceed_max_score": bool}.
+    All edits are applied in one transaction; the response has one status per edit.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        edits = data.get('edits')
         
-        # Use upsert (insert or update) pattern for more efficiency
-        # First try to update existing score
-        result = db.session.execute(
-            text("""
-                UPDATE score 
-                SET score = :score, updated_at = :updated_at
-                WHERE student_id = :student_id 
-                  AND question_id = :question_id 
-                  AND exam_id = :exam_id
-            """),
-            {
-                "score": score_float,  # Use float instead of Decimal
-                "updated_at": current_time,
-                "student_id": student_id,
-                "question_id": question_id,
-                "exam_id": exam_id
-            }
-        )
+        if not isinstance(edits, list) or not edits:
+            return jsonify({'success': False, 'error': 'Missing required data', 'results': []})
         
-        # If no rows were updated, insert new score
-        if result.rowcount == 0:
-            db.session.execute(
-                text("""
-                    INSERT INTO score (score, student_id, question_id, exam_id, created_at, updated_at)
-                    VALUES (:score, :student_id, :question_id, :exam_id, :created_at, :updated_at)
-                """),
-                {
-                    "score": score_float,  # Use float instead of Decimal
-                    "student_id": student_id,
-                    "question_id": question_id,
-                    "exam_id": exam_id,
-                    "created_at": current_time,
-                    "updated_at": current_time
-                }
-            )
+        results = apply_score_edits(exam_id, edits, allow_exceed_max=bool(data.get('allow_exceed_max_score', False)))
+        saved = sum(1 for result in results if result['success'])
         
+        if saved:
+            # Mark the course's cached outcome results as dirty in the same transaction
+            invalidate_course_results_for_exam(exam_id)
         db.session.commit()
-        return jsonify({'success': True})
+        
+        return jsonify({
+            'success': saved == len(results),
+            'saved': saved,
+            'failed': len(results) - saved,
+            'results': results
+        })
         
     except Exception as e:
         db.session.rollback()
-        logging.error(f"Error auto-saving score: {str(e)}")
-        return jsonify({'success': False, 'error': str(e)})
+        logging.error(f"Error auto-saving score batch: {str(e)}")
+        return jsonify({'success': False, 'error': str(e), 'results': []})
 
 @student_bp.route('/exam/<int:exam_id>/import-scores', methods=['POST'])
 def import_scores(exam_id):
@@ -629,8 +578,9 @@ def import_scores(exam_id):
     exam = Exam.query.get_or_404(exam_id)
     course = Course.query.get_or_404(exam.course_id)
     
-    # Get all questions for this exam, indexed by number
+    # Get all questions for this exam, indexed by number (and by database ID for the write step)
     questions = {q.number: q for q in Question.query.filter_by(exam_id=exam_id).all()}
+    questions_by_id = {q.id: q for q in questions.values()}
     
     if not questions:
         flash('No questions found for this exam. Please add questions first.', 'warning')
@@ -803,6 +753,7 @@ def import_scores(exam_id):
             try:
                 # Use bulk insert for potentially better performance
                 db.session.bulk_insert_mappings(Student, temp_students_to_create)
+                invalidate_course_results(course.id)
                 db.session.commit()
                 flash(f"Successfully created {len(temp_students_to_create)} new students.", 'info')
                 
@@ -851,7 +802,10 @@ def import_scores(exam_id):
                 if not continue_on_errors: return redirect(url_for('student.manage_scores', exam_id=exam_id))
                 
     # Second pass: Process scores
+    # The whole file is parsed and validated against the in-memory question/student maps first;
+    # scores and attendance are written afterwards in a few set-based statements
     scores_to_add = []
+    absent_students = [] # Student database IDs to mark as not attended
     processed_students = set() # Track processed students per line to avoid duplicate processing
     
     for i, line in enumerate(lines, 1 if not header_row else 2):
@@ -880,11 +834,6 @@ def import_scores(exam_id):
             elif create_students and student_id_ext in student_id_map:
                  # Student was created in the first pass
                  student_db_id = student_id_map[student_id_ext]
-                 student = Student.query.get(student_db_id) # Get the actual student object
-                 if not student: # Should not happen, but safety check
-                      # Treat this as a warning, but skip this line's scores
-                      warnings.append(f"Line {i}: Could not retrieve newly created student {student_id_ext}. Scores for this line skipped.")
-                      continue
             else:
                  # Student not found and not created (or creation failed/disabled)
                  # Change this from an error to a warning and skip the line
@@ -909,25 +858,7 @@ def import_scores(exam_id):
                 if len(parts) < 2: # Need ID and Name minimum for this format, even if scores are missing
                      warnings.append(f"Line {i}, Student {student_id_ext}: Not enough data for detailed format (expected student ID and name). Raw line: {raw_line}. Student will be marked as not attended.")
                      # Mark student as not attended
-                     try:
-                         attendance_record = StudentExamAttendance.query.filter_by(
-                             student_id=student_db_id, 
-                             exam_id=exam_id
-                         ).first()
-                         
-                         if attendance_record:
-                             attendance_record.attended = False
-                         else:
-                             # Create new attendance record
-                             new_attendance = StudentExamAttendance(
-                                 student_id=student_db_id,
-                                 exam_id=exam_id,
-                                 attended=False
-                             )
-                             db.session.add(new_attendance)
-                         
-                     except Exception as e:
-                         warnings.append(f"Line {i}, Student {student_id_ext}: Could not update attendance: {str(e)}")
+                     absent_students.append(student_db_id)
                      continue
                 
                 score_data_parts = parts[2:] # Scores start from the 3rd element
@@ -1066,25 +997,7 @@ def import_scores(exam_id):
                     # Only student ID provided, no delimiter or score fields
                     warnings.append(f"Line {i}, Student {student_id_ext}: No delimiter or score fields found. Expected format: student_id<delimiter>score1<delimiter>score2... Raw line: {raw_line}. Student will be marked as not attended.")
                     # Mark student as not attended
-                    try:
-                        attendance_record = StudentExamAttendance.query.filter_by(
-                            student_id=student_db_id, 
-                            exam_id=exam_id
-                        ).first()
-                        
-                        if attendance_record:
-                            attendance_record.attended = False
-                        else:
-                            # Create new attendance record
-                            new_attendance = StudentExamAttendance(
-                                student_id=student_db_id,
-                                exam_id=exam_id,
-                                attended=False
-                            )
-                            db.session.add(new_attendance)
-                        
-                    except Exception as e:
-                        warnings.append(f"Line {i}, Student {student_id_ext}: Could not update attendance: {str(e)}")
+                    absent_students.append(student_db_id)
                     continue
                 
                 score_data_parts = parts[1:]  # Scores start from the 2nd element
@@ -1165,52 +1078,15 @@ def import_scores(exam_id):
                     if all_zeros:
                         warnings.append(f"Line {i}, Student {student_id_ext}: All scores are 0, student will be marked as not attended")
                         # Set attendance to False for this student
-                        try:
-                            attendance_record = StudentExamAttendance.query.filter_by(
-                                student_id=student_db_id, 
-                                exam_id=exam_id
-                            ).first()
-                            
-                            if attendance_record:
-                                attendance_record.attended = False
-                            else:
-                                # Create new attendance record
-                                new_attendance = StudentExamAttendance(
-                                    student_id=student_db_id,
-                                    exam_id=exam_id,
-                                    attended=False
-                                )
-                                db.session.add(new_attendance)
-                            
-                            # Don't add the zero scores to the database
-                            temp_line_scores = []
-                            
-                        except Exception as e:
-                            warnings.append(f"Line {i}, Student {student_id_ext}: Could not update attendance: {str(e)}")
+                        absent_students.append(student_db_id)
+                        # Don't add the zero scores to the database
+                        temp_line_scores = []
                 
                 # Handle case where student has no scores at all (empty after student_id)
                 elif not temp_line_scores:
                     warnings.append(f"Line {i}, Student {student_id_ext}: No scores provided, student will be marked as not entered the exam")
                     # Set attendance to False for this student
-                    try:
-                        attendance_record = StudentExamAttendance.query.filter_by(
-                            student_id=student_db_id, 
-                            exam_id=exam_id
-                        ).first()
-                        
-                        if attendance_record:
-                            attendance_record.attended = False
-                        else:
-                            # Create new attendance record
-                            new_attendance = StudentExamAttendance(
-                                student_id=student_db_id,
-                                exam_id=exam_id,
-                                attended=False
-                            )
-                            db.session.add(new_attendance)
-                        
-                    except Exception as e:
-                        warnings.append(f"Line {i}, Student {student_id_ext}: Could not update attendance: {str(e)}")
+                    absent_students.append(student_db_id)
                 
                 # Add the scores for this line
                 line_scores.extend(temp_line_scores)
@@ -1222,25 +1098,7 @@ def import_scores(exam_id):
                     # Only student ID provided, no delimiter or score field
                     warnings.append(f"Line {i}, Student {student_id_ext}: No delimiter or score field found. Expected format: student_id<delimiter>score or student_id<delimiter> (empty score). Raw line: {raw_line}. Student will be marked as not attended.")
                     # Mark student as not attended
-                    try:
-                        attendance_record = StudentExamAttendance.query.filter_by(
-                            student_id=student_db_id, 
-                            exam_id=exam_id
-                        ).first()
-                        
-                        if attendance_record:
-                            attendance_record.attended = False
-                        else:
-                            # Create new attendance record
-                            new_attendance = StudentExamAttendance(
-                                student_id=student_db_id,
-                                exam_id=exam_id,
-                                attended=False
-                            )
-                            db.session.add(new_attendance)
-                        
-                    except Exception as e:
-                        warnings.append(f"Line {i}, Student {student_id_ext}: Could not update attendance: {str(e)}")
+                    absent_students.append(student_db_id)
                     continue
                 
                 total_score_str = parts[1].strip().replace(',', '.')
@@ -1248,25 +1106,7 @@ def import_scores(exam_id):
                     # If total score string is empty, skip score processing for this student on this line.
                     warnings.append(f"Line {i}, Student {student_id_ext}: Empty total score provided. Raw line: {raw_line}. Student will be marked as not attended.")
                     # Mark student as not attended
-                    try:
-                        attendance_record = StudentExamAttendance.query.filter_by(
-                            student_id=student_db_id, 
-                            exam_id=exam_id
-                        ).first()
-                        
-                        if attendance_record:
-                            attendance_record.attended = False
-                        else:
-                            # Create new attendance record
-                            new_attendance = StudentExamAttendance(
-                                student_id=student_db_id,
-                                exam_id=exam_id,
-                                attended=False
-                            )
-                            db.session.add(new_attendance)
-                        
-                    except Exception as e:
-                        warnings.append(f"Line {i}, Student {student_id_ext}: Could not update attendance: {str(e)}")
+                    absent_students.append(student_db_id)
                     continue # Skip to the next line in the input file
                 else:
                     try:
@@ -1284,25 +1124,7 @@ def import_scores(exam_id):
                             # If not the first line, treat as a warning instead of error for better robustness
                             warnings.append(f"Line {i}, Student {student_id_ext}: Invalid total score format '{parts[1]}'. Raw line: {raw_line}. Student will be marked as not attended.")
                             # Mark student as not attended
-                            try:
-                                attendance_record = StudentExamAttendance.query.filter_by(
-                                    student_id=student_db_id, 
-                                    exam_id=exam_id
-                                ).first()
-                                
-                                if attendance_record:
-                                    attendance_record.attended = False
-                                else:
-                                    # Create new attendance record
-                                    new_attendance = StudentExamAttendance(
-                                        student_id=student_db_id,
-                                        exam_id=exam_id,
-                                        attended=False
-                                    )
-                                    db.session.add(new_attendance)
-                                
-                            except Exception as e:
-                                warnings.append(f"Line {i}, Student {student_id_ext}: Could not update attendance: {str(e)}")
+                            absent_students.append(student_db_id)
                             continue # Skip processing scores for this student on this line
                 
                 num_questions = len(questions)
@@ -1399,8 +1221,7 @@ def import_scores(exam_id):
                          warnings.append(f"Line {i}, Student {student_id_ext}: Final calculated total {final_total_check} does not exactly match target {target_total} due to capping/rounding adjustments.")
 
                     for question_id, final_score in final_scores_per_question.items():
-                        # Find the original question object again (could optimize by storing obj earlier)
-                        question = next((q for q in questions.values() if q.id == question_id), None)
+                        question = questions_by_id.get(question_id)
                         if question: # Should always find it
                             line_scores.append({
                                 'student_id': student_db_id,
@@ -1444,28 +1265,21 @@ def import_scores(exam_id):
         for warning in warnings:
             flash(warning, 'warning')
 
-    # Final step: Add scores to the database
-    if scores_to_add:
+    # Final step: Write scores and attendance to the database in one transaction
+    if scores_to_add or absent_students:
         try:
-            # Optional: Delete existing scores for the imported students first
-            # delete_existing = request.form.get('delete_existing') == 'on'
-            # if delete_existing:
-            #     student_ids_in_import = {s['student_id'] for s in scores_to_add}
-            #     if student_ids_in_import:
-            #         Score.query.filter(Score.exam_id == exam_id, Score.student_id.in_(student_ids_in_import)).delete(synchronize_session=False)
-            #         db.session.commit() # Commit deletion before adding new scores
-            
             scores_updated = 0
             scores_added = 0
-            db_errors = []
-            
-            # Get existing scores more efficiently using a dictionary lookup
-            existing_scores_query = Score.query.filter(Score.exam_id == exam_id)
-            existing_scores = {(s.student_id, s.question_id): s for s in existing_scores_query}
-            
-            scores_to_insert = []
-            scores_to_update = []
 
+            # Existing score values of this exam in one query: {(student_id, question_id): score}
+            existing_scores = {
+                (student_id, question_id): score
+                for student_id, question_id, score in db.session.query(
+                    Score.student_id, Score.question_id, Score.score
+                ).filter(Score.exam_id == exam_id)
+            }
+
+            scores_to_write = []
             processed_keys = set() # Ensure we don't try to insert/update the same student/question twice from the import list
 
             for score_data in scores_to_add:
@@ -1478,78 +1292,38 @@ def import_scores(exam_id):
                 processed_keys.add(score_key)
 
                 if score_key in existing_scores:
-                    # Update existing score
-                    existing_score = existing_scores[score_key]
                     # Only update if the score is different to minimize db writes
-                    if existing_score.score != score_data['score']:
-                         existing_score.score = score_data['score']
-                         existing_score.updated_at = datetime.now()
-                         scores_to_update.append(existing_score) # Can bulk update later if needed, or just rely on session tracking
+                    if existing_scores[score_key] != score_data['score']:
+                         scores_to_write.append(score_data)
                          scores_updated += 1
                     # If score is the same, do nothing for this entry
                 else:
-                    # Prepare new score for insertion
-                    # Ensure we don't add a score for a student that failed creation or wasn't found
-                    if score_data['student_id'] is not None:
-                         new_score = Score(
-                             score=score_data['score'],
-                             student_id=score_data['student_id'],
-                             question_id=score_data['question_id'],
-                             exam_id=exam_id
-                         )
-                         scores_to_insert.append(new_score)
-                         scores_added += 1
-                         # Add key to existing_scores conceptually to prevent duplicates within the same import batch if not using processed_keys
-                         # existing_scores[score_key] = new_score # Add placeholder or the object itself
-                    else:
-                         # This should be caught earlier, but safeguard
-                         db_errors.append(f"Attempted to add score for unknown student (Ext ID: {score_data['student_ext_id']}, Line: {score_data['line_number']})")
+                    scores_to_write.append(score_data)
+                    scores_added += 1
 
-            # Perform bulk insertion if possible
-            if scores_to_insert:
-                 try:
-                      db.session.bulk_save_objects(scores_to_insert)
-                 except Exception as e:
-                      db_errors.append(f"Error during bulk insertion: {str(e)}")
-                      # Rollback might be needed here depending on overall transaction strategy
-                      db.session.rollback() # Rollback bulk insert attempt
-                      # Optionally, attempt individual inserts if bulk fails and continue_on_errors
-                      if continue_on_errors:
-                           flash("Bulk insertion failed, attempting individual inserts...", 'warning')
-                           scores_added = 0 # Reset count
-                           for score_obj in scores_to_insert:
-                                try:
-                                     db.session.add(score_obj)
-                                     db.session.flush() # Flush to catch errors per object
-                                     scores_added += 1
-                                except Exception as e_ind:
-                                     db_errors.append(f"Error inserting score for Student Ext ID {score_data['student_ext_id']} Q{score_data['question_num']}: {str(e_ind)}")
-                                     db.session.rollback() # Rollback only the failed insert
-                                     db.session.begin() # Start a new transaction context if needed
-                           if scores_added > 0: db.session.commit() # Commit successful individual inserts
-                      else:
-                          # If not continuing, report error and stop
-                          flash(f"Database error during score insertion: {str(e)}. Import failed.", 'error')
-                          return redirect(url_for('student.manage_scores', exam_id=exam_id))
+            # One executemany upsert for the scores, two executemany statements for the attendance
+            now = datetime.now()
+            upsert_scores(scores_to_write, timestamp=now)
+            if absent_students:
+                write_attendance(exam_id, absent_students, False, timestamp=now)
 
+            invalidate_course_results(course.id)
 
-            # Commit all updates (tracked by the session) and successful inserts
+            if scores_to_add:
+                # Log action
+                log = Log(
+                    action="IMPORT_SCORES",
+                    description=f"Imported {scores_added} scores, updated {scores_updated} scores for exam: {exam.name} (Format: {import_format})."
+                )
+                db.session.add(log)
             db.session.commit()
+            logging.info(f"Score import for exam {exam_id}: {len(scores_to_write)} scores written, "
+                         f"{len(set(absent_students))} students marked as not attended")
 
-            # Log action
-            log = Log(
-                action="IMPORT_SCORES",
-                description=f"Imported {scores_added} scores, updated {scores_updated} scores for exam: {exam.name} (Format: {import_format})."
-            )
-            db.session.add(log)
-            db.session.commit()
-            
-            success_msg = f"Scores imported successfully: {scores_added} added, {scores_updated} updated."
-            if db_errors:
-                 flash(success_msg + " Some database errors occurred.", 'warning')
-                 for db_err in db_errors: flash(db_err, 'danger')
-            else:
-                 flash(success_msg, 'success')
+            if scores_to_add:
+                flash(f"Scores imported successfully: {scores_added} added, {scores_updated} updated.", 'success')
+            elif not errors:
+                flash("No valid score data found to import.", 'info')
                  
         except Exception as e:
             db.session.rollback()
@@ -1623,6 +1397,7 @@ def edit_student(student_id):
         log = Log(action="EDIT_STUDENT", 
                 description=f"Edited student {student_id_new} in course: {course.code}")
         db.session.add(log)
+        invalidate_course_results(course.id)
         
         try:
             db.session.commit()
@@ -1683,6 +1458,7 @@ def add_student(course_id):
                 description=f"Added student {student_id} to course: {course.code}")
         db.session.add(log)
         db.session.add(new_student)
+        invalidate_course_results(course.id)
         
         try:
             db.session.commit()
@@ -1748,6 +1524,7 @@ def mass_delete_students():
         log = Log(action="MASS_DELETE_STUDENTS", 
                  description=f"Deleted {deleted_count} students from course: {course.code}")
         db.session.add(log)
+        invalidate_course_results(course.id)
         
         try:
             db.session.commit()
@@ -1799,6 +1576,7 @@ def manage_attendance(exam_id):
                 description=f"Updated attendance for {exam.name} in course {course.code}"
             )
             db.session.add(log)
+            invalidate_course_results(course.id)
             db.session.commit()
             
             flash('Attendance updated successfully.', 'success')
@@ -1995,6 +1773,7 @@ def import_attendance(exam_id):
                         description=f"Imported attendance for {imported_count} students in {exam.name}"
                     )
                     db.session.add(log)
+                    invalidate_course_results(exam.course_id)
                     
                     db.session.commit()
                     
@@ -2051,6 +1830,7 @@ def update_attendance(exam_id):
             )
             db.session.add(attendance)
         
+        invalidate_course_results(exam.course_id)
         db.session.commit()
         return jsonify({'success': True})
         
@@ -2073,6 +1853,7 @@ def toggle_exclusion(student_id):
     log = Log(action=action, description=f"{action} {student.student_id}: {student.first_name} {student.last_name}")
     
     db.session.add(log)
+    invalidate_course_results(course_id)
     
     try:
         db.session.commit()
@@ -1,19 +1,27 @@
 from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, send_file, make_response
 from flask import current_app, Markup, stream_with_context # Added stream_with_context
 from app import db
-from models import Log, Course, Student, Exam, CourseOutcome, Question, Score, ExamWeight, StudentExamAttendance, ProgramOutcome, CourseSettings
+from models import Log, Course, Student, Exam, CourseOutcome, Question, ExamWeight, StudentExamAttendance, ProgramOutcome
 from datetime import datetime
 import logging
 import os
-import shutil
 import sqlite3
 import traceback
-import glob
 import csv
 import tempfile
 import io
 import json
 from sqlalchemy import text
+from routes.result_cache import invalidate_course_results
+from routes.backup_engine import (
+    create_database_backup, materialize_backup, delete_backup_file, is_backup_filename,
+    list_backup_files, restore_database_file, INCREMENTAL_BACKUP_EXTENSION
+)
+from routes.merge_engine import merge_courses_bulk, load_merge_snapshot, plan_course_merge
+from routes.ranking_engine import get_student_rankings, query_student_rankings
+from routes.contribution_index import get_contribution_index, contributions_page_data, contributions_api_data
+from routes.import_engine import attach_backup, detach_backup, import_backup_data, OPTIONAL_TABLES
+from db_performance import dispose_read_engine, apply_sqlite_pragmas
 from sqlalchemy.orm import Session
 import time
 from sqlalchemy.orm import scoped_session, sessionmaker
@@ -167,13 +175,8 @@ def backup_database():
                 backup_dir = current_app.config['BACKUP_FOLDER']
                 os.makedirs(backup_dir, exist_ok=True)
 
-                # Create backup filename with timestamp
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                backup_filename = f"accredit_data_backup_{timestamp}.db"
-                backup_path = os.path.join(backup_dir, backup_filename)
-
-                # Copy database file
-                shutil.copy2(db_path, backup_path)
+                # Online backup of the live database (.db, or .dbz with BACKUP_FORMAT=incremental)
+                backup_filename = create_database_backup(db_path, backup_dir, 'accredit_data_backup')
 
                 # Get and save the custom description
                 description = request.form.get('description', '').strip()
@@ -224,7 +227,7 @@ def backup_database():
                 descriptions = {}
 
         if os.path.exists(backup_dir):
-            backup_files = glob.glob(os.path.join(backup_dir, "*.db"))
+            backup_files = list_backup_files(backup_dir)
             for backup_file in backup_files:
                 filename = os.path.basename(backup_file)
                 created_at = os.path.getmtime(backup_file)
@@ -292,6 +295,17 @@ def download_backup(filename):
         db.session.add(log)
         db.session.commit()
 
+        # Incremental backups are downloaded as a plain SQLite database (rebuilt in a temporary file)
+        if filename.endswith(INCREMENTAL_BACKUP_EXTENSION):
+            fd, temp_path = tempfile.mkstemp(suffix='.db')
+            os.close(fd)
+            materialize_backup(backup_path, temp_path)
+            response = send_file(temp_path,
+                                as_attachment=True,
+                                download_name=filename[:-len(INCREMENTAL_BACKUP_EXTENSION)] + '.db')
+            response.call_on_close(lambda: os.remove(temp_path))
+            return response
+
         return send_file(backup_path,
                         as_attachment=True,
                         download_name=filename)
@@ -304,8 +318,8 @@ def download_backup(filename):
 def delete_backup(filename):
     """Delete a backup file"""
     try:
-        # Ensure filename is not empty and has .db extension
-        if not filename or not filename.endswith('.db'):
+        # Ensure filename is not empty and has a backup extension (.db or .dbz)
+        if not is_backup_filename(filename):
             return jsonify({'success': False, 'message': 'Invalid backup filename'})
 
         # Prevent directory traversal attacks
@@ -319,8 +333,8 @@ def delete_backup(filename):
         if not os.path.exists(backup_path):
             return jsonify({'success': False, 'message': f'Backup file {filename} not found'})
 
-        # Remove the file
-        os.remove(backup_path)
+        # Remove the file (incremental backups based on it are kept restorable)
+        delete_backup_file(backup_dir, filename)
 
         # Remove from descriptions file if exists
         descriptions_file = os.path.join(backup_dir, 'backup_descriptions.json')
@@ -384,8 +398,8 @@ def batch_delete_backups():
         failed_files = []
 
         for filename in filenames:
-            # Ensure filename is not empty and has .db extension
-            if not filename or not isinstance(filename, str) or not filename.endswith('.db'):
+            # Ensure filename is not empty and has a backup extension (.db or .dbz)
+            if not is_backup_filename(filename):
                 failed_count += 1
                 failed_files.append(filename)
                 continue
@@ -405,8 +419,8 @@ def batch_delete_backups():
                 continue
 
             try:
-                # Remove the file
-                os.remove(backup_path)
+                # Remove the file (incremental backups based on it are kept restorable)
+                delete_backup_file(backup_dir, filename)
 
                 # Remove from descriptions if exists
                 if filename in descriptions:
@@ -463,6 +477,7 @@ def refresh_database_session():
         try:
             engine = db.get_engine()
             engine.dispose()
+            dispose_read_engine()
         except Exception as e:
             logging.warning(f"Error disposing engine, continuing with refresh: {str(e)}")
 
@@ -476,6 +491,19 @@ def refresh_database_session():
             # Test if it worked
             if db.session.execute(text("SELECT 1")).scalar() == 1:
                 logging.info("Database session successfully refreshed")
+
+                # A restored database may predate the result cache or carry entries that
+                # belong to a different state of the data: recreate the tables and clear them
+                from routes.result_cache import ensure_result_cache_tables, invalidate_all_course_results
+                if ensure_result_cache_tables():
+                    invalidate_all_course_results()
+                    db.session.commit()
+                # The restored database may have another graduating students list
+                from routes.graduating_snapshot import invalidate_graduating_snapshot
+                invalidate_graduating_snapshot()
+                # Keep the job table so jobs still running can record their outcome
+                from routes.job_queue import ensure_job_table
+                ensure_job_table()
                 return True
             else:
                 logging.error("Failed to execute test query after session refresh")
@@ -521,17 +549,14 @@ def restore_database():
                 db_path = os.path.join('instance', 'accredit_data.db')
 
                 # Create a backup of current database before restore
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                pre_restore_backup = os.path.join(current_app.config['BACKUP_FOLDER'], f"pre_restore_backup_{timestamp}.db")
-
                 if os.path.exists(db_path):
-                    shutil.copy2(db_path, pre_restore_backup)
+                    create_database_backup(db_path, current_app.config['BACKUP_FOLDER'], 'pre_restore_backup')
 
                 # Close the current database connection
                 db.session.close()
 
-                # Copy the backup file to the database location
-                shutil.copy2(temp_path, db_path)
+                # Write the backup into the database through SQLite (safe in WAL mode)
+                restore_database_file(temp_path, db_path)
 
                 # Remove temporary file
                 os.remove(temp_path)
@@ -580,10 +605,8 @@ def restore_database():
                 descriptions = {}
 
         if os.path.exists(backup_dir):
-            backup_files = glob.glob(os.path.join(backup_dir, "accredit_data_backup_*.db"))
-            # Add pre-restore and pre-import backups to the list
-            backup_files.extend(glob.glob(os.path.join(backup_dir, "pre_restore_backup_*.db")))
-            backup_files.extend(glob.glob(os.path.join(backup_dir, "pre_import_backup_*.db")))
+            # Regular, pre-restore and pre-import backups (both formats)
+            backup_files = list_backup_files(backup_dir, prefixes=('accredit_data_backup_', 'pre_restore_backup_', 'pre_import_backup_'))
             for backup_file in backup_files:
                 filename = os.path.basename(backup_file)
                 created_at = os.path.getmtime(backup_file)
@@ -653,12 +676,9 @@ def restore_from_file():
         db_path = os.path.join('instance', 'accredit_data.db')
 
         # Create a backup of current database before restore
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        pre_restore_backup = os.path.join(current_app.config['BACKUP_FOLDER'], f"pre_restore_backup_{timestamp}.db")
-
         if os.path.exists(db_path):
-            shutil.copy2(db_path, pre_restore_backup)
-            flash(f'Created backup of current database before restore: pre_restore_backup_{timestamp}.db', 'info')
+            pre_restore_backup = create_database_backup(db_path, current_app.config['BACKUP_FOLDER'], 'pre_restore_backup')
+            flash(f'Created backup of current database before restore: {pre_restore_backup}', 'info')
 
         # Close all existing database connections to ensure clean restore
         db.session.close()
@@ -667,8 +687,8 @@ def restore_from_file():
 
         # Copy the backup file to the database location
         try:
-            # Use direct file copy for better performance
-            shutil.copy2(temp_path, db_path)
+            # Write the backup into the database through SQLite (safe in WAL mode)
+            restore_database_file(temp_path, db_path)
 
             # Remove temporary file
             os.remove(temp_path)
@@ -773,6 +793,49 @@ def recreate_indexes():
     
     return redirect(url_for('utility.index_status'))
 
+@utility_bp.route('/performance', methods=['GET', 'POST'])
+def performance():
+    """Per-request SQL profile: query counts, SQL/Python time and slowest statements per endpoint"""
+    from sql_profiler import get_sql_profiler
+
+    profiler = get_sql_profiler()
+    if profiler is None:
+        flash('SQL profiler not available', 'error')
+        return redirect(url_for('utility.index'))
+
+    if request.method == 'POST':
+        action = request.form.get('action', '')
+        if action == 'enable':
+            profiler.enabled = True
+            # Set environment variable for persistence
+            os.environ['SQL_PROFILING'] = '1'
+            flash('SQL profiling enabled. Open the pages to profile, then come back to this page.', 'success')
+        elif action == 'disable':
+            profiler.enabled = False
+            os.environ['SQL_PROFILING'] = '0'
+            flash('SQL profiling disabled', 'success')
+        elif action == 'reset':
+            profiler.reset()
+            flash('SQL profile cleared', 'success')
+        else:
+            flash('Invalid action', 'error')
+        return redirect(url_for('utility.performance'))
+
+    try:
+        return render_template('utility/performance.html',
+                             enabled=profiler.enabled,
+                             started_at=profiler.started_at,
+                             top_n=profiler.top_n,
+                             endpoints=profiler.endpoint_summary(),
+                             slow_requests=profiler.slow_requests(),
+                             recent_requests=profiler.recent_requests(limit=50),
+                             slowest_statements=profiler.slowest_statements(),
+                             active_page='admin')
+    except Exception as e:
+        logging.error(f"Error showing SQL profile: {str(e)}")
+        flash(f'Error showing SQL profile: {str(e)}', 'error')
+        return redirect(url_for('utility.index'))
+
 @utility_bp.route('/restore/<filename>', methods=['POST'])
 def restore_from_backup(filename):
     """Restore database from an existing backup"""
@@ -787,12 +850,14 @@ def restore_from_backup(filename):
         # Get current database path
         db_path = os.path.join('instance', 'accredit_data.db')
 
+        # Incremental backups are rebuilt into a plain database file first
+        if backup_path.endswith(INCREMENTAL_BACKUP_EXTENSION):
+            backup_path = materialize_backup(backup_path, os.path.join(backup_dir, 'temp_restore.db'))
+
         # Always create a backup of current database before restore
         if os.path.exists(db_path):
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            pre_restore_backup = os.path.join(current_app.config['BACKUP_FOLDER'], f"pre_restore_backup_{timestamp}.db")
-            shutil.copy2(db_path, pre_restore_backup)
-            flash(f'Created automatic backup of current database before restore: pre_restore_backup_{timestamp}.db', 'info')
+            pre_restore_backup = create_database_backup(db_path, current_app.config['BACKUP_FOLDER'], 'pre_restore_backup')
+            flash(f'Created automatic backup of current database before restore: {pre_restore_backup}', 'info')
 
         # Close all existing database connections to ensure clean restore
         db.session.close()
@@ -801,8 +866,12 @@ def restore_from_backup(filename):
 
         # Copy the backup file to the database location
         try:
-            # Use direct file copy for better performance
-            shutil.copy2(backup_path, db_path)
+            # Write the backup into the database through SQLite (safe in WAL mode)
+            restore_database_file(backup_path, db_path)
+
+            # Remove the file rebuilt from an incremental backup
+            if filename.endswith(INCREMENTAL_BACKUP_EXTENSION):
+                os.remove(backup_path)
 
             # Refresh the database session
             if refresh_database_session():
@@ -912,65 +981,39 @@ def merge_courses():
         # Get the destination course
         destination_course = Course.query.get_or_404(destination_id)
 
-        # Always create a backup before merging, regardless of checkbox
-        # (but keep the checkbox for UI consistency)
-        backup_result = backup_database_before_merge()
-        if not backup_result['success']:
-            flash(f"Warning: Failed to create backup before merge: {backup_result['error']}. Proceeding with merge.", 'warning')
-
         # Define flags for what to merge
         merge_students = request.form.get('merge_students') == 'on'
         merge_exams = request.form.get('merge_exams') == 'on'
         merge_outcomes = request.form.get('merge_outcomes') == 'on'
+        dry_run = request.form.get('dry_run') == 'on'
+
+        # A dry run plans the merge (same stats and conflicts) without writing anything
+        if dry_run:
+            stats = merge_courses_bulk(destination_course.id, source_ids, merge_students, merge_exams,
+                                       merge_outcomes, dry_run=True)['stats']
+            summary = format_merge_summary(stats, merge_students, merge_exams, merge_outcomes) or 'nothing'
+            flash(f"Dry run: the merge would add {summary} to {destination_course.code}. Nothing was changed.", 'info')
+            if stats['conflicts']:
+                flash(f"{len(stats['conflicts'])} conflicts would be detected during merge.", 'warning')
+            return redirect(url_for('utility.merge_database'))
 
-        # Initialize counters and tracking for summary
-        stats = {
-            'students_merged': 0,
-            'exams_merged': 0,
-            'outcomes_merged': 0,
-            'scores_merged': 0,
-            'weights_merged': 0,
-            'attendances_merged': 0,
-            'conflicts': []  # To track any conflicts/warnings
-        }
-
-        # Pre-load existing items in destination course for faster lookups
-        dest_students_map = {student.student_id: student for student in destination_course.students}
-        dest_exams_map = {exam.name: exam for exam in destination_course.exams}
-        dest_outcomes_map = {outcome.code: outcome for outcome in destination_course.course_outcomes}
-
-        # Mapping of source exam IDs to destination exam IDs (for makeup relationships)
-        exam_id_mapping = {}
+        # Always create a backup before merging, regardless of checkbox
+        # (but keep the checkbox for UI consistency)
+        backup_result = backup_database_before_merge()
+        if not backup_result['success']:
+            flash(f"Warning: Failed to create backup before merge: {backup_result['error']}. Proceeding with merge.", 'warning')
 
         # Now start a transaction savepoint before actual changes
         # Using session begin_nested() to create a SAVEPOINT
         transaction_savepoint = db.session.begin_nested()
 
-        # Process each source course
-        for source_id in source_ids:
-            source_course = Course.query.get(source_id)
-            if not source_course:
-                stats['conflicts'].append(f"Source course ID {source_id} not found, skipping")
-                continue
-
-            # Merge outcomes first (needed for exam/question associations)
-            if merge_outcomes:
-                merge_course_outcomes(source_course, destination_course, dest_outcomes_map, stats)
-
-            # Merge exams next (needed for student score associations)
-            if merge_exams:
-                merge_course_exams(source_course, destination_course, dest_exams_map, dest_outcomes_map, exam_id_mapping, stats)
-
-            # Finally merge students (and their scores if applicable)
-            if merge_students:
-                merge_course_students(source_course, destination_course, dest_students_map, dest_exams_map, exam_id_mapping, merge_exams, stats)
-
-        # Fix makeup exam relationships now that all exams are merged
-        if merge_exams:
-            fix_makeup_relationships(exam_id_mapping, stats)
+        # The id mappings are computed in memory once, then scores, attendance and
+        # weights are written with bulk statements (see routes/merge_engine.py)
+        stats = merge_courses_bulk(destination_course.id, source_ids, merge_students, merge_exams, merge_outcomes)['stats']
 
         # Commit all changes
         transaction_savepoint.commit()
+        invalidate_course_results([destination_course.id] + list(source_ids))
         db.session.commit()
 
         # Log the merge action with detailed information
@@ -988,20 +1031,9 @@ def merge_courses():
         db.session.commit()
 
         # Show summary
-        summary = []
-        if merge_students:
-            summary.append(f"{stats['students_merged']} students, {stats['scores_merged']} scores")
-            if stats.get('attendances_merged', 0) > 0:
-                summary.append(f"{stats['attendances_merged']} attendance records")
-        if merge_exams:
-            summary.append(f"{stats['exams_merged']} exams")
-            if stats.get('weights_merged', 0) > 0:
-                summary.append(f"{stats['weights_merged']} exam weights")
-        if merge_outcomes:
-            summary.append(f"{stats['outcomes_merged']} course outcomes")
-
+        summary = format_merge_summary(stats, merge_students, merge_exams, merge_outcomes)
         if summary:
-            flash(f"Successfully merged {', '.join(summary)} into {destination_course.code}.", 'success')
+            flash(f"Successfully merged {summary} into {destination_course.code}.", 'success')
 
             # Show conflicts as warnings if any
             if stats['conflicts']:
@@ -1028,404 +1060,20 @@ def merge_courses():
 
     return redirect(url_for('utility.merge_database'))
 
-def merge_course_outcomes(source_course, destination_course, dest_outcomes_map, stats):
-    """Helper function to merge course outcomes from source to destination"""
-    # Track outcomes that need program outcomes relationships
-    outcomes_to_link = []
-
-    for outcome in source_course.course_outcomes:
-        try:
-            # Check if a similar outcome already exists
-            if outcome.code in dest_outcomes_map:
-                # Outcome already exists, check if descriptions match
-                existing = dest_outcomes_map[outcome.code]
-                if existing.description != outcome.description:
-                    stats['conflicts'].append(
-                        f"Outcome {outcome.code} has different descriptions in source and destination: "
-                        f"'{outcome.description[:50]}...' vs '{existing.description[:50]}...'"
-                    )
-
-                # Check if program outcome relationships are complete
-                # Get program outcomes associated with source and destination outcomes
-                source_po_ids = {po.id for po in outcome.program_outcomes}
-                dest_po_ids = {po.id for po in existing.program_outcomes}
-
-                # Find missing program outcomes in destination
-                missing_pos = source_po_ids - dest_po_ids
-                if missing_pos:
-                    # Get the program outcomes to add
-                    pos_to_add = [po for po in outcome.program_outcomes if po.id in missing_pos]
-                    if pos_to_add:
-                        # Add the missing program outcomes to the existing outcome
-                        for po in pos_to_add:
-                            existing.program_outcomes.append(po)
-                        stats['conflicts'].append(
-                            f"Added {len(pos_to_add)} missing program outcome links to existing outcome {outcome.code}"
-                        )
-
-                continue
-
-            # Create new outcome in destination course
-            new_outcome = CourseOutcome(
-                course_id=destination_course.id,
-                code=outcome.code,
-                description=outcome.description
-            )
-            db.session.add(new_outcome)
-            db.session.flush()  # Get ID for new outcome
-
-            # Store outcome to link program outcomes after basic creation
-            outcomes_to_link.append((new_outcome, outcome.program_outcomes))
-
-            # Update the lookup map
-            dest_outcomes_map[outcome.code] = new_outcome
-            stats['outcomes_merged'] += 1
-
-        except Exception as e:
-            stats['conflicts'].append(f"Error merging outcome {outcome.code}: {str(e)}")
-            logging.error(f"Error in merge_course_outcomes: {str(e)}\n{traceback.format_exc()}")
-
-    # Link program outcomes in a separate step to avoid potential ORM issues
-    for new_outcome, program_outcomes in outcomes_to_link:
-        try:
-            # Link to same program outcomes
-            for po in program_outcomes:
-                new_outcome.program_outcomes.append(po)
-
-            db.session.flush()  # Flush to ensure relationships are saved
-        except Exception as e:
-            stats['conflicts'].append(
-                f"Error linking program outcomes for outcome {new_outcome.code}: {str(e)}"
-            )
-            logging.error(f"Error linking program outcomes: {str(e)}\n{traceback.format_exc()}")
-
-    # Final flush to ensure all changes are persisted
-    db.session.flush()
-
-def merge_course_exams(source_course, destination_course, dest_exams_map, dest_outcomes_map, exam_id_mapping, stats):
-    """Helper function to merge exams from source to destination"""
-    for exam in source_course.exams:
-        # Check if a similar exam already exists
-        if exam.name in dest_exams_map:
-            existing_exam = dest_exams_map[exam.name]
-            # Store mapping even for existing exams (needed for makeup relationships)
-            exam_id_mapping[exam.id] = existing_exam.id
-            stats['conflicts'].append(f"Exam '{exam.name}' already exists in destination course, skipping")
-            continue
-
-        # Create new exam in destination course - don't set makeup_for yet
-        new_exam = Exam(
-            course_id=destination_course.id,
-            name=exam.name,
-            exam_date=exam.exam_date,
-            max_score=exam.max_score,
-            is_makeup=exam.is_makeup,
-            is_final=exam.is_final,
-            is_mandatory=exam.is_mandatory
-            # makeup_for will be set later to avoid potential reference issues
-        )
-        db.session.add(new_exam)
-        db.session.flush()  # To get the new ID
-
-        # Store mapping for fixing makeup relationships later
-        exam_id_mapping[exam.id] = new_exam.id
-
-        # Copy questions to new exam
-        for question in exam.questions:
-            new_question = Question(
-                exam_id=new_exam.id,
-                number=question.number,
-                text=question.text,
-                max_score=question.max_score
-            )
-            db.session.add(new_question)
-            db.session.flush()  # Add flush to ensure question is saved before linking to course outcomes
-
-            # Associate with course outcomes if they exist
-            for co in question.course_outcomes:
-                # Find matching course outcome in destination
-                dest_co = dest_outcomes_map.get(co.code)
-                if dest_co:
-                    new_question.course_outcomes.append(dest_co)
-
-        # Copy exam weights if they exist
-        merge_exam_weights(exam.id, new_exam.id, destination_course.id, stats)
-
-        # Update the lookup map
-        dest_exams_map[exam.name] = new_exam
-        stats['exams_merged'] += 1
-
-def merge_exam_weights(source_exam_id, dest_exam_id, dest_course_id, stats):
-    """Helper function to merge exam weights"""
-    try:
-        # Check if source exam has weights
-        source_weight = ExamWeight.query.filter_by(exam_id=source_exam_id).first()
-        if not source_weight:
-            # No weight to merge
-            return
-
-        # Check if destination exam already has weights
-        dest_weight = ExamWeight.query.filter_by(exam_id=dest_exam_id).first()
-        if dest_weight:
-            # Weight already exists - check for conflicts
-            if float(dest_weight.weight) != float(source_weight.weight):
-                weight_diff = abs(float(dest_weight.weight) - float(source_weight.weight))
-                stats['conflicts'].append(
-                    f"Exam weight for exam ID {dest_exam_id} differs from source exam ID {source_exam_id}: "
-                    f"{dest_weight.weight} vs {source_weight.weight} (diff: {weight_diff:.4f})"
-                )
-        else:
-            # Create new weight for destination exam
-            new_weight = ExamWeight(
-                exam_id=dest_exam_id,
-                course_id=dest_course_id,
-                weight=source_weight.weight
-            )
-            db.session.add(new_weight)
-            db.session.flush()  # Ensure weight is committed
-            stats['weights_merged'] = stats.get('weights_merged', 0) + 1
-
-    except Exception as e:
-        stats['conflicts'].append(f"Error merging exam weight for exam {dest_exam_id}: {str(e)}")
-        logging.error(f"Error in merge_exam_weights: {str(e)}\n{traceback.format_exc()}")
-
-def merge_course_students(source_course, destination_course, dest_students_map, dest_exams_map, exam_id_mapping, merge_exams, stats):
-    """Helper function to merge students and their scores"""
-    # Batch size for bulk inserts
-    BATCH_SIZE = 100
-
-    # Prepare lists for batched operations
-    new_students = []
-    new_scores = []
-    new_attendances = []
-
-    # Build a mapping of destination exam question numbers to question objects
-    # This avoids needing to query for each question individually
-    dest_question_mapping = {}  # {(exam_id, question_number): question_object}
-
-    # Only build the question mapping if we're merging exams and scores
+def format_merge_summary(stats, merge_students, merge_exams, merge_outcomes):
+    """Summary of the merged items for the flash message ('' when nothing was selected)"""
+    summary = []
+    if merge_students:
+        summary.append(f"{stats['students_merged']} students, {stats['scores_merged']} scores")
+        if stats.get('attendances_merged', 0) > 0:
+            summary.append(f"{stats['attendances_merged']} attendance records")
     if merge_exams:
-        # Get all destination exam questions in a single query
-        dest_questions = Question.query.join(Exam).filter(Exam.course_id == destination_course.id).all()
-        for q in dest_questions:
-            dest_question_mapping[(q.exam_id, q.number)] = q
-
-    # Process students in batches
-    for student in source_course.students:
-        try:
-            # Check if student already exists in destination course
-            if student.student_id in dest_students_map:
-                # Use existing student
-                dest_student = dest_students_map[student.student_id]
-
-                # Check for name conflicts and log them
-                if (dest_student.first_name != student.first_name or
-                    dest_student.last_name != student.last_name):
-                    stats['conflicts'].append(
-                        f"Student ID {student.student_id} has different names in source and destination: "
-                        f"{student.first_name} {student.last_name} vs {dest_student.first_name} {dest_student.last_name}"
-                    )
-            else:
-                # Create new student in destination course
-                new_student = Student(
-                    course_id=destination_course.id,
-                    student_id=student.student_id,
-                    first_name=student.first_name,
-                    last_name=student.last_name,
-                    excluded=student.excluded
-                )
-                new_students.append(new_student)
-                db.session.add(new_student)
-                db.session.flush()  # Get ID for the new student
-
-                # Update student map
-                dest_students_map[student.student_id] = new_student
-                dest_student = new_student
-                stats['students_merged'] += 1
-
-            # Merge scores and attendance records if merging exams
-            if merge_exams:
-                # Process scores
-                process_student_scores(student, dest_student, source_course,
-                                     dest_exams_map, dest_question_mapping,
-                                     new_scores, stats)
-
-                # Process attendance records
-                process_student_attendance(student, dest_student, exam_id_mapping,
-                                         new_attendances, stats)
-
-            # Flush after each batch to optimize performance
-            if len(new_students) >= BATCH_SIZE or len(new_scores) >= BATCH_SIZE or len(new_attendances) >= BATCH_SIZE:
-                db.session.flush()
-                # Clear the lists after flush
-                new_students = []
-                new_scores = []
-                new_attendances = []
-
-        except Exception as e:
-            stats['conflicts'].append(f"Error processing student {student.student_id}: {str(e)}")
-            logging.error(f"Error in merge_course_students: {str(e)}\n{traceback.format_exc()}")
-
-    # Final flush for any remaining records
-    if new_students or new_scores or new_attendances:
-        db.session.flush()
-
-def process_student_scores(source_student, dest_student, source_course, dest_exams_map, dest_question_mapping, new_scores, stats):
-    """Process and merge scores for a student"""
-    # Get all scores for this student in the source course (optimized query)
-    scores = Score.query.join(Question).join(Exam).filter(
-        Score.student_id == source_student.id,
-        Exam.course_id == source_course.id
-    ).all()
-
-    # Track existing scores to avoid conflicts
-    existing_score_keys = set()
-
-    # Get all existing scores for the destination student
-    existing_scores = Score.query.filter_by(student_id=dest_student.id).all()
-    for existing_score in existing_scores:
-        # Store (question_id, exam_id) as key
-        existing_score_keys.add((existing_score.question_id, existing_score.exam_id))
-
-    for score in scores:
-        try:
-            # Find the corresponding question in the destination course
-            source_question = Question.query.get(score.question_id)
-            if not source_question:
-                stats['conflicts'].append(f"Source question ID {score.question_id} not found")
-                continue
-
-            source_exam = Exam.query.get(source_question.exam_id)
-            if not source_exam:
-                stats['conflicts'].append(f"Source exam for question ID {score.question_id} not found")
-                continue
-
-            # Skip if exam wasn't merged
-            dest_exam = dest_exams_map.get(source_exam.name)
-            if not dest_exam:
-                continue
-
-            # Find matching question in destination exam using mapping
-            dest_question = dest_question_mapping.get((dest_exam.id, source_question.number))
-
-            if dest_question:
-                # Verify question compatibility
-                if float(dest_question.max_score) != float(source_question.max_score):
-                    stats['conflicts'].append(
-                        f"Question {dest_question.number} in exam {dest_exam.name} has different max_score: "
-                        f"{dest_question.max_score} vs {source_question.max_score}"
-                    )
-
-                # Check if score already exists
-                if (dest_question.id, dest_exam.id) in existing_score_keys:
-                    # Score exists - could add logic to handle conflicts if needed
-                    continue
-
-                # Create new score
-                new_score = Score(
-                    student_id=dest_student.id,
-                    question_id=dest_question.id,
-                    exam_id=dest_exam.id,
-                    score=score.score
-                )
-                new_scores.append(new_score)
-                stats['scores_merged'] += 1
-
-                # Mark as existing to avoid duplicates
-                existing_score_keys.add((dest_question.id, dest_exam.id))
-
-        except Exception as e:
-            stats['conflicts'].append(f"Error merging score for student {source_student.student_id}, "
-                                    f"question {score.question_id}: {str(e)}")
-            logging.error(f"Error in process_student_scores: {str(e)}")
-
-def process_student_attendance(source_student, dest_student, exam_id_mapping, new_attendances, stats):
-    """Process and merge attendance records for a student"""
-    # Get all attendance records for this student
-    attendances = StudentExamAttendance.query.filter_by(student_id=source_student.id).all()
-
-    # Track existing attendance records
-    existing_attendance_keys = set()
-
-    # Get all existing attendance records for the destination student
-    existing_attendances = StudentExamAttendance.query.filter_by(student_id=dest_student.id).all()
-    for existing_attendance in existing_attendances:
-        existing_attendance_keys.add(existing_attendance.exam_id)
-
-    for attendance in attendances:
-        try:
-            # Skip if the exam wasn't merged
-            if attendance.exam_id not in exam_id_mapping:
-                continue
-
-            # Get corresponding destination exam
-            dest_exam_id = exam_id_mapping[attendance.exam_id]
-
-            # Skip if attendance record already exists
-            if dest_exam_id in existing_attendance_keys:
-                continue
-
-            # Create new attendance record
-            new_attendance = StudentExamAttendance(
-                student_id=dest_student.id,
-                exam_id=dest_exam_id,
-                attended=attendance.attended
-            )
-            new_attendances.append(new_attendance)
-            stats['attendances_merged'] = stats.get('attendances_merged', 0) + 1
-
-            # Mark as existing to avoid duplicates
-            existing_attendance_keys.add(dest_exam_id)
-
-        except Exception as e:
-            stats['conflicts'].append(f"Error merging attendance for student {source_student.student_id}, "
-                                    f"exam {attendance.exam_id}: {str(e)}")
-            logging.error(f"Error in process_student_attendance: {str(e)}")
-
-def fix_makeup_relationships(exam_id_mapping, stats):
-    """Fix makeup exam relationships after all exams are merged"""
-    # Get all source exams that have makeup relationships
-    source_makeup_exams = Exam.query.filter(Exam.id.in_(exam_id_mapping.keys())).filter(Exam.makeup_for.isnot(None)).all()
-
-    for exam in source_makeup_exams:
-        try:
-            # We need both the exam and its makeup_for exam to have been merged
-            if exam.id in exam_id_mapping:
-                dest_exam_id = exam_id_mapping[exam.id]
-                dest_exam = Exam.query.get(dest_exam_id)
-
-                if not dest_exam:
-                    stats['conflicts'].append(f"Destination exam ID {dest_exam_id} not found for makeup relationship")
-                    continue
-
-                # Check if the original exam it's a makeup for was also merged
-                if exam.makeup_for in exam_id_mapping:
-                    dest_makeup_for_id = exam_id_mapping[exam.makeup_for]
-
-                    # Verify the destination makeup_for exam exists
-                    dest_makeup_for_exam = Exam.query.get(dest_makeup_for_id)
-                    if dest_makeup_for_exam:
-                        # Update the makeup relationship
-                        dest_exam.makeup_for = dest_makeup_for_id
-                        db.session.add(dest_exam)
-                        logging.info(f"Fixed makeup relationship: Exam ID {dest_exam_id} is makeup for {dest_makeup_for_id}")
-                    else:
-                        stats['conflicts'].append(f"Destination makeup exam ID {dest_makeup_for_id} not found")
-                else:
-                    # The original exam wasn't merged, so we can't establish the relationship
-                    stats['conflicts'].append(f"Makeup relationship broken: original exam {exam.makeup_for} was not merged")
-
-                    # Get makeup_for exam details for better logging
-                    original_makeup_for = Exam.query.get(exam.makeup_for)
-                    if original_makeup_for:
-                        logging.warning(f"Could not establish makeup relationship for {dest_exam.name}. "
-                                        f"Original makeup_for exam '{original_makeup_for.name}' was not merged.")
-        except Exception as e:
-            stats['conflicts'].append(f"Error fixing makeup relationship for exam ID {exam.id}: {str(e)}")
-            logging.error(f"Error in fix_makeup_relationships: {str(e)}\n{traceback.format_exc()}")
-
-    # Commit these changes before continuing
-    db.session.flush()
+        summary.append(f"{stats['exams_merged']} exams")
+        if stats.get('weights_merged', 0) > 0:
+            summary.append(f"{stats['weights_merged']} exam weights")
+    if merge_outcomes:
+        summary.append(f"{stats['outcomes_merged']} course outcomes")
+    return ', '.join(summary)
 
 def backup_database_before_merge():
     """Create a backup before merging courses
@@ -1448,13 +1096,8 @@ def backup_database_before_merge():
         backup_dir = current_app.config['BACKUP_FOLDER']
         os.makedirs(backup_dir, exist_ok=True)
 
-        # Create backup filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_filename = f"pre_merge_backup_{timestamp}.db"
-        backup_path = os.path.join(backup_dir, backup_filename)
-
-        # Copy database file
-        shutil.copy2(db_path, backup_path)
+        # Online backup of the live database
+        backup_filename = create_database_backup(db_path, backup_dir, 'pre_merge_backup')
 
         # Log action
         log = Log(action="BACKUP_BEFORE_MERGE",
@@ -1641,7 +1284,7 @@ def list_backups():
 
     if os.path.exists(backup_dir):
         # Get all backup files (including pre-restore and pre-merge backups)
-        backup_files = glob.glob(os.path.join(backup_dir, "*.db"))
+        backup_files = list_backup_files(backup_dir)
         for backup_file in backup_files:
             filename = os.path.basename(backup_file)
             created_at = os.path.getmtime(backup_file)
@@ -1683,9 +1326,10 @@ def import_database():
     This version uses proper try/except/finally blocks and context managers so that
     database connections are closed before the temporary file is removed.
     Key columns such as max_score, exam weights, course settings, and scores are
-    imported, and makeup exam relationships are updated.
+    imported, and makeup exam relationships are updated. The backup is ATTACHed
+    and merged with set-based statements by routes/import_engine.py.
     """
-    import os, glob, sqlite3, shutil
+    import os, sqlite3
     from flask import Markup
     temp_path = os.path.join(current_app.config['BACKUP_FOLDER'], 'temp_import.db')
 
@@ -1719,17 +1363,15 @@ def import_database():
                     flash(f"Invalid database: Missing required tables: {', '.join(missing_tables)}", 'error')
                     return redirect(url_for('utility.import_database'))
                 # Warn about optional tables.
-                for table in ['achievement_level', 'course_settings', 'exam_weight', 'student_exam_attendance']:
+                for table in OPTIONAL_TABLES:
                     if table not in existing_tables:
                         flash(f"Optional table '{table}' not found. Related data won't be imported.", 'warning')
 
             # Create a backup of the current database.
             db_path = os.path.join('instance', 'accredit_data.db')
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            pre_import_backup = os.path.join(current_app.config['BACKUP_FOLDER'], f"pre_import_backup_{timestamp}.db")
             if os.path.exists(db_path):
-                shutil.copy2(db_path, pre_import_backup)
-                flash(f"Created backup of current database before import: pre_import_backup_{timestamp}.db", "info")
+                pre_import_backup = create_database_backup(db_path, current_app.config['BACKUP_FOLDER'], 'pre_import_backup')
+                flash(f"Created backup of current database before import: {pre_import_backup}", "info")
 
             # Get user-selected import options.
             import_courses            = request.form.get('import_courses') == 'on'
@@ -1760,548 +1402,43 @@ def import_database():
                 'question_co_imported': 0,
                 'errors': []  # Track any errors during import
             }
-            course_id_map = {}          # backup course id -> current course id
-            outcome_id_map = {}         # backup course outcome id -> current course outcome id
-            program_outcome_id_map = {} # backup program outcome id -> current program outcome id
-            student_id_map = {}         # backup student primary key (id) -> current student id
-            exam_id_map = {}            # backup exam id -> current exam id
-            question_id_map = {}        # backup question id -> current question id
-
-            # Open both current and backup databases using context managers.
-            with sqlite3.connect(db_path) as current_db, sqlite3.connect(temp_path) as import_db:
+            import_options = {
+                'import_courses': import_courses,
+                'import_students': import_students,
+                'import_exams': import_exams,
+                'import_outcomes': import_outcomes,
+                'import_program_outcomes': import_program_outcomes,
+                'import_achievement_levels': import_achievement_levels,
+                'import_course_settings': import_course_settings,
+                'import_exam_weights': import_exam_weights,
+                'import_attendance': import_attendance,
+                'import_scores': import_scores,
+            }
+
+            # The backup is ATTACHed to the connection of the current database and merged
+            # with set-based INSERT ... SELECT statements (see routes/import_engine.py)
+            with sqlite3.connect(db_path) as current_db:
                 current_db.row_factory = sqlite3.Row
-                import_db.row_factory = sqlite3.Row
+                apply_sqlite_pragmas(current_db, current_app.extensions.get('db_performance', {}).get('pragmas', {}))
 
-                # Helper function to safely get column value
-                def safe_get(row, column, default=None):
-                    try:
-                        return row[column] if row[column] is not None else default
-                    except (IndexError, KeyError):
-                        return default
-
-                # Helper function to convert various boolean formats to integer (0 or 1)
-                def to_int_bool(value):
-                    if value is None:
-                        return 0
-                    if isinstance(value, bool):
-                        return 1 if value else 0
-                    if isinstance(value, int):
-                        return 1 if value else 0
-                    if isinstance(value, str):
-                        return 1 if value.lower() in ('true', 't', 'yes', 'y', '1') else 0
-                    return 0
+                # ATTACH is not allowed inside a transaction
+                attach_backup(current_db, temp_path)
 
                 # Begin a transaction.
                 current_db.execute("BEGIN TRANSACTION")
 
                 try:
-                    # (Optional) Get source database schema info.
-                    source_schema = {}
-                    for table in existing_tables:
-                        source_schema[table] = {
-                            column[1]: {'type': column[2], 'notnull': column[3], 'dflt_value': column[4]}
-                            for column in import_db.execute(f"PRAGMA table_info({table})").fetchall()
-                        }
+                    # STEPS 1-14: courses, outcomes, students, exams, questions, weights,
+                    # scores, attendance, makeup links and outcome associations
+                    for warning in import_backup_data(current_db, import_options, import_summary):
+                        flash(warning, "warning")
 
-                    # STEP 1: IMPORT COURSES
-                    if import_courses:
-                        courses = import_db.execute("SELECT * FROM course").fetchall()
-                        for row in courses:
-                            if not safe_get(row, 'code') or not safe_get(row, 'name') or not safe_get(row, 'semester'):
-                                import_summary['errors'].append("Skipped course with missing required fields")
-                                continue
-
-                            existing = current_db.execute(
-                                "SELECT id FROM course WHERE code=? AND semester=?",
-                                (safe_get(row, 'code'), safe_get(row, 'semester'))
-                            ).fetchone()
-
-                            if existing:
-                                course_id_map[safe_get(row, 'id')] = existing['id']
-                            else:
-                                cw = safe_get(row, 'course_weight', 1.0)
-                                created = safe_get(row, 'created_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                updated = safe_get(row, 'updated_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                cur = current_db.execute(
-                                    "INSERT INTO course (code, name, semester, course_weight, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
-                                    (safe_get(row, 'code'), safe_get(row, 'name'), safe_get(row, 'semester'), cw, created, updated)
-                                )
-                                course_id_map[safe_get(row, 'id')] = cur.lastrowid
-                                import_summary['courses_imported'] += 1
-
-                    # STEP 2: IMPORT COURSE OUTCOMES
-                    if import_outcomes:
-                        outcomes = import_db.execute("SELECT * FROM course_outcome").fetchall()
-                        for row in outcomes:
-                            if not safe_get(row, 'code') or not safe_get(row, 'course_id'):
-                                import_summary['errors'].append("Skipped course outcome with missing required fields")
-                                continue
-                            if safe_get(row, 'course_id') not in course_id_map:
-                                import_summary['errors'].append(f"Skipped course outcome with invalid course_id: {safe_get(row, 'course_id')}")
-                                continue
-                            curr_course = course_id_map[safe_get(row, 'course_id')]
-                            existing = current_db.execute(
-                                "SELECT id FROM course_outcome WHERE code=? AND course_id=?",
-                                (safe_get(row, 'code'), curr_course)
-                            ).fetchone()
-                            if existing:
-                                outcome_id_map[safe_get(row, 'id')] = existing['id']
-                            else:
-                                created = safe_get(row, 'created_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                updated = safe_get(row, 'updated_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                cur = current_db.execute(
-                                    "INSERT INTO course_outcome (code, description, course_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
-                                    (
-                                        safe_get(row, 'code'),
-                                        safe_get(row, 'description', ''),
-                                        curr_course,
-                                        created,
-                                        updated
-                                    )
-                                )
-                                outcome_id_map[safe_get(row, 'id')] = cur.lastrowid
-                                import_summary['outcomes_imported'] += 1
-
-                    # STEP 3: IMPORT PROGRAM OUTCOMES
-                    if import_program_outcomes:
-                        pos = import_db.execute("SELECT * FROM program_outcome").fetchall()
-                        for row in pos:
-                            if not safe_get(row, 'code') or not safe_get(row, 'description'):
-                                import_summary['errors'].append("Skipped program outcome with missing required fields")
-                                continue
-                            existing = current_db.execute(
-                                "SELECT id FROM program_outcome WHERE code=?",
-                                (safe_get(row, 'code'),)
-                            ).fetchone()
-                            if existing:
-                                program_outcome_id_map[safe_get(row, 'id')] = existing['id']
-                            else:
-                                created = safe_get(row, 'created_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                updated = safe_get(row, 'updated_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                cur = current_db.execute(
-                                    "INSERT INTO program_outcome (code, description, created_at, updated_at) VALUES (?, ?, ?, ?)",
-                                    (safe_get(row, 'code'), safe_get(row, 'description'), created, updated)
-                                )
-                                program_outcome_id_map[safe_get(row, 'id')] = cur.lastrowid
-                                import_summary['program_outcomes_imported'] += 1
-
-                    # STEP 4: IMPORT ACHIEVEMENT LEVELS (Optional)
-                    if import_achievement_levels:
-                        table_exist = import_db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='achievement_level'").fetchone()
-                        if table_exist:
-                            levels = import_db.execute("SELECT * FROM achievement_level").fetchall()
-                            for row in levels:
-                                if safe_get(row, 'course_id') not in course_id_map:
-                                    import_summary['errors'].append(f"Skipped achievement level with invalid course_id: {safe_get(row, 'course_id')}")
-                                    continue
-                                curr_course = course_id_map[safe_get(row, 'course_id')]
-                                existing = current_db.execute(
-                                    "SELECT id FROM achievement_level WHERE course_id=? AND name=?",
-                                    (curr_course, safe_get(row, 'name', ''))
-                                ).fetchone()
-                                if existing:
-                                    continue
-                                created = safe_get(row, 'created_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                updated = safe_get(row, 'updated_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                name = safe_get(row, 'name', 'Achievement Level')
-                                min_score = safe_get(row, 'min_score', 0.0)
-                                max_score = safe_get(row, 'max_score', 100.0)
-                                color = safe_get(row, 'color', 'primary')
-                                current_db.execute(
-                                    """
-                                    INSERT INTO achievement_level
-                                    (course_id, name, min_score, max_score, color, created_at, updated_at)
-                                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                                    """,
-                                    (curr_course, name, min_score, max_score, color, created, updated)
-                                )
-                                import_summary['achievement_levels_imported'] += 1
-
-                    # STEP 5: IMPORT COURSE SETTINGS (Optional)
-                    if import_course_settings:
-                        table_exist = import_db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='course_settings'").fetchone()
-                        if table_exist:
-                            settings = import_db.execute("SELECT * FROM course_settings").fetchall()
-                            for row in settings:
-                                if safe_get(row, 'course_id') not in course_id_map:
-                                    import_summary['errors'].append(f"Skipped course settings with invalid course_id: {safe_get(row, 'course_id')}")
-                                    continue
-                                curr_course = course_id_map[safe_get(row, 'course_id')]
-                                existing = current_db.execute("SELECT id FROM course_settings WHERE course_id=?", (curr_course,)).fetchone()
-                                if existing:
-                                    continue
-                                created = safe_get(row, 'created_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                updated = safe_get(row, 'updated_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                success_rate_method = safe_get(row, 'success_rate_method', 'absolute')
-                                relative_success_threshold = safe_get(row, 'relative_success_threshold', 60.0)
-                                excluded = to_int_bool(safe_get(row, 'excluded', False))
-                                current_db.execute(
-                                    """
-                                    INSERT INTO course_settings
-                                    (course_id, success_rate_method, relative_success_threshold, excluded, created_at, updated_at)
-                                    VALUES (?, ?, ?, ?, ?, ?)
-                                    """,
-                                    (curr_course, success_rate_method, relative_success_threshold, excluded, created, updated)
-                                )
-                                import_summary['course_settings_imported'] += 1
-
-                    # STEP 6: IMPORT STUDENTS
-                    if import_students:
-                        students = import_db.execute("SELECT * FROM student").fetchall()
-                        for row in students:
-                            if not safe_get(row, 'student_id') or safe_get(row, 'course_id') not in course_id_map:
-                                import_summary['errors'].append(f"Skipped student with missing student_id or invalid course_id: {safe_get(row, 'course_id')}")
-                                continue
-                            curr_course = course_id_map[safe_get(row, 'course_id')]
-                            existing = current_db.execute(
-                                "SELECT id FROM student WHERE student_id=? AND course_id=?",
-                                (safe_get(row, 'student_id'), curr_course)
-                            ).fetchone()
-                            if existing:
-                                student_id_map[safe_get(row, 'id')] = existing['id']
-                            else:
-                                created = safe_get(row, 'created_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                updated = safe_get(row, 'updated_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                excluded = to_int_bool(safe_get(row, 'excluded', False))
-                                cur = current_db.execute(
-                                    """
-                                    INSERT INTO student
-                                    (student_id, first_name, last_name, course_id, excluded, created_at, updated_at)
-                                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                                    """,
-                                    (
-                                        safe_get(row, 'student_id'),
-                                        safe_get(row, 'first_name', ''),
-                                        safe_get(row, 'last_name', ''),
-                                        curr_course,
-                                        excluded,
-                                        created,
-                                        updated
-                                    )
-                                )
-                                student_id_map[safe_get(row, 'id')] = cur.lastrowid
-                                import_summary['students_imported'] += 1
-
-                    # STEP 7: IMPORT EXAMS
-                    if import_exams:
-                        exam_columns = [col[1] for col in import_db.execute("PRAGMA table_info(exam)").fetchall()]
-                        exams = import_db.execute("SELECT * FROM exam").fetchall()
-                        for row in exams:
-                            if safe_get(row, 'course_id') not in course_id_map:
-                                import_summary['errors'].append(f"Skipped exam with invalid course_id: {safe_get(row, 'course_id')}")
-                                continue
-                            curr_course = course_id_map[safe_get(row, 'course_id')]
-                            existing = current_db.execute(
-                                "SELECT id FROM exam WHERE name=? AND course_id=?",
-                                (safe_get(row, 'name', ''), curr_course)
-                            ).fetchone()
-                            if existing:
-                                exam_id_map[safe_get(row, 'id')] = existing['id']
-                            else:
-                                max_score = safe_get(row, 'max_score', 100.0)
-                                exam_date = safe_get(row, 'exam_date', None)
-                                is_makeup = to_int_bool(safe_get(row, 'is_makeup', False))
-                                is_final = to_int_bool(safe_get(row, 'is_final', False))
-                                is_mandatory = to_int_bool(safe_get(row, 'is_mandatory', False))
-                                created = safe_get(row, 'created_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                updated = safe_get(row, 'updated_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                cur = current_db.execute(
-                                    """
-                                    INSERT INTO exam
-                                    (name, max_score, exam_date, course_id, is_makeup, is_final, is_mandatory, created_at, updated_at)
-                                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                                    """,
-                                    (safe_get(row, 'name', ''), max_score, exam_date, curr_course, is_makeup, is_final, is_mandatory, created, updated)
-                                )
-                                exam_id_map[safe_get(row, 'id')] = cur.lastrowid
-                                import_summary['exams_imported'] += 1
-
-                    # STEP 8: IMPORT QUESTIONS
-                    if import_exams:
-                        questions = import_db.execute("SELECT * FROM question").fetchall()
-                        for row in questions:
-                            if safe_get(row, 'exam_id') not in exam_id_map:
-                                import_summary['errors'].append(f"Skipped question with invalid exam_id: {safe_get(row, 'exam_id')}")
-                                continue
-                            curr_exam = exam_id_map[safe_get(row, 'exam_id')]
-                            existing = current_db.execute(
-                                "SELECT id FROM question WHERE exam_id=? AND number=?",
-                                (curr_exam, safe_get(row, 'number', 0))
-                            ).fetchone()
-                            if existing:
-                                question_id_map[safe_get(row, 'id')] = existing['id']
-                            else:
-                                text = safe_get(row, 'text', '')
-                                max_score = safe_get(row, 'max_score', 0.0)
-                                number = safe_get(row, 'number', 0)
-                                created = safe_get(row, 'created_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                updated = safe_get(row, 'updated_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                cur = current_db.execute(
-                                    """
-                                    INSERT INTO question
-                                    (text, number, max_score, exam_id, created_at, updated_at)
-                                    VALUES (?, ?, ?, ?, ?, ?)
-                                    """,
-                                    (text, number, max_score, curr_exam, created, updated)
-                                )
-                                question_id_map[safe_get(row, 'id')] = cur.lastrowid
-                                import_summary['questions_imported'] += 1
-
-                    # STEP 9: IMPORT EXAM WEIGHTS (Optional)
-                    if import_exam_weights:
-                        table_exist = import_db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='exam_weight'").fetchone()
-                        if table_exist:
-                            weights = import_db.execute("SELECT * FROM exam_weight").fetchall()
-                            for row in weights:
-                                backup_exam_id = safe_get(row, 'exam_id')
-                                backup_course_id = safe_get(row, 'course_id')
-                                if backup_exam_id not in exam_id_map or backup_course_id not in course_id_map:
-                                    import_summary['errors'].append(
-                                        f"Skipped exam weight with invalid exam_id or course_id: e{backup_exam_id}, c{backup_course_id}"
-                                    )
-                                    continue
-                                curr_exam = exam_id_map[backup_exam_id]
-                                curr_course = course_id_map[backup_course_id]
-                                weight_value = safe_get(row, 'weight', 0.0)
-                                created = safe_get(row, 'created_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                updated = safe_get(row, 'updated_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                existing = current_db.execute(
-                                    "SELECT id FROM exam_weight WHERE exam_id=? AND course_id=?",
-                                    (curr_exam, curr_course)
-                                ).fetchone()
-                                if existing:
-                                    current_db.execute(
-                                        "UPDATE exam_weight SET weight=?, updated_at=? WHERE id=?",
-                                        (weight_value, updated, existing['id'])
-                                    )
-                                    import_summary['exam_weights_imported'] += 1
-                                else:
-                                    current_db.execute(
-                                        "INSERT INTO exam_weight (exam_id, course_id, weight, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
-                                        (curr_exam, curr_course, weight_value, created, updated)
-                                    )
-                                    import_summary['exam_weights_imported'] += 1
-                        else:
-                            flash("Exam weight table not found in backup.", "warning")
-
-                    # STEP 10: IMPORT SCORES
-                    if import_scores:
-                        scores = import_db.execute("SELECT * FROM score").fetchall()
-                        for row in scores:
-                            backup_student_fk = safe_get(row, 'student_id')
-                            backup_question_fk = safe_get(row, 'question_id')
-                            backup_exam_fk = safe_get(row, 'exam_id')
-                            if (backup_student_fk not in student_id_map or
-                                backup_question_fk not in question_id_map or
-                                backup_exam_fk not in exam_id_map):
-                                import_summary['errors'].append(
-                                    f"Skipped score with invalid foreign keys: s{backup_student_fk}, q{backup_question_fk}, e{backup_exam_fk}"
-                                )
-                                continue
-                            curr_student = student_id_map[backup_student_fk]
-                            curr_question = question_id_map[backup_question_fk]
-                            curr_exam = exam_id_map[backup_exam_fk]
-                            existing = current_db.execute(
-                                "SELECT id FROM score WHERE student_id=? AND question_id=? AND exam_id=?",
-                                (curr_student, curr_question, curr_exam)
-                            ).fetchone()
-                            score_value = safe_get(row, 'score', 0.0)
-                            if existing:
-                                updated = safe_get(row, 'updated_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                current_db.execute(
-                                    "UPDATE score SET score=?, updated_at=? WHERE id=?",
-                                    (score_value, updated, existing['id'])
-                                )
-                                import_summary['scores_imported'] += 1
-                            else:
-                                created = safe_get(row, 'created_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                updated = safe_get(row, 'updated_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                current_db.execute(
-                                    "INSERT INTO score (score, student_id, question_id, exam_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
-                                    (score_value, curr_student, curr_question, curr_exam, created, updated)
-                                )
-                                import_summary['scores_imported'] += 1
-
-                    # STEP 11: IMPORT STUDENT EXAM ATTENDANCE (Optional)
-                    if import_attendance:
-                        table_exist = import_db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='student_exam_attendance'").fetchone()
-                        if table_exist:
-                            attendance_rows = import_db.execute("SELECT * FROM student_exam_attendance").fetchall()
-                            for row in attendance_rows:
-                                if safe_get(row, 'student_id') not in student_id_map or safe_get(row, 'exam_id') not in exam_id_map:
-                                    import_summary['errors'].append(
-                                        f"Skipped attendance record with invalid student_id or exam_id: s{safe_get(row, 'student_id')}, e{safe_get(row, 'exam_id')}"
-                                    )
-                                    continue
-                                curr_student = student_id_map[safe_get(row, 'student_id')]
-                                curr_exam = exam_id_map[safe_get(row, 'exam_id')]
-                                existing = current_db.execute(
-                                    "SELECT id FROM student_exam_attendance WHERE student_id=? AND exam_id=?",
-                                    (curr_student, curr_exam)
-                                ).fetchone()
-                                if existing:
-                                    attended = to_int_bool(safe_get(row, 'attended', True))
-                                    updated = safe_get(row, 'updated_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                    current_db.execute(
-                                        "UPDATE student_exam_attendance SET attended=?, updated_at=? WHERE id=?",
-                                        (attended, updated, existing['id'])
-                                    )
-                                    import_summary['attendance_imported'] += 1
-                                else:
-                                    attended = to_int_bool(safe_get(row, 'attended', True))
-                                    created = safe_get(row, 'created_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                    updated = safe_get(row, 'updated_at', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                                    current_db.execute(
-                                        """
-                                        INSERT INTO student_exam_attendance
-                                        (student_id, exam_id, attended, created_at, updated_at)
-                                        VALUES (?, ?, ?, ?, ?)
-                                        """,
-                                        (curr_student, curr_exam, attended, created, updated)
-                                    )
-                                    import_summary['attendance_imported'] += 1
-
-                    # STEP 12: UPDATE MAKEUP EXAM RELATIONSHIPS
-                    for row in import_db.execute("SELECT id, makeup_for FROM exam WHERE makeup_for IS NOT NULL").fetchall():
-                        source_exam_id = safe_get(row, 'id')
-                        source_makeup_for = safe_get(row, 'makeup_for')
-                        if source_exam_id in exam_id_map and source_makeup_for in exam_id_map:
-                            dest_exam_id = exam_id_map[source_exam_id]
-                            dest_makeup_for = exam_id_map[source_makeup_for]
-                            current_db.execute("UPDATE exam SET makeup_for=? WHERE id=?", (dest_makeup_for, dest_exam_id))
-
-                    # STEP 13: IMPORT CO-PO ASSOCIATIONS AND WEIGHTS
-                    if import_outcomes and import_program_outcomes:
-                        # First check if the table has relative_weight column for older backups
-                        has_relative_weight = False
-                        try:
-                            columns = [col[1] for col in import_db.execute("PRAGMA table_info(course_outcome_program_outcome)").fetchall()]
-                            has_relative_weight = 'relative_weight' in columns
-                        except:
-                            import_summary['errors'].append("Could not determine if course_outcome_program_outcome table has relative_weight column")
-
-                        # Check if destination table has relative_weight column
-                        dest_has_relative_weight = False
-                        try:
-                            dest_columns = [col[1] for col in current_db.execute("PRAGMA table_info(course_outcome_program_outcome)").fetchall()]
-                            dest_has_relative_weight = 'relative_weight' in dest_columns
-                        except:
-                            import_summary['errors'].append("Could not determine if destination course_outcome_program_outcome table has relative_weight column")
-
-                        # Fetch CO-PO associations
-                        try:
-                            if has_relative_weight:
-                                associations = import_db.execute(
-                                    "SELECT course_outcome_id, program_outcome_id, relative_weight FROM course_outcome_program_outcome"
-                                ).fetchall()
-                            else:
-                                associations = import_db.execute(
-                                    "SELECT course_outcome_id, program_outcome_id FROM course_outcome_program_outcome"
-                                ).fetchall()
-
-                            for row in associations:
-                                backup_co_id = safe_get(row, 'course_outcome_id')
-                                backup_po_id = safe_get(row, 'program_outcome_id')
-
-                                if backup_co_id not in outcome_id_map or backup_po_id not in program_outcome_id_map:
-                                    import_summary['errors'].append(
-                                        f"Skipped CO-PO association with invalid IDs: co{backup_co_id}, po{backup_po_id}"
-                                    )
-                                    continue
-
-                                curr_co_id = outcome_id_map[backup_co_id]
-                                curr_po_id = program_outcome_id_map[backup_po_id]
-
-                                # Check if association already exists
-                                exists = current_db.execute(
-                                    "SELECT 1 FROM course_outcome_program_outcome WHERE course_outcome_id=? AND program_outcome_id=?",
-                                    (curr_co_id, curr_po_id)
-                                ).fetchone()
-
-                                if not exists:
-                                    # Check if destination table has relative_weight column
-                                    dest_columns = [col[1] for col in current_db.execute("PRAGMA table_info(course_outcome_program_outcome)").fetchall()]
-                                    dest_has_relative_weight = 'relative_weight' in dest_columns
-
-                                    if dest_has_relative_weight:
-                                        # Get the relative weight with default of 1.0
-                                        relative_weight = safe_get(row, 'relative_weight', 1.0)
-                                        current_db.execute(
-                                            "INSERT INTO course_outcome_program_outcome (course_outcome_id, program_outcome_id, relative_weight) VALUES (?, ?, ?)",
-                                            (curr_co_id, curr_po_id, relative_weight)
-                                        )
-                                    else:
-                                        # For older backups without the relative_weight column
-                                        current_db.execute(
-                                            "INSERT INTO course_outcome_program_outcome (course_outcome_id, program_outcome_id) VALUES (?, ?)",
-                                            (curr_co_id, curr_po_id)
-                                        )
-                                    import_summary['co_po_imported'] += 1
-                                elif has_relative_weight and dest_has_relative_weight:
-                                    # Update the weight if the association already exists and both tables have relative_weight
-                                    relative_weight = safe_get(row, 'relative_weight', 1.0)
-                                    try:
-                                        current_db.execute(
-                                            "UPDATE course_outcome_program_outcome SET relative_weight=? WHERE course_outcome_id=? AND program_outcome_id=?",
-                                            (relative_weight, curr_co_id, curr_po_id)
-                                        )
-                                    except Exception as e:
-                                        import_summary['errors'].append(f"Error updating CO-PO weight: {str(e)}")
-                        except Exception as e:
-                            import_summary['errors'].append(f"Error importing CO-PO associations: {str(e)}")
-
-                    # STEP 14: IMPORT COURSE-OUTCOME QUESTION ASSOCIATIONS
-                    if import_outcomes and import_exams:
-                        try:
-                            # Check if the source database has relative_weight column
-                            source_has_relative_weight = False
-                            try:
-                                columns = [column[1] for column in import_db.execute("PRAGMA table_info(question_course_outcome)").fetchall()]
-                                source_has_relative_weight = 'relative_weight' in columns
-                            except Exception as ce:
-                                import_summary['errors'].append(f"Could not check question_course_outcome columns: {str(ce)}")
-                            
-                            # Modify query based on whether source has the relative_weight column
-                            if source_has_relative_weight:
-                                query = "SELECT question_id, course_outcome_id, relative_weight FROM question_course_outcome"
-                            else:
-                                query = "SELECT question_id, course_outcome_id FROM question_course_outcome"
-                                
-                            associations = import_db.execute(query).fetchall()
-                            for row in associations:
-                                backup_q_id = safe_get(row, 'question_id')
-                                backup_co_id = safe_get(row, 'course_outcome_id')
-                                # Get relative weight if available, otherwise use default 1.0
-                                relative_weight = safe_get(row, 'relative_weight', 1.0)
-
-                                if backup_q_id not in question_id_map or backup_co_id not in outcome_id_map:
-                                    import_summary['errors'].append(
-                                        f"Skipped question-CO association with invalid IDs: q{backup_q_id}, co{backup_co_id}"
-                                    )
-                                    continue
-
-                                curr_q_id = question_id_map[backup_q_id]
-                                curr_co_id = outcome_id_map[backup_co_id]
-
-                                # Check if association already exists
-                                exists = current_db.execute(
-                                    "SELECT 1 FROM question_course_outcome WHERE question_id=? AND course_outcome_id=?",
-                                    (curr_q_id, curr_co_id)
-                                ).fetchone()
-
-                                if not exists:
-                                    try:
-                                        current_db.execute(
-                                            "INSERT INTO question_course_outcome (question_id, course_outcome_id, relative_weight) VALUES (?, ?, ?)",
-                                            (curr_q_id, curr_co_id, relative_weight)
-                                        )
-                                        if 'question_co_imported' not in import_summary:
-                                            import_summary['question_co_imported'] = 0
-                                        import_summary['question_co_imported'] += 1
-                                    except Exception as qe:
-                                        import_summary['errors'].append(f"Error associating question {curr_q_id} with outcome {curr_co_id}: {str(qe)}")
-                        except Exception as e:
-                            import_summary['errors'].append(f"Error importing question-CO associations: {str(e)}")
+                    # Imported data can land in existing courses: drop every cached course result
+                    try:
+                        current_db.execute("DELETE FROM course_result_cache")
+                        current_db.execute("UPDATE course_data_version SET version = version + 1")
+                    except sqlite3.Error as cache_error:
+                        logging.warning(f"Could not clear course result cache after import: {str(cache_error)}")
 
                     current_db.execute("COMMIT")
 
@@ -2350,6 +1487,11 @@ def import_database():
                     logging.error(f"Import error: {error_message}\n{traceback.format_exc()}")
                     flash(error_message, "error")
 
+                try:
+                    detach_backup(current_db)
+                except sqlite3.Error as detach_error:
+                    logging.error(f"Could not detach the imported backup: {str(detach_error)}")
+
                 # Build and flash an import summary message.
                 summary_message = "<strong>Import Summary:</strong><br>"
                 for key, count in import_summary.items():
@@ -2383,7 +1525,7 @@ def import_database():
         backup_dir = current_app.config['BACKUP_FOLDER']
         backups = []
         if os.path.exists(backup_dir):
-            for backup_file in glob.glob(os.path.join(backup_dir, "*.db")):
+            for backup_file in list_backup_files(backup_dir):
                 filename = os.path.basename(backup_file)
                 created_at = os.path.getmtime(backup_file)
                 size = os.path.getsize(backup_file) / (1024 * 1024)
@@ -2524,6 +1666,14 @@ def preview_merge():
             }
         }
 
+        # Dry run of the merge: the same snapshot and plan as merge_courses, without writing
+        source_course_ids = [source_course.id for source_course in source_courses]
+        snapshot = load_merge_snapshot(destination_course.id, source_course_ids)
+        merge_stats = plan_course_merge(snapshot, destination_course.id, source_course_ids,
+                                        merge_students, merge_exams, merge_outcomes)['stats']
+        preview['merge_stats'] = merge_stats
+        preview['merge_preview']['attendances']['new'] = merge_stats['attendances_merged']
+
         # Build lookup maps for destination items
         dest_students = {student.student_id: student for student in destination_course.students}
         dest_exams = {exam.name: exam for exam in destination_course.exams}
@@ -2549,17 +1699,11 @@ def preview_merge():
             if merge_students:
                 preview['merge_preview']['students']['total'] += len(source_course.students)
 
-                # Check for students with incomplete attendance records
+                # Check for students with incomplete attendance records (from the merge snapshot)
                 if merge_exams:
-                    for student in source_course.students:
-                        # Get all exams for this course
-                        course_exams = Exam.query.filter_by(course_id=source_course.id).all()
-                        course_exam_ids = [exam.id for exam in course_exams]
-
-                        # Get attendance records for this student
-                        attendance_exam_ids = [
-                            a.exam_id for a in StudentExamAttendance.query.filter_by(student_id=student.id).all()
-                        ]
+                    course_exam_ids = [exam.id for exam in snapshot['exams'][source_course.id]]
+                    for student in snapshot['students'][source_course.id]:
+                        attendance_exam_ids = [exam_id for exam_id, _ in snapshot['attendance'].get(student.id, ())]
 
                         # Find exams without attendance records
                         missing_attendance = set(course_exam_ids) - set(attendance_exam_ids)
@@ -3119,281 +2263,72 @@ def student_ranking():
 
 @utility_bp.route('/student_ranking/data')
 def student_ranking_data():
-    """Get student ranking data efficiently"""
+    """
+    Get student ranking data from the cached ranking snapshot (see routes/ranking_engine.py).
+
+    With a page parameter only that page is returned, filtered by search and
+    sorted by sort (rank, name, student_id, course_count, average_score,
+    exam_count), together with the number of matching students and the
+    statistics of the whole ranking. Without it every ranked student is returned.
+    """
     try:
         # Get filter parameters
         min_exams = request.args.get('min_exams', type=int, default=0)
-        # Get all students with their course information in one query
-        students_query = db.session.query(
-            Student.id,
-            Student.student_id,
-            Student.first_name,
-            Student.last_name,
-            Student.course_id,
-            Course.code.label('course_code'),
-            Course.name.label('course_name')
-        ).join(Course).filter(
-            Student.excluded == False
-        ).all()
-        
-        if not students_query:
-            return jsonify({'students': [], 'total': 0})
-        
-        # Group students by student_id (same student can be in multiple courses)
-        student_data = {}
-        for row in students_query:
-            student_key = row.student_id
-            if student_key not in student_data:
-                student_data[student_key] = {
-                    'student_id': row.student_id,
-                    'name': f"{row.first_name} {row.last_name}".strip(),
-                    'courses': [],
-                    'total_score': 0,
-                    'total_exams': 0,
-                    'course_count': 0
-                }
-            
-            student_data[student_key]['courses'].append({
-                'course_id': row.course_id,
-                'course_code': row.course_code,
-                'course_name': row.course_name,
-                'student_db_id': row.id  # The internal database ID for this student-course relationship
-            })
-            student_data[student_key]['course_count'] += 1
-        
-        # Get all student internal IDs for score queries
-        all_student_db_ids = []
-        student_id_to_db_ids = {}  # Maps student_id to list of internal db IDs
-        for student_key, data in student_data.items():
-            db_ids = []
-            for course in data['courses']:
-                all_student_db_ids.append(course['student_db_id'])
-                db_ids.append(course['student_db_id'])
-            student_id_to_db_ids[student_key] = db_ids
-        
-        if not all_student_db_ids:
-            return jsonify({'students': [], 'total': 0})
-        
-        # Get all scores for these students efficiently
-        scores_query = db.session.query(
-            Score.student_id,
-            Score.exam_id,
-            Score.score,
-            Question.max_score,
-            Exam.course_id
-        ).select_from(Score).join(
-            Question, Score.question_id == Question.id
-        ).join(
-            Exam, Question.exam_id == Exam.id
-        ).filter(
-            Score.student_id.in_(all_student_db_ids)
-        ).all()
-        
-        # Group scores by student and exam
-        student_exam_scores = {}  # {student_db_id: {exam_id: {'total_score': X, 'max_score': Y}}}
-        for score_row in scores_query:
-            student_db_id = score_row.student_id
-            exam_id = score_row.exam_id
-            
-            if student_db_id not in student_exam_scores:
-                student_exam_scores[student_db_id] = {}
-            
-            if exam_id not in student_exam_scores[student_db_id]:
-                student_exam_scores[student_db_id][exam_id] = {
-                    'total_score': 0,
-                    'max_score': 0
-                }
-            
-            student_exam_scores[student_db_id][exam_id]['total_score'] += float(score_row.score)
-            student_exam_scores[student_db_id][exam_id]['max_score'] += float(score_row.max_score)
-        
-        # Calculate average scores for each student
-        final_rankings = []
-        for student_key, data in student_data.items():
-            total_percentage = 0
-            exam_count = 0
-            
-            # Get scores for all this student's database IDs (across all courses)
-            for db_id in student_id_to_db_ids[student_key]:
-                if db_id in student_exam_scores:
-                    for exam_id, exam_data in student_exam_scores[db_id].items():
-                        if exam_data['max_score'] > 0:
-                            exam_percentage = (exam_data['total_score'] / exam_data['max_score']) * 100
-                            total_percentage += exam_percentage
-                            exam_count += 1
-            
-            # Calculate average score
-            average_score = total_percentage / exam_count if exam_count > 0 else 0
-            
-            # Apply minimum exams filter
-            if exam_count < min_exams:
-                continue  # Skip this student if they haven't taken enough exams
-            
-            # Calculate ranking value (courses + average score)
-            ranking_value = data['course_count'] + average_score
-            
-            final_rankings.append({
-                'student_id': data['student_id'],
-                'name': data['name'],
-                'course_count': data['course_count'],
-                'average_score': round(average_score, 2),
-                'exam_count': exam_count,
-                'ranking_value': round(ranking_value, 2)
+        page = request.args.get('page', type=int)
+
+        if page is None:
+            students = get_student_rankings(min_exams)
+            return jsonify({
+                'students': students,
+                'total': len(students)
             })
-        
-        # Sort by ranking value (descending)
-        final_rankings.sort(key=lambda x: x['ranking_value'], reverse=True)
-        
-        # Add rank numbers
-        for i, student in enumerate(final_rankings):
-            student['rank'] = i + 1
-        
+
+        per_page = min(max(request.args.get('per_page', type=int, default=25), 1), 500)
+        students, total, statistics = query_student_rankings(
+            min_exams=min_exams,
+            search=request.args.get('search', ''),
+            sort=request.args.get('sort', 'rank'),
+            page=max(page, 1),
+            per_page=per_page
+        )
         return jsonify({
-            'students': final_rankings,
-            'total': len(final_rankings)
+            'students': students,
+            'total': total,
+            'page': max(page, 1),
+            'per_page': per_page,
+            'pages': (total + per_page - 1) // per_page,
+            'statistics': statistics
         })
-        
+
     except Exception as e:
         logging.error(f"Error in student ranking data: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @utility_bp.route('/student_ranking/export')
 def export_student_ranking():
-    """Export student ranking data to CSV"""
+    """Export student ranking data to CSV (same snapshot as the ranking page)"""
     try:
         # Get filter parameters
         min_exams = request.args.get('min_exams', type=int, default=0)
-        
-        # Get the same data as the ranking page
-        from flask import request as flask_request
-        
-        # Get data from the data endpoint logic (reuse the same calculation)
-        # We'll call the same logic but format it for export
-        
-        # Get all students with their course information in one query
-        students_query = db.session.query(
-            Student.id,
-            Student.student_id,
-            Student.first_name,
-            Student.last_name,
-            Student.course_id,
-            Course.code.label('course_code'),
-            Course.name.label('course_name')
-        ).join(Course).filter(
-            Student.excluded == False
-        ).all()
-        
-        if not students_query:
-            return export_to_excel_csv([], 'student_ranking_empty', 
-                                     ['Rank', 'Student ID', 'Name', 'Courses Count', 'Average Score'])
-        
-        # Group students by student_id (same student can be in multiple courses)
-        student_data = {}
-        for row in students_query:
-            student_key = row.student_id
-            if student_key not in student_data:
-                student_data[student_key] = {
-                    'student_id': row.student_id,
-                    'name': f"{row.first_name} {row.last_name}".strip(),
-                    'courses': [],
-                    'course_count': 0
-                }
-            
-            student_data[student_key]['courses'].append({
-                'course_id': row.course_id,
-                'student_db_id': row.id
-            })
-            student_data[student_key]['course_count'] += 1
-        
-        # Get all student internal IDs for score queries
-        all_student_db_ids = []
-        student_id_to_db_ids = {}
-        for student_key, data in student_data.items():
-            db_ids = []
-            for course in data['courses']:
-                all_student_db_ids.append(course['student_db_id'])
-                db_ids.append(course['student_db_id'])
-            student_id_to_db_ids[student_key] = db_ids
-        
-        # Get all scores for these students efficiently
-        scores_query = db.session.query(
-            Score.student_id,
-            Score.exam_id,
-            Score.score,
-            Question.max_score
-        ).select_from(Score).join(
-            Question, Score.question_id == Question.id
-        ).join(
-            Exam, Question.exam_id == Exam.id
-        ).filter(
-            Score.student_id.in_(all_student_db_ids)
-        ).all()
-        
-        # Group scores by student and exam
-        student_exam_scores = {}
-        for score_row in scores_query:
-            student_db_id = score_row.student_id
-            exam_id = score_row.exam_id
-            
-            if student_db_id not in student_exam_scores:
-                student_exam_scores[student_db_id] = {}
-            
-            if exam_id not in student_exam_scores[student_db_id]:
-                student_exam_scores[student_db_id][exam_id] = {
-                    'total_score': 0,
-                    'max_score': 0
-                }
-            
-            student_exam_scores[student_db_id][exam_id]['total_score'] += float(score_row.score)
-            student_exam_scores[student_db_id][exam_id]['max_score'] += float(score_row.max_score)
-        
-        # Calculate rankings
-        final_rankings = []
-        for student_key, data in student_data.items():
-            total_percentage = 0
-            exam_count = 0
-            
-            for db_id in student_id_to_db_ids[student_key]:
-                if db_id in student_exam_scores:
-                    for exam_id, exam_data in student_exam_scores[db_id].items():
-                        if exam_data['max_score'] > 0:
-                            exam_percentage = (exam_data['total_score'] / exam_data['max_score']) * 100
-                            total_percentage += exam_percentage
-                            exam_count += 1
-            
-            average_score = total_percentage / exam_count if exam_count > 0 else 0
-            
-            # Apply minimum exams filter
-            if exam_count < min_exams:
-                continue  # Skip this student if they haven't taken enough exams
-            
-            ranking_value = data['course_count'] + average_score
-            
-            final_rankings.append({
-                'student_id': data['student_id'],
-                'name': data['name'],
-                'course_count': data['course_count'],
-                'average_score': round(average_score, 2),
-                'ranking_value': round(ranking_value, 2)
-            })
-        
-        # Sort by ranking value
-        final_rankings.sort(key=lambda x: x['ranking_value'], reverse=True)
-        
+        headers = ['Rank', 'Student ID', 'Name', 'Courses Count', 'Average Score']
+
+        students = get_student_rankings(min_exams)
+        if not students:
+            return export_to_excel_csv([], 'student_ranking_empty', headers)
+
         # Format for CSV export
         export_data = []
-        for i, student in enumerate(final_rankings):
+        for student in students:
             export_data.append([
-                i + 1,  # Rank
+                student['rank'],
                 student['student_id'],
                 student['name'],
                 student['course_count'],
                 student['average_score']
             ])
-        
-        headers = ['Rank', 'Student ID', 'Name', 'Courses Count', 'Average Score']
+
         return export_to_excel_csv(export_data, 'student_ranking', headers)
-        
+
     except Exception as e:
         logging.error(f"Error exporting student ranking: {str(e)}")
         flash(f'Error exporting data: {str(e)}', 'error')
@@ -3403,68 +2338,8 @@ def export_student_ranking():
 def program_outcome_contributions():
     """Show which courses contribute to each program outcome"""
     try:
-        # Get all program outcomes
-        program_outcomes = ProgramOutcome.query.order_by(ProgramOutcome.code).all()
-        
-        # Get all courses with their settings
-        courses = Course.query.outerjoin(CourseSettings).all()
-        
-        # Build the data structure
-        program_outcome_data = {}
-        
-        for po in program_outcomes:
-            contributing_courses = []
-            
-            # Find all course outcomes that are linked to this program outcome
-            course_outcomes = CourseOutcome.query.filter(
-                CourseOutcome.program_outcomes.any(id=po.id)
-            ).all()
-            
-            # Get the courses from these course outcomes
-            for co in course_outcomes:
-                course = co.course
-                is_excluded = course.settings and course.settings.excluded
-                
-                course_info = {
-                    'id': course.id,
-                    'code': course.code,
-                    'name': course.name,
-                    'semester': course.semester,
-                    'course_weight': float(course.course_weight),
-                    'excluded': is_excluded,
-                    'course_outcome_code': co.code,
-                    'course_outcome_description': co.description
-                }
-                
-                # Check if this course is already in the list (could have multiple COs linking to same PO)
-                existing_course = next((c for c in contributing_courses if c['id'] == course.id), None)
-                if existing_course:
-                    # Add the course outcome info to existing course
-                    if 'course_outcomes' not in existing_course:
-                        existing_course['course_outcomes'] = [existing_course['course_outcome_code']]
-                        del existing_course['course_outcome_code']
-                        del existing_course['course_outcome_description']
-                    existing_course['course_outcomes'].append(co.code)
-                else:
-                    contributing_courses.append(course_info)
-            
-            # Sort courses by code
-            contributing_courses.sort(key=lambda x: x['code'])
-            
-            # Split into included and excluded
-            included_courses = [c for c in contributing_courses if not c['excluded']]
-            excluded_courses = [c for c in contributing_courses if c['excluded']]
-            
-            program_outcome_data[po.code] = {
-                'id': po.id,
-                'description': po.description,
-                'all_courses': contributing_courses,
-                'included_courses': included_courses,
-                'excluded_courses': excluded_courses,
-                'total_count': len(contributing_courses),
-                'included_count': len(included_courses),
-                'excluded_count': len(excluded_courses)
-            }
+        # Program outcomes and their contributing courses come from the shared contribution index
+        program_outcomes, program_outcome_data = contributions_page_data()
         
         return render_template('utility/program_outcome_contributions.html',
                              program_outcomes=program_outcomes,
@@ -3480,66 +2355,11 @@ def program_outcome_contributions():
 def program_outcome_contributions_api(program_outcome_code):
     """API endpoint to get course contributions for a specific program outcome"""
     try:
-        # Get the program outcome
-        po = ProgramOutcome.query.filter_by(code=program_outcome_code).first()
-        if not po:
+        data = contributions_api_data(program_outcome_code)
+        if data is None:
             return jsonify({'error': 'Program outcome not found'}), 404
         
-        # Find all course outcomes that are linked to this program outcome
-        course_outcomes = CourseOutcome.query.filter(
-            CourseOutcome.program_outcomes.any(id=po.id)
-        ).all()
-        
-        contributing_courses = []
-        course_ids_seen = set()
-        
-        # Get the courses from these course outcomes
-        for co in course_outcomes:
-            course = co.course
-            
-            if course.id not in course_ids_seen:
-                is_excluded = course.settings and course.settings.excluded
-                
-                course_info = {
-                    'id': course.id,
-                    'code': course.code,
-                    'name': course.name,
-                    'semester': course.semester,
-                    'course_weight': float(course.course_weight),
-                    'excluded': is_excluded,
-                    'course_outcomes': []
-                }
-                contributing_courses.append(course_info)
-                course_ids_seen.add(course.id)
-            
-            # Find the course in the list and add the course outcome
-            course_info = next(c for c in contributing_courses if c['id'] == course.id)
-            course_info['course_outcomes'].append({
-                'code': co.code,
-                'description': co.description
-            })
-        
-        # Sort courses by code
-        contributing_courses.sort(key=lambda x: x['code'])
-        
-        # Split into included and excluded
-        included_courses = [c for c in contributing_courses if not c['excluded']]
-        excluded_courses = [c for c in contributing_courses if c['excluded']]
-        
-        return jsonify({
-            'program_outcome': {
-                'code': po.code,
-                'description': po.description
-            },
-            'all_courses': contributing_courses,
-            'included_courses': included_courses,
-            'excluded_courses': excluded_courses,
-            'summary': {
-                'total_count': len(contributing_courses),
-                'included_count': len(included_courses),
-                'excluded_count': len(excluded_courses)
-            }
-        })
+        return jsonify(data)
     
     except Exception as e:
         logging.error(f"Error in program_outcome_contributions_api: {str(e)}")
@@ -3547,86 +2367,119 @@ def program_outcome_contributions_api(program_outcome_code):
 
 @utility_bp.route('/program_outcome_contributions/generate_pdfs', methods=['POST'])
 def generate_program_outcome_pdfs():
-    """Generate PDF reports for all program outcomes showing their contributing courses"""
+    """Start generating PDF reports for all program outcomes showing their contributing courses (background job)"""
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
     try:
         # Get form parameters
         custom_suffix = request.form.get('custom_suffix', '').strip()
         orientation = request.form.get('orientation', 'landscape')
         page_size = request.form.get('page_size', 'A4')
         
-        # Get all program outcomes
-        program_outcomes = ProgramOutcome.query.order_by(ProgramOutcome.code).all()
+        # Get all program outcomes (the pages rendered for the PDFs are served from the same index)
+        program_outcome_codes = [po['code'] for po in get_contribution_index()['program_outcomes']]
         
-        if not program_outcomes:
+        if not program_outcome_codes:
+            if is_ajax:
+                return jsonify({'success': False, 'error': 'No program outcomes found to generate PDFs.'}), 400
             flash('No program outcomes found to generate PDFs.', 'warning')
             return redirect(url_for('utility.program_outcome_contributions'))
         
-        # Create timestamped directory for this run
-        from datetime import datetime
-        timestamp = datetime.now().strftime('%d_%B_%Y_%H_%M_%p')
-        po_pdfs_dir = os.path.join('program_outcome_pdfs', timestamp)
-        os.makedirs(po_pdfs_dir, exist_ok=True)
-        
-        # Generate PDFs for each program outcome
-        generated_files = []
-        errors = []
-        
-        for po in program_outcomes:
-            try:
-                # Generate filename
-                filename_base = f"{po.code}"
-                if custom_suffix:
-                    filename_base += f" {custom_suffix}"
-                filename = f"{filename_base}.pdf"
-                filepath = os.path.join(po_pdfs_dir, filename)
-                
-                # Generate PDF using Playwright
-                pdf_content = generate_program_outcome_pdf_with_playwright(
-                    po.code, orientation, page_size
-                )
-                
-                if pdf_content:
-                    # Save PDF file
-                    with open(filepath, 'wb') as f:
-                        f.write(pdf_content)
-                    generated_files.append(filename)
-                    logging.info(f"Generated PDF for program outcome {po.code}: {filename}")
-                else:
-                    errors.append(f"Failed to generate PDF for {po.code}")
-                    logging.error(f"Failed to generate PDF for program outcome {po.code}")
-                    
-            except Exception as e:
-                errors.append(f"Error generating PDF for {po.code}: {str(e)}")
-                logging.error(f"Error generating PDF for program outcome {po.code}: {str(e)}")
-        
-        # Log action
-        log = Log(action="GENERATE_PROGRAM_OUTCOME_PDFS",
-                 description=f"Generated {len(generated_files)} program outcome PDF reports in folder: {po_pdfs_dir}")
-        db.session.add(log)
-        db.session.commit()
+        # The job runs outside the request: pass the base URL for rendering the pages
+        from routes.job_queue import submit_job
+        job_id = submit_job(
+            'program_outcome_pdfs', generate_program_outcome_pdfs_job,
+            program_outcome_codes, custom_suffix, orientation, page_size, request.url_root.rstrip('/'),
+            total=len(program_outcome_codes),
+            message=f'Preparing to generate {len(program_outcome_codes)} program outcome PDFs...'
+        )
         
-        # Show results
-        if generated_files:
-            success_msg = f"Successfully generated {len(generated_files)} PDF reports in folder: {po_pdfs_dir}"
-            if errors:
-                success_msg += f" (with {len(errors)} errors)"
-            flash(success_msg, 'success')
-            
-            # Show error details if any
-            for error in errors:
-                flash(error, 'warning')
-        else:
-            flash('No PDF reports were generated successfully.', 'error')
+        if is_ajax:
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status_url': url_for('jobs.job_status', job_id=job_id),
+                'total': len(program_outcome_codes)
+            }), 202
         
+        flash(f'PDF generation for {len(program_outcome_codes)} program outcomes started in the background '
+              f'(progress: {url_for("jobs.job_status", job_id=job_id)}).', 'info')
         return redirect(url_for('utility.program_outcome_contributions'))
         
     except Exception as e:
         logging.error(f"Error in generate_program_outcome_pdfs: {str(e)}")
+        if is_ajax:
+            return jsonify({'success': False, 'error': str(e)}), 500
         flash(f'An error occurred during PDF generation: {str(e)}', 'error')
         return redirect(url_for('utility.program_outcome_contributions'))
 
-def generate_program_outcome_pdf_with_playwright(program_outcome_code, orientation='landscape', page_size='A4'):
-    """Generate PDF for a single program outcome using Playwright"""
+def generate_program_outcome_pdfs_job(job, program_outcome_codes, custom_suffix, orientation, page_size, base_url):
+    """Background job body for generate_program_outcome_pdfs"""
+    # Create a timestamped directory of its own for this run (jobs started in the same minute must not share it)
+    timestamp = datetime.now().strftime('%d_%B_%Y_%H_%M_%p')
+    os.makedirs('program_outcome_pdfs', exist_ok=True)
+    po_pdfs_dir = os.path.relpath(tempfile.mkdtemp(prefix=f'{timestamp}_', dir='program_outcome_pdfs'))
+    
+    # Generate PDFs for each program outcome
+    generated_files = []
+    errors = []
+    
+    for index, po_code in enumerate(program_outcome_codes):
+        job.check_cancelled()
+        job.update(current=index, message=f'Generating PDF for {po_code} ({index + 1}/{len(program_outcome_codes)})...')
+        try:
+            # Generate filename
+            filename_base = f"{po_code}"
+            if custom_suffix:
+                filename_base += f" {custom_suffix}"
+            filename = f"{filename_base}.pdf"
+            filepath = os.path.join(po_pdfs_dir, filename)
+            
+            # Generate PDF using Playwright
+            pdf_content = generate_program_outcome_pdf_with_playwright(
+                po_code, orientation, page_size, base_url
+            )
+            
+            if pdf_content:
+                # Save PDF file
+                with open(filepath, 'wb') as f:
+                    f.write(pdf_content)
+                generated_files.append(filepath)
+                logging.info(f"Generated PDF for program outcome {po_code}: {filename}")
+            else:
+                errors.append(f"Failed to generate PDF for {po_code}")
+                logging.error(f"Failed to generate PDF for program outcome {po_code}")
+                
+        except Exception as e:
+            errors.append(f"Error generating PDF for {po_code}: {str(e)}")
+            logging.error(f"Error generating PDF for program outcome {po_code}: {str(e)}")
+    
+    if not generated_files:
+        raise RuntimeError('No PDF reports were generated successfully. ' + '; '.join(errors[:5]))
+    
+    # Offer all generated PDFs as one download
+    import zipfile
+    zip_path = os.path.join(po_pdfs_dir, 'program_outcome_pdfs.zip')
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for filepath in generated_files:
+            zip_file.write(filepath, os.path.basename(filepath))
+    job.set_result(os.path.abspath(zip_path), f'program_outcome_pdfs_{timestamp}.zip')
+    
+    # Log action
+    log = Log(action="GENERATE_PROGRAM_OUTCOME_PDFS",
+             description=f"Generated {len(generated_files)} program outcome PDF reports in folder: {po_pdfs_dir}")
+    db.session.add(log)
+    db.session.commit()
+    
+    message = f"Successfully generated {len(generated_files)} PDF reports in folder: {po_pdfs_dir}"
+    if errors:
+        message += f" (with {len(errors)} errors: {'; '.join(errors[:5])})"
+    job.update(current=len(program_outcome_codes), message=message)
+
+
+def generate_program_outcome_pdf_with_playwright(program_outcome_code, orientation='landscape', page_size='A4', base_url=None):
+    """Generate PDF for a single program outcome using Playwright (base_url is required outside a request)"""
+    if base_url is None:
+        base_url = request.url_root.rstrip('/')
     try:
         import asyncio
         from playwright.async_api import async_playwright
@@ -3639,7 +2492,6 @@ def generate_program_outcome_pdf_with_playwright(program_outcome_code, orientati
                     page = await browser.new_page()
                     
                     # Build URL to the program outcome contributions page with auto-selection
-                    base_url = request.url_root.rstrip('/')
                     url = f"{base_url}/utility/program_outcome_contributions"
                     
                     # Navigate to the page
@@ -0,0 +1,350 @@
+"""
+Vectorized NumPy Calculation Engine
+
+This module provides an alternative to the Decimal based per-student loops in
+calculate_course_results_from_bulk_data_v2_optimized. A course's scores are
+packed into a dense student x question matrix, the Q-CO and CO-PO relative
+weights into matrices, and every student's CO/PO score is computed with
+matrix products.
+
+The engine works purely on the per-course dictionaries produced by
+bulk_load_course_data and never touches the database, so it is safe to call
+for hundreds of courses on the /calculation/all_courses page.
+
+Semantics follow the Decimal path exactly:
+1. Only questions that have a score for a student count towards that student's
+   CO score (missing scores are neither earned nor possible points)
+2. A base exam is skipped for a CO when the student attended (or has no
+   attendance record for) a makeup exam that is also linked to that CO
+3. Each exam contributes its percentage weighted by the course-level exam
+   weight times the sum of the Q-CO weights of the scored questions
+4. CO scores are rounded half-up to 2 decimals before PO aggregation
+
+NumPy is imported by the functions that use it, so importing this module (for
+the engine names) does not load NumPy until the engine is actually used.
+"""
+
+from decimal import Decimal
+
+# Settings accepted by CALCULATION_ENGINE
+ENGINE_DECIMAL = 'decimal'
+ENGINE_NUMPY = 'numpy'
+ENGINE_PARITY = 'parity'
+CALCULATION_ENGINES = (ENGINE_DECIMAL, ENGINE_NUMPY, ENGINE_PARITY)
+
+# Guards float comparisons against representation error (e.g. 59.99999999999 vs 60)
+FLOAT_EPSILON = 1e-9
+
+
+def _empty_result(course, contributing_po_ids):
+    """Result returned when a course cannot be used for aggregation"""
+    return {
+        'program_outcome_scores': {},
+        'contributing_po_ids': contributing_po_ids,
+        'is_valid_for_aggregation': False,
+        'student_count_used': 0,
+        'course': course
+    }
+
+
+def round_half_up(values):
+    """Round an array to 2 decimals using ROUND_HALF_UP like Decimal.quantize"""
+    import numpy as np
+    return np.floor(values * 100.0 + 0.5 + FLOAT_EPSILON) / 100.0
+
+
+def get_valid_students(course_data):
+    """
+    Return the students that take part in the calculation.
+
+    Mirrors the filtering of the v2 Decimal path: manually excluded students are
+    removed and students who missed a mandatory exam and its makeup are skipped.
+    Missing attendance records count as attended.
+    """
+    students = course_data['students']
+    attendance_dict = course_data['attendance_dict']
+    makeup_map = course_data['makeup_map']
+
+    mandatory_exams = [exam for exam in course_data['regular_exams'] if exam.is_mandatory]
+
+    valid_students = []
+    for student in students:
+        if getattr(student, 'excluded', False):
+            continue
+
+        skip_student = False
+        for exam in mandatory_exams:
+            regular_attended = attendance_dict.get((student.id, exam.id), True)
+            makeup_exam = makeup_map.get(exam.id)
+            makeup_attended = attendance_dict.get((student.id, makeup_exam.id), True) if makeup_exam else False
+
+            if not regular_attended and not makeup_attended:
+                skip_student = True
+                break
+
+        if not skip_student:
+            valid_students.append(student)
+
+    return valid_students
+
+
+def build_course_matrices(course_data, students):
+    """
+    Pack a course's bulk data into dense matrices.
+
+    Returns a dictionary with:
+    - scores (S x Q): score values, 0 where a score is missing
+    - present (S x Q): 1.0 where a score exists, else 0.0
+    - max_scores (Q): question max scores
+    - question_exam (Q): index into exam_ids for every question
+    - qco_weights (Q x C): Q-CO relative weights, 0 where not linked
+    - qco_links (Q x C): True where a question is linked to a CO
+    - copo_weights (C x P): CO-PO relative weights, 0 where not linked
+    - attendance (S x E): 1.0 where the student attended (default attended)
+    - student_ids, question_ids, exam_ids, outcome_ids, po_ids: axis labels
+    """
+    import numpy as np
+    course_outcomes = course_data['course_outcomes']
+    program_outcomes = course_data['program_outcomes']
+    outcome_questions = course_data['outcome_questions']
+    scores_dict = course_data['scores_dict']
+    attendance_dict = course_data['attendance_dict']
+    question_co_weights = course_data.get('question_co_weights', {})
+    co_po_weights = course_data.get('co_po_weights', {})
+
+    student_ids = [s.id for s in students]
+    outcome_ids = [co.id for co in course_outcomes]
+    po_ids = [po.id for po in program_outcomes]
+    outcome_index = {co_id: i for i, co_id in enumerate(outcome_ids)}
+
+    # Only questions linked to at least one CO influence the results
+    questions = []
+    question_index = {}
+    for co_id in outcome_ids:
+        for question in outcome_questions.get(co_id, []):
+            if question.id not in question_index:
+                question_index[question.id] = len(questions)
+                questions.append(question)
+
+    exam_ids = sorted({q.exam_id for q in questions})
+    exam_index = {exam_id: i for i, exam_id in enumerate(exam_ids)}
+
+    num_students = len(student_ids)
+    num_questions = len(questions)
+
+    max_scores = np.array([float(q.max_score) for q in questions], dtype=np.float64)
+    question_exam = np.array([exam_index[q.exam_id] for q in questions], dtype=np.int64)
+
+    qco_weights = np.zeros((num_questions, len(outcome_ids)), dtype=np.float64)
+    qco_links = np.zeros((num_questions, len(outcome_ids)), dtype=bool)
+    for co_id in outcome_ids:
+        c = outcome_index[co_id]
+        for question in outcome_questions.get(co_id, []):
+            weight = question_co_weights.get((question.id, co_id), Decimal('1.0'))
+            qco_weights[question_index[question.id], c] = float(weight)
+            qco_links[question_index[question.id], c] = True
+
+    copo_weights = np.zeros((len(outcome_ids), len(po_ids)), dtype=np.float64)
+    program_to_course_outcomes = course_data['program_to_course_outcomes']
+    for p, po_id in enumerate(po_ids):
+        for co in program_to_course_outcomes.get(po_id, []):
+            if co.id in outcome_index:
+                weight = co_po_weights.get((co.id, po_id), Decimal('1.0'))
+                copo_weights[outcome_index[co.id], p] = float(weight)
+
+    scores = np.zeros((num_students, num_questions), dtype=np.float64)
+    present = np.zeros((num_students, num_questions), dtype=np.float64)
+    attendance = np.ones((num_students, len(exam_ids)), dtype=np.float64)
+
+    for s, student_id in enumerate(student_ids):
+        for question in questions:
+            value = scores_dict.get((student_id, question.id, question.exam_id))
+            if value is not None:
+                q = question_index[question.id]
+                scores[s, q] = float(value)
+                present[s, q] = 1.0
+        for exam_id, e in exam_index.items():
+            if not attendance_dict.get((student_id, exam_id), True):
+                attendance[s, e] = 0.0
+
+    return {
+        'scores': scores,
+        'present': present,
+        'max_scores': max_scores,
+        'question_exam': question_exam,
+        'qco_weights': qco_weights,
+        'qco_links': qco_links,
+        'copo_weights': copo_weights,
+        'attendance': attendance,
+        'student_ids': student_ids,
+        'question_ids': [q.id for q in questions],
+        'exam_ids': exam_ids,
+        'outcome_ids': outcome_ids,
+        'po_ids': po_ids
+    }
+
+
+def compute_course_outcome_matrix(course_data, matrices):
+    """
+    Compute the S x C matrix of course outcome scores (rounded to 2 decimals).
+    """
+    import numpy as np
+    scores = matrices['scores']
+    present = matrices['present']
+    max_scores = matrices['max_scores']
+    question_exam = matrices['question_exam']
+    qco_weights = matrices['qco_weights']
+    attendance = matrices['attendance']
+    exam_ids = matrices['exam_ids']
+
+    num_students = scores.shape[0]
+    num_outcomes = qco_weights.shape[1]
+
+    numerator = np.zeros((num_students, num_outcomes), dtype=np.float64)
+    denominator = np.zeros((num_students, num_outcomes), dtype=np.float64)
+
+    if not exam_ids or num_outcomes == 0:
+        return numerator
+
+    normalized_weights = course_data['normalized_weights']
+    exams_by_id = {exam.id: exam for exam in course_data['all_exams']}
+    exam_index = {exam_id: i for i, exam_id in enumerate(exam_ids)}
+
+    # Which exams carry questions for which CO (E x C)
+    exam_has_questions = np.zeros((len(exam_ids), num_outcomes), dtype=bool)
+    for q, e in enumerate(question_exam):
+        exam_has_questions[e] |= matrices['qco_links'][q]
+
+    # Makeups of each base exam, ordered by id so the last one wins like the Decimal path
+    makeups_by_base = {}
+    for exam_id in exam_ids:
+        exam = exams_by_id.get(exam_id)
+        if exam is not None and exam.is_makeup and exam.makeup_for:
+            makeups_by_base.setdefault(exam.makeup_for, []).append(exam_index[exam_id])
+
+    weighted_scores = scores * present
+
+    for exam_id in exam_ids:
+        if exam_id not in normalized_weights:
+            continue
+
+        e = exam_index[exam_id]
+        columns = np.flatnonzero(question_exam == e)
+        exam_weight = float(normalized_weights[exam_id])
+
+        exam_qco = qco_weights[columns]
+        earned = weighted_scores[:, columns] @ exam_qco
+        possible = present[:, columns] @ (max_scores[columns, None] * exam_qco)
+        applied_weight = present[:, columns] @ exam_qco
+
+        effective_weight = exam_weight * applied_weight
+
+        # Skip the base exam where the student sat a makeup linked to the same CO
+        exam = exams_by_id.get(exam_id)
+        if exam is not None and not exam.is_makeup and exam_id in makeups_by_base:
+            for c in range(num_outcomes):
+                linked_makeups = [m for m in makeups_by_base[exam_id] if exam_has_questions[m, c]]
+                if linked_makeups:
+                    effective_weight[:, c] *= 1.0 - attendance[:, linked_makeups[-1]]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percentage = np.where(possible > 0, earned / np.where(possible > 0, possible, 1.0) * 100.0, 0.0)
+
+        numerator += percentage * effective_weight
+        denominator += effective_weight
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        co_scores = np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1.0), 0.0)
+
+    return round_half_up(co_scores)
+
+
+def compute_program_outcome_matrix(co_scores, copo_weights):
+    """
+    Compute the S x P matrix of program outcome scores as the CO-PO weighted
+    average of the related CO scores.
+    """
+    import numpy as np
+    total_weights = copo_weights.sum(axis=0)
+    weighted = co_scores @ copo_weights
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total_weights > 0, weighted / np.where(total_weights > 0, total_weights, 1.0), 0.0)
+
+
+def calculate_course_results_vectorized(course_id, bulk_data, calculation_method='absolute', include_student_scores=False):
+    """
+    Vectorized equivalent of calculate_course_results_from_bulk_data_v2_optimized.
+
+    Parameters:
+    - course_id: The course to calculate
+    - bulk_data: Output of bulk_load_course_data
+    - calculation_method: 'absolute' or 'relative'
+    - include_student_scores: Also return the per-student CO/PO scores
+      (used by the parity check)
+
+    Returns the same dictionary shape as the Decimal path.
+    """
+    import numpy as np
+    course_data = bulk_data.get(course_id)
+    if not course_data:
+        return _empty_result(None, set())
+
+    course = course_data['course']
+    settings = course_data['settings']
+
+    if settings.excluded:
+        return _empty_result(course, set())
+
+    contributing_po_ids = course_data['contributing_po_ids']
+
+    if not course_data['course_outcomes'] or not course_data['students']:
+        return _empty_result(course, contributing_po_ids)
+
+    total_questions = sum(len(questions) for questions in course_data['questions_by_exam'].values())
+    if total_questions == 0:
+        return _empty_result(course, contributing_po_ids)
+
+    valid_students = get_valid_students(course_data)
+    if not valid_students:
+        return _empty_result(course, contributing_po_ids)
+
+    matrices = build_course_matrices(course_data, valid_students)
+    co_scores = compute_course_outcome_matrix(course_data, matrices)
+    po_scores = compute_program_outcome_matrix(co_scores, matrices['copo_weights'])
+
+    program_outcome_scores = {}
+    if calculation_method == 'relative':
+        threshold = float(settings.relative_success_threshold)
+        meeting_threshold = (po_scores >= threshold - FLOAT_EPSILON).sum(axis=0)
+        for p, po_id in enumerate(matrices['po_ids']):
+            program_outcome_scores[po_id] = (int(meeting_threshold[p]) / len(valid_students)) * 100
+    else:
+        averages = po_scores.mean(axis=0) if len(valid_students) else np.zeros(len(matrices['po_ids']))
+        for p, po_id in enumerate(matrices['po_ids']):
+            program_outcome_scores[po_id] = float(averages[p])
+
+    is_valid_for_aggregation = (
+        len(valid_students) > 0 and
+        bool(program_outcome_scores) and
+        any(score > 0 for score in program_outcome_scores.values())
+    )
+
+    result = {
+        'program_outcome_scores': program_outcome_scores,
+        'contributing_po_ids': contributing_po_ids,
+        'is_valid_for_aggregation': is_valid_for_aggregation,
+        'student_count_used': len(valid_students),
+        'course': course
+    }
+
+    if include_student_scores:
+        result['student_course_outcome_scores'] = {
+            student_id: dict(zip(matrices['outcome_ids'], co_scores[s].tolist()))
+            for s, student_id in enumerate(matrices['student_ids'])
+        }
+        result['student_program_outcome_scores'] = {
+            student_id: dict(zip(matrices['po_ids'], po_scores[s].tolist()))
+            for s, student_id in enumerate(matrices['student_ids'])
+        }
+
+    return result
@@ -0,0 +1,249 @@
+"""
+Per-request SQL profiler for Accredit Helper Pro.
+
+When profiling is on, every SQL statement executed while a request is handled
+is timed with the SQLAlchemy before_cursor_execute / after_cursor_execute
+events (on every engine, so the read-only reporting engine of db_performance.py
+is included). At the end of the request the profiler records:
+
+- the number of statements and the time spent in SQLite
+- the Python time (request time minus SQL time: calculations, templates)
+- the slowest statements of the request
+
+Requests are kept in a ring buffer (SQL_PROFILER_HISTORY entries) and summed
+per endpoint, with the SQL_PROFILER_TOP_N slowest statements per endpoint and
+overall. The results are shown on /utility/performance, where profiling can be
+switched on and off at runtime (like the logging level). Statements run by
+background jobs (no request) are not recorded.
+
+Usage:
+    from sql_profiler import configure_sql_profiler
+    configure_sql_profiler(app)
+"""
+
+import heapq
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from itertools import count
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_HISTORY = 200
+DEFAULT_TOP_N = 10
+
+# Endpoints never profiled (the dashboard itself would fill the history it shows)
+EXCLUDED_ENDPOINTS = ('static', 'utility.performance')
+
+# Longer statements are cut in the report (the start identifies the query)
+MAX_STATEMENT_LENGTH = 600
+
+_listeners_installed = False
+_listener_lock = threading.Lock()
+
+
+def _config_int(app, name, default):
+    try:
+        return max(1, int(app.config.get(name, default)))
+    except (TypeError, ValueError):
+        logging.warning(f"Invalid {name} '{app.config.get(name)}', using {default}")
+        return default
+
+
+def _push_slowest(heap, top_n, duration, sequence, item):
+    """Keep the top_n slowest items in a min-heap of (duration, sequence, item)"""
+    entry = (duration, sequence, item)
+    if len(heap) < top_n:
+        heapq.heappush(heap, entry)
+    elif duration > heap[0][0]:
+        heapq.heapreplace(heap, entry)
+
+
+def _sorted_slowest(heap):
+    return [item for _, _, item in sorted(heap, key=lambda entry: entry[0], reverse=True)]
+
+
+class SQLProfiler:
+    """Ring buffer of profiled requests and per-endpoint totals (thread-safe)"""
+
+    def __init__(self, enabled=False, history=DEFAULT_HISTORY, top_n=DEFAULT_TOP_N):
+        self.enabled = enabled
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._sequence = count()
+        self._requests = deque(maxlen=history)
+        self._endpoints = {}
+        self._slowest = []
+        self.started_at = datetime.now()
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._endpoints = {}
+            self._slowest = []
+            self.started_at = datetime.now()
+
+    def record_request(self, profile):
+        """Add a finished request (the dict built by the request hooks)"""
+        total_ms = profile['total_ms']
+        endpoint = profile['endpoint']
+        with self._lock:
+            self._requests.append({key: value for key, value in profile.items() if key != 'slowest'})
+
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    'endpoint': endpoint, 'requests': 0, 'queries': 0, 'sql_ms': 0.0, 'python_ms': 0.0,
+                    'total_ms': 0.0, 'max_total_ms': 0.0, 'max_queries': 0, 'slowest': []
+                }
+            stats['requests'] += 1
+            stats['queries'] += profile['queries']
+            stats['sql_ms'] += profile['sql_ms']
+            stats['python_ms'] += profile['python_ms']
+            stats['total_ms'] += total_ms
+            stats['max_total_ms'] = max(stats['max_total_ms'], total_ms)
+            stats['max_queries'] = max(stats['max_queries'], profile['queries'])
+
+            for statement in profile['slowest']:
+                statement = dict(statement, endpoint=endpoint, path=profile['path'])
+                sequence = next(self._sequence)
+                _push_slowest(stats['slowest'], self.top_n, statement['duration_ms'], sequence, statement)
+                _push_slowest(self._slowest, self.top_n, statement['duration_ms'], sequence, statement)
+
+    def endpoint_summary(self):
+        """Per-endpoint totals and averages, the endpoints with the most total time first"""
+        with self._lock:
+            summary = []
+            for stats in self._endpoints.values():
+                requests = stats['requests']
+                summary.append({
+                    'endpoint': stats['endpoint'],
+                    'requests': requests,
+                    'avg_queries': round(stats['queries'] / requests, 1),
+                    'max_queries': stats['max_queries'],
+                    'avg_sql_ms': round(stats['sql_ms'] / requests, 2),
+                    'avg_python_ms': round(stats['python_ms'] / requests, 2),
+                    'avg_total_ms': round(stats['total_ms'] / requests, 2),
+                    'max_total_ms': round(stats['max_total_ms'], 2),
+                    'total_ms': round(stats['total_ms'], 2),
+                    'sql_share': round(100 * stats['sql_ms'] / stats['total_ms'], 1) if stats['total_ms'] else 0.0,
+                    'slowest': _sorted_slowest(stats['slowest']),
+                })
+        summary.sort(key=lambda item: item['total_ms'], reverse=True)
+        return summary
+
+    def recent_requests(self, limit=None):
+        """Profiled requests of the ring buffer, newest first"""
+        with self._lock:
+            requests = list(self._requests)
+        requests.reverse()
+        return requests[:limit] if limit else requests
+
+    def slow_requests(self, limit=20):
+        """Slowest requests of the ring buffer"""
+        with self._lock:
+            requests = list(self._requests)
+        return sorted(requests, key=lambda item: item['total_ms'], reverse=True)[:limit]
+
+    def slowest_statements(self):
+        with self._lock:
+            return _sorted_slowest(self._slowest)
+
+
+def get_sql_profiler(app=None):
+    """The profiler of the app, or None when configure_sql_profiler was not called"""
+    app = app or current_app
+    return app.extensions.get('sql_profiler')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    profile = g.get('_sql_profile')
+    if profile is not None and context is not None:
+        # Kept on the execution context, which is discarded with the statement even when it fails
+        # (the pooled connection's info would keep the start of a failed statement forever)
+        context._sql_profiler_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    profile = g.get('_sql_profile')
+    started = getattr(context, '_sql_profiler_start', None)
+    if profile is None or started is None:
+        return
+    duration = time.perf_counter() - started
+    duration_ms = duration * 1000
+    profile['queries'] += 1
+    profile['sql_time'] += duration
+    statement = ' '.join(statement.split())
+    if len(statement) > MAX_STATEMENT_LENGTH:
+        statement = statement[:MAX_STATEMENT_LENGTH] + '...'
+    _push_slowest(profile['slowest'], profile['top_n'], duration_ms, profile['queries'], {
+        'statement': statement,
+        'duration_ms': round(duration_ms, 3),
+        'executemany': bool(executemany),
+    })
+
+
+def _install_listeners():
+    """Time the statements of every engine (app engine and read-only reporting engine)"""
+    global _listeners_installed
+    with _listener_lock:
+        if _listeners_installed:
+            return
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _listeners_installed = True
+
+
+def configure_sql_profiler(app):
+    """
+    Create the profiler and register the request hooks.
+
+    SQL_PROFILING turns profiling on at startup; it can be switched at runtime on
+    /utility/performance. The profiler is kept in app.extensions['sql_profiler'].
+    """
+    enabled = str(app.config.get('SQL_PROFILING', '0')).lower() in ('1', 'true', 'on', 'yes')
+    profiler = SQLProfiler(enabled=enabled,
+                           history=_config_int(app, 'SQL_PROFILER_HISTORY', DEFAULT_HISTORY),
+                           top_n=_config_int(app, 'SQL_PROFILER_TOP_N', DEFAULT_TOP_N))
+    app.extensions['sql_profiler'] = profiler
+    _install_listeners()
+
+    @app.before_request
+    def start_sql_profile():
+        if profiler.enabled and request.endpoint not in EXCLUDED_ENDPOINTS:
+            g._sql_profile = {'start': time.perf_counter(), 'queries': 0, 'sql_time': 0.0,
+                              'top_n': profiler.top_n, 'slowest': []}
+
+    @app.after_request
+    def finish_sql_profile(response):
+        profile = g.pop('_sql_profile', None)
+        if profile is None:
+            return response
+        try:
+            total = time.perf_counter() - profile['start']
+            profiler.record_request({
+                'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'method': request.method,
+                'path': request.full_path.rstrip('?'),
+                'endpoint': request.endpoint or request.path,
+                'status': response.status_code,
+                'queries': profile['queries'],
+                'sql_ms': round(profile['sql_time'] * 1000, 2),
+                'python_ms': round(max(total - profile['sql_time'], 0.0) * 1000, 2),
+                'total_ms': round(total * 1000, 2),
+                'slowest': _sorted_slowest(profile['slowest']),
+            })
+        except Exception as e:
+            logging.error(f"Error recording SQL profile: {str(e)}")
+        return response
+
+    logging.info(f"SQL profiler configured (enabled: {enabled})")
+    return profiler
@@ -0,0 +1,82 @@
+"""
+Startup profiler for Accredit Helper Pro.
+
+create_app() times each of its phases (module imports, database setup,
+blueprint imports, schema checks, ...) in a StartupProfile stored as
+app.startup_profile. `python app.py --startup-profile` prints the report and
+exits without starting the server:
+
+    Phase                                   Time (ms)      %
+    Import app modules (flask, SQLAlchemy)      412.3   55.1
+    ...
+
+The report also lists which of the heavy optional modules (numpy, pandas,
+matplotlib, playwright, PyPDF2, reportlab) were imported during startup. They
+are only needed by the features that use them (PDF reports, the numpy
+calculation engine, ...) and are imported when those are first used, so the
+list should normally be empty.
+
+Usage:
+    from startup_profiler import StartupProfile
+    profile = StartupProfile()
+    with profile.phase('Database setup'):
+        ...
+    print(profile.report())
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+# Modules that take long to import and are only needed by some features
+HEAVY_MODULES = ('numpy', 'pandas', 'matplotlib', 'playwright', 'PyPDF2', 'reportlab')
+
+
+def loaded_heavy_modules():
+    """Heavy optional modules currently imported"""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+class StartupProfile:
+    """Wall-clock time of the named startup phases, in the order they ran"""
+
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self.finished = None
+        self.phases = []
+
+    def add(self, name, seconds):
+        self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as one phase"""
+        phase_started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - phase_started)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def total(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def report(self):
+        """Text table of the phases with their share of the total startup time"""
+        total = self.total
+        width = max([len(name) for name, _ in self.phases] + [len('Phase')]) + 2
+        lines = [f"{'Phase':<{width}}{'Time (ms)':>10}{'%':>7}", '-' * (width + 17)]
+        for name, seconds in self.phases:
+            share = seconds / total * 100 if total > 0 else 0
+            lines.append(f"{name:<{width}}{seconds * 1000:>10.1f}{share:>7.1f}")
+        untracked = total - sum(seconds for _, seconds in self.phases)
+        lines.append(f"{'Other':<{width}}{untracked * 1000:>10.1f}{(untracked / total * 100 if total > 0 else 0):>7.1f}")
+        lines.append('-' * (width + 17))
+        lines.append(f"{'Total':<{width}}{total * 1000:>10.1f}")
+        heavy = loaded_heavy_modules()
+        lines.append('')
+        lines.append(f"Heavy modules imported at startup: {', '.join(heavy) if heavy else 'none'}")
+        return '\n'.join(lines)
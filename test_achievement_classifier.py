@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test script for the compiled achievement-level classifier
+(routes/achievement_classifier.py).
+
+Compares the bisect lookups with the previous get_achievement_level() scan for
+random level sets (overlapping levels, gaps, equal minimums, unrounded
+boundaries) and scores around every 0.01 boundary, checks the error cases and
+that classifiers are compiled once per distinct set of levels.
+
+Usage: python test_achievement_classifier.py
+"""
+
+import os
+import sys
+import random
+from types import SimpleNamespace
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+
+def reference_achievement_level(score, achievement_levels):
+    """get_achievement_level() as it was before the classifier: a sorted Decimal scan per call"""
+    try:
+        score_decimal = score if isinstance(score, Decimal) else Decimal(str(score))
+        rounded_score = score_decimal.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    except (InvalidOperation, TypeError, ValueError):
+        return {'name': 'Invalid Score', 'color': 'secondary'}
+    if not isinstance(achievement_levels, list):
+        return {'name': 'Config Error', 'color': 'danger'}
+    try:
+        sorted_levels = sorted(achievement_levels, key=lambda x: Decimal(str(x.min_score)), reverse=True)
+    except (InvalidOperation, TypeError, ValueError):
+        return {'name': 'Config Error', 'color': 'danger'}
+    for level in sorted_levels:
+        try:
+            if Decimal(str(level.min_score)) <= rounded_score <= Decimal(str(level.max_score)):
+                return {'name': level.name, 'color': level.color}
+        except (InvalidOperation, TypeError, ValueError):
+            continue
+    return {'name': 'Not Categorized', 'color': 'secondary'}
+
+
+def default_levels():
+    return [SimpleNamespace(name=name, color=color, min_score=Decimal(low), max_score=Decimal(high))
+            for name, low, high, color in (('Excellent', '90.00', '100.00', 'success'),
+                                           ('Better', '70.00', '89.99', 'info'),
+                                           ('Good', '60.00', '69.99', 'primary'),
+                                           ('Need Improvements', '50.00', '59.99', 'warning'),
+                                           ('Failure', '0.01', '49.99', 'danger'))]
+
+
+def random_levels(rng):
+    """Levels with gaps, overlaps, equal minimums and boundaries of mixed types"""
+    levels = []
+    for index in range(rng.randint(1, 6)):
+        low = round(rng.uniform(-5, 100), rng.choice((0, 1, 2, 3)))
+        high = low + round(rng.uniform(-1, 40), rng.choice((0, 2, 3)))
+        if rng.random() < 0.2 and levels:
+            low = levels[-1].min_score
+        convert = rng.choice((float, lambda value: Decimal(str(value)), str))
+        levels.append(SimpleNamespace(name=f'L{index}', color='c', min_score=convert(low), max_score=convert(high)))
+    return levels
+
+
+def test_achievement_classifier():
+    """Bisect lookups classify exactly like the previous scan"""
+    print("Testing compiled achievement-level classifier...")
+
+    from routes.achievement_classifier import AchievementLevelClassifier, get_achievement_classifier
+    from routes.calculation_routes import get_achievement_level, cross_course_achievement_level
+
+    levels = default_levels()
+    boundary_scores = [Decimal(cents) / 100 for cents in range(-200, 10300)]
+    boundary_scores += [score + offset for score in (Decimal('49.99'), Decimal('59.99'), Decimal('89.99'))
+                        for offset in (Decimal('0.004'), Decimal('0.005'), Decimal('0.0049999'))]
+    boundary_scores += [59.995, 59.994, 89.995, 0.005, 0.004, 100.004, 100.005, '69.995', 70]
+    for score in boundary_scores:
+        assert get_achievement_level(score, levels) == reference_achievement_level(score, levels), score
+    print(f"  ✓ Default levels: {len(boundary_scores)} scores around every 0.01 boundary")
+
+    rng = random.Random(25)
+    checked = 0
+    for _ in range(300):
+        levels = random_levels(rng)
+        classifier = AchievementLevelClassifier(levels)
+        scores = [round(rng.uniform(-10, 150), rng.choice((0, 2, 3, 5))) for _ in range(60)]
+        scores += [Decimal(str(level.min_score)) for level in levels] + [Decimal(str(level.max_score)) for level in levels]
+        for score in scores:
+            assert classifier.classify(score) == reference_achievement_level(score, levels), (score, levels)
+            checked += 1
+    print(f"  ✓ Random level sets: {checked} scores match the previous scan")
+
+    levels = default_levels()
+    for score in (None, 'abc', float('inf'), float('nan'), Decimal('sNaN'), Decimal('1e30')):
+        assert get_achievement_level(score, levels) == reference_achievement_level(score, levels), score
+    assert get_achievement_level(50, tuple(levels)) == {'name': 'Config Error', 'color': 'danger'}
+    broken = levels + [SimpleNamespace(name='Broken', color='c', min_score='x', max_score='1')]
+    assert get_achievement_level(50, broken) == reference_achievement_level(50, broken)
+    invalid_max = levels + [SimpleNamespace(name='Bad max', color='c', min_score='95', max_score='y')]
+    assert get_achievement_level(95, invalid_max) == reference_achievement_level(95, invalid_max)
+    assert get_achievement_level(50, []) == {'name': 'Not Categorized', 'color': 'secondary'}
+    assert cross_course_achievement_level(0.0, levels) == {'name': 'Unknown', 'color': 'secondary'}
+    assert cross_course_achievement_level(89.995, levels)['name'] == 'Excellent'
+    print("  ✓ Invalid scores, invalid levels and fallbacks handled")
+
+    # Compiled once per distinct set of levels, recompiled when a level changes
+    classifier = get_achievement_classifier(levels)
+    assert get_achievement_classifier(default_levels()) is classifier
+    assert get_achievement_classifier(classifier) is classifier
+    changed = default_levels()
+    changed[1].min_score = Decimal('75.00')
+    assert get_achievement_classifier(changed) is not classifier
+    assert get_achievement_level(72, changed) == {'name': 'Not Categorized', 'color': 'secondary'}
+    result = classifier.classify(95)
+    result['name'] = 'Changed'
+    assert classifier.classify(95)['name'] == 'Excellent'
+    print("  ✓ Classifiers cached by level content")
+
+
+if __name__ == "__main__":
+    test_achievement_classifier()
+    print("All achievement classifier tests passed")
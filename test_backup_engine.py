@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test script for the database backup engine.
+
+Checks that online backups (SQLite backup API) are consistent while another
+connection keeps writing, that incremental .dbz backups only store the
+changed pages and restore to exactly the backed-up data, that a new base
+backup starts after INCREMENTAL_CHAIN_LIMIT backups, and that deleting a
+backup keeps the incremental backups based on it restorable.
+
+Usage: python test_backup_engine.py
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+
+def create_sample_database(path, rows=3000):
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE score (id INTEGER PRIMARY KEY, student TEXT, value REAL)")
+        conn.executemany("INSERT INTO score (student, value) VALUES (?, ?)",
+                         [(f'student-{i:05d}', i * 0.5) for i in range(rows)])
+    conn.close()
+
+
+def dump(path):
+    """All rows and the integrity check result of a database"""
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+        return conn.execute("SELECT id, student, value FROM score ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_online_backup_during_writes():
+    """The online backup is a consistent copy while another connection writes"""
+    print("Testing online backup...")
+    from routes.backup_engine import online_backup, create_database_backup
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(temp_dir, 'live.db')
+        create_sample_database(db_path)
+        stop = threading.Event()
+        writes = {'count': 0}
+
+        def writer():
+            conn = sqlite3.connect(db_path, timeout=30)
+            while not stop.is_set():
+                conn.execute("INSERT INTO score (student, value) VALUES ('writer', 1)")
+                conn.commit()
+                writes['count'] += 1
+            conn.close()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            backup_path = online_backup(db_path, os.path.join(temp_dir, 'copy.db'), pages_per_step=4, step_pause=0.001)
+        finally:
+            stop.set()
+            thread.join()
+
+        rows = dump(backup_path)
+        assert len(rows) >= 3000
+        assert not os.path.exists(backup_path + '.partial')
+        print(f"  ✓ Consistent backup of {len(rows)} rows while {writes['count']} rows were written")
+
+        filename = create_database_backup(db_path, temp_dir, 'accredit_data_backup', timestamp='20250101_000000')
+        assert filename == 'accredit_data_backup_20250101_000000.db'
+        assert dump(os.path.join(temp_dir, filename)) == dump(db_path)
+        again = create_database_backup(db_path, temp_dir, 'accredit_data_backup', timestamp='20250101_000000')
+        assert again == 'accredit_data_backup_20250101_000000_1.db'
+        print("  ✓ Full backups are plain SQLite files, same-second backups are not overwritten")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def test_incremental_backups():
+    """Incremental backups store changed pages and restore exactly"""
+    print("Testing incremental backups...")
+    from routes import backup_engine
+    from routes.backup_engine import (create_database_backup, materialize_backup, read_backup_index,
+                                      delete_backup_file, backup_dependents)
+
+    temp_dir = tempfile.mkdtemp()
+    backup_dir = os.path.join(temp_dir, 'backups')
+    try:
+        db_path = os.path.join(temp_dir, 'live.db')
+        create_sample_database(db_path)
+
+        expected = {}
+        names = []
+        for step in range(3):
+            if step:
+                with sqlite3.connect(db_path) as conn:
+                    conn.execute("UPDATE score SET value = value + 1 WHERE id = ?", (step * 10,))
+                conn.close()
+            name = create_database_backup(db_path, backup_dir, 'pre_merge_backup', timestamp=f'2025010{step}_000000',
+                                          backup_format='incremental')
+            # Consecutive backups are ordered by modification time
+            os.utime(os.path.join(backup_dir, name), (1000 + step, 1000 + step))
+            names.append(name)
+            expected[name] = dump(db_path)
+
+        base_header, _ = read_backup_index(os.path.join(backup_dir, names[0]))
+        child_header, _ = read_backup_index(os.path.join(backup_dir, names[2]))
+        assert base_header['parent'] is None and child_header['parent'] == names[1]
+        base_size = os.path.getsize(os.path.join(backup_dir, names[0]))
+        child_size = os.path.getsize(os.path.join(backup_dir, names[2]))
+        assert child_size < base_size / 3, f"{child_size} bytes is not much smaller than the base ({base_size})"
+        print(f"  ✓ Base backup {base_size} bytes, incremental backup {child_size} bytes")
+
+        for name in names:
+            restored = materialize_backup(os.path.join(backup_dir, name), os.path.join(temp_dir, 'restored.db'))
+            assert dump(restored) == expected[name]
+        print("  ✓ Every backup of the chain restores its own data")
+
+        # Deleting the base keeps the rest of the chain restorable
+        assert backup_dependents(backup_dir, names[0]) == [names[1]]
+        delete_backup_file(backup_dir, names[0])
+        assert not os.path.exists(os.path.join(backup_dir, names[0]))
+        assert read_backup_index(os.path.join(backup_dir, names[1]))[0]['parent'] is None
+        for name in names[1:]:
+            restored = materialize_backup(os.path.join(backup_dir, name), os.path.join(temp_dir, 'restored.db'))
+            assert dump(restored) == expected[name]
+        print("  ✓ Deleting a base backup rewrites its dependent as a new base")
+
+        # A new base backup starts when the chain is full
+        previous_limit = backup_engine.INCREMENTAL_CHAIN_LIMIT
+        backup_engine.INCREMENTAL_CHAIN_LIMIT = 3
+        try:
+            name = create_database_backup(db_path, backup_dir, 'pre_merge_backup', timestamp='20250105_000000',
+                                          backup_format='incremental')
+            os.utime(os.path.join(backup_dir, name), (2000, 2000))
+            header, _ = read_backup_index(os.path.join(backup_dir, name))
+            assert header['chain_length'] == 2, header
+            name = create_database_backup(db_path, backup_dir, 'pre_merge_backup', timestamp='20250106_000000',
+                                          backup_format='incremental')
+            header, _ = read_backup_index(os.path.join(backup_dir, name))
+            assert header['parent'] is None and header['chain_length'] == 0
+        finally:
+            backup_engine.INCREMENTAL_CHAIN_LIMIT = previous_limit
+        print("  ✓ A new base backup starts after the chain limit")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_online_backup_during_writes()
+    test_incremental_backups()
+    print("All backup engine tests passed")
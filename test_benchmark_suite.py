@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script for the synthetic dataset generator and the benchmark runner.
+
+Generates a small dataset and checks the row counts, that the same seed gives
+the same data, that the generated courses calculate on the real pages, that
+--append adds courses to an existing dataset, that the benchmark runner
+reports every selected benchmark and that the comparison flags regressions.
+
+Usage: python test_benchmark_suite.py
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+
+def table_rows(db_path, sql):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_generator_and_runner():
+    """Dataset counts, determinism and benchmark results"""
+    print("Testing benchmark dataset generator and runner...")
+
+    from generate_benchmark_data import generate_dataset
+    from benchmark_suite import run_benchmarks, compare_results
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        first = os.path.join(temp_dir, 'first.db')
+        second = os.path.join(temp_dir, 'second.db')
+        counts = generate_dataset(first, courses=6, students=15, exams=3, questions=4, outcomes=3,
+                                  program_outcomes=5, score_density=0.8, seed=7)
+        assert counts['course'] == 6 and counts['student'] == 90
+        assert counts['exam'] == 6 * 4 and counts['question'] == 6 * 4 * 4 and counts['course_outcome'] == 18
+        assert counts['program_outcome'] == 5 and counts['student_exam_attendance'] == 180
+        assert table_rows(first, "SELECT COUNT(*) FROM score")[0][0] == counts['score'] > 0
+        assert table_rows(first, "SELECT COUNT(*) FROM exam WHERE makeup_for IS NOT NULL")[0][0] == 6
+        # Students are shared between courses, as on the all-courses page
+        assert table_rows(first, "SELECT COUNT(DISTINCT student_id) FROM student")[0][0] < 90
+        print(f"  ✓ Row counts: {counts['score']} scores, {counts['student']} students")
+
+        generate_dataset(second, courses=6, students=15, exams=3, questions=4, outcomes=3,
+                         program_outcomes=5, score_density=0.8, seed=7)
+        score_sql = "SELECT student_id, question_id, exam_id, score FROM score ORDER BY id"
+        assert table_rows(first, score_sql) == table_rows(second, score_sql)
+        counts = generate_dataset(second, courses=2, students=10, code_prefix='MORE', seed=8)
+        assert table_rows(second, "SELECT COUNT(*) FROM course")[0][0] == 8
+        assert table_rows(second, "SELECT COUNT(*) FROM program_outcome")[0][0] == 11
+        print("  ✓ Same seed gives the same data, --append adds courses")
+
+        results = run_benchmarks(first, temp_dir, repeat=1,
+                                 only=['bulk_load', 'all_courses', 'course_results', 'score_import', 'merge'])
+        assert set(results) == {'bulk_load', 'all_courses', 'course_results', 'score_import', 'merge'}, results
+        assert all(not result.get('skipped') for result in results.values()), results
+        assert results['bulk_load']['scores'] == table_rows(first, "SELECT COUNT(*) FROM score")[0][0]
+        assert results['merge']['scores'] > 0 and results['all_courses']['queries'] > 0
+        # The merge is rolled back and the benchmarks run on a copy of the dataset
+        assert table_rows(first, "SELECT COUNT(*) FROM course")[0][0] == 6
+        print(f"  ✓ Benchmarks ran: all_courses {results['all_courses']['best_ms']} ms, "
+              f"{results['all_courses']['queries']} queries")
+
+        baseline = {'results': {'bulk_load': {'best_ms': 100.0}, 'merge': {'best_ms': 100.0}}}
+        current = {'results': {'bulk_load': {'best_ms': 125.0}, 'merge': {'best_ms': 104.0},
+                               'student_pdfs': {'skipped': True, 'error': 'no browser'}}}
+        rows = compare_results(current, baseline, threshold=10)
+        assert rows == [('bulk_load', 100.0, 125.0, 25.0, True), ('merge', 100.0, 104.0, 4.0, False)], rows
+        print("  ✓ Comparison flags slowdowns above the threshold")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_generator_and_runner()
+    print("All benchmark suite tests passed")
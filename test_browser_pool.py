@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Test script for the Playwright browser pool used for student PDF reports.
+
+Uses stand-in browser/page objects (no Chromium needed) to check that the pool
+bounds concurrency to browsers x pages, recycles pages after a number of
+reports and replaces a page whose render failed, that a crashed browser is
+relaunched without losing pool slots, that retries of failing students are
+bounded and that a chunk of students is printed from in-process HTML with
+page.set_content.
+
+Usage: python test_browser_pool.py
+"""
+
+import os
+import sys
+import asyncio
+import shutil
+import tempfile
+from datetime import datetime
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakePage:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+        self.content = None
+
+    async def close(self):
+        self.closed = True
+
+    async def set_content(self, html, wait_until=None, timeout=None):
+        self.content = html
+
+    async def evaluate(self, script):
+        pass
+
+    async def pdf(self, **options):
+        return f'%PDF {self.content}'.encode()
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.pages_opened = 0
+        self.crashed = False
+        self.closed = False
+
+    def is_connected(self):
+        return not self.crashed
+
+    async def new_page(self):
+        if self.crashed:
+            raise RuntimeError('Target page, context or browser has been closed')
+        self.pages_opened += 1
+        return FakePage(self)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeChromium:
+    def __init__(self):
+        self.launched = []
+        self.fail_launch = False
+
+    async def launch(self, headless=True):
+        if self.fail_launch:
+            raise RuntimeError('Chromium failed to start')
+        browser = FakeBrowser()
+        self.launched.append(browser)
+        return browser
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.chromium = FakeChromium()
+
+
+def make_pool(browser_count, pages_per_browser, recycle_after):
+    """A BrowserPool filled with fake browsers instead of launching Chromium"""
+    from routes.pdf_multithread import BrowserPool
+    pool = BrowserPool(browser_count, pages_per_browser, recycle_after=recycle_after)
+    pool._playwright = FakePlaywright()
+    pool._pages = asyncio.Queue()
+    browsers = [FakeBrowser() for _ in range(browser_count)]
+    for index, browser in enumerate(browsers):
+        pool._browsers.append(browser)
+        pool._browser_locks.append(asyncio.Lock())
+        for _ in range(pages_per_browser):
+            browser.pages_opened += 1
+            pool._pages.put_nowait([index, FakePage(browser), 0])
+    pool._started_at = datetime.now()
+    return pool, browsers
+
+
+def test_pool_bounds_concurrency_and_recycles_pages():
+    """At most browsers x pages renders run at once; pages are recycled"""
+    print("Testing browser pool...")
+
+    async def scenario():
+        pool, browsers = make_pool(browser_count=2, pages_per_browser=2, recycle_after=3)
+        active = {'now': 0, 'max': 0}
+
+        async def render(page, student_id):
+            assert not page.closed
+            active['now'] += 1
+            active['max'] = max(active['max'], active['now'])
+            await asyncio.sleep(0.01)
+            active['now'] -= 1
+            return f'pdf-{student_id}'.encode()
+
+        results = await asyncio.gather(*[pool.render(render, i) for i in range(24)])
+        assert results == [f'pdf-{i}'.encode() for i in range(24)]
+        assert active['max'] == pool.size == 4
+        assert pool.pages_rendered == 24
+        assert pool.pages_per_second() > 0
+        # 24 renders over 4 pages recycled every 3 uses: 8 replacement pages on top of the initial 4
+        assert sum(browser.pages_opened for browser in browsers) == 4 + 8
+        print(f"  ✓ 24 reports on {pool.size} pages, max concurrency {active['max']}, pages recycled")
+
+        async def failing_render(page, student_id):
+            raise RuntimeError('navigation timeout')
+
+        opened_before = sum(browser.pages_opened for browser in browsers)
+        try:
+            await pool.render(failing_render, 99)
+            assert False, 'render error must propagate'
+        except RuntimeError:
+            pass
+        assert sum(browser.pages_opened for browser in browsers) == opened_before + 1
+        assert pool._pages.qsize() == pool.size
+        print("  ✓ A failed render replaces its page and returns the slot to the pool")
+
+    asyncio.run(scenario())
+
+
+def test_pool_survives_crashed_browsers():
+    """A crashed browser is relaunched once; if it cannot be, its slots stay in the pool"""
+    print("Testing browser pool with crashed browsers...")
+
+    async def scenario():
+        pool, browsers = make_pool(browser_count=2, pages_per_browser=2, recycle_after=10)
+
+        async def render(page, student_id):
+            if page.browser.crashed:
+                raise RuntimeError('Target crashed')
+            return f'pdf-{student_id}'.encode()
+
+        browsers[0].crashed = True
+        results = await asyncio.gather(*[pool.render(render, i) for i in range(4)], return_exceptions=True)
+        assert sum(isinstance(result, RuntimeError) for result in results) == 2
+        assert pool._pages.qsize() == pool.size
+        assert len(pool._playwright.chromium.launched) == 1 and browsers[0].closed
+        assert pool._browsers[0] is pool._playwright.chromium.launched[0]
+        results = await asyncio.gather(*[pool.render(render, i) for i in range(8)])
+        assert results == [f'pdf-{i}'.encode() for i in range(8)]
+        print("  ✓ Crashed browser relaunched once for all its pages")
+
+        # Relaunching fails too: the slots come back without a page and renders fail instead of hanging
+        pool._browsers[0].crashed = True
+        pool._playwright.chromium.fail_launch = True
+        results = await asyncio.wait_for(asyncio.gather(
+            *[pool.render(render, i) for i in range(8)], return_exceptions=True), timeout=5)
+        assert pool._pages.qsize() == pool.size
+        assert any(isinstance(result, RuntimeError) for result in results)
+        assert any(isinstance(result, bytes) for result in results)
+        pool._playwright.chromium.fail_launch = False
+        results = await asyncio.wait_for(asyncio.gather(*[pool.render(render, i) for i in range(8)]), timeout=5)
+        assert len(results) == 8
+        print("  ✓ Slots are never lost when a browser cannot be relaunched")
+
+    asyncio.run(scenario())
+
+
+def test_chunk_retries_are_bounded():
+    """Students that keep failing are given up after MAX_RETRY_ROUNDS rounds"""
+    from routes import pdf_multithread
+    from routes.pdf_multithread import generate_student_pdfs_chunk_pooled
+
+    output_dir = tempfile.mkdtemp()
+    previous_delay = pdf_multithread.RETRY_DELAY_SECONDS
+    pdf_multithread.RETRY_DELAY_SECONDS = 0
+    try:
+        async def scenario():
+            pool, _ = make_pool(browser_count=1, pages_per_browser=1, recycle_after=10)
+
+            def report_html(student_id):
+                if student_id == 'S2':
+                    raise RuntimeError('report failed')
+                return f'<html>{student_id}</html>'
+
+            return await asyncio.wait_for(generate_student_pdfs_chunk_pooled(
+                pool, ['S1', 'S2'], report_html, 'landscape', 'A4', output_dir, None, 0, 2, {}
+            ), timeout=10)
+
+        result = asyncio.run(scenario())
+        assert result['successful_count'] == 1 and len(result['pdf_files']) == 1
+        assert result['retry_rounds'] == pdf_multithread.MAX_RETRY_ROUNDS
+        print(f"  ✓ Failing students given up after {result['retry_rounds']} rounds")
+    finally:
+        pdf_multithread.RETRY_DELAY_SECONDS = previous_delay
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def test_chunk_prints_in_process_html():
+    """Each student's report HTML is loaded with set_content and saved as a PDF"""
+    from routes.pdf_multithread import generate_student_pdfs_chunk_pooled
+
+    output_dir = tempfile.mkdtemp()
+    try:
+        async def scenario():
+            pool, _ = make_pool(browser_count=1, pages_per_browser=2, recycle_after=10)
+            rendered = []
+
+            def report_html(student_id):
+                rendered.append(student_id)
+                return f'<html>{student_id}</html>'
+
+            return await generate_student_pdfs_chunk_pooled(
+                pool, ['S1', 'S2', 'S3'], report_html, 'landscape', 'A4', output_dir, None, 0, 3,
+                {'S1': 'Ada Lovelace', 'S2': 'Alan Turing', 'S3': 'Grace Hopper'}
+            ), rendered
+
+        result, rendered = asyncio.run(scenario())
+        assert rendered == ['S1', 'S2', 'S3']
+        assert result['successful_count'] == 3
+        names = sorted(os.path.basename(path) for path in result['pdf_files'])
+        assert names == ['S1_Ada_Lovelace.pdf', 'S2_Alan_Turing.pdf', 'S3_Grace_Hopper.pdf']
+        with open(os.path.join(output_dir, 'S2_Alan_Turing.pdf'), 'rb') as f:
+            assert f.read() == b'%PDF <html>S2</html>'
+        print("  ✓ Reports are printed from in-process HTML")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_pool_bounds_concurrency_and_recycles_pages()
+    test_pool_survives_crashed_browsers()
+    test_chunk_retries_are_bounded()
+    test_chunk_prints_in_process_html()
+    print("All browser pool tests passed")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk_load_course_data.
+
+Loads several courses at once and checks that scores, attendance, outcome
+questions and PO relationships are attributed to the right course, comparing
+against the ORM relationships.
+
+Usage: python test_bulk_load.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from flask import Flask
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import build_sample_course
+
+
+def test_bulk_load_groups_rows_by_course():
+    """Every loaded row must land in the course it belongs to"""
+    print("Testing bulk_load_course_data grouping...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_bulk_load.db")
+
+    from models import db, init_db_session
+    previous_session = db.session
+
+    try:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{temp_db_path}'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(app)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            course_ids = [build_sample_course(db, seed=seed, student_count=15, course_code=f'BL{seed}')
+                          for seed in range(3)]
+
+            from models import Score, StudentExamAttendance, CourseOutcome
+            from routes.calculation_routes import bulk_load_course_data
+
+            bulk_data = bulk_load_course_data(course_ids)
+            assert set(bulk_data) == set(course_ids)
+
+            total_scores = sum(len(data['scores_dict']) for data in bulk_data.values())
+            total_attendance = sum(len(data['attendance_dict']) for data in bulk_data.values())
+            assert total_scores == Score.query.count()
+            assert total_attendance == StudentExamAttendance.query.count()
+
+            for course_id, data in bulk_data.items():
+                student_ids = {student.id for student in data['students']}
+                exam_ids = {exam.id for exam in data['all_exams']}
+                assert all(key[0] in student_ids and key[2] in exam_ids for key in data['scores_dict'])
+                assert all(key[0] in student_ids and key[1] in exam_ids for key in data['attendance_dict'])
+
+                for outcome in CourseOutcome.query.filter_by(course_id=course_id).all():
+                    loaded = sorted(question.id for question in data['outcome_questions'][outcome.id])
+                    assert loaded == sorted(question.id for question in outcome.questions)
+                    for po in outcome.program_outcomes:
+                        assert outcome in data['program_to_course_outcomes'][po.id]
+                        assert po.id in data['contributing_po_ids']
+                print(f"  ✓ Course {course_id}: {len(data['scores_dict'])} scores, "
+                      f"{len(data['outcome_questions'])} outcomes grouped correctly")
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_bulk_load_groups_rows_by_course()
+    print("All bulk load tests passed")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for the program outcome contribution index (routes/contribution_index.py).
+
+Checks that /utility/program_outcome_contributions and its API return the same
+courses and course outcomes as the previous per-program-outcome queries, that
+the index is reused between requests, that it is rebuilt after a CO-PO mapping
+or course exclusion change and that score writes do not rebuild it.
+
+Usage: python test_contribution_index.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import build_sample_course, create_report_app, count_statements
+
+
+def reference_contributions(po):
+    """Contributing courses of a program outcome as the previous implementation collected them"""
+    from models import CourseOutcome
+
+    courses = []
+    for co in CourseOutcome.query.filter(CourseOutcome.program_outcomes.any(id=po.id)).all():
+        course = co.course
+        existing = next((c for c in courses if c['id'] == course.id), None)
+        if existing is None:
+            existing = {
+                'id': course.id,
+                'code': course.code,
+                'name': course.name,
+                'semester': course.semester,
+                'course_weight': float(course.course_weight),
+                'excluded': bool(course.settings and course.settings.excluded),
+                'course_outcomes': []
+            }
+            courses.append(existing)
+        existing['course_outcomes'].append({'code': co.code, 'description': co.description})
+    courses.sort(key=lambda c: c['code'])
+    return courses
+
+
+def test_contribution_index():
+    """The index matches the per-program-outcome queries and is rebuilt only after mapping changes"""
+    print("Testing program outcome contribution index...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_contribution_index.db")
+
+    from models import db, init_db_session, Course, CourseOutcome, ProgramOutcome, Score
+    from routes.contribution_index import invalidate_contribution_index, contributions_page_data
+    previous_session = db.session
+
+    try:
+        app = create_report_app(temp_db_path)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            invalidate_contribution_index()
+            for seed, code in enumerate(('POB', 'POA', 'POC')):
+                build_sample_course(db, seed=seed, student_count=5, course_code=code)
+            Course.query.filter_by(code='POC').first().settings.excluded = True
+            db.session.add(ProgramOutcome(code='VT9', description='Without contributions'))
+            db.session.commit()
+            client = app.test_client()
+
+            def check_all():
+                program_outcomes = ProgramOutcome.query.order_by(ProgramOutcome.code).all()
+                page_outcomes, page_data = contributions_page_data()
+                assert [po['code'] for po in page_outcomes] == [po.code for po in program_outcomes]
+                for po in program_outcomes:
+                    expected = reference_contributions(po)
+                    data = client.get(f'/utility/program_outcome_contributions/api/{po.code}').get_json()
+                    assert data['all_courses'] == expected, (po.code, data['all_courses'], expected)
+                    assert data['included_courses'] == [c for c in expected if not c['excluded']]
+                    assert data['summary']['excluded_count'] == len([c for c in expected if c['excluded']])
+                    # The page shows one CO with its description and several COs by code
+                    page_courses = page_data[po.code]['all_courses']
+                    assert [c['id'] for c in page_courses] == [c['id'] for c in expected]
+                    for page_course, course in zip(page_courses, expected):
+                        if len(course['course_outcomes']) == 1:
+                            assert page_course['course_outcome_code'] == course['course_outcomes'][0]['code']
+                            assert 'course_outcomes' not in page_course
+                        else:
+                            assert page_course['course_outcomes'] == [co['code'] for co in course['course_outcomes']]
+                    assert page_data[po.code]['total_count'] == len(expected)
+                return program_outcomes
+
+            program_outcomes = check_all()
+            assert any(len(c['course_outcomes']) > 1 for po in program_outcomes for c in reference_contributions(po))
+            assert client.get('/utility/program_outcome_contributions/api/VT9').get_json()['all_courses'] == []
+            assert client.get('/utility/program_outcome_contributions/api/NOPE').status_code == 404
+            response = client.get('/utility/program_outcome_contributions')
+            assert response.status_code == 200 and b'VT9' in response.data
+            print(f"  ✓ Same contributions as the per-program-outcome queries ({len(program_outcomes)} program outcomes)")
+
+            # The index is reused: only the fingerprint query runs
+            _, statements = count_statements(db, lambda: client.get('/utility/program_outcome_contributions/api/VT1'))
+            assert len(statements) == 1 and 'course_outcome_program_outcome' in statements[0], statements
+            print("  ✓ Index reused between requests (1 statement)")
+
+            # A score write does not rebuild the index
+            score = Score.query.first()
+            score.score = 0
+            db.session.commit()
+            _, statements = count_statements(db, lambda: client.get('/utility/program_outcome_contributions/api/VT1'))
+            assert len(statements) == 1, statements
+            print("  ✓ Score writes keep the index")
+
+            # Exclusion and mapping changes rebuild it
+            Course.query.filter_by(code='POC').first().settings.excluded = False
+            db.session.commit()
+            check_all()
+            co = CourseOutcome.query.filter_by(code='CO1').first()
+            removed = co.program_outcomes[0]
+            co.program_outcomes.remove(removed)
+            other = CourseOutcome.query.filter(CourseOutcome.id != co.id, ~CourseOutcome.program_outcomes.any(id=removed.id)).first()
+            other.program_outcomes.append(removed)
+            db.session.commit()
+            check_all()
+            print("  ✓ Index rebuilt after exclusion and CO-PO mapping changes")
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_contribution_index()
+    print("All contribution index tests passed")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test script for the bulk course merge (routes/merge_engine.py).
+
+Merges two sections into an empty course through /utility/merge/courses and
+checks the stats and conflicts, that students, scores, attendance, weights,
+questions, outcome links and makeup links are written, that a dry run and the
+merge preview report the same stats without writing, that merging again adds
+nothing, and that the number of SQL statements does not grow with the number
+of students.
+
+Usage: python test_course_merge.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import build_sample_course, create_report_app, count_queries
+
+
+def post_merge(client, destination_id, source_ids, dry_run=False):
+    """Post the merge form and return the flashed messages"""
+    data = {'destination_course': str(destination_id), 'source_courses': [str(i) for i in source_ids],
+            'merge_students': 'on', 'merge_exams': 'on', 'merge_outcomes': 'on', 'confirm_merge': 'on'}
+    if dry_run:
+        data['dry_run'] = 'on'
+    client.post('/utility/merge/courses', data=data)
+    with client.session_transaction() as session:
+        return [message for _, message in session.pop('_flashes', [])]
+
+
+def test_bulk_course_merge():
+    """Two sections are merged into an empty course with bulk statements"""
+    print("Testing bulk course merge...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_course_merge.db")
+
+    from models import db, init_db_session, Course, Exam, Student, Score, StudentExamAttendance, ExamWeight, Question
+    from routes.merge_engine import merge_courses_bulk
+    previous_session = db.session
+
+    try:
+        app = create_report_app(temp_db_path)
+        app.config['BACKUP_FOLDER'] = temp_dir
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            build_sample_course(db, seed=1, student_count=12, course_code='SECA')
+            build_sample_course(db, seed=2, student_count=12, course_code='SECB')
+            section_a = Course.query.filter_by(code='SECA').first().id
+            section_b = Course.query.filter_by(code='SECB').first().id
+            # A student of section A also listed in section B under another name
+            db.session.add(Student(student_id='SECA-S0000', first_name='Other', last_name='Name', course_id=section_b))
+            merged = Course(code='MERGED', name='Merged Sections', semester='Fall 2024')
+            db.session.add(merged)
+            db.session.commit()
+            merged_id = merged.id
+
+            source_scores = Score.query.count()
+            source_attendance = StudentExamAttendance.query.count()
+            client = app.test_client()
+
+            # The dry run and the preview report the same stats as the real merge, without writing
+            dry_stats = merge_courses_bulk(merged_id, [section_a, section_b], True, True, True, dry_run=True)['stats']
+            messages = post_merge(client, merged_id, [section_a, section_b], dry_run=True)
+            assert any(m.startswith('Dry run: the merge would add 24 students') for m in messages), messages
+            preview = client.post('/utility/merge/preview', json={
+                'destination_course': str(merged_id), 'source_courses': [str(section_a), str(section_b)],
+                'merge_students': True, 'merge_exams': True, 'merge_outcomes': True
+            }).get_json()['preview']
+            assert preview['merge_stats'] == dry_stats
+            assert preview['merge_preview']['attendances']['new'] == dry_stats['attendances_merged']
+            db.session.remove()
+            assert Student.query.filter_by(course_id=merged_id).count() == 0
+            print("  ✓ Dry run and preview share the merge plan and write nothing")
+
+            messages = post_merge(client, merged_id, [section_a, section_b])
+            db.session.remove()
+            stats = dry_stats
+            assert stats['students_merged'] == 24 and stats['exams_merged'] == 4 and stats['outcomes_merged'] == 4
+            assert stats['weights_merged'] == 4
+            assert stats['scores_merged'] == source_scores
+            assert stats['attendances_merged'] == source_attendance
+            assert "Exam 'Midterm' already exists in destination course, skipping" in stats['conflicts']
+            assert ("Student ID SECA-S0000 has different names in source and destination: "
+                    "Other Name vs Student0 None") in stats['conflicts'], stats['conflicts']
+            assert f"Successfully merged 24 students, {source_scores} scores, {source_attendance} attendance records, " \
+                   f"4 exams, 4 exam weights, 4 course outcomes into MERGED." in messages, messages
+            print(f"  ✓ Stats and conflicts reported: {stats['scores_merged']} scores, {len(stats['conflicts'])} conflicts")
+
+            # Everything is written, not only counted
+            assert Student.query.filter_by(course_id=merged_id).count() == 24
+            assert Score.query.join(Student).filter(Student.course_id == merged_id).count() == source_scores
+            assert StudentExamAttendance.query.join(Student).filter(Student.course_id == merged_id).count() == source_attendance
+            assert ExamWeight.query.filter_by(course_id=merged_id).count() == 4
+            assert Question.query.join(Exam).filter(Exam.course_id == merged_id).count() == 15
+            exams = {exam.name: exam for exam in Exam.query.filter_by(course_id=merged_id)}
+            assert exams['Midterm Makeup'].makeup_for == exams['Midterm'].id
+            assert all(question.course_outcomes for question in exams['Final'].questions)
+            assert all(outcome.program_outcomes for outcome in db.session.get(Course, merged_id).course_outcomes)
+            print("  ✓ Students, scores, attendance, weights, questions and links written")
+
+            # Merging again only matches existing rows
+            stats = merge_courses_bulk(merged_id, [section_a, section_b], True, True, True, dry_run=True)['stats']
+            assert stats['students_merged'] == stats['scores_merged'] == stats['attendances_merged'] == 0
+            print("  ✓ A second merge adds nothing")
+
+            # The merge runs the same statements for small and large sections
+            def count_statements(student_count):
+                code = f'SIZE{student_count}'
+                build_sample_course(db, seed=3, student_count=student_count, course_code=code)
+                source_id = Course.query.filter_by(code=code).first().id
+                target = Course(code=f'T{code}', name='Target', semester='Fall 2024')
+                db.session.add(target)
+                db.session.commit()
+                target_id = target.id
+                db.session.remove()
+                with count_queries(db.engine) as statements:
+                    messages = post_merge(client, target_id, [source_id])
+                assert any(m.startswith(f'Successfully merged {student_count} students') for m in messages), messages
+                return len(statements)
+
+            few = count_statements(5)
+            many = count_statements(60)
+            assert few == many, f"{few} statements for 5 students, {many} for 60"
+            print(f"  ✓ {many} SQL statements for 5 or 60 students")
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_bulk_course_merge()
+    print("All course merge tests passed")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for the batched cross-course outcome data endpoint
+(/calculation/cross_course_outcomes/data).
+
+Builds several courses (one without settings, one without a weight for an
+exam, one with makeup attendance records missing and one excluded course) and
+checks that the course outcome scores calculated for all courses in one pass
+match calculate_single_course_results(), that a batched request returns every
+group with each course calculated once, and that later requests use the cache.
+
+Usage: python test_cross_course_data.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import build_sample_course, create_report_app, count_statements
+
+
+def test_cross_course_data():
+    """Batched course calculation gives the single-course scores for every group"""
+    print("Testing batched cross-course outcome data...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_cross_course_data.db")
+
+    from models import (db, init_db_session, Course, CourseOutcome, CourseSettings, Exam, ExamWeight,
+                        StudentExamAttendance)
+    from routes.calculation_routes import calculate_single_course_results
+    previous_session = db.session
+
+    try:
+        app = create_report_app(temp_db_path)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            for seed in range(5):
+                build_sample_course(db, seed=seed, student_count=30, course_code=f'XC{seed}')
+            db.session.commit()
+            course_ids = [Course.query.filter_by(code=f'XC{seed}').first().id for seed in range(5)]
+
+            # Cases where a bulk-loaded course used to differ from a course loaded on its own
+            CourseSettings.query.filter_by(course_id=course_ids[1]).delete()
+            quiz = Exam.query.filter_by(course_id=course_ids[2], name='Quiz').first()
+            ExamWeight.query.filter_by(exam_id=quiz.id).delete()
+            makeup = Exam.query.filter_by(course_id=course_ids[3], is_makeup=True).first()
+            StudentExamAttendance.query.filter_by(exam_id=makeup.id).delete()
+            CourseSettings.query.filter_by(course_id=course_ids[4]).first().excluded = True
+            db.session.commit()
+
+            outcomes = CourseOutcome.query.order_by(CourseOutcome.id).all()
+            # Similar outcomes of different courses, as the page groups them
+            groups = {f'collapse{number}': [o.id for o in outcomes if o.code == f'CO{number}'] for number in range(1, 5)}
+            groups['non_grouped'] = [outcomes[0].id, outcomes[5].id]
+            client = app.test_client()
+
+            response, statements = count_statements(db, lambda: client.post(
+                '/calculation/cross_course_outcomes/data', json={'groups': groups}))
+            data = response.get_json()
+            assert response.status_code == 200 and data['success'], data
+            assert set(data['groups']) == set(groups)
+            first_request_statements = len(statements)
+            assert CourseSettings.query.filter_by(course_id=course_ids[1]).count() == 1
+
+            expected = {}
+            for course_id in course_ids:
+                result = calculate_single_course_results(course_id, 'absolute')
+                if result['is_valid_for_aggregation']:
+                    expected.update(result['course_outcome_scores'])
+            assert course_ids[4] not in {r['course_id'] for group in data['groups'].values() for r in group['results']}
+            for key, outcome_ids in groups.items():
+                group = data['groups'][key]
+                assert [r['outcome_id'] for r in group['results']] == sorted(i for i in outcome_ids if i in expected)
+                for result in group['results']:
+                    assert abs(result['score'] - float(expected[result['outcome_id']])) < 1e-9, (key, result)
+                scores = [float(expected[i]) for i in outcome_ids if i in expected]
+                assert abs(group['overall_average'] - sum(scores) / len(scores)) < 1e-9
+                assert group['overall_level']['name'] != 'Unknown'
+            print(f"  ✓ Batched scores match calculate_single_course_results ({len(course_ids)} courses, "
+                  f"{len(groups)} groups, {first_request_statements} statements)")
+
+            # The single outcome_ids format still answers with one result set
+            response = client.post('/calculation/cross_course_outcomes/data', json={'outcome_ids': groups['collapse1']})
+            data_single = response.get_json()
+            assert data_single['success'] and data_single['results'] == data['groups']['collapse1']['results']
+            assert client.post('/calculation/cross_course_outcomes/data', json={'outcome_ids': []}).status_code == 400
+            assert client.post('/calculation/cross_course_outcomes/data', json={'groups': {'a': ['x']}}).status_code == 400
+            assert client.post('/calculation/cross_course_outcomes/data', json={'outcome_ids': [999999]}).status_code == 404
+            print("  ✓ Single-group requests and invalid input handled")
+
+            # Cached courses are not loaded again
+            response, statements = count_statements(db, lambda: client.post(
+                '/calculation/cross_course_outcomes/data', json={'groups': groups}))
+            assert response.get_json()['groups'] == data['groups']
+            assert len(statements) < first_request_statements and not any('FROM score' in s for s in statements), statements
+            print(f"  ✓ Later requests use the course result cache ({len(statements)} statements)")
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_cross_course_data()
+    print("All cross-course data tests passed")
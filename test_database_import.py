@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Test script for the set-based database import (routes/import_engine.py).
+
+Builds a backup with two courses and a few broken rows, imports it into a
+database that already has one of the courses, and checks the import_summary
+counts and warnings, that the imported course is identical to the backup
+(scores, attendance, weights, makeup links, outcome associations), that a
+second import adds nothing new, that the import options are respected and
+that the number of SQL statements does not grow with the size of the backup.
+
+Usage: python test_database_import.py
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+from flask import Flask
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import build_sample_course
+
+ALL_OPTIONS = ('import_courses', 'import_students', 'import_exams', 'import_outcomes', 'import_program_outcomes',
+               'import_achievement_levels', 'import_course_settings', 'import_exam_weights', 'import_attendance',
+               'import_scores')
+
+
+def build_database(path, course_codes, student_count=30):
+    """Database with one sample course per code (see test_vectorized_engine.build_sample_course)"""
+    from models import db, init_db_session
+
+    previous_session = db.session
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    try:
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            for seed, code in enumerate(course_codes):
+                build_sample_course(db, seed=seed, student_count=student_count, course_code=code)
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        db.session = previous_session
+
+
+def new_summary():
+    """Empty import_summary, as initialized by the import route"""
+    summary = {key: 0 for key in (
+        'courses_imported', 'outcomes_imported', 'program_outcomes_imported', 'achievement_levels_imported',
+        'course_settings_imported', 'students_imported', 'exams_imported', 'questions_imported',
+        'exam_weights_imported', 'scores_imported', 'attendance_imported', 'co_po_imported', 'question_co_imported')}
+    summary['errors'] = []
+    return summary
+
+
+def run_import(db_path, backup_path, options=ALL_OPTIONS, statements=None):
+    """Import the backup the way the import route does and return (summary, warnings)"""
+    from routes.import_engine import attach_backup, detach_backup, import_backup_data
+
+    summary = new_summary()
+    conn = sqlite3.connect(db_path)
+    try:
+        if statements is not None:
+            conn.set_trace_callback(statements.append)
+        attach_backup(conn, backup_path)
+        conn.execute("BEGIN TRANSACTION")
+        warnings = import_backup_data(conn, {option: True for option in options}, summary)
+        conn.execute("COMMIT")
+        conn.set_trace_callback(None)
+        detach_backup(conn)
+    finally:
+        conn.close()
+    return summary, warnings
+
+
+def course_snapshot(db_path, code):
+    """Everything of a course keyed on natural keys, so two databases can be compared"""
+    conn = sqlite3.connect(db_path)
+    try:
+        queries = {
+            'scores': """
+                SELECT st.student_id, e.name, q.number, CAST(s.score AS REAL)
+                FROM score s JOIN student st ON st.id = s.student_id JOIN question q ON q.id = s.question_id
+                JOIN exam e ON e.id = s.exam_id JOIN course c ON c.id = e.course_id WHERE c.code = ?""",
+            'attendance': """
+                SELECT st.student_id, e.name, a.attended FROM student_exam_attendance a
+                JOIN student st ON st.id = a.student_id JOIN exam e ON e.id = a.exam_id
+                JOIN course c ON c.id = e.course_id WHERE c.code = ?""",
+            'students': "SELECT s.student_id, s.first_name, s.excluded FROM student s JOIN course c ON c.id = s.course_id WHERE c.code = ?",
+            'exams': """
+                SELECT e.name, e.is_makeup, e.is_final, e.is_mandatory, m.name, CAST(w.weight AS REAL)
+                FROM exam e JOIN course c ON c.id = e.course_id LEFT JOIN exam m ON m.id = e.makeup_for
+                LEFT JOIN exam_weight w ON w.exam_id = e.id WHERE c.code = ?""",
+            'question_outcomes': """
+                SELECT e.name, q.number, CAST(q.max_score AS REAL), co.code, qco.relative_weight
+                FROM question_course_outcome qco JOIN question q ON q.id = qco.question_id JOIN exam e ON e.id = q.exam_id
+                JOIN course_outcome co ON co.id = qco.course_outcome_id JOIN course c ON c.id = e.course_id WHERE c.code = ?""",
+            'program_outcomes': """
+                SELECT co.code, po.code, copo.relative_weight FROM course_outcome_program_outcome copo
+                JOIN course_outcome co ON co.id = copo.course_outcome_id JOIN program_outcome po ON po.id = copo.program_outcome_id
+                JOIN course c ON c.id = co.course_id WHERE c.code = ?""",
+            'settings': "SELECT cs.success_rate_method, cs.excluded FROM course_settings cs JOIN course c ON c.id = cs.course_id WHERE c.code = ?",
+        }
+        return {name: sorted(conn.execute(sql, (code,)).fetchall(), key=repr) for name, sql in queries.items()}
+    finally:
+        conn.close()
+
+
+def table_counts(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('course', 'student', 'exam', 'question', 'score', 'student_exam_attendance',
+                              'exam_weight', 'course_outcome_program_outcome', 'question_course_outcome')}
+    finally:
+        conn.close()
+
+
+def test_set_based_import():
+    """Counts, warnings and imported data match the backup"""
+    print("Testing set-based database import...")
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        backup_path = os.path.join(temp_dir, 'backup.db')
+        db_path = os.path.join(temp_dir, 'current.db')
+        build_database(backup_path, ['IMPA', 'IMPB'])
+        build_database(db_path, ['IMPA'])
+
+        # Broken rows of the backup are skipped with the same warnings as before
+        conn = sqlite3.connect(backup_path)
+        conn.execute("INSERT INTO course (code, name, semester, course_weight) VALUES ('BROKEN', '', 'Fall 2024', 1)")
+        conn.execute("INSERT INTO score (score, student_id, question_id, exam_id) VALUES (5, 999999, 1, 1)")
+        conn.execute("INSERT INTO student (student_id, first_name, last_name, course_id, excluded) VALUES ('X1', 'A', 'B', 777, 0)")
+        source = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ('student', 'exam', 'question', 'score', 'student_exam_attendance', 'exam_weight')}
+        conn.commit()
+        conn.close()
+
+        summary, warnings = run_import(db_path, backup_path)
+        expected_course_b = course_snapshot(backup_path, 'IMPB')
+        assert summary['courses_imported'] == 1
+        assert summary['students_imported'] == 30 and summary['exams_imported'] == 4
+        assert summary['questions_imported'] == 15 and summary['outcomes_imported'] == 4
+        assert summary['program_outcomes_imported'] == 0 and summary['course_settings_imported'] == 1
+        # Rows without a unique key and scores are written (inserted or updated) for every valid backup row
+        assert summary['scores_imported'] == source['score'] - 1
+        assert summary['attendance_imported'] == source['student_exam_attendance']
+        assert summary['exam_weights_imported'] == source['exam_weight']
+        assert summary['co_po_imported'] == 8 and summary['question_co_imported'] == len(expected_course_b['question_outcomes'])
+        assert summary['errors'] == [
+            'Skipped course with missing required fields',
+            'Skipped student with missing student_id or invalid course_id: 777',
+            'Skipped score with invalid foreign keys: s999999, q1, e1',
+        ], summary['errors']
+        assert warnings == []
+        print(f"  ✓ Summary counts and warnings: {summary['scores_imported']} scores, 1 course, 30 students")
+
+        assert course_snapshot(db_path, 'IMPB') == expected_course_b
+        assert course_snapshot(db_path, 'IMPA') == course_snapshot(backup_path, 'IMPA')
+        print("  ✓ Imported course identical to the backup, existing course matched (not duplicated)")
+
+        counts = table_counts(db_path)
+        summary, _ = run_import(db_path, backup_path)
+        assert table_counts(db_path) == counts
+        assert summary['courses_imported'] == summary['students_imported'] == summary['questions_imported'] == 0
+        assert summary['co_po_imported'] == summary['question_co_imported'] == 0
+        assert summary['scores_imported'] == source['score'] - 1
+        print("  ✓ Second import matches every row and adds nothing")
+
+        # Only the selected options are imported
+        db_path_2 = os.path.join(temp_dir, 'options.db')
+        build_database(db_path_2, [])
+        summary, _ = run_import(db_path_2, backup_path, options=('import_courses', 'import_students'))
+        assert summary['courses_imported'] == 2 and summary['students_imported'] == 60
+        assert summary['exams_imported'] == summary['scores_imported'] == 0
+        assert table_counts(db_path_2)['score'] == 0
+        print("  ✓ Import options respected")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def test_statement_count_is_constant():
+    """The import runs the same statements for a small and a large backup"""
+    print("Testing import statement count...")
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        def count_statements(course_codes):
+            backup_path = os.path.join(temp_dir, f'backup_{len(course_codes)}.db')
+            db_path = os.path.join(temp_dir, f'current_{len(course_codes)}.db')
+            build_database(backup_path, course_codes, student_count=10)
+            build_database(db_path, [])
+            statements = []
+            summary, _ = run_import(db_path, backup_path, statements=statements)
+            assert summary['courses_imported'] == len(course_codes)
+            return len(statements), summary['scores_imported']
+
+        few, few_scores = count_statements(['CNT1'])
+        many, many_scores = count_statements([f'CNT{index}' for index in range(6)])
+        assert many_scores > few_scores and few == many, f"{few} statements for 1 course, {many} for 6"
+        print(f"  ✓ {many} SQL statements for {few_scores} or {many_scores} scores")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_set_based_import()
+    test_statement_count_is_constant()
+    print("All database import tests passed")
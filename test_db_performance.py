@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test script for the SQLite performance profile.
+
+Checks that the PRAGMAs of the profile are set on every connection, that the
+reporting engine is read-only, that read_only_session() moves the queries of
+the all-courses page to the reporting engine (with the same page as without
+it), and that restoring a backup into a database in WAL mode is not mixed
+with the frames of the old database.
+
+Usage: python test_db_performance.py
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import build_sample_course, create_report_app, count_queries
+
+
+def test_profile_pragmas_and_read_only_engine():
+    """Every connection is tuned and reporting queries run on the read-only engine"""
+    print("Testing database performance profile...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_db_performance.db")
+
+    from models import db, init_db_session, Course
+    from db_performance import configure_database_performance, read_only_session, get_read_engine
+    previous_session = db.session
+
+    try:
+        app = create_report_app(temp_db_path)
+        app.config['DB_PERFORMANCE_PROFILE'] = 'balanced'
+        app.config['DB_PRAGMAS'] = 'cache_size=-32000'
+        configure_database_performance(app, db)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            build_sample_course(db, seed=1, student_count=12, course_code='PERF1')
+
+            with db.engine.connect() as connection:
+                pragmas = {name: connection.execute(text(f"PRAGMA {name}")).scalar()
+                           for name in ('journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'temp_store', 'busy_timeout')}
+            assert pragmas == {'journal_mode': 'wal', 'synchronous': 1, 'mmap_size': 256 * 1024 * 1024,
+                               'cache_size': -32000, 'temp_store': 2, 'busy_timeout': 10000}, pragmas
+            print(f"  ✓ PRAGMAs on every connection: {pragmas}")
+
+            read_engine = get_read_engine()
+            with read_engine.connect() as connection:
+                assert connection.execute(text("PRAGMA query_only")).scalar() == 1
+                assert connection.execute(text("SELECT COUNT(*) FROM course")).scalar() == 1
+                try:
+                    connection.execute(text("DELETE FROM course"))
+                    assert False, 'the reporting engine must not write'
+                except OperationalError:
+                    pass
+            print("  ✓ Reporting engine reads and refuses writes")
+
+            primary_session = db.session()
+            with read_only_session() as session:
+                assert db.session() is session and session.get_bind() is read_engine
+                course = Course.query.filter_by(code='PERF1').first()
+            assert db.session() is primary_session
+            # Objects loaded in the block can still load their relationships
+            assert len(course.exams) == 4
+            print("  ✓ read_only_session() swaps the thread's session and restores it")
+
+            # The all-courses page loads its data through the reporting engine
+            client = app.test_client()
+            expected = client.get('/calculation/all_courses').get_data(as_text=True)
+            db.session.remove()
+            from routes.result_cache import invalidate_course_results
+            invalidate_course_results(course.id)
+            db.session.commit()
+            db.session.remove()
+
+            with count_queries(read_engine) as statements:
+                response = client.get('/calculation/all_courses')
+            assert response.status_code == 200
+            assert response.get_data(as_text=True) == expected
+            assert any('FROM score' in statement for statement in statements)
+            print(f"  ✓ All-courses page ran {len(statements)} statements on the reporting engine, same page")
+
+            db.session.remove()
+            read_engine.dispose()
+            db.engine.dispose()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def test_restore_into_wal_database():
+    """A restored backup is never mixed with the WAL frames of the old database"""
+    print("Testing restore into a WAL database...")
+    from routes.backup_engine import restore_database_file
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(temp_dir, 'live.db')
+        backup_path = os.path.join(temp_dir, 'backup.db')
+
+        with sqlite3.connect(backup_path) as conn:
+            conn.execute("CREATE TABLE score (id INTEGER PRIMARY KEY, value INTEGER)")
+            conn.executemany("INSERT INTO score (value) VALUES (?)", [(i,) for i in range(100)])
+        conn.close()
+
+        # Live database in WAL mode with committed frames still in the -wal file
+        live = sqlite3.connect(db_path)
+        live.execute("PRAGMA journal_mode=WAL")
+        live.execute("PRAGMA wal_autocheckpoint=0")
+        live.execute("CREATE TABLE score (id INTEGER PRIMARY KEY, value INTEGER)")
+        live.executemany("INSERT INTO score (value) VALUES (?)", [(-i,) for i in range(500)])
+        live.commit()
+        assert os.path.getsize(db_path + '-wal') > 0
+
+        restore_database_file(backup_path, db_path)
+        live.close()
+
+        conn = sqlite3.connect(db_path)
+        try:
+            assert conn.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+            assert conn.execute("SELECT COUNT(*), MIN(value), MAX(value) FROM score").fetchone() == (100, 0, 99)
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        finally:
+            conn.close()
+        print("  ✓ Restored database has exactly the backup's rows and stays in WAL mode")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_profile_pragmas_and_read_only_engine()
+    test_restore_into_wal_database()
+    print("All database performance tests passed")
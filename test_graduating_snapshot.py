@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test script for the graduating students snapshot (routes/graduating_snapshot.py).
+
+Checks that the graduating filter of bulk-loaded calculations runs no query
+once the snapshot is loaded, that it gives the same per-student results as
+looking every student up, that the /calculation/graduating_students routes
+refresh the snapshot and that other requests reuse it.
+
+Usage: python test_graduating_snapshot.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import build_sample_course, create_report_app, count_statements
+
+
+def test_graduating_snapshot():
+    """Snapshot lookups run no queries and follow the graduating students routes"""
+    print("Testing graduating students snapshot...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_graduating_snapshot.db")
+
+    from models import db, init_db_session, Student, GraduatingStudent
+    from routes.graduating_snapshot import graduating_student_id_set
+    from routes.calculation_routes import (
+        bulk_load_course_data, calculate_individual_student_results, calculate_student_course_scores,
+        filter_courses_by_graduating_students
+    )
+    previous_session = db.session
+
+    try:
+        app = create_report_app(temp_db_path)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            course_ids = [build_sample_course(db, seed=seed, student_count=12, course_code=f'GS{seed}')
+                          for seed in range(3)]
+            db.session.commit()
+            client = app.test_client()
+
+            assert graduating_student_id_set() == frozenset()
+            students = Student.query.filter(Student.course_id.in_(course_ids[:2])).order_by(Student.id).all()
+            graduating = sorted({student.student_id for student in students[::3]})
+            response = client.post('/calculation/graduating_students',
+                                   data={'action': 'add_bulk', 'bulk_student_ids': '\n'.join(graduating)})
+            assert response.status_code == 302
+            assert graduating_student_id_set() == frozenset(graduating)
+            print(f"  ✓ Adding graduating students refreshes the snapshot ({len(graduating)} students)")
+
+            # No query for the graduating flags while calculating
+            bulk_data = bulk_load_course_data(course_ids, 'absolute', include_graduating_only=True)
+            unfiltered_data = bulk_load_course_data(course_ids, 'absolute')
+            all_students = Student.query.filter(Student.course_id.in_(course_ids)).all()
+
+            def calculate():
+                return {student.id: calculate_individual_student_results(student.id, student.course_id, bulk_data,
+                                                                         'absolute', include_graduating_only=True)
+                        for student in all_students}
+
+            filtered, statements = count_statements(db, calculate)
+            assert statements == [], statements
+            for student in all_students:
+                unfiltered = calculate_individual_student_results(student.id, student.course_id, unfiltered_data, 'absolute')
+                expected = unfiltered if student.student_id in graduating else {}
+                assert filtered[student.id] == expected, student.student_id
+            scores, statements = count_statements(db, lambda: calculate_student_course_scores(
+                {all_students[1].course_id: all_students[1].id}, bulk_data, 'absolute', include_graduating_only=True))
+            assert statements == [] and scores == {all_students[1].course_id: {}}
+            print(f"  ✓ Graduating filter of {len(all_students)} students runs no query")
+
+            courses, info = filter_courses_by_graduating_students(
+                [unfiltered_data[course_id]['course'] for course_id in course_ids], True)
+            assert [course.id for course in courses] == course_ids[:2]
+            assert info['courses_with_graduating_students'] == 2 and info['total_graduating_students'] == len(graduating)
+            print("  ✓ Courses filtered by the snapshot")
+
+            # Other requests reuse the snapshot; deleting and clearing refresh it
+            _, statements = count_statements(db, lambda: graduating_student_id_set())
+            assert statements == []
+            removed = GraduatingStudent.query.filter_by(student_id=graduating[0]).first()
+            client.post(f'/calculation/graduating_students/delete/{removed.id}')
+            assert graduating_student_id_set() == frozenset(graduating[1:])
+            client.post('/calculation/graduating_students', data={'action': 'clear_all'})
+            assert graduating_student_id_set() == frozenset()
+            print("  ✓ Deleting and clearing refresh the snapshot")
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_graduating_snapshot()
+    print("All graduating snapshot tests passed")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Shared fixtures of the test scripts.
+
+build_sample_course() fills a temporary database with one course (exams with a
+makeup, weighted Q-CO and CO-PO links, students, scores and attendance) and
+create_report_app() serves the real templates and blueprints on it.
+build_exam() adds a course with a single exam for the score entry tests.
+count_queries() and count_statements() collect the SQL statements executed on
+an engine, for the tests checking that a statement count does not grow with
+the data.
+
+Usage:
+    from test_helpers import build_sample_course, count_queries
+    course_id = build_sample_course(db, seed=1, student_count=20)
+    with count_queries(db.engine) as statements:
+        ...
+"""
+
+import os
+import sys
+import random
+from contextlib import contextmanager
+from decimal import Decimal
+from flask import Flask
+from sqlalchemy import event
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_sample_course(db, seed=42, student_count=40, course_code='CENG101'):
+    """Create one course with exams, outcomes, students, scores and attendance"""
+    from sqlalchemy import text
+    from models import (Course, CourseSettings, Exam, ExamWeight, Question, CourseOutcome,
+                        ProgramOutcome, Student, Score, StudentExamAttendance)
+
+    rng = random.Random(seed)
+
+    course = Course(code=course_code, name='Vectorized Engine Test', semester='Fall 2024', course_weight=1.0)
+    db.session.add(course)
+    db.session.flush()
+    db.session.add(CourseSettings(course_id=course.id, success_rate_method='absolute', relative_success_threshold=60.0))
+
+    midterm = Exam(name='Midterm', max_score=100, course_id=course.id, is_mandatory=True)
+    final = Exam(name='Final', max_score=100, course_id=course.id, is_final=True)
+    quiz = Exam(name='Quiz', max_score=100, course_id=course.id)
+    db.session.add_all([midterm, final, quiz])
+    db.session.flush()
+    makeup = Exam(name='Midterm Makeup', max_score=100, course_id=course.id, is_makeup=True, makeup_for=midterm.id)
+    db.session.add(makeup)
+    db.session.flush()
+
+    db.session.add_all([
+        ExamWeight(exam_id=midterm.id, course_id=course.id, weight=Decimal('0.3')),
+        ExamWeight(exam_id=final.id, course_id=course.id, weight=Decimal('0.5')),
+        ExamWeight(exam_id=quiz.id, course_id=course.id, weight=Decimal('0.2')),
+        ExamWeight(exam_id=makeup.id, course_id=course.id, weight=Decimal('0.3')),
+    ])
+
+    questions = []
+    for exam, count in ((midterm, 4), (final, 5), (quiz, 2), (makeup, 4)):
+        for number in range(1, count + 1):
+            question = Question(number=number, max_score=rng.choice([10, 15, 20, 25]), exam_id=exam.id)
+            db.session.add(question)
+            questions.append(question)
+    db.session.flush()
+
+    outcomes = [CourseOutcome(code=f'CO{i}', description=f'Outcome {i}', course_id=course.id) for i in range(1, 5)]
+    db.session.add_all(outcomes)
+    # Program outcomes are shared between courses built in the same database
+    program_outcomes = []
+    for i in range(1, 4):
+        po = ProgramOutcome.query.filter_by(code=f'VT{i}').first()
+        if not po:
+            po = ProgramOutcome(code=f'VT{i}', description=f'Program outcome {i}')
+            db.session.add(po)
+        program_outcomes.append(po)
+    db.session.flush()
+
+    # Link questions to outcomes with non-uniform weights
+    for question in questions:
+        for outcome in rng.sample(outcomes, rng.choice([1, 2])):
+            db.session.execute(
+                text("INSERT INTO question_course_outcome (question_id, course_outcome_id, relative_weight) VALUES (:q, :co, :w)"),
+                {'q': question.id, 'co': outcome.id, 'w': rng.choice([0.5, 1.0, 2.0])}
+            )
+    for outcome in outcomes:
+        for po in rng.sample(program_outcomes, 2):
+            db.session.execute(
+                text("INSERT INTO course_outcome_program_outcome (course_outcome_id, program_outcome_id, relative_weight) VALUES (:co, :po, :w)"),
+                {'co': outcome.id, 'po': po.id, 'w': rng.choice([1.0, 1.5, 3.0])}
+            )
+
+    for index in range(student_count):
+        student = Student(student_id=f'{course_code}-S{index:04d}', first_name=f'Student{index}', course_id=course.id,
+                          excluded=(index % 17 == 0))
+        db.session.add(student)
+        db.session.flush()
+
+        missed_midterm = index % 5 == 0
+        took_makeup = missed_midterm and index % 10 == 0
+        db.session.add(StudentExamAttendance(student_id=student.id, exam_id=midterm.id, attended=not missed_midterm))
+        db.session.add(StudentExamAttendance(student_id=student.id, exam_id=makeup.id, attended=took_makeup))
+
+        for question in questions:
+            if question.exam_id == midterm.id and missed_midterm:
+                continue
+            if question.exam_id == makeup.id and not took_makeup:
+                continue
+            if rng.random() < 0.1:
+                continue  # Leave some scores missing
+            value = round(rng.uniform(0, float(question.max_score)), 2)
+            db.session.add(Score(score=value, student_id=student.id, question_id=question.id, exam_id=question.exam_id))
+
+    db.session.commit()
+    return course.id
+
+
+def create_report_app(db_path):
+    """Flask app with the real templates and blueprints on a temporary database"""
+    from models import db
+    from routes.course_routes import course_bp
+    from routes.exam_routes import exam_bp
+    from routes.outcome_routes import outcome_bp
+    from routes.student_routes import student_bp
+    from routes.calculation_routes import calculation_bp
+    from routes.utility_routes import utility_bp
+    from routes.question_routes import question_bp
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    app = Flask(__name__, template_folder=os.path.join(root, 'templates'),
+                static_folder=os.path.join(root, 'static'))
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = 'test'
+    db.init_app(app)
+    for blueprint in (course_bp, exam_bp, outcome_bp, student_bp, calculation_bp, utility_bp, question_bp):
+        app.register_blueprint(blueprint)
+    app.add_url_rule('/', 'index', lambda: '')
+    return app
+
+
+def build_exam(db, student_count, question_count=10, code='IMP101'):
+    """One course with an exam of question_count questions (max 10 each) and student_count students"""
+    from models import Course, Exam, Question, Student
+
+    course = Course(code=code, name='Score Import Test', semester='Fall 2024')
+    db.session.add(course)
+    db.session.flush()
+    exam = Exam(name='Midterm', max_score=100, course_id=course.id)
+    db.session.add(exam)
+    db.session.flush()
+    for number in range(1, question_count + 1):
+        db.session.add(Question(number=number, max_score=10, exam_id=exam.id))
+    for index in range(student_count):
+        db.session.add(Student(student_id=f'{code}-{index:04d}', first_name='Student', last_name=str(index),
+                               course_id=course.id))
+    db.session.commit()
+    return exam.id
+
+
+@contextmanager
+def count_queries(engine):
+    """Count the SQL statements executed on the engine inside the block"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def count_statements(db, function):
+    """Run function and return (its result, the SQL statements it executed on db.engine)"""
+    with count_queries(db.engine) as statements:
+        result = function()
+    return result, statements
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script for the background job queue and the /jobs/<id> endpoints.
+
+Runs jobs on the worker threads and checks progress reporting, result
+downloads, failures, cancellation and the recovery of jobs left running by a
+previous run of the application.
+
+Usage: python test_job_queue.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+from flask import Flask
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+
+def write_report_job(job, path, steps):
+    """Report progress for each step and offer the written file"""
+    for step in range(steps):
+        job.check_cancelled()
+        job.update(current=step + 1, message=f'Step {step + 1}/{steps}')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('report')
+    job.set_result(path, 'report.txt')
+
+
+def failing_job(job):
+    raise ValueError('broken input')
+
+
+def blocking_job(job, started, release):
+    """Wait until released, then stop if the job was cancelled"""
+    started.set()
+    release.wait(10)
+    job.check_cancelled()
+
+
+def test_job_lifecycle():
+    """Jobs report progress, results, failures and cancellation through /jobs/<id>"""
+    print("Testing background job queue...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_job_queue.db")
+
+    from models import db, init_db_session
+    previous_session = db.session
+
+    try:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{temp_db_path}'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        app.config['JOB_WORKERS'] = 1
+        db.init_app(app)
+
+        from routes.job_routes import job_bp
+        app.register_blueprint(job_bp)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+
+            from models import BackgroundJob
+            from routes.job_queue import submit_job, wait_for_jobs, recover_interrupted_jobs
+            client = app.test_client()
+
+            # Successful job with a downloadable result
+            report_path = os.path.join(temp_dir, 'report.txt')
+            job_id = submit_job('test_report', write_report_job, report_path, 3, total=3)
+            assert wait_for_jobs(timeout=10)
+            status = client.get(f'/jobs/{job_id}').get_json()
+            assert status['status'] == 'completed' and status['finished']
+            assert status['current'] == 3 and status['total'] == 3
+            assert status['download_url'] == f'/jobs/{job_id}/download'
+            assert 'result_path' not in status
+            download = client.get(status['download_url'])
+            assert download.status_code == 200 and download.data == b'report'
+            assert 'report.txt' in download.headers['Content-Disposition']
+            print("  ✓ Completed job reports progress and serves its result")
+
+            # Failing job
+            job_id = submit_job('test_failure', failing_job)
+            assert wait_for_jobs(timeout=10)
+            status = client.get(f'/jobs/{job_id}').get_json()
+            assert status['status'] == 'failed' and status['error'] == 'broken input'
+            assert status['download_url'] is None
+            assert client.get(f'/jobs/{job_id}/download').status_code == 404
+            print("  ✓ Failed job records its error")
+
+            # Cancel a running job and a job still waiting in the queue
+            started, release = threading.Event(), threading.Event()
+            running_id = submit_job('test_block', blocking_job, started, release)
+            queued_id = submit_job('test_report', write_report_job, report_path, 1)
+            assert started.wait(10)
+            assert client.get(f'/jobs/{running_id}').get_json()['status'] == 'running'
+            assert client.get(f'/jobs/{queued_id}').get_json()['status'] == 'queued'
+            assert client.post(f'/jobs/{running_id}/cancel').get_json()['success']
+            assert client.post(f'/jobs/{queued_id}/cancel').get_json()['success']
+            release.set()
+            assert wait_for_jobs(timeout=10)
+            assert client.get(f'/jobs/{running_id}').get_json()['status'] == 'cancelled'
+            assert client.get(f'/jobs/{queued_id}').get_json()['status'] == 'cancelled'
+            assert client.post(f'/jobs/{running_id}/cancel').status_code == 409
+            print("  ✓ Running and queued jobs can be cancelled")
+
+            # Final states are persisted in the job table
+            statuses = {job.id: job.status for job in BackgroundJob.query.all()}
+            assert statuses[running_id] == 'cancelled' and statuses[job_id] == 'failed'
+
+            # Jobs left running by a previous process are marked interrupted
+            db.session.add(BackgroundJob(id='stale', job_type='test_report', status='running'))
+            db.session.commit()
+            assert recover_interrupted_jobs() == 1
+            assert client.get('/jobs/stale').get_json()['status'] == 'interrupted'
+            assert client.get('/jobs/missing').status_code == 404
+            print("  ✓ Jobs interrupted by a restart are recovered")
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_job_lifecycle()
+    print("All job queue tests passed")
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Test script for the course outcome similarity engine (routes/similarity_engine.py).
+
+Builds course outcomes with near-duplicate descriptions in several courses and
+checks that the blocked, stored scores give the same groups as comparing every
+description with every other one, that changing the threshold re-groups from
+the stored scores without scoring again, that new and removed descriptions
+only touch their own pairs, that parallel scoring gives the same scores and
+that /calculation/cross_course_outcomes renders the groups.
+
+Usage: python test_outcome_similarity.py
+"""
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import create_report_app
+
+WORDS = ("understand apply analyze design evaluate develop implement basic concepts of data structures "
+         "algorithms software systems engineering problems solutions mathematical models communication "
+         "teamwork ethical professional responsibility programming languages databases networks computer "
+         "hardware circuits signals control theory project management written oral skills laboratory "
+         "experiments results interpret modern tools techniques").split()
+
+
+def sample_descriptions(seed=5, count=60):
+    """Sentences with slightly edited copies (replaced, inserted or dropped words, capitalization)"""
+    rng = random.Random(seed)
+    descriptions = []
+    for _ in range(count):
+        base = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14)))
+        descriptions.append(base)
+        for _ in range(rng.randint(0, 2)):
+            words = base.split()
+            edit = rng.random()
+            if edit < 0.4:
+                words[rng.randrange(len(words))] = rng.choice(WORDS)
+            elif edit < 0.7:
+                words.insert(rng.randrange(len(words)), rng.choice(WORDS))
+            else:
+                words = words[:-1]
+            copy = " ".join(words)
+            descriptions.append(copy.capitalize() + "." if rng.random() < 0.3 else copy)
+    rng.shuffle(descriptions)
+    return descriptions
+
+
+def reference_groups(course_outcomes, threshold):
+    """Groups as the page computed them before: every description against every other one"""
+    import jellyfish
+
+    groups = []
+    processed = set()
+    for i, outcome1 in enumerate(course_outcomes):
+        if outcome1.id in processed:
+            continue
+        group = [outcome1.id]
+        processed.add(outcome1.id)
+        for j, outcome2 in enumerate(course_outcomes):
+            if i == j or outcome2.id in processed:
+                continue
+            if jellyfish.jaro_winkler_similarity(outcome1.description.lower(), outcome2.description.lower()) >= threshold:
+                group.append(outcome2.id)
+                processed.add(outcome2.id)
+        if len(group) > 1:
+            groups.append(group)
+        else:
+            processed.remove(outcome1.id)
+    return groups, [o.id for o in course_outcomes if o.id not in processed]
+
+
+def test_outcome_similarity():
+    """Stored, blocked similarity scores give the same groups as the exhaustive comparison"""
+    print("Testing course outcome similarity engine...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_outcome_similarity.db")
+
+    from models import db, init_db_session, Course, CourseOutcome, OutcomeSimilarity
+    from routes import similarity_engine
+    from routes.similarity_engine import group_outcomes_by_similarity, score_pairs, clear_similarity_scores
+    previous_session = db.session
+
+    try:
+        app = create_report_app(temp_db_path)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            courses = [Course(code=f'SIM{i}', name=f'Similarity {i}', semester='Fall 2024') for i in range(4)]
+            db.session.add_all(courses)
+            db.session.flush()
+            for index, description in enumerate(sample_descriptions()):
+                db.session.add(CourseOutcome(code=f'CO{index % 7 + 1}', description=description,
+                                             course_id=courses[index % 4].id))
+            db.session.commit()
+            clear_similarity_scores()
+
+            def check(threshold):
+                outcomes = CourseOutcome.query.order_by(CourseOutcome.id).all()
+                groups, non_grouped, scored = group_outcomes_by_similarity(outcomes, threshold)
+                expected_groups, expected_non_grouped = reference_groups(outcomes, threshold)
+                assert [[o.id for o in group['outcomes']] for group in groups] == expected_groups, threshold
+                assert [o.id for o in non_grouped] == expected_non_grouped
+                assert all(group['representative'] is group['outcomes'][0] for group in groups)
+                return groups, scored
+
+            outcome_count = CourseOutcome.query.count()
+            all_pairs = outcome_count * (outcome_count - 1) // 2
+            groups, scored = check(0.9)
+            assert groups and 0 < scored < all_pairs // 2, (scored, all_pairs)
+            print(f"  ✓ Same groups as the exhaustive comparison at 0.9 ({len(groups)} groups, "
+                  f"{scored} of {all_pairs} pairs scored)")
+
+            for threshold in (0.95, 0.9, 0.92):
+                assert check(threshold)[1] == 0
+            assert check(0.85)[1] > 0 and check(0.8)[1] > 0 and check(0.7)[1] > 0
+            for threshold in (0.75, 0.8, 0.9, 0.7):
+                assert check(threshold)[1] == 0
+            print("  ✓ Threshold changes re-group from stored scores (lower thresholds score only new pairs)")
+
+            # A new description is only scored against the others; removing it drops its scores
+            new_outcome = CourseOutcome(code='CO9', description=CourseOutcome.query.first().description + ' again',
+                                        course_id=courses[0].id)
+            db.session.add(new_outcome)
+            db.session.commit()
+            texts = {similarity_engine.description_key(o.description)[1] for o in CourseOutcome.query}
+            assert 0 < check(0.8)[1] < len(texts)
+            new_hash = similarity_engine.description_key(new_outcome.description)[1]
+            db.session.delete(new_outcome)
+            db.session.commit()
+            assert check(0.9)[1] == 0
+            assert OutcomeSimilarity.query.filter((OutcomeSimilarity.hash_a == new_hash) |
+                                                  (OutcomeSimilarity.hash_b == new_hash)).count() == 0
+            print("  ✓ New descriptions scored against the others, removed ones dropped")
+
+            # Parallel scoring gives the same scores
+            texts = {similarity_engine.description_key(o.description)[1]: o.description.lower()
+                     for o in CourseOutcome.query}
+            pairs = similarity_engine.candidate_pairs(list(texts), texts, 0.0)[:400]
+            previous_minimum = similarity_engine.PARALLEL_MIN_PAIRS
+            previous_chunk = similarity_engine.SCORE_CHUNK_SIZE
+            similarity_engine.PARALLEL_MIN_PAIRS, similarity_engine.SCORE_CHUNK_SIZE = 100, 150
+            try:
+                assert score_pairs(pairs, texts, workers=2) == score_pairs(pairs, texts)
+            finally:
+                similarity_engine.PARALLEL_MIN_PAIRS, similarity_engine.SCORE_CHUNK_SIZE = previous_minimum, previous_chunk
+            print(f"  ✓ Parallel scoring matches ({len(pairs)} pairs)")
+
+            client = app.test_client()
+            response = client.get('/calculation/cross_course_outcomes?similarity=90&show_non_grouped=on&sort=count_desc')
+            assert response.status_code == 200 and groups[0]['representative'].code.encode() in response.data
+            response = client.get('/calculation/cross_course_outcomes?similarity=90&refresh=1')
+            assert response.status_code == 200 and OutcomeSimilarity.query.count() > 0
+            print("  ✓ Cross-course outcomes page renders the groups")
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_outcome_similarity()
+    print("All outcome similarity tests passed")
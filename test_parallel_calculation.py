@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for the multi-process all-courses calculation.
+
+Calculates several sample courses serially and in worker processes
+(CALCULATION_WORKERS > 1) and checks that both paths return identical
+program outcome scores, student counts and contributing POs for the absolute,
+relative and graduating-students calculations.
+
+Usage: python test_parallel_calculation.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from flask import Flask
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import build_sample_course
+
+
+def assert_same_results(serial, parallel):
+    """Both result dictionaries must match course by course"""
+    assert set(serial) == set(parallel)
+    for course_id, expected in serial.items():
+        actual = parallel[course_id]
+        assert actual['is_valid_for_aggregation'] == expected['is_valid_for_aggregation']
+        assert actual['student_count_used'] == expected['student_count_used']
+        assert set(actual['contributing_po_ids']) == set(expected['contributing_po_ids'])
+        assert actual['program_outcome_scores'] == expected['program_outcome_scores'], \
+            f"Course {course_id}: {actual['program_outcome_scores']} != {expected['program_outcome_scores']}"
+        assert actual['course'] is expected['course']
+
+
+def test_parallel_matches_serial():
+    """Worker processes return the same results as the serial path"""
+    print("Testing multi-process course calculation...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_parallel_calculation.db")
+
+    from models import db, init_db_session
+    previous_session = db.session
+
+    try:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{temp_db_path}'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(app)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            course_ids = [build_sample_course(db, seed=seed, student_count=20, course_code=f'PC{seed}')
+                          for seed in range(4)]
+
+            # Every other student of every course graduates
+            from models import Student, GraduatingStudent
+            for student in Student.query.order_by(Student.id).all()[::2]:
+                db.session.add(GraduatingStudent(student_id=student.student_id))
+            db.session.commit()
+
+            from routes.calculation_routes import bulk_load_course_data, calculate_courses_results
+            from routes.parallel_calculation import calculate_courses_in_processes, shutdown_calculation_pool
+
+            try:
+                for method, graduating_only in (('absolute', False), ('relative', False), ('absolute', True)):
+                    bulk_data = bulk_load_course_data(course_ids, method, graduating_only)
+
+                    app.config['CALCULATION_WORKERS'] = 0
+                    serial = calculate_courses_results(course_ids, bulk_data, method, graduating_only)
+
+                    app.config['CALCULATION_WORKERS'] = 2
+                    parallel = calculate_courses_results(course_ids, bulk_data, method, graduating_only)
+
+                    assert_same_results(serial, parallel)
+                    label = f"{method}{' (graduating only)' if graduating_only else ''}"
+                    print(f"  ✓ {label}: {len(parallel)} courses identical to the serial path")
+
+                # The pool itself must succeed (not silently fall back to serial)
+                bulk_data = bulk_load_course_data(course_ids)
+                pool_results = calculate_courses_in_processes(course_ids, bulk_data, 'absolute', 'numpy', workers=2)
+                assert pool_results is not None
+                assert all(result['course'] is None for result in pool_results.values())
+
+                app.config['CALCULATION_ENGINE'] = 'numpy'
+                app.config['CALCULATION_WORKERS'] = 0
+                serial = calculate_courses_results(course_ids, bulk_data, 'absolute')
+                for course_id, result in pool_results.items():
+                    assert result['program_outcome_scores'] == serial[course_id]['program_outcome_scores']
+                print("  ✓ Worker pool runs the numpy engine on ORM-free payloads")
+            finally:
+                shutdown_calculation_pool()
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_parallel_matches_serial()
+    print("All parallel calculation tests passed")
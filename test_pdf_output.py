@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for assembling the student PDF output on disk.
+
+Checks that combine_pdfs_to_files splits the combined PDF into parts of at
+most COMBINED_PDF_PART_SIZE reports (keeping every page in order) and that
+write_zip_from_files packs the reports and the combined parts.
+
+Usage: python test_pdf_output.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import zipfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_report(path, pages):
+    """A small PDF with the given number of blank pages"""
+    from PyPDF2 import PdfWriter
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=100, height=100)
+    with open(path, 'wb') as f:
+        writer.write(f)
+
+
+def page_count(path):
+    from PyPDF2 import PdfReader
+    return len(PdfReader(path).pages)
+
+
+def test_combined_pdf_parts_and_zip():
+    """Combined PDFs are written in bounded parts and zipped from disk"""
+    print("Testing PDF output assembly...")
+
+    from routes.pdf_multithread import combine_pdfs_to_files, write_zip_from_files
+
+    output_dir = tempfile.mkdtemp()
+    try:
+        reports = []
+        for index in range(7):
+            path = os.path.join(output_dir, f'S{index}_Student.pdf')
+            write_report(path, pages=2)
+            reports.append(path)
+
+        # Everything fits into one part: the usual single combined file
+        combined = combine_pdfs_to_files(reports, output_dir, part_size=10)
+        assert [os.path.basename(path) for path in combined] == ['combined_all_students.pdf']
+        assert page_count(combined[0]) == 14
+        os.remove(combined[0])
+        print("  ✓ Single combined PDF with all 14 pages")
+
+        # Three reports per part
+        combined = combine_pdfs_to_files(reports + [os.path.join(output_dir, 'missing.pdf')], output_dir, part_size=3)
+        assert [os.path.basename(path) for path in combined] == [
+            'combined_all_students_part_01.pdf', 'combined_all_students_part_02.pdf', 'combined_all_students_part_03.pdf'
+        ]
+        assert [page_count(path) for path in combined] == [6, 6, 2]
+        print("  ✓ Combined PDF split into parts of at most 3 reports, missing files skipped")
+
+        zip_path = write_zip_from_files(os.path.join(output_dir, 'student_reports.zip'), reports + combined)
+        with zipfile.ZipFile(zip_path) as zip_file:
+            names = zip_file.namelist()
+            assert len(names) == 10
+            assert 'combined_all_students_part_03.pdf' in names
+            with open(reports[0], 'rb') as f:
+                assert zip_file.read('S0_Student.pdf') == f.read()
+        print("  ✓ ZIP contains the reports and the combined parts")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_combined_pdf_parts_and_zip()
+    print("All PDF output tests passed")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Query-count regression test for the course calculation helpers.
+
+The per-student helpers (calculate_student_exam_score_optimized,
+calculate_course_outcome_score_optimized, calculate_program_outcome_score_optimized)
+read exam metadata and outcome weights from a preloaded exam context, so
+computing a course must issue the same number of SQL statements whether it has
+10 or 40 students.
+
+Usage: python test_query_count.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from flask import Flask
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import build_sample_course, count_queries
+
+
+def test_query_count_independent_of_students():
+    """Course calculations issue a fixed number of statements per course"""
+    print("Testing query count of course calculations...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_query_count.db")
+
+    from models import db, init_db_session
+    previous_session = db.session
+
+    try:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{temp_db_path}'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(app)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+
+            # Same seed, same course structure; only the number of students differs
+            small_course_id = build_sample_course(db, seed=7, student_count=10, course_code='QC10')
+            large_course_id = build_sample_course(db, seed=7, student_count=40, course_code='QC40')
+
+            from routes.calculation_routes import (
+                calculate_single_course_results, bulk_load_course_data,
+                calculate_course_results_from_bulk_data_v2_optimized
+            )
+
+            single_counts = {}
+            bulk_counts = {}
+            for course_id in (small_course_id, large_course_id):
+                db.session.remove()
+                with count_queries(db.engine) as statements:
+                    result = calculate_single_course_results(course_id, 'absolute')
+                assert result['is_valid_for_aggregation']
+                single_counts[course_id] = len(statements)
+
+                db.session.remove()
+                with count_queries(db.engine) as statements:
+                    bulk_data = bulk_load_course_data([course_id])
+                bulk_counts[course_id] = len(statements)
+
+                # The calculation itself runs entirely on preloaded data
+                with count_queries(db.engine) as statements:
+                    result = calculate_course_results_from_bulk_data_v2_optimized(course_id, bulk_data, 'absolute')
+                assert result['is_valid_for_aggregation']
+                assert statements == [], f"Bulk calculation issued {len(statements)} queries"
+
+            print(f"  ✓ calculate_single_course_results: {single_counts[small_course_id]} statements "
+                  f"for 10 students, {single_counts[large_course_id]} for 40")
+            print(f"  ✓ bulk_load_course_data: {bulk_counts[small_course_id]} statements "
+                  f"for 10 students, {bulk_counts[large_course_id]} for 40")
+            assert single_counts[small_course_id] == single_counts[large_course_id]
+            assert bulk_counts[small_course_id] == bulk_counts[large_course_id]
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_query_count_independent_of_students()
+    print("All query count tests passed")
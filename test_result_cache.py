@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent course result cache.
+
+Checks that cached results round-trip with their Decimal values, that an
+invalidation (as done by every write route) hides the stale entry, and that a
+result computed against an old data version is never served. A failed
+invalidation is raised so the caller rolls its write back.
+
+Usage: python test_result_cache.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import build_sample_course
+
+
+def test_result_cache_invalidation():
+    """Cached results are served until the course data changes"""
+    print("Testing course result cache...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_result_cache.db")
+
+    from models import db, init_db_session
+    previous_session = db.session
+
+    try:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{temp_db_path}'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(app)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            course_id = build_sample_course(db)
+
+            from routes.calculation_routes import bulk_load_course_data, calculate_course_results_from_bulk_data
+            from routes.result_cache import (
+                get_course_data_versions, get_cached_course_results, store_course_result,
+                invalidate_course_results, invalidate_graduating_course_results
+            )
+
+            # Miss on an empty cache
+            versions = get_course_data_versions([course_id])
+            assert versions == {course_id: 0}
+            assert get_cached_course_results([course_id], 'absolute') == {}
+
+            # Store and hit
+            result = calculate_course_results_from_bulk_data(course_id, bulk_load_course_data([course_id]), 'absolute')
+            store_course_result(course_id, 'absolute', False, result, versions[course_id])
+            db.session.commit()
+
+            cached = get_cached_course_results([course_id], 'absolute')
+            assert course_id in cached
+            assert cached[course_id]['program_outcome_scores'] == result['program_outcome_scores']
+            assert cached[course_id]['student_count_used'] == result['student_count_used']
+            assert cached[course_id]['contributing_po_ids'] == set(result['contributing_po_ids'])
+            assert get_cached_course_results([course_id], 'relative') == {}
+            print("  ✓ Stored result is served back unchanged")
+
+            # A write invalidates the course
+            invalidate_course_results(course_id)
+            db.session.commit()
+            assert get_cached_course_results([course_id], 'absolute') == {}
+            assert get_course_data_versions([course_id]) == {course_id: 1}
+            print("  ✓ Invalidation removes the cached result")
+
+            # A result computed before the write (old version) must not be served
+            store_course_result(course_id, 'absolute', False, result, versions[course_id])
+            db.session.commit()
+            assert get_cached_course_results([course_id], 'absolute') == {}
+            print("  ✓ Results computed against an old data version are ignored")
+
+            # Graduating-filter entries are dropped when the graduating list changes
+            store_course_result(course_id, 'absolute', True, result, 1)
+            store_course_result(course_id, 'absolute', False, result, 1)
+            db.session.commit()
+            invalidate_graduating_course_results()
+            db.session.commit()
+            assert get_cached_course_results([course_id], 'absolute', include_graduating_only=True) == {}
+            assert course_id in get_cached_course_results([course_id], 'absolute')
+            print("  ✓ Graduating list changes only drop graduating-filter entries")
+
+            # A failed invalidation reaches the caller, which rolls its write back
+            from models import Course
+            from routes.result_cache import ensure_result_cache_tables
+            with db.engine.begin() as connection:
+                connection.execute(text("DROP TABLE course_result_cache"))
+            course = db.session.get(Course, course_id)
+            original_name = course.name
+            course.name = 'Renamed'
+            try:
+                invalidate_course_results(course_id)
+                raise AssertionError("invalidation error was swallowed")
+            except OperationalError:
+                db.session.rollback()
+            assert db.session.get(Course, course_id).name == original_name
+            assert ensure_result_cache_tables()
+            print("  ✓ Failed invalidations roll the write back")
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_result_cache_invalidation()
+    print("All result cache tests passed")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for the batched auto-save of the score grid.
+
+Posts batches of cell edits to /student/exam/<id>/scores/auto-save-batch and
+checks the per-cell status (saved, capped, cleared, not attended, unknown
+question/student, invalid value), that repeated edits of a cell are coalesced,
+that a batch costs the same number of SQL statements for 3 or 300 cells, that
+the single-cell endpoint still works and that the scores page posts to the
+batch endpoint.
+
+Usage: python test_score_autosave.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from decimal import Decimal
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import build_exam, create_report_app, count_queries
+
+
+def test_batch_auto_save():
+    """A batch of edits is validated against one snapshot and saved in one transaction"""
+    print("Testing batched score auto-save...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_score_autosave.db")
+
+    from models import db, init_db_session, Score, Student, Question, StudentExamAttendance
+    previous_session = db.session
+
+    try:
+        app = create_report_app(temp_db_path)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            exam_id = build_exam(db, student_count=40, question_count=10)
+            students = [s.id for s in Student.query.order_by(Student.student_id).all()]
+            questions = [q.id for q in Question.query.filter_by(exam_id=exam_id).order_by(Question.number).all()]
+            db.session.add(StudentExamAttendance(student_id=students[1], exam_id=exam_id, attended=False))
+            db.session.commit()
+            client = app.test_client()
+            url = f'/student/exam/{exam_id}/scores/auto-save-batch'
+
+            response = client.post(url, json={'edits': [
+                {'student_id': students[0], 'question_id': questions[0], 'score': 7.5},
+                {'student_id': students[0], 'question_id': questions[1], 'score': 15},
+                {'student_id': students[0], 'question_id': questions[0], 'score': 8},
+                {'student_id': students[1], 'question_id': questions[0], 'score': 5},
+                {'student_id': students[0], 'question_id': 999999, 'score': 5},
+                {'student_id': 999999, 'question_id': questions[0], 'score': 5},
+                {'student_id': students[2], 'question_id': questions[0], 'score': 'abc'},
+                {'question_id': questions[0], 'score': 1},
+            ]})
+            data = response.get_json()
+            assert data['success'] is False and data['saved'] == 3 and data['failed'] == 5
+            statuses = [(result['success'], result.get('score'), result.get('error')) for result in data['results']]
+            assert statuses == [
+                (True, 7.5, None), (True, 10.0, None), (True, 8.0, None),
+                (False, None, 'Student did not attend the exam'),
+                (False, None, 'Question not found'),
+                (False, None, 'Student not found'),
+                (False, None, 'Invalid score value'),
+                (False, None, 'Missing required data'),
+            ], statuses
+            db.session.remove()
+            saved = {(s.student_id, s.question_id): s.score for s in Score.query.filter_by(exam_id=exam_id)}
+            assert saved == {(students[0], questions[0]): Decimal('8'), (students[0], questions[1]): Decimal('10')}
+            print("  ✓ Per-cell status returned, repeated edits of a cell coalesced (last wins)")
+
+            # Clearing a cell deletes the score; exceeding the max is kept when allowed
+            data = client.post(url, json={'allow_exceed_max_score': True, 'edits': [
+                {'student_id': students[0], 'question_id': questions[0], 'score': ''},
+                {'student_id': students[0], 'question_id': questions[1], 'score': 12},
+            ]}).get_json()
+            assert data['success'] and [result['score'] for result in data['results']] == [None, 12.0]
+            db.session.remove()
+            saved = {(s.student_id, s.question_id): s.score for s in Score.query.filter_by(exam_id=exam_id)}
+            assert saved == {(students[0], questions[1]): Decimal('12')}
+            print("  ✓ Empty cells are cleared, scores above max kept when allowed")
+
+            # The single-cell endpoint shares the same validation
+            data = client.post(f'/student/exam/{exam_id}/scores/auto-save',
+                               json={'student_id': students[1], 'question_id': questions[0], 'score': 3}).get_json()
+            assert data == {'success': False, 'error': 'Student did not attend the exam'}
+            data = client.post(f'/student/exam/{exam_id}/scores/auto-save',
+                               json={'student_id': students[3], 'question_id': questions[2], 'score': 3}).get_json()
+            assert data == {'success': True}
+            print("  ✓ Single-cell auto-save still works")
+
+            # A pasted column costs the same as a few cells
+            def count_statements(cell_count):
+                db.session.remove()
+                edits = [{'student_id': students[index % len(students)], 'question_id': questions[index // len(students)],
+                          'score': 5} for index in range(cell_count)]
+                with count_queries(db.engine) as statements:
+                    data = client.post(url, json={'edits': edits}).get_json()
+                # students[1] did not attend
+                assert data['saved'] == cell_count - sum(1 for edit in edits if edit['student_id'] == students[1])
+                return len(statements)
+
+            few = count_statements(3)
+            many = count_statements(300)
+            assert few == many, f"{few} statements for 3 cells, {many} for 300"
+            print(f"  ✓ {many} SQL statements for 3 or 300 cells")
+
+            # The grid posts its edits to the batch endpoint
+            page = client.get(f'/student/exam/{exam_id}/scores').get_data(as_text=True)
+            assert url in page and 'pendingScoreEdits' in page
+            print("  ✓ Scores page uses the batch endpoint")
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_batch_auto_save()
+    print("All score auto-save tests passed")
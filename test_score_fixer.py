@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test script for the set-based invalid score fixer (routes/score_fixer.py).
+
+Builds exams with scores above their question maximum and question maximums
+above the exam maximum, and checks the grouped diagnostics of the confirmation
+page, the proportional rescaling and capping written by the bulk updates, and
+that the log file is written while the fix runs and ends with the summary.
+
+Usage: python test_score_fixer.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from decimal import Decimal
+from types import SimpleNamespace
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import create_report_app, count_queries
+
+
+def add_exam(db, course, name, max_score, question_maxes, student_scores):
+    """Exam with questions and {student: [score per question]}"""
+    from models import Exam, Question, Score
+
+    exam = Exam(name=name, max_score=max_score, course_id=course.id)
+    db.session.add(exam)
+    db.session.flush()
+    questions = []
+    for number, question_max in enumerate(question_maxes, 1):
+        question = Question(text=f'{name} Q{number}', number=number, max_score=question_max, exam_id=exam.id)
+        db.session.add(question)
+        questions.append(question)
+    db.session.flush()
+    for student, scores in student_scores.items():
+        for question, score in zip(questions, scores):
+            db.session.add(Score(score=score, student_id=student.id, question_id=question.id, exam_id=exam.id))
+    return exam
+
+
+def exam_scores(exam_id, student_id):
+    from models import Score, Question
+    return [float(score.score) for score in Score.query.join(Question, Score.question_id == Question.id).filter(
+        Score.exam_id == exam_id, Score.student_id == student_id).order_by(Question.number)]
+
+
+def test_score_fixer():
+    """Diagnostics, rescaling, capping and the streamed log"""
+    print("Testing invalid score fixer...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_score_fixer.db")
+
+    from models import db, init_db_session, Course, Student, Question
+    from routes.score_fixer import score_fixer_bp, cap_student_exam_total
+    previous_session = db.session
+
+    try:
+        app = create_report_app(temp_db_path)
+        app.register_blueprint(score_fixer_bp)
+        app.config['BACKUP_FOLDER'] = os.path.join(temp_dir, 'backups')
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            course = Course(code='FIX101', name='Score Fixing', semester='Fall 2024')
+            db.session.add(course)
+            db.session.flush()
+            first = Student(student_id='F001', first_name='Over', last_name='Scored', course_id=course.id)
+            second = Student(student_id='F002', first_name='Valid', course_id=course.id)
+            db.session.add_all([first, second])
+            db.session.flush()
+            # Exam A: Q1 score above its maximum; exam B: question maximums above the exam maximum
+            exam_a = add_exam(db, course, 'Exam A', 100, [40, 60], {first: [50, 30], second: [20, 30]})
+            exam_b = add_exam(db, course, 'Exam B', 50, [30, 30], {first: [30, 30], second: [10, 10]})
+            exam_c = add_exam(db, course, 'Exam C', 100, [20, 20], {second: [10, 10]})
+            add_exam(db, course, 'Exam D', 100, [50, 50], {second: [40, 40]})
+            db.session.commit()
+            exam_a, exam_b, exam_c = exam_a.id, exam_b.id, exam_c.id
+            first, second = first.id, second.id
+            client = app.test_client()
+
+            with count_queries(db.engine) as statements:
+                response = client.get('/score_fixer/fix_invalid_scores')
+            assert response.status_code == 200
+            assert len(statements) == 1, statements
+            from routes.score_fixer import get_invalid_scores_statistics
+            stats = get_invalid_scores_statistics()
+            assert stats['total_exams'] == 4 and stats['exams_with_invalid_scores'] == 1
+            assert stats['total_invalid_scores'] == 1 and stats['total_students_affected'] == 1
+            assert stats['exams_with_question_score_issues'] == 1 and stats['exams_with_underscored_question_sums'] == 1
+            assert [exam['exam_id'] for exam in stats['exams_details']] == [exam_a, exam_b, exam_c]
+            assert stats['exams_details'][1]['question_scores_sum'] == Decimal('60')
+            print("  ✓ Diagnostics from one grouped query")
+
+            response = client.post('/score_fixer/fix_invalid_scores')
+            assert response.status_code == 302
+            db.session.remove()
+            # Exam A: total 80 redistributed over the question maximums 40/60
+            assert exam_scores(exam_a, first) == [32, 48] and exam_scores(exam_a, second) == [20, 30]
+            # Exam B: question maximums scaled to 25/25, then the student's 60 capped at 50
+            assert [float(q.max_score) for q in Question.query.filter_by(exam_id=exam_b).order_by(Question.number)] == [25, 25]
+            assert exam_scores(exam_b, first) == [25, 25] and exam_scores(exam_b, second) == [10, 10]
+            stats = get_invalid_scores_statistics()
+            assert stats['total_invalid_scores'] == 0 and stats['exams_with_question_score_issues'] == 0
+            print("  ✓ Scores rescaled and question maximums adjusted with bulk updates")
+
+            log_files = os.listdir(app.config['BACKUP_FOLDER'])
+            assert len(log_files) == 1
+            with open(os.path.join(app.config['BACKUP_FOLDER'], log_files[0]), encoding='utf-8') as f:
+                log = f.read()
+            assert 'Found 2 exams that need processing' in log and 'Student: F001 - Over Scored' in log
+            assert 'Q1: 50.00 → 32' in log and log.rstrip().endswith('- Processed exams: 2')
+            print("  ✓ Log written with the summary")
+
+            # Capping redistributes a total above the exam maximum over the questions
+            exam = SimpleNamespace(id=0, max_score=Decimal('50'))
+            questions = [{'id': 1, 'number': 1, 'max_score': Decimal('30')}, {'id': 2, 'number': 2, 'max_score': Decimal('30')}]
+            scores = [{'id': 1, 'question_id': 1, 'score': Decimal('30')}, {'id': 2, 'question_id': 2, 'score': Decimal('30')},
+                      {'id': 3, 'question_id': 99, 'score': Decimal('5')}]
+            lines = []
+            result = cap_student_exam_total({'student_id': 'X'}, exam, questions, scores, lines.append)
+            assert result['capped'] and [score['score'] for score in scores] == [23, 27, 5]
+            assert result['new_total'] == 55 and len(lines) == 2
+            print("  ✓ Totals above the exam maximum are capped")
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_score_fixer()
+    print("All score fixer tests passed")
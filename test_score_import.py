@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test script for the set-based score import.
+
+Imports score sheets through /student/exam/<id>/import-scores and checks that
+scores and attendance are written (inserted, then updated by a second import),
+that the per-line warnings are still reported, that the number of SQL
+statements does not grow with the number of students, and that the startup
+migration adds the unique score key to an existing database (backing it up
+before removing duplicate scores).
+
+Usage: python test_score_import.py
+"""
+
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+from decimal import Decimal
+from flask import Flask
+from sqlalchemy import inspect
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import build_exam, count_queries
+
+
+def create_import_app(db_path):
+    """Flask app with the student blueprint on a temporary database"""
+    from models import db
+    from routes.student_routes import student_bp
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = 'test'
+    db.init_app(app)
+    app.register_blueprint(student_bp)
+    return app
+
+
+def import_sheet(client, exam_id, lines, import_format='simple'):
+    """Post a score sheet and return the flashed messages"""
+    client.post(f'/student/exam/{exam_id}/import-scores', data={
+        'scores_data': '\n'.join(lines),
+        'import_format': import_format,
+        'continue_on_errors': 'on'
+    })
+    with client.session_transaction() as session:
+        return [message for _, message in session.pop('_flashes', [])]
+
+
+def test_bulk_score_import():
+    """Scores and attendance are upserted in a few statements with the same warnings"""
+    print("Testing bulk score import...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_score_import.db")
+
+    from models import db, init_db_session, Score, StudentExamAttendance, Student
+    previous_session = db.session
+
+    try:
+        app = create_import_app(temp_db_path)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            exam_id = build_exam(db, student_count=200)
+            client = app.test_client()
+
+            sheet = [f'IMP101-{index:04d};' + ';'.join(str(index % 9 + 1) for _ in range(10)) for index in range(1, 200)]
+            sheet.append('IMP101-0000;0;0;0;0;0;0;0;0;0;0')   # All zeros: not attended
+            sheet.append('UNKNOWN-1;5;5;5;5;5;5;5;5;5;5')     # Not in the course
+            sheet.append('IMP101-0001;12;3')                  # Duplicate student line, capped + missing scores
+            messages = import_sheet(client, exam_id, sheet)
+
+            assert "Line 201: Student ID UNKNOWN-1 not found in course. Scores for this line skipped." in messages
+            assert "Line 200, Student IMP101-0000: All scores are 0, student will be marked as not attended" in messages
+            assert "Line 202, Student IMP101-0001, Q1: Score 12 capped at max 10.00" in messages
+            assert "Line 202, Student IMP101-0001: 8 missing score(s) set to 0" in messages
+            assert "Scores imported successfully: 1990 added, 0 updated." in messages, messages
+            print("  ✓ Per-line warnings reported, 1990 scores added")
+
+            db.session.remove()
+            assert Score.query.filter_by(exam_id=exam_id).count() == 1990
+            absent = StudentExamAttendance.query.filter_by(exam_id=exam_id, attended=False).all()
+            assert [db.session.get(Student, a.student_id).student_id for a in absent] == ['IMP101-0000']
+            print("  ✓ Students with only zero scores are marked as not attended")
+
+            # A second import updates the changed scores in place
+            messages = import_sheet(client, exam_id, ['IMP101-0005;9;9;9;9;9;9;9;9;9;9', 'IMP101-0000;0;0;0;0;0;0;0;0;0;1'])
+            assert "Scores imported successfully: 10 added, 10 updated." in messages, messages
+            db.session.remove()
+            student = Student.query.filter_by(student_id='IMP101-0005').first()
+            scores = Score.query.filter_by(exam_id=exam_id, student_id=student.id).all()
+            assert len(scores) == 10 and all(score.score == Decimal('9') for score in scores)
+            assert Score.query.filter_by(exam_id=exam_id).count() == 2000
+            print("  ✓ Re-import upserts on (student_id, question_id, exam_id)")
+
+            # The statement count does not depend on the number of students
+            def count_statements(student_count):
+                with count_queries(db.engine) as statements:
+                    lines = [f'IMP101-{index:04d};' + ';'.join('7' for _ in range(10)) for index in range(student_count)]
+                    assert any(m.startswith('Scores imported successfully') for m in import_sheet(client, exam_id, lines))
+                return len(statements)
+
+            few = count_statements(5)
+            many = count_statements(200)
+            assert few == many, f"{few} statements for 5 students, {many} for 200"
+            print(f"  ✓ {many} SQL statements for 5 or 200 students")
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def test_migration_adds_unique_score_key():
+    """Existing databases get the unique score key, keeping the newest duplicate"""
+    print("Testing unique score key migration...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_score_migration.db")
+
+    from models import db, init_db_session, Score, Log
+    from db_migrations import check_and_update_database, score_unique_key_exists
+    previous_session = db.session
+
+    try:
+        app = create_import_app(temp_db_path)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            db.session.remove()
+
+        # Recreate the score table the way older versions did (no unique key) with a duplicate
+        conn = sqlite3.connect(temp_db_path)
+        conn.execute("DROP TABLE score")
+        conn.execute("""
+            CREATE TABLE score (id INTEGER PRIMARY KEY, score NUMERIC(10, 2) NOT NULL, student_id INTEGER NOT NULL,
+                                question_id INTEGER NOT NULL, exam_id INTEGER NOT NULL, created_at DATETIME, updated_at DATETIME)
+        """)
+        conn.executemany("INSERT INTO score (score, student_id, question_id, exam_id) VALUES (?, ?, ?, ?)",
+                         [(1, 1, 1, 1), (2, 1, 2, 1), (3, 1, 1, 1)])
+        conn.commit()
+        conn.close()
+
+        # Without a backup no score is deleted and the key is not added
+        blocked_backup_folder = os.path.join(temp_dir, 'not_a_directory')
+        open(blocked_backup_folder, 'w').close()
+        app.config['BACKUP_FOLDER'] = blocked_backup_folder
+        with app.app_context():
+            assert not check_and_update_database(app)
+            assert Score.query.count() == 3
+            assert not score_unique_key_exists(inspect(db.engine))
+            db.session.remove()
+        print("  ✓ Duplicates kept and key not added when the backup fails")
+
+        app.config['BACKUP_FOLDER'] = os.path.join(temp_dir, 'backups')
+        with app.app_context():
+            assert check_and_update_database(app)
+            assert sorted((s.question_id, float(s.score)) for s in Score.query.all()) == [(1, 3.0), (2, 2.0)]
+            backups = os.listdir(app.config['BACKUP_FOLDER'])
+            assert len(backups) == 1 and backups[0].startswith('pre_score_key_backup_'), backups
+            log = Log.query.filter_by(action='MIGRATION_REMOVE_DUPLICATE_SCORES').one()
+            assert 'Removed 1 duplicate score rows' in log.description and backups[0] in log.description
+            from routes.score_writer import upsert_scores
+            upsert_scores([{'student_id': 1, 'question_id': 1, 'exam_id': 1, 'score': Decimal('4.5')}])
+            db.session.commit()
+            assert sorted((s.question_id, float(s.score)) for s in Score.query.all()) == [(1, 4.5), (2, 2.0)]
+            db.session.remove()
+        print("  ✓ Duplicates removed after a backup and upsert works on a migrated database")
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_bulk_score_import()
+    test_migration_adds_unique_score_key()
+    print("All score import tests passed")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-request SQL profiler (sql_profiler.py).
+
+Profiles /calculation/course/<id> and /calculation/all_courses and checks that
+the query counts match the statements SQLAlchemy executed, that SQL and
+Python time add up to the request time, that only the top-N slowest
+statements are kept, that the ring buffer is bounded, that the runtime toggle
+and the reset of /utility/performance work, that failed statements leave no
+state on the pooled connection and that nothing is recorded while profiling
+is off.
+
+Usage: python test_sql_profiler.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import build_sample_course, create_report_app, count_queries
+
+
+def test_sql_profiler():
+    """Query counts, timings and slowest statements are recorded per endpoint"""
+    print("Testing SQL profiler...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_sql_profiler.db")
+
+    from models import db, init_db_session, Course
+    from sql_profiler import configure_sql_profiler, get_sql_profiler
+    previous_session = db.session
+    previous_setting = os.environ.get('SQL_PROFILING')
+
+    try:
+        app = create_report_app(temp_db_path)
+        app.config['SQL_PROFILER_TOP_N'] = '3'
+        app.config['SQL_PROFILER_HISTORY'] = '4'
+        configure_sql_profiler(app)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            build_sample_course(db, seed=1, student_count=15, course_code='PROF1')
+            course_id = Course.query.filter_by(code='PROF1').first().id
+            db.session.remove()
+            profiler = get_sql_profiler()
+            client = app.test_client()
+
+            # Off by default: nothing is recorded
+            assert profiler.enabled is False
+            assert client.get(f'/calculation/course/{course_id}').status_code == 200
+            assert profiler.recent_requests() == [] and profiler.endpoint_summary() == []
+            print("  ✓ Nothing recorded while profiling is off")
+
+            client.post('/utility/performance', data={'action': 'enable'})
+            assert profiler.enabled is True and os.environ['SQL_PROFILING'] == '1'
+
+            with count_queries(db.engine) as statements:
+                assert client.get(f'/calculation/course/{course_id}').status_code == 200
+            db.session.remove()
+
+            request_profile = profiler.recent_requests()[0]
+            assert request_profile['endpoint'] == 'calculation.course_calculations', request_profile
+            assert request_profile['queries'] == len(statements) > 0
+            assert request_profile['status'] == 200
+            assert abs(request_profile['sql_ms'] + request_profile['python_ms'] - request_profile['total_ms']) < 0.05
+            summary = {item['endpoint']: item for item in profiler.endpoint_summary()}['calculation.course_calculations']
+            durations = [statement['duration_ms'] for statement in summary['slowest']]
+            assert len(durations) == 3 and durations == sorted(durations, reverse=True)
+            print(f"  ✓ /calculation/course: {request_profile['queries']} queries, "
+                  f"{request_profile['sql_ms']} ms SQL, {request_profile['python_ms']} ms Python")
+
+            for _ in range(4):
+                client.get('/calculation/all_courses')
+            assert len(profiler.recent_requests()) == 4
+            endpoints = {item['endpoint']: item for item in profiler.endpoint_summary()}
+            assert endpoints['calculation.all_courses']['requests'] == 4
+            assert len(profiler.slowest_statements()) == 3
+            print("  ✓ Ring buffer bounded, totals kept per endpoint")
+
+            # A failing statement leaves no start time behind on the pooled connection
+            with app.test_request_context(f'/calculation/course/{course_id}'):
+                app.preprocess_request()
+                try:
+                    db.session.execute(text("SELECT * FROM missing_table"))
+                    assert False, 'statement must fail'
+                except OperationalError:
+                    db.session.rollback()
+                connection_info = db.session.connection().info
+                db.session.execute(text("SELECT 1"))
+                assert g._sql_profile['queries'] == 1
+                assert not any(key.startswith('_sql_profiler') for key in connection_info)
+                g.pop('_sql_profile')
+            db.session.remove()
+            print("  ✓ Failed statements leave no profiler state on the connection")
+
+            page = client.get('/utility/performance')
+            html = page.get_data(as_text=True)
+            assert page.status_code == 200 and 'calculation.all_courses' in html and 'Disable Profiling' in html
+
+            client.post('/utility/performance', data={'action': 'reset'})
+            assert profiler.recent_requests() == [] and profiler.endpoint_summary() == []
+            client.post('/utility/performance', data={'action': 'disable'})
+            assert profiler.enabled is False
+            client.get(f'/calculation/course/{course_id}')
+            assert profiler.recent_requests() == []
+            print("  ✓ Dashboard renders, reset and runtime toggle work")
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        if previous_setting is None:
+            os.environ.pop('SQL_PROFILING', None)
+        else:
+            os.environ['SQL_PROFILING'] = previous_setting
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_sql_profiler()
+    print("All SQL profiler tests passed")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test script for the startup schema fingerprint (db_schema_fingerprint.py) and
+the startup profiler (startup_profiler.py).
+
+Checks that a recorded fingerprint lets the next start skip the schema and
+index checks with two queries, that a changed database (dropped index) or
+changed code (new required index) runs them again, that importing the
+application and its blueprints loads none of the heavy optional modules and
+that the startup profile reports its phases.
+
+Usage: python test_startup_fingerprint.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+from sqlalchemy import text
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import create_report_app, count_statements
+
+
+def test_schema_fingerprint():
+    """Schema checks are skipped while neither the code nor the database changed"""
+    print("Testing startup schema fingerprint...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_startup_fingerprint.db")
+
+    from models import db, init_db_session
+    from db_migrations import check_and_update_database
+    from db_index_manager import IndexManager, initialize_index_manager
+    from db_schema_fingerprint import check_schema_fingerprint, record_schema_fingerprint
+    previous_session = db.session
+
+    def run_schema_checks(app):
+        """The startup path of create_app() when the fingerprint does not match"""
+        current, code_signature = check_schema_fingerprint(db)
+        if current:
+            return False
+        db.create_all()
+        assert check_and_update_database(app) and initialize_index_manager(app, db)
+        assert record_schema_fingerprint(db, code_signature)
+        return True
+
+    try:
+        app = create_report_app(temp_db_path)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            assert run_schema_checks(app)
+            (current, _), statements = count_statements(db, lambda: check_schema_fingerprint(db))
+            assert current and len(statements) == 2, statements
+            assert not run_schema_checks(app)
+            print(f"  ✓ Second start skips the schema checks ({len(statements)} statements)")
+
+            # A changed database runs the checks again, which restore the index
+            with db.engine.begin() as connection:
+                connection.execute(text("DROP INDEX idx_course_code_name_search"))
+            assert run_schema_checks(app)
+            with db.engine.connect() as connection:
+                assert connection.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'idx_course_code_name_search'")).first()
+            assert check_schema_fingerprint(db)[0]
+            print("  ✓ Dropped index detected and recreated")
+
+            # Changed code (a new required index) runs the checks again
+            original_define = IndexManager._define_required_indexes
+
+            def define_with_extra_index(self):
+                indexes = original_define(self)
+                indexes['idx_exam_name_date_lookup'] = {'table': 'exam', 'columns': ['name', 'exam_date'],
+                                                   'description': 'Test index'}
+                return indexes
+
+            IndexManager._define_required_indexes = define_with_extra_index
+            try:
+                assert run_schema_checks(app)
+                with db.engine.connect() as connection:
+                    assert connection.execute(text(
+                        "SELECT 1 FROM sqlite_master WHERE name = 'idx_exam_name_date_lookup'")).first()
+                assert check_schema_fingerprint(db)[0]
+            finally:
+                IndexManager._define_required_indexes = original_define
+            assert not check_schema_fingerprint(db)[0]
+            print("  ✓ Code changes run the schema checks again")
+
+            # Databases without the fingerprint table run the checks
+            with db.engine.begin() as connection:
+                connection.execute(text("DROP TABLE schema_fingerprint"))
+            assert not check_schema_fingerprint(db)[0]
+            assert run_schema_checks(app) and check_schema_fingerprint(db)[0]
+            print("  ✓ Missing fingerprint table handled")
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def test_startup_imports():
+    """Importing the application and its blueprints loads no heavy optional module"""
+    print("Testing startup imports...")
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    script = (
+        "import sys, app\n"
+        "import routes.course_routes, routes.exam_routes, routes.outcome_routes, routes.student_routes\n"
+        "import routes.calculation_routes, routes.utility_routes, routes.question_routes, routes.api_routes\n"
+        "import routes.score_fixer, routes.job_routes\n"
+        "from startup_profiler import loaded_heavy_modules\n"
+        "print(','.join(loaded_heavy_modules() + [m for m in ('flask_migrate',) if m in sys.modules]))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=root, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '', result.stdout
+    print("  ✓ numpy, pandas, matplotlib, playwright, PyPDF2, reportlab and flask_migrate not imported")
+
+    from startup_profiler import StartupProfile
+    profile = StartupProfile()
+    with profile.phase('First phase'):
+        pass
+    profile.add('Second phase', 0.25)
+    profile.finish()
+    report = profile.report()
+    assert 'First phase' in report and 'Second phase' in report and 'Total' in report
+    assert 'Heavy modules imported at startup' in report
+    print("  ✓ Startup profile reports its phases")
+
+
+if __name__ == "__main__":
+    test_schema_fingerprint()
+    test_startup_imports()
+    print("All startup fingerprint tests passed")
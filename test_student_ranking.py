@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test script for the SQL-side student ranking (routes/ranking_engine.py).
+
+Checks that /utility/student_ranking/data returns the same ranking as the
+previous Python aggregation over every score row (course counts, exam counts,
+averages, ranking values, ranks and the min_exams filter), that pages, sorting
+and search are done on the server, that the snapshot is reused until a write
+invalidates a course, and that the CSV export uses the same ranking.
+
+Usage: python test_student_ranking.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import build_sample_course, create_report_app, count_queries
+
+
+def reference_ranking(min_exams=0):
+    """The ranking as the previous implementation computed it, from every score row"""
+    from models import db, Student, Course, Score, Question, Exam
+
+    students = {}
+    db_ids = {}
+    for row in db.session.query(Student.id, Student.student_id, Student.first_name, Student.last_name) \
+            .join(Course).filter(Student.excluded == False).order_by(Student.id):
+        if row.student_id not in students:
+            students[row.student_id] = {'student_id': row.student_id,
+                                        'name': f"{row.first_name} {row.last_name}".strip(), 'course_count': 0}
+        students[row.student_id]['course_count'] += 1
+        db_ids.setdefault(row.student_id, []).append(row.id)
+
+    exam_scores = {}
+    for row in db.session.query(Score.student_id, Score.exam_id, Score.score, Question.max_score) \
+            .select_from(Score).join(Question, Score.question_id == Question.id).join(Exam, Question.exam_id == Exam.id):
+        totals = exam_scores.setdefault(row.student_id, {}).setdefault(row.exam_id, [0, 0])
+        totals[0] += float(row.score)
+        totals[1] += float(row.max_score)
+
+    ranking = []
+    for student_id, data in students.items():
+        percentages = [total / maximum * 100 for db_id in db_ids[student_id]
+                       for total, maximum in exam_scores.get(db_id, {}).values() if maximum > 0]
+        average = sum(percentages) / len(percentages) if percentages else 0
+        if len(percentages) < min_exams:
+            continue
+        ranking.append(dict(data, average_score=round(average, 2), exam_count=len(percentages),
+                            ranking_value=round(data['course_count'] + average, 2)))
+    ranking.sort(key=lambda student: student['ranking_value'], reverse=True)
+    for index, student in enumerate(ranking):
+        student['rank'] = index + 1
+    return ranking
+
+
+def test_student_ranking():
+    """The SQL ranking matches the Python aggregation and is served from the snapshot"""
+    print("Testing student ranking...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_student_ranking.db")
+
+    from models import db, init_db_session, Course, Student, Score
+    from routes.ranking_engine import invalidate_ranking_snapshot
+    from routes.result_cache import invalidate_course_results
+    previous_session = db.session
+
+    try:
+        app = create_report_app(temp_db_path)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            invalidate_ranking_snapshot()
+            build_sample_course(db, seed=3, student_count=30, course_code='RANKA')
+            build_sample_course(db, seed=4, student_count=30, course_code='RANKB')
+            # Students enrolled in both courses, one of them excluded from the second
+            course_b = Course.query.filter_by(code='RANKB').first().id
+            db.session.add(Student(student_id='RANKA-S0001', first_name='Twice', last_name='Enrolled', course_id=course_b))
+            db.session.add(Student(student_id='RANKA-S0002', first_name='Excluded', course_id=course_b, excluded=True))
+            db.session.commit()
+            client = app.test_client()
+
+            for min_exams in (0, 3):
+                expected = reference_ranking(min_exams)
+                data = client.get(f'/utility/student_ranking/data?min_exams={min_exams}').get_json()
+                assert data['total'] == len(expected)
+                assert data['students'] == expected, (data['students'][:3], expected[:3])
+            twice = next(s for s in data['students'] if s['student_id'] == 'RANKA-S0001')
+            assert twice['course_count'] == 2 and twice['name'] == 'Student1 None'
+            print(f"  ✓ Same ranking as the Python aggregation ({len(reference_ranking())} students)")
+
+            page = client.get('/utility/student_ranking/data?page=2&per_page=10&sort=rank').get_json()
+            expected = reference_ranking()
+            assert page['students'] == expected[10:20] and page['pages'] == (len(expected) + 9) // 10
+            assert page['statistics']['total_students'] == len(expected)
+            by_score = client.get('/utility/student_ranking/data?page=1&per_page=5&sort=average_score').get_json()
+            assert [s['average_score'] for s in by_score['students']] == \
+                sorted((s['average_score'] for s in expected), reverse=True)[:5]
+            found = client.get('/utility/student_ranking/data?page=1&search=twice').get_json()
+            assert found['total'] == 0  # The name of the first enrollment is shown
+            found = client.get('/utility/student_ranking/data?page=1&search=ranka-s000').get_json()
+            assert found['total'] == len([s for s in expected if s['student_id'].startswith('RANKA-S000')]) > 0
+            assert all(s['student_id'].startswith('RANKA-S000') for s in found['students'])
+            print("  ✓ Server-side pages, sorting and search")
+
+            # The snapshot is reused: only the signature query runs
+            with count_queries(db.engine) as statements:
+                client.get('/utility/student_ranking/data?page=3&sort=name')
+            assert len(statements) == 1 and 'course_data_version' in statements[0], statements
+            print("  ✓ Snapshot reused between requests (1 statement)")
+
+            # A score write invalidates the course and the next request recomputes the ranking
+            student = Student.query.filter_by(student_id='RANKA-S0003').first()
+            score = Score.query.filter_by(student_id=student.id).first()
+            score.score = 0
+            invalidate_course_results(student.course_id)
+            db.session.commit()
+            db.session.remove()
+            data = client.get('/utility/student_ranking/data').get_json()
+            assert data['students'] == reference_ranking()
+            print("  ✓ Snapshot recomputed after a score write")
+
+            response = client.get('/utility/student_ranking/export?min_exams=3')
+            lines = response.get_data(as_text=True).lstrip('﻿').splitlines()
+            expected = reference_ranking(3)
+            assert len(lines) == len(expected) + 2
+            assert lines[2].split(';')[:3] == ['1', expected[0]['student_id'], expected[0]['name']]
+            print("  ✓ Export uses the same ranking")
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_student_ranking()
+    print("All student ranking tests passed")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-process student report rendering used by the PDF job.
+
+Renders every student's all-courses report from build_student_report_contexts
+and checks that the HTML matches /calculation/all_courses?student_id=... served
+over HTTP (absolute, relative and graduating-students views), and that the
+batch issues the same number of SQL statements for 2 or for all students.
+
+Usage: python test_student_report_rendering.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import build_sample_course, count_queries, create_report_app
+
+BASE_URL = 'http://localhost'
+
+
+def page_html(client, student_id, display_method, graduating_only):
+    """The report page as the browser used to load it"""
+    with client.session_transaction() as session:
+        session['display_method'] = display_method
+    url = f'/calculation/all_courses?student_id={student_id}'
+    if graduating_only:
+        url += '&graduating_only=true'
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.get_data(as_text=True)
+
+
+def test_in_process_reports_match_pages():
+    """In-process HTML equals the served page for every student"""
+    print("Testing in-process student report rendering...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_student_report_rendering.db")
+
+    from models import db, init_db_session
+    previous_session = db.session
+
+    try:
+        app = create_report_app(temp_db_path)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            for seed in range(3):
+                build_sample_course(db, seed=seed, student_count=8, course_code=f'RR{seed}')
+
+            # Half of the students of RR1 are also enrolled in RR0 (same student ID), some graduate
+            from models import Student, GraduatingStudent
+            first = Student.query.filter(Student.student_id.like('RR0-%')).order_by(Student.id).all()
+            second = Student.query.filter(Student.student_id.like('RR1-%')).order_by(Student.id).all()
+            for shared, student in zip(first[:4], second[:4]):
+                student.student_id = shared.student_id
+            for student in first[::3]:
+                db.session.add(GraduatingStudent(student_id=student.student_id))
+            db.session.commit()
+
+            from routes.calculation_routes import build_student_report_contexts, render_student_report_html
+            student_ids = sorted({student.student_id for student in Student.query.all()})
+            client = app.test_client()
+            # The first visit of the page adds the default achievement levels
+            assert client.get('/calculation/all_courses').status_code == 200
+
+            for display_method, graduating_only in (('absolute', False), ('relative', False), ('absolute', True)):
+                contexts = build_student_report_contexts(student_ids, include_graduating_only=graduating_only,
+                                                         display_method=display_method)
+                assert list(contexts) == student_ids
+                for student_id in student_ids:
+                    expected = page_html(client, student_id, display_method, graduating_only)
+                    html = render_student_report_html(contexts[student_id], BASE_URL, display_method)
+                    assert f'<base href="{BASE_URL}/">' in html
+                    html = html.replace(f'\n    <base href="{BASE_URL}/">', '', 1)
+                    assert html == expected, \
+                        f"Report of {student_id} differs from the page ({display_method}, graduating={graduating_only})"
+                shared = contexts[first[0].student_id]
+                assert shared['student_info']['total_courses'] == 2
+                label = f"{display_method}{' (graduating only)' if graduating_only else ''}"
+                print(f"  ✓ {label}: {len(student_ids)} reports identical to the served page")
+
+            # The batch cost does not grow with the number of students
+            def count_statements(ids):
+                db.session.remove()
+                with count_queries(db.engine) as statements:
+                    build_student_report_contexts(ids)
+                return len(statements)
+
+            # Two students who together attend all three courses
+            few = count_statements([first[0].student_id, 'RR2-S0000'])
+            everyone = count_statements(student_ids)
+            assert few == everyone, f"{few} statements for 2 students, {everyone} for {len(student_ids)}"
+            print(f"  ✓ {everyone} SQL statements for 2 or {len(student_ids)} students")
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_in_process_reports_match_pages()
+    print("All student report rendering tests passed")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for the vectorized NumPy calculation engine.
+
+Builds a small course in a temporary database (mandatory exam with a makeup,
+weighted Q-CO and CO-PO links, missing scores and absences) and checks that the
+vectorized engine matches the Decimal path through the parity checker.
+
+Usage: python test_vectorized_engine.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from flask import Flask
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+from test_helpers import build_sample_course
+
+
+def test_vectorized_engine_parity():
+    """The vectorized engine must match the Decimal path for both methods"""
+    print("Testing vectorized engine parity...")
+
+    temp_dir = tempfile.mkdtemp()
+    temp_db_path = os.path.join(temp_dir, "test_vectorized.db")
+
+    from models import db, init_db_session
+    previous_session = db.session
+
+    try:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{temp_db_path}'
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        app.config['CALCULATION_ENGINE'] = 'parity'
+        db.init_app(app)
+
+        with app.app_context():
+            init_db_session(app)
+            db.create_all()
+            course_id = build_sample_course(db)
+
+            from routes.calculation_routes import (
+                bulk_load_course_data, check_vectorized_engine_parity, calculate_course_results_with_engine
+            )
+            from routes.vectorized_calculation import calculate_course_results_vectorized
+
+            bulk_data = bulk_load_course_data([course_id])
+
+            for method in ('absolute', 'relative'):
+                mismatches = check_vectorized_engine_parity(course_id, bulk_data, method)
+                for mismatch in mismatches:
+                    print(f"  ✗ {method}: {mismatch}")
+                assert not mismatches, f"{len(mismatches)} parity mismatches for {method} method"
+
+                result = calculate_course_results_vectorized(course_id, bulk_data, method)
+                assert result['is_valid_for_aggregation']
+                assert result['program_outcome_scores']
+                print(f"  ✓ {method}: {len(result['program_outcome_scores'])} POs, "
+                      f"{result['student_count_used']} students match the Decimal path")
+
+            # Parity mode returns the Decimal results with an empty mismatch list
+            with app.test_request_context():
+                result = calculate_course_results_with_engine(course_id, bulk_data, 'absolute')
+                assert result['parity_mismatches'] == []
+
+            db.session.remove()
+    finally:
+        db.session = previous_session
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_vectorized_engine_parity()
+    print("All vectorized engine tests passed")